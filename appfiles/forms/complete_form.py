@@ -98,16 +98,17 @@ class CompletionForm(ctk.CTkToplevel):
             taskcomp_datalist.append(comp_data)
         if len(taskcomp_datalist) != len(wo.task_list):
             return
-        for i, task in enumerate(wo.task_list):
-            task.complete(taskcomp_datalist[i])
-        wo.log_comment(self.newcomments)
-        wo_comp_data: WorkorderCompletionData = WorkorderCompletionData(
-            string_to_date(self.startdateentry.get()),
-            string_to_date(self.enddateentry.get()),
-            string_to_date(self.restoredateentry.get()),
-            self.repairtimeentry.get())
-        if not wo.complete(wo_comp_data):
-            return
+        with wo.batch():
+            for i, data in enumerate(taskcomp_datalist):
+                wo.complete_task(i, data)
+            wo.log_comment(self.newcomments)
+            wo_comp_data: WorkorderCompletionData = WorkorderCompletionData(
+                string_to_date(self.startdateentry.get()),
+                string_to_date(self.enddateentry.get()),
+                string_to_date(self.restoredateentry.get()),
+                self.repairtimeentry.get())
+            if not wo.complete(wo_comp_data):
+                return
         self.destroy()
 
 
@@ -1,11 +1,30 @@
 """This file defines the MainWindow class which serves as the application's primary window."""
 
+import ntpath
+import os
+from queue import Empty, SimpleQueue
+import sqlite3
+from threading import Thread
+from tkinter import Event, messagebox
+
 import customtkinter as ctk #type: ignore
 
 from appfiles.forms.config_frame import ConfigurationFrame
 from appfiles.forms.status_frame import TWOISStatusFrame
 from appfiles.forms.recur_frame import RecurringTaskFrame
+from appfiles.forms.template_form import TemplateForm
 from appfiles.forms.workorder_form import WorkOrderForm, WorkOrderFormMode
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.library.recurring_scheduler import ScheduleResult, recurring_scheduler
+from appfiles.library.recurring_store import recurring_store
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import workorder_index
+from appfiles.utils.appglobals import COMPLETE_DIR, IN_PROGRESS_DIR, TEMPLATE_DIR
+from appfiles.utils.bulk_import import ImportReport, import_approved_workorders
+from appfiles.utils.twois_codec import TwoisFormatError
+from appfiles.utils.file_transaction import recover
+from appfiles.utils.watcher import DirectoryWatcher, WatchEvent
+from appfiles.utils.workorder import approved_file_status
 
 WIN_W: int = 1100
 WIN_H: int = 600
@@ -13,6 +32,9 @@ STAT_TAB: str = "TWOIS Status"
 RECUR_TAB: str = "Recurring Tasks"
 CFG_TAB: str = "Configuration"
 BTN_W: int = 175
+WATCH_POLL_MS: int = 250
+SCHEDULE_POLL_MS: int = 60 * 60 * 1000
+REPORT_LINES: int = 15
 
 class MainWindow(ctk.CTk):
     """Class which defines the primary window of the TWOIS Management App. It only houses more
@@ -20,6 +42,21 @@ class MainWindow(ctk.CTk):
     def __init__(self):
         super().__init__()
 
+        # finish any save that was interrupted before the workorders are listed
+        try:
+            recover([IN_PROGRESS_DIR, TEMPLATE_DIR, COMPLETE_DIR])
+        except OSError as ex:
+            messagebox.showerror("Recovery Error",
+                                 f"An interrupted save could not be finished:\n{ex}")
+
+        # the recurring tasks are scheduled before their tab lists them
+        try:
+            for task in recurring_store.load_all():
+                recurring_scheduler.add(task)
+        except sqlite3.Error as ex:
+            messagebox.showerror("Recurring Tasks Error",
+                                 f"The recurring tasks could not be loaded:\n{ex}")
+
         # configure window
         self.title("TWOIS Manager")
         self.geometry(f"{WIN_W}x{WIN_H}")
@@ -51,9 +88,15 @@ class MainWindow(ctk.CTk):
         self.recurring_tasks.grid(row=0, column=0, rowspan=4, padx=20, pady=10, sticky="nsew")
         self.config_frame.grid(row=0, column=0, rowspan=4, padx=20, pady=10, sticky="nsew")
 
-
-    def __sidebar_button_event(self): ##BCOBB: DELETE THIS METHOD
-        print("BCOBB: FINISH YOUR FUCKING JOB BRO")
+        self.watcher: DirectoryWatcher = DirectoryWatcher([IN_PROGRESS_DIR, COMPLETE_DIR,
+                                                           TEMPLATE_DIR],
+                                                          restat=[IN_PROGRESS_DIR])
+        self.watcher.start()
+        self.after(WATCH_POLL_MS, self.__process_watch_events)
+        self.__imports: SimpleQueue = SimpleQueue()
+        self.__importing: bool = False
+        self.__schedules: SimpleQueue = SimpleQueue()
+        self.after_idle(self.__run_recurring_scheduler)
 
 
     def launch_new_workorder_window(self):
@@ -66,13 +109,188 @@ class MainWindow(ctk.CTk):
         WorkOrderForm(self, WorkOrderFormMode.TEMPLATE)
 
 
+    def launch_template_window(self) -> None:
+        """Method is used to launch the form which makes workorders from a template."""
+        form: TemplateForm = TemplateForm(self)
+        form.bind("<Destroy>", self.__template_form_closed)
+
+
+    def __template_form_closed(self, e: Event) -> None:
+        if isinstance(e.widget, TemplateForm):
+            self.twois_status.update_contents()
+
+
+    def launch_bulk_import(self) -> None:
+        """Asks for a folder of approved TWOIS spreadsheets, then approves the pending
+        workorder that each one belongs to on a worker thread. The report of the files that
+        could not be approved is shown once the import has finished."""
+        if self.__importing:
+            messagebox.showinfo("Import Running", "A bulk import is already running.")
+            return
+        desktop = os.path.join(os.path.join(os.environ['USERPROFILE']), 'Desktop')
+        source: str = ctk.filedialog.askdirectory(initialdir=desktop,
+                                                  title="Select a folder of approved TWOIS files")
+        if not source:
+            return
+        self.__importing = True
+        Thread(target=self.__import_files, args=(source, self.__imports), daemon=True).start()
+        self.after(WATCH_POLL_MS, self.__process_import_result)
+
+
+    @staticmethod
+    def __import_files(source: str, queue: SimpleQueue) -> None:
+        """The body of the import thread. Puts the ImportReport on the queue, or the error
+        that stopped the import."""
+        result: ImportReport | BaseException = RuntimeError("The import stopped unexpectedly")
+        try:
+            result = import_approved_workorders(source)
+        except (OSError, ValueError, TwoisFormatError, sqlite3.Error) as ex:
+            result = ex
+        finally:
+            queue.put(result)
+
+
+    def __process_import_result(self) -> None:
+        """Waits on the Tk thread for the import thread to finish, then shows its report."""
+        try:
+            result: ImportReport | BaseException = self.__imports.get_nowait()
+        except Empty:
+            self.after(WATCH_POLL_MS, self.__process_import_result)
+            return
+        self.__importing = False
+        if isinstance(result, BaseException):
+            messagebox.showerror("Import Error", f"The files could not be imported:\n{result}")
+            return
+        self.twois_status.update_contents()
+        messagebox.showinfo("Import Complete", self.__format_import_report(result))
+
+
+    @staticmethod
+    def __format_import_report(report: ImportReport) -> str:
+        lines: list[str] = [f"Approved {len(report.approved)} workorder(s)."]
+        if report.unmatched:
+            lines.append(f"\n{len(report.unmatched)} file(s) did not match a pending workorder:")
+            lines.extend(report.unmatched[:REPORT_LINES])
+        if report.invalid:
+            lines.append(f"\n{len(report.invalid)} file(s) are not approved TWOIS files:")
+            lines.extend(f"{name} ({status.name})" for name, status in
+                         report.invalid[:REPORT_LINES])
+        if report.failed:
+            lines.append(f"\n{len(report.failed)} file(s) could not be approved:")
+            lines.extend(f"{name}: {reason}" for name, reason in report.failed[:REPORT_LINES])
+        return "\n".join(lines)
+
+
     def refresh_app(self) -> None:
         """A method which will forget all of the tabularized windows' placement and reinitialize
-        them with new information."""
-        self.twois_status.refresh_contents()
+        them with new information. The workorder index is rebuilt from disk first, in case any
+        files were changed outside of the app. The rebuild runs on the status list's loader
+        thread."""
+        self.twois_status.rebuild_contents()
         # BCOBB: The other two frames should also refresh
 
 
+    def __process_watch_events(self) -> None:
+        """Drains the directory watcher's queue on the Tk thread. Approved TWOIS spreadsheets
+        that show up in the in_progress directory approve the pending workorder they match,
+        changes to in_progress are applied to the status list row by row, and changes to the
+        complete or templates directories reload the recurring tasks."""
+        status_changed: bool = False
+        recurring_changed: bool = False
+        approvals: list[str] = []
+        while True:
+            try:
+                event: WatchEvent = self.watcher.events.get_nowait()
+            except Empty:
+                break
+            if event.directory == IN_PROGRESS_DIR:
+                status_changed = True
+                for name in sorted(event.added | event.modified):
+                    approval: str | None = self.__approve_dropped_file(
+                        f"{IN_PROGRESS_DIR}\\{name}")
+                    if approval is not None:
+                        approvals.append(approval)
+            else:
+                recurring_changed = True
+        if status_changed:
+            self.twois_status.update_contents()
+        if recurring_changed:
+            self.recurring_tasks.refresh_contents()
+        self.after(WATCH_POLL_MS, self.__process_watch_events)
+        if approvals:
+            messagebox.showinfo("Approved TWOIS Files Found", "\n".join(approvals))
+
+
+    def __run_recurring_scheduler(self) -> None:
+        """Creates the pending workorders for the recurring tasks that fall due within the
+        lead time on a worker thread, and waits for it on the Tk thread. The check runs again
+        every SCHEDULE_POLL_MS, so that a window left open over midnight keeps creating them."""
+        Thread(target=self.__schedule_recurring, args=(self.__schedules,), daemon=True).start()
+        self.after(WATCH_POLL_MS, self.__process_schedule_result)
+
+
+    @staticmethod
+    def __schedule_recurring(queue: SimpleQueue) -> None:
+        """The body of the scheduler thread. Every workorder is saved inside one index batch,
+        then the tasks that changed are stored. Puts the ScheduleResult on the queue, or the
+        error that stopped it."""
+        result: ScheduleResult | BaseException = RuntimeError("The scheduler stopped unexpectedly")
+        try:
+            with workorder_index.batch():
+                result = recurring_scheduler.run()
+            recurring_store.save_all({id(task): task for task in
+                                      [s.task for s in result.created] + result.failed}.values())
+        except (OSError, ValueError, TwoisFormatError, sqlite3.Error) as ex:
+            result = ex
+        finally:
+            queue.put(result)
+
+
+    def __process_schedule_result(self) -> None:
+        """Waits on the Tk thread for the scheduler thread to finish, schedules the next
+        check, and then refreshes the lists or shows what went wrong."""
+        try:
+            result: ScheduleResult | BaseException = self.__schedules.get_nowait()
+        except Empty:
+            self.after(WATCH_POLL_MS, self.__process_schedule_result)
+            return
+        self.after(SCHEDULE_POLL_MS, self.__run_recurring_scheduler)
+        if isinstance(result, BaseException):
+            messagebox.showerror("Recurring Task Error",
+                                 f"Could not create the recurring workorders:\n{result}")
+            return
+        if result.created:
+            self.twois_status.update_contents()
+            self.recurring_tasks.refresh_contents()
+        if result.failed:
+            messagebox.showerror("Recurring Task Error",
+                                 "Could not load the templates of these recurring tasks:\n"
+                                 + "\n".join(f"{task}: {task.template_file}"
+                                             for task in result.failed[:REPORT_LINES]))
+
+
+    @staticmethod
+    def __approve_dropped_file(filepath: str) -> str | None:
+        """Approves the pending workorder that an approved spreadsheet dropped into the
+        in_progress directory belongs to. The workorder's files are replaced and the dropped
+        spreadsheet is removed in one transaction. Returns a line telling the user what was
+        approved, or what went wrong, or None if the file is not the approved spreadsheet of a
+        pending workorder."""
+        name: str = ntpath.basename(filepath)
+        try:
+            if approved_file_status(filepath) != ExcelFileStatus.IS_VALID:
+                return None
+            wo: WorkOrder | None = workorder_index.find_pending_match(filepath)
+            if wo is None:
+                return None
+            pending: str = f"{wo.get_full_workorder_number()} ({wo.title})"
+            if wo.approve(filepath, remove_source=True) != ExcelFileStatus.IS_VALID:
+                return None
+        except (OSError, ValueError, TwoisFormatError, sqlite3.Error) as ex:
+            return f"{name} could not be approved: {ex}"
+        return f"{pending} was approved from {name}."
+
+
     def __populate_sidebar_frame(self) -> ctk.CTkFrame:
         resp: ctk.CTkFrame = ctk.CTkFrame(self, width=140, corner_radius=0)
         resp.grid_rowconfigure((1,3), weight=1)
@@ -88,13 +306,12 @@ class MainWindow(ctk.CTk):
                                          command=self.launch_new_workorder_template_window,
                                          text="Create TWOIS Template", width=BTN_W)
 
-        # BCOBB: Could I leverage the "Approve Workorder" method used elsewhere?
         load_wo_btn = ctk.CTkButton(resp,
-                                       command=self.__sidebar_button_event,
+                                       command=self.launch_bulk_import,
                                        text="Load Approved TWOIS", width=BTN_W)
 
         load_wo_template_btn = ctk.CTkButton(resp,
-                                                command=self.__sidebar_button_event,
+                                                command=self.launch_template_window,
                                                 text="Load TWOIS from Template", width=BTN_W)
 
         refresh_btn = ctk.CTkButton(resp,
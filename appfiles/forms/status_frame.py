@@ -1,19 +1,33 @@
 """Yo!"""
 
+from array import array
+from bisect import bisect_left
 from functools import partial
-import os
-import random as rng
 from datetime import date
+import os
+from queue import Empty, SimpleQueue
+import sqlite3
+from threading import Thread
 from tkinter import Event, messagebox
 import customtkinter as ctk #type: ignore
 
 from appfiles.forms.complete_form import CompletionForm
 from appfiles.forms.workorder_form import WorkOrderForm, WorkOrderFormMode
-from appfiles.library.logcomment import LogComment
-from appfiles.widgets.twois_detail import TWOISDetailButton, TWOISDetailFrame, TWOISLogCommentFrame
+from appfiles.widgets.facet_filter import TWOISFacetFrame
+from appfiles.widgets.twois_detail import TWOISDetailFrame, TWOISDetailList, TWOISLogCommentFrame
+from appfiles.library.archive_index import archive_index
 from appfiles.library.workorder import WorkOrder
-from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder_facets import FacetView
+from appfiles.library.workorder_index import IndexChanges, IndexEntry, workorder_index
+from appfiles.library.workorder_loader import WorkOrderLoader
+from appfiles.library.workorder_search import SearchResults, search_workorders
 from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.utils.utils import date_to_string
+
+POLL_MS: int = 50
+BUTTONS_PER_POLL: int = 10
+SEARCH_DELAY_MS: int = 250
+COMPLETED_LINES: int = 5
 
 class TWOISStatusFrame(ctk.CTkFrame):
     """Yo!"""
@@ -22,33 +36,73 @@ class TWOISStatusFrame(ctk.CTkFrame):
 
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
-        self.button_scrframe: ctk.CTkScrollableFrame = ctk.CTkScrollableFrame(self, width=360)
-        self.button_scrframe.grid(row=0, column=0, padx=10, pady=10, sticky='nsew')
+        self.twois_list: TWOISDetailList = TWOISDetailList(self, self.__show_workorder_details)
+        self.twois_list.grid(row=0, column=0, padx=10, pady=10, sticky='nsew')
+        self.facets: TWOISFacetFrame = TWOISFacetFrame(self, self.__refresh_list)
+        self.facets.grid(row=1, column=0, padx=10, pady=(0, 10), sticky='ew')
+        self.search_entry: ctk.CTkEntry = ctk.CTkEntry(self, width=360,
+                                                       placeholder_text="Search workorders")
+        self.search_entry.grid(row=2, column=0, padx=10, pady=(0, 10), sticky='ew')
+        self.search_entry.bind("<KeyRelease>", self.__schedule_search)
+        self.search_results: ctk.CTkLabel = ctk.CTkLabel(self, text="", justify='left',
+                                                         wraplength=360)
+        self.progress_bar: ctk.CTkProgressBar = ctk.CTkProgressBar(self, width=360)
         self.detail_frame: ctk.CTkFrame = TWOISDetailFrame(self, WorkOrder())
 
-        self.workorders: list[WorkOrder] = self.load_workorders()
-        self.buttons: list[TWOISDetailButton] = self.__create_twois_buttons()
+        self.workorders: list[WorkOrder] = []
         self.active_workorder: WorkOrder = WorkOrder()
+        self.__keys: list[tuple[str, str, str]] = []
+        self.__entries: dict[str, IndexEntry] = {}
+        self.__version: int = 0
+        self.__loader: WorkOrderLoader = WorkOrderLoader(workorder_index)
+        self.__archive_results: SimpleQueue = SimpleQueue()
+        self.__load_total: int = 0
+        self.__query: str = ""
+        self.__search_rows: list[int] = []
+        self.__search_job: str | None = None
+        self.__view: FacetView | None = None
         self.__hide_workorder_details()
+        self.__start_loading()
+        self.__refresh_archive()
 
 
     def refresh_contents(self) -> None:
-        """A method which clears out all of the workorder buttons, reloads the workorders,
-        and then repopulates the buttons."""
+        """A method which brings the workorder list up to date with the workorder index. Only
+        the rows whose .twois file was added, removed or rewritten since the last refresh are
+        touched, so refreshing after an edit costs the same however long the list is. If the
+        initial load is still running, it is started over instead."""
+        self.__hide_workorder_details()
+        self.active_workorder = WorkOrder()
+        if self.__loader.is_loading():
+            self.__clear_rows()
+            self.__start_loading()
+            return
+        self.__apply_changes(workorder_index.changes_since(self.__version))
+
+
+    def rebuild_contents(self) -> None:
+        """A method which rebuilds the workorder index from the files on disk, in case any of
+        them were changed outside of the app, and then loads the list again. The rebuild reads
+        every .twois file, so it runs on the loader thread rather than the Tk thread."""
         self.__hide_workorder_details()
-        for btn in self.buttons:
-            btn.grid_forget()
-        self.buttons.clear()
-        self.workorders = self.load_workorders()
-        self.buttons = self.__create_twois_buttons()
         self.active_workorder = WorkOrder()
+        self.__clear_rows()
+        self.__start_loading(rebuild=True)
+
+
+    def update_contents(self) -> None:
+        """A method which applies any changes to the workorder index to the list, without
+        touching the details pane. While the initial load is running this does nothing, since
+        the load applies any changes made during it once it finishes."""
+        if not self.__loader.is_loading():
+            self.__apply_changes(workorder_index.changes_since(self.__version))
 
 
     def load_workorders(self) -> list[WorkOrder]:
-        """A method which looks in the 'in progress' directory and loads all of the serialized
-        WorkOrder files stores in .twois files into memory and returns them as a single list."""
-        #BCOBB: Implement--make it load from the real workorders directory
-        return self.__DELETE_THIS__generate_fake_workorders()
+        """A method which loads all of the serialized WorkOrder files tracked by the workorder
+        index for the 'in progress' directory and returns them as a single list, sorted by due
+        date."""
+        return workorder_index.load_workorders()
 
 
     def complete_workorder(self) -> None:
@@ -119,6 +173,134 @@ class TWOISStatusFrame(ctk.CTkFrame):
     def __refresh_contents_event_handler(self, e: Event):
         if isinstance(e.widget, WorkOrderForm) or isinstance(e.widget, CompletionForm):
             self.refresh_contents()
+        if isinstance(e.widget, CompletionForm):
+            self.__refresh_archive()
+
+
+    def __refresh_archive(self) -> None:
+        """Brings the index of completed workorders up to date on a worker thread, so that
+        the search box finds them. The thread's result is drained on the Tk thread."""
+        Thread(target=self.__index_archive, args=(self.__archive_results,), daemon=True).start()
+        self.after(POLL_MS, self.__poll_archive)
+
+
+    @staticmethod
+    def __index_archive(results: SimpleQueue) -> None:
+        """The body of the archive thread. Puts None on the queue once the archive index is up
+        to date, or the error that stopped it."""
+        result: BaseException | None = RuntimeError("The refresh stopped unexpectedly")
+        try:
+            archive_index.refresh()
+            result = None
+        except (OSError, ValueError, sqlite3.Error) as ex:
+            result = ex
+        finally:
+            results.put(result)
+
+
+    def __poll_archive(self) -> None:
+        """Waits on the Tk thread for an archive refresh to finish, and shows its error if it
+        failed."""
+        try:
+            result: BaseException | None = self.__archive_results.get_nowait()
+        except Empty:
+            self.after(POLL_MS, self.__poll_archive)
+            return
+        if result is not None:
+            messagebox.showerror("Archive Index Error",
+                                 f"Completed workorders could not be indexed:\n{result}")
+
+
+    def __schedule_search(self, *args) -> None: #pylint: disable=unused-argument
+        """Runs the search once typing has paused for SEARCH_DELAY_MS."""
+        if self.__search_job is not None:
+            self.after_cancel(self.__search_job)
+        self.__search_job = self.after(SEARCH_DELAY_MS, self.__run_search)
+
+
+    def __run_search(self) -> None:
+        """Shows only the open workorders that match the search box, best match first, and
+        lists the best matching completed ones below it. An empty box shows every workorder."""
+        self.__search_job = None
+        self.__query = self.search_entry.get().strip()
+        self.__search_rows = []
+        if not self.__query:
+            self.search_results.grid_forget()
+            self.__refresh_list()
+            return
+        try:
+            results: SearchResults = search_workorders(self.__query)
+        except sqlite3.Error:
+            results = SearchResults([], [])
+
+        for hit in results.open:
+            pos: int | None = self.__position_of(hit.key)
+            if pos is not None:
+                self.__search_rows.append(pos)
+        self.__refresh_list()
+
+        completed: list[str] = []
+        for hit in results.completed:
+            when: str = "" if hit.date is None else f" ({date_to_string(hit.date)})"
+            completed.append(f"{hit.full_number}: {hit.title}{when}")
+
+        if completed:
+            lines: list[str] = completed[:COMPLETED_LINES]
+            if len(completed) > COMPLETED_LINES:
+                lines.append(f"...and {len(completed) - COMPLETED_LINES} more")
+            self.search_results.configure(text="Completed matches:\n" + "\n".join(lines))
+            self.search_results.grid(row=4, column=0, padx=10, pady=(0, 10), sticky='ew')
+        else:
+            self.search_results.grid_forget()
+
+
+    def __position_of(self, twois_name: str) -> int | None:
+        """Returns the position in self.workorders of the workorder whose .twois file has the
+        given name, if it is loaded."""
+        entry: IndexEntry | None = self.__entries.get(twois_name)
+        if entry is None:
+            return None
+        return bisect_left(self.__keys, self.__sort_key(entry))
+
+
+    def __facet_view(self) -> FacetView:
+        """Returns the facet view of the loaded workorders, building it again if they have
+        changed since it was built or if the day has rolled over."""
+        if self.__view is None or self.__view.today != date.today():
+            self.__view = FacetView(self.workorders)
+        return self.__view
+
+
+    def __shows_every_row(self) -> bool:
+        """Returns true if the list holds every loaded workorder in due date order, in which
+        case rows are added and removed in place."""
+        return not self.__query and not self.facets.is_filtering()
+
+
+    def __refresh_list(self) -> None:
+        """Fills the list with the workorders that pass the facet filters, in the chosen order,
+        or in order of relevance if a search is running, and updates the facet counts."""
+        view: FacetView = self.__facet_view()
+        selection = self.facets.selection()
+        rows: list[int] | array
+        if self.__query:
+            rows = view.keep(self.__search_rows, selection)
+        else:
+            rows = view.rows(selection, self.facets.sort_key())
+        self.twois_list.set_workorders([self.workorders[row] for row in rows])
+        self.facets.set_counts(view.counts(selection,
+                                           self.__search_rows if self.__query else None))
+
+
+    def __update_list(self) -> None:
+        """Brings the list and the facet counts up to date after the loaded workorders have
+        changed."""
+        if self.__query:
+            self.__run_search()
+        elif self.facets.is_filtering():
+            self.__refresh_list()
+        else:
+            self.facets.set_counts(self.__facet_view().counts())
 
 
 
@@ -160,43 +342,89 @@ class TWOISStatusFrame(ctk.CTkFrame):
             command=partial(self.__show_workorder_details, self.active_workorder))
 
 
-    def __create_twois_buttons(self) -> list[TWOISDetailButton]:
-        for i, wo in enumerate(self.workorders):
-            resp: list[TWOISDetailButton] = []
-            btn: TWOISDetailButton = TWOISDetailButton(self.button_scrframe, wo)
-            btn.configure(command=partial(self.__show_workorder_details, wo))
-            # btn.bind("<Button-1>", self.__show_workorder_details_getlambda(wo))
-            btn.grid(row=i, column=0, padx=20, pady=10, sticky="ew")
-            resp.append(btn)
-        return resp
-
-
-    def __DELETE_THIS__generate_fake_workorders(self) -> list[WorkOrder]: #pylint: disable=invalid-name
-        resp: list[WorkOrder] = []
-        desc_str: str = ""
-        with open('lorem_ipsum.txt', mode='r', encoding='utf-8') as file:
-            desc_str = file.read()
-
-        for i in range(1, 11):
-            month: int = date.today().month + rng.randint(-1,2)
-            ddd = date(2024,month,(rng.randint(1,28)))
-            wo: WorkOrder = WorkOrder(
-                wo_number=f"{543000 + i}",
-                title=f"{str(i).rjust(2, '0')}-Day Antivirus (AV) Update{'t'*(i-1)*5}",
-                due_date=ddd, room=rng.randint(1,3),
-                description=f"{str(i).rjust(2,'0')} - {desc_str}",
-                task_list=[TaskItem((i+0)*10, f"Task number {i+0} ttt",
-                                    f"Ref number {i+0}", i+16),
-                           TaskItem((i+1)*10, f"Task number {i+1} tttttt",
-                                    f"Ref number {i+1}", i+17),
-                           TaskItem((i+2)*10, f"Task number {i+2} ttttttttt",
-                                    f"Ref number {i+2}", i+18)],
-                comments=[LogComment(f"This is log comment number {i+0}",
-                                     "Brian Cobb", ddd, 0),
-                          LogComment(f"This is log comment number {i+1}",
-                                     "Brian Cobb", ddd, 1),
-                          LogComment("This is a really really fucking long and detailed log comment",
-                                     "Brian Cobb", ddd, 2)])
-            resp.append(wo)
-        resp.sort(key=lambda twois: twois.due_date)
-        return resp
+    @staticmethod
+    def __sort_key(entry: IndexEntry) -> tuple[str, str, str]:
+        return (entry.due_date.isoformat(), entry.full_number, entry.twois_name)
+
+
+    def __add_row(self, entry: IndexEntry, wo: WorkOrder) -> None:
+        """Adds a row for a workorder at its place in due date order."""
+        key: tuple[str, str, str] = self.__sort_key(entry)
+        pos: int = bisect_left(self.__keys, key)
+        self.__keys.insert(pos, key)
+        self.workorders.insert(pos, wo)
+        if self.__shows_every_row():
+            self.twois_list.insert(pos, wo)
+        self.__entries[entry.twois_name] = entry
+        self.__view = None
+
+
+    def __remove_row(self, twois_name: str) -> None:
+        """Removes the row of a workorder by the name of its .twois file, if it has one."""
+        entry: IndexEntry | None = self.__entries.pop(twois_name, None)
+        if entry is None:
+            return
+        pos: int = bisect_left(self.__keys, self.__sort_key(entry))
+        del self.__keys[pos]
+        del self.workorders[pos]
+        if self.__shows_every_row():
+            self.twois_list.pop(pos)
+        self.__view = None
+
+
+    def __clear_rows(self) -> None:
+        self.__keys.clear()
+        self.__entries.clear()
+        self.workorders.clear()
+        self.twois_list.clear()
+        self.__view = None
+
+
+    def __apply_changes(self, changes: IndexChanges) -> None:
+        """Applies the differences between the rows on screen and the index. Rows whose entry,
+        including the file's mtime, is unchanged are left alone."""
+        rewritten: set[str] = {entry.twois_name for entry in changes.changed}
+        for name in changes.removed:
+            if name not in rewritten:
+                self.__remove_row(name)
+        for entry in changes.changed:
+            if self.__entries.get(entry.twois_name) == entry:
+                continue
+            self.__remove_row(entry.twois_name)
+            wo: WorkOrder | None = workorder_index.load(entry)
+            if wo is not None:
+                self.__add_row(entry, wo)
+        self.__version = changes.version
+        if changes.changed or changes.removed:
+            self.__update_list()
+
+
+    def __start_loading(self, rebuild: bool = False) -> None:
+        """Starts the background loader, which reads the workorders tracked by the index on a
+        worker thread, and drains it with after() polling. If 'rebuild' is true, the loader
+        rebuilds the index from disk first. Results from an earlier load that is still running
+        are ignored once a new load starts."""
+        self.__load_total = 0
+        self.progress_bar.set(0)
+        self.progress_bar.grid(row=3, column=0, padx=20, pady=(0, 10), sticky='ew')
+        self.after(POLL_MS, self.__poll_loader, self.__loader.start(rebuild))
+
+
+    def __poll_loader(self, generation: int) -> None:
+        """Adds at most BUTTONS_PER_POLL buttons per call, so that the window keeps handling
+        events while a long list loads, and reschedules itself until the load is done."""
+        if generation != self.__loader.generation():
+            return
+        for kind, payload in self.__loader.drain(BUTTONS_PER_POLL):
+            if kind == 'total':
+                self.__load_total, self.__version = payload
+            elif kind == 'workorder':
+                self.__add_row(*payload)
+            elif kind == 'done':
+                self.progress_bar.grid_forget()
+                self.__update_list()
+                self.__apply_changes(workorder_index.changes_since(self.__version))
+                return
+        if self.__load_total > 0:
+            self.progress_bar.set(len(self.workorders) / self.__load_total)
+        self.after(POLL_MS, self.__poll_loader, generation)
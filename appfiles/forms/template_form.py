@@ -0,0 +1,105 @@
+"""Yo!"""
+
+from datetime import date, timedelta
+from tkinter import messagebox
+
+import customtkinter as ctk     #type: ignore
+from appfiles.library.template_library import TemplateInfo, template_library
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import workorder_index
+from appfiles.utils.utils import date_to_string
+from appfiles.utils.validation import parse_date_string
+
+MAX_COUNT: int = 52
+
+
+class TemplateForm(ctk.CTkToplevel):
+    """A new window which makes one or more pending workorders from a template, spaced a set
+    number of days apart."""
+    def __init__(self, master: ctk.CTk | ctk.CTkToplevel | ctk.CTkFrame):
+        super().__init__(master=master)
+        self.title("Load TWOIS from Template")
+        self.geometry("520x300")
+        self.resizable(False, False)
+        self.grid_columnconfigure((0, 1, 2), weight=1)
+
+        template_library.refresh()
+        self.templates: dict[str, TemplateInfo] = {
+            f"{info.title} ({info.name})": info for info in template_library.templates()}
+
+        templatelbl: ctk.CTkLabel = ctk.CTkLabel(self, anchor='w', text="Template")
+        templatelbl.grid(row=0, column=0, columnspan=3, padx=35, pady=(20, 0), sticky='ew')
+        self.template_menu: ctk.CTkOptionMenu = ctk.CTkOptionMenu(
+            self, values=list(self.templates) or ["No templates found"], dynamic_resizing=False)
+        self.template_menu.grid(row=1, column=0, columnspan=3, padx=35, pady=(0, 20), sticky='ew')
+
+        datelbl: ctk.CTkLabel = ctk.CTkLabel(self, anchor='w', text="First Due Date")
+        datelbl.grid(row=2, column=0, padx=35, pady=(0, 0), sticky='ew')
+        self.dateentry: ctk.CTkEntry = ctk.CTkEntry(self)
+        self.dateentry.insert(0, date_to_string(date.today()))
+        self.dateentry.grid(row=3, column=0, padx=35, pady=(0, 20), sticky='ew')
+
+        countlbl: ctk.CTkLabel = ctk.CTkLabel(self, anchor='w', text="Workorders")
+        countlbl.grid(row=2, column=1, padx=35, pady=(0, 0), sticky='ew')
+        self.countentry: ctk.CTkEntry = ctk.CTkEntry(self)
+        self.countentry.insert(0, "1")
+        self.countentry.grid(row=3, column=1, padx=35, pady=(0, 20), sticky='ew')
+
+        intervallbl: ctk.CTkLabel = ctk.CTkLabel(self, anchor='w', text="Days Apart")
+        intervallbl.grid(row=2, column=2, padx=35, pady=(0, 0), sticky='ew')
+        self.intervalentry: ctk.CTkEntry = ctk.CTkEntry(self)
+        self.intervalentry.insert(0, "7")
+        self.intervalentry.grid(row=3, column=2, padx=35, pady=(0, 20), sticky='ew')
+
+        btnframe: ctk.CTkFrame = ctk.CTkFrame(self)
+        btnframe.grid_columnconfigure((0, 3), weight=1)
+        btnframe.grid(row=4, column=0, columnspan=3, padx=20, pady=20, sticky='ew')
+
+        self.submit_btn: ctk.CTkButton = ctk.CTkButton(btnframe, text="Create",
+                                                       width=80, command=self.__submit)
+        self.submit_btn.grid(row=0, column=1, padx=60, pady=20)
+
+        self.cancel_btn: ctk.CTkButton = ctk.CTkButton(btnframe, text="Cancel",
+                                                       width=80, command=self.destroy)
+        self.cancel_btn.grid(row=0, column=2, padx=60, pady=20)
+
+
+    def __due_dates(self) -> list[date] | None:
+        """Returns the due date of each workorder to make, or None after telling the user what
+        is wrong with the inputs."""
+        try:
+            first: date | None = parse_date_string(self.dateentry.get())
+        except ValueError:
+            first = None
+        if first is None:
+            messagebox.showerror("Malformed Date Input",
+                                 "You must enter a valid due date in the pattern MM/DD/YYYY.")
+            return None
+        count: str = self.countentry.get().strip()
+        interval: str = self.intervalentry.get().strip()
+        if not count.isdigit() or not 1 <= int(count) <= MAX_COUNT or not interval.isdigit():
+            messagebox.showerror("Bad Number",
+                                 f"You must make between 1 and {MAX_COUNT} workorders, and they "
+                                 "must be a whole number of days apart.")
+            return None
+        return [first + timedelta(days=i * int(interval)) for i in range(int(count))]
+
+
+    def __submit(self) -> None:
+        info: TemplateInfo | None = self.templates.get(self.template_menu.get())
+        if info is None:
+            messagebox.showerror("No Template", "There is no template to load.")
+            return
+        due_dates: list[date] | None = self.__due_dates()
+        if due_dates is None:
+            return
+        try:
+            workorders: list[WorkOrder] = template_library.create_many(info.filepath, due_dates)
+            with workorder_index.batch():
+                for wo in workorders:
+                    wo.save()
+        except (OSError, ValueError) as ex:
+            messagebox.showerror("Template Error",
+                                 f"The workorders could not be made from {info.name}:\n{ex}")
+            return
+        self.destroy()
@@ -15,6 +15,7 @@ from appfiles.library.workorderform_dict import WorkOrderFormDict
 from appfiles.utils.appglobals import default_building, default_room, primary_user
 from appfiles.utils.appglobals import default_site, default_special, default_wotype
 from appfiles.utils.utils import date_to_string, is_a_valid_date_string, string_to_date
+from appfiles.utils.validation import parse_date_string
 from appfiles.utils.workorder import is_a_valid_ncr_number
 
 GENERAL: str = "General Details"
@@ -96,7 +97,6 @@ class WorkOrderForm(ctk.CTkToplevel):
                 self.get_workorder().save()
             case WorkOrderFormMode.EDIT:
                 self.wo_for_edit.edit(**self.__workorder_kwargs())
-                self.wo_for_edit.save()
             case WorkOrderFormMode.TEMPLATE:
                 #BCOBB: Prompt user to enter a filename?
                 self.get_workorder().save_as_wo_template('BCOBB')
@@ -133,10 +133,10 @@ class WorkOrderForm(ctk.CTkToplevel):
         if not is_a_valid_date_string(in_str):
             messagebox.showerror(e_title, e_message)
             return False
-        ds: list[str] = in_str.split('/')
         try:
-            d: date = date(int(ds[2]), int(ds[0]), int(ds[1]))
-            if d < date.today() - timedelta(days=14) or d > date.today() + timedelta(days=500):
+            d: date | None = parse_date_string(in_str)
+            if (d is None or d < date.today() - timedelta(days=14)
+                    or d > date.today() + timedelta(days=500)):
                 raise ValueError
         except ValueError:
             messagebox.showerror(e_title, e_message)
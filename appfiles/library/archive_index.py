@@ -0,0 +1,498 @@
+"""Module which provides the ArchiveIndex class, a persistent SQLite index of every completed
+TWOIS spreadsheet filed under the complete directory.\n
+WorkOrder.complete() files each finished spreadsheet into complete/<year>/Week of MM-DD/, next
+to a _description.txt file, and nothing ever read them back, so a year-end audit meant opening
+the folders by hand. The archive index parses every completed spreadsheet once (its header,
+tasks and their actuals, log comments and completion data) and keeps the result in a database,
+so those questions become queries.\n
+The index is incremental: each file is stored with its mtime and size, and refresh() only
+re-parses the files whose mtime or size has changed, forgets the ones that are gone, and
+parses the new ones. The files are parsed in parallel across a process pool with the streaming
+reader in xlsx_scan, which reads only the mapped cells of each sheet. Files that are not TWOIS
+spreadsheets are remembered too, so that they are not opened again until they change.\n
+The title, description, tasks and log comments of every completed workorder are also kept in
+a full-text table, so search() finds and ranks them by their text the same way that
+WorkOrderIndex.search() does for the open ones (see appfiles.utils.fulltext).\n
+The index can be brought up to date from the command line with:
+    python -m appfiles.library.archive_index
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from itertools import repeat
+import os
+import sqlite3
+from threading import RLock
+from typing import Any, Iterator, NamedTuple
+
+from openpyxl.utils.cell import get_column_letter
+
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.utils.appglobals import ARCHIVE_DB, COMPLETE_DIR
+from appfiles.utils.fulltext import bm25, document_text, fts_table
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.twois_layout import SheetValues
+import appfiles.utils.workorder as woutils
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
+
+SCHEMA_VERSION: int = 2
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS archive (
+    path            TEXT PRIMARY KEY,
+    mtime           INTEGER NOT NULL,
+    size            INTEGER NOT NULL,
+    full_number     TEXT NOT NULL,
+    title           TEXT NOT NULL,
+    due_date        TEXT,
+    site            TEXT,
+    special         TEXT,
+    type            TEXT,
+    priority        TEXT,
+    creator         TEXT,
+    building        TEXT,
+    room            TEXT,
+    startdate       TEXT,
+    enddate         TEXT,
+    restoredate     TEXT,
+    repairtime      TEXT,
+    description     TEXT
+);
+CREATE INDEX IF NOT EXISTS archive_enddate ON archive (enddate);
+CREATE INDEX IF NOT EXISTS archive_full_number ON archive (full_number);
+CREATE TABLE IF NOT EXISTS archive_tasks (
+    path            TEXT NOT NULL,
+    position        INTEGER NOT NULL,
+    number          INTEGER,
+    summary         TEXT NOT NULL,
+    reference       TEXT,
+    completion_date TEXT,
+    technician      TEXT,
+    qty_techs       INTEGER,
+    hours           REAL,
+    PRIMARY KEY (path, position)
+);
+CREATE INDEX IF NOT EXISTS archive_tasks_technician ON archive_tasks (technician);
+CREATE TABLE IF NOT EXISTS archive_comments (
+    path            TEXT NOT NULL,
+    position        INTEGER NOT NULL,
+    text            TEXT NOT NULL,
+    person          TEXT,
+    date            TEXT,
+    PRIMARY KEY (path, position)
+);
+CREATE TABLE IF NOT EXISTS skipped (
+    path            TEXT PRIMARY KEY,
+    mtime           INTEGER NOT NULL,
+    size            INTEGER NOT NULL
+);
+""" + fts_table("archive_search", "path")
+TABLES: tuple[str, ...] = ("archive", "archive_tasks", "archive_comments", "skipped",
+                           "archive_search")
+
+COLUMNS: str = ("path, mtime, size, full_number, title, due_date, site, special, type, "
+                "priority, creator, building, room, startdate, enddate, restoredate, "
+                "repairtime, description")
+TASK_COLUMNS: str = ("number, summary, reference, completion_date, technician, qty_techs, "
+                     "hours")
+DATE_COLUMNS: tuple[int, ...] = (5, 13, 14, 15)
+ARCHIVE_CELLS: tuple[str, ...] = tuple(f"{get_column_letter(col)}{row}"
+                                       for row, col in sorted(layout.mapped_positions()))
+DESCRIPTION_SUFFIX: str = "_description.txt"
+CHUNKSIZE: int = 8
+
+
+class ArchiveEntry(NamedTuple):
+    """The header and completion data of one completed spreadsheet. 'path' is relative to the
+    complete directory. Dates that were left blank are None."""
+    path: str
+    mtime: int
+    size: int
+    full_number: str
+    title: str
+    due_date: date | None
+    site: str | None
+    special: str | None
+    type: str | None
+    priority: str | None
+    creator: str | None
+    building: str | None
+    room: str | None
+    startdate: date | None
+    enddate: date | None
+    restoredate: date | None
+    repairtime: str | None
+    description: str | None
+
+
+class ArchivedTask(NamedTuple):
+    """One task of a completed spreadsheet, with its actuals if it was carried out."""
+    number: int | None
+    summary: str
+    reference: str | None
+    completion_date: date | None
+    technician: str | None
+    qty_techs: int | None
+    hours: float | None
+
+
+class ArchivedComment(NamedTuple):
+    """One log comment of a completed spreadsheet."""
+    text: str
+    person: str | None
+    date: date | None
+
+
+class ArchivedWorkOrder(NamedTuple):
+    """Everything that is indexed from one completed spreadsheet."""
+    entry: ArchiveEntry
+    tasks: tuple[ArchivedTask, ...]
+    comments: tuple[ArchivedComment, ...]
+
+
+class ArchiveIndex:
+    """A persistent index of the completed TWOIS spreadsheets filed under one directory.
+
+    Public Methods
+    -------------------------
+        refresh(workers: int | None = None, processes: bool = True) -> int:
+            Parses the spreadsheets that are new or have changed since the last refresh and
+            forgets the ones that are gone. Returns the number of files parsed.
+
+        rebuild(workers: int | None = None, processes: bool = True) -> int:
+            Throws the index away and parses every spreadsheet again.
+
+        entries(start: date | None = None, end: date | None = None) -> list[ArchiveEntry]:
+            The completed workorders whose end date falls between 'start' and 'end'.
+
+        find(full_number: str) -> list[ArchiveEntry]:
+            The completed workorders filed under a full workorder number.
+
+        search(query: str, limit: int) -> list[tuple[ArchiveEntry, float]]:
+            The completed workorders whose text matches an FTS5 query, best match first.
+
+        tasks(path: str) -> list[ArchivedTask]:
+            The tasks of one completed workorder.
+
+        comments(path: str) -> list[ArchivedComment]:
+            The log comments of one completed workorder.
+
+        technician_hours(start: date | None = None, end: date | None = None) -> dict[str, float]:
+            The hours logged by each technician on tasks completed between 'start' and 'end'.
+
+        close() -> None:
+            Closes the database connection.
+    """
+    def __init__(self, db_path: str = ARCHIVE_DB, directory: str = COMPLETE_DIR) -> None:
+        self.db_path: str = db_path
+        self.directory: str = directory
+        self.__conn: sqlite3.Connection | None = None
+        self.__lock: RLock = RLock()
+
+
+    ########### PRIVATE METHODS
+    def __connection(self) -> sqlite3.Connection:
+        """Opens the database on first use, so that importing this module never touches disk."""
+        if self.__conn is None:
+            self.__conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            if self.__conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # The index only caches what is on disk, so an old layout is simply rebuilt
+                self.__conn.executescript(" ".join(f"DROP TABLE IF EXISTS {table};"
+                                                   for table in TABLES))
+                self.__conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.__conn.executescript(SCHEMA)
+        return self.__conn
+
+
+    def __archived_files(self) -> Iterator[tuple[str, int, int]]:
+        """Yields (relative path, mtime, size) for every spreadsheet under the directory,
+        skipping the lock files that excel leaves next to open spreadsheets."""
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".xlsx") or name.startswith("~$"):
+                    continue
+                path: str = os.path.join(root, name)
+                try:
+                    stat: os.stat_result = os.stat(path)
+                except OSError:
+                    continue
+                yield (os.path.relpath(path, self.directory), stat.st_mtime_ns, stat.st_size)
+
+
+    @staticmethod
+    def __iso(value: date | None) -> str | None:
+        return None if value is None else value.isoformat()
+
+
+    @staticmethod
+    def __from_iso(value: str | None) -> date | None:
+        return None if value is None else date.fromisoformat(value)
+
+
+    @staticmethod
+    def __forget(conn: sqlite3.Connection, paths: list[str]) -> None:
+        for table in TABLES:
+            conn.executemany(f"DELETE FROM {table} WHERE path = ?", [(p,) for p in paths])
+
+
+    @classmethod
+    def __store(cls, conn: sqlite3.Connection, wo: ArchivedWorkOrder) -> None:
+        row: list[Any] = list(wo.entry)
+        for i in DATE_COLUMNS:
+            row[i] = cls.__iso(row[i])
+        conn.execute(f"INSERT INTO archive ({COLUMNS}) VALUES ({', '.join('?' * len(row))})",
+                     row)
+        conn.executemany(f"INSERT INTO archive_tasks (path, position, {TASK_COLUMNS}) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(wo.entry.path, i, t.number, t.summary, t.reference,
+                           cls.__iso(t.completion_date), t.technician, t.qty_techs, t.hours)
+                          for i, t in enumerate(wo.tasks)])
+        conn.executemany("INSERT INTO archive_comments (path, position, text, person, date) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         [(wo.entry.path, i, c.text, c.person, cls.__iso(c.date))
+                          for i, c in enumerate(wo.comments)])
+        conn.execute("INSERT INTO archive_search VALUES (?, ?, ?, ?, ?)",
+                     (wo.entry.path, *document_text(
+                         wo.entry.title, wo.entry.description,
+                         ((t.summary, t.reference) for t in wo.tasks),
+                         (c.text for c in wo.comments))))
+
+
+    def __index_files(self, conn: sqlite3.Connection, files: list[tuple[str, int, int]],
+                      workers: int | None, processes: bool) -> None:
+        """Parses the given (relative path, mtime, size) files and stores what they hold."""
+        parsed: list[ArchivedWorkOrder | None] = parse_archived_files(
+            [os.path.join(self.directory, path) for path, _, _ in files], self.directory,
+            workers, processes)
+        self.__forget(conn, [path for path, _, _ in files])
+        for file, wo in zip(files, parsed):
+            if wo is None:
+                conn.execute("INSERT INTO skipped (path, mtime, size) VALUES (?, ?, ?)", file)
+            else:
+                self.__store(conn, wo)
+
+
+    @classmethod
+    def __to_entry(cls, row: tuple) -> ArchiveEntry:
+        values: list[Any] = list(row)
+        for i in DATE_COLUMNS:
+            values[i] = cls.__from_iso(values[i])
+        return ArchiveEntry(*values)
+
+
+    ########### PUBLIC METHODS
+    def refresh(self, workers: int | None = None, processes: bool = True) -> int:
+        """Brings the index up to date with the directory. Spreadsheets whose mtime or size
+        differ from their entry, and new ones, are parsed across a pool of 'workers' processes
+        (1 parses them on the calling thread, and 'processes' false uses threads instead), and
+        entries for missing files are dropped. Returns the number of files parsed."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            known: dict[str, tuple[int, int]] = {
+                path: (mtime, size) for path, mtime, size in conn.execute(
+                    "SELECT path, mtime, size FROM archive UNION ALL "
+                    "SELECT path, mtime, size FROM skipped")}
+            stale: list[tuple[str, int, int]] = []
+            for path, mtime, size in self.__archived_files():
+                if known.pop(path, None) != (mtime, size):
+                    stale.append((path, mtime, size))
+            with conn:
+                self.__forget(conn, list(known))
+                self.__index_files(conn, stale, workers, processes)
+            return len(stale)
+
+
+    def rebuild(self, workers: int | None = None, processes: bool = True) -> int:
+        """Deletes every entry and parses every spreadsheet under the directory again. Returns
+        the number of completed workorders indexed."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            with conn:
+                for table in TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                self.__index_files(conn, list(self.__archived_files()), workers, processes)
+            return conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+
+    def entries(self, start: date | None = None, end: date | None = None) -> list[ArchiveEntry]:
+        """Returns the completed workorders whose end date falls between 'start' and 'end',
+        inclusive, ordered by end date. Either bound can be left open; with neither, every
+        entry is returned, including any without an end date."""
+        clauses: list[str] = []
+        params: list[str] = []
+        if start is not None:
+            clauses.append("enddate >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("enddate <= ?")
+            params.append(end.isoformat())
+        where: str = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self.__lock:
+            rows = self.__connection().execute(
+                f"SELECT {COLUMNS} FROM archive {where}ORDER BY enddate, full_number",
+                params).fetchall()
+        return [self.__to_entry(row) for row in rows]
+
+
+    def find(self, full_number: str) -> list[ArchiveEntry]:
+        """Returns every completed workorder filed under a full workorder number."""
+        with self.__lock:
+            rows = self.__connection().execute(
+                f"SELECT {COLUMNS} FROM archive WHERE full_number = ? ORDER BY enddate",
+                (full_number,)).fetchall()
+        return [self.__to_entry(row) for row in rows]
+
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[ArchiveEntry, float]]:
+        """Takes an FTS5 query, such as one built by fulltext.to_fts_query(), and returns the
+        completed workorders whose text matches it along with their bm25 rank, best match
+        (lowest rank) first. Raises an sqlite3.OperationalError if the query is malformed."""
+        columns: str = ", ".join(f"a.{column.strip()}" for column in COLUMNS.split(","))
+        with self.__lock:
+            rows = self.__connection().execute(
+                f"SELECT {columns}, {bm25('archive_search')} AS rank FROM archive_search "
+                "JOIN archive a ON a.path = archive_search.path "
+                "WHERE archive_search MATCH ? ORDER BY rank LIMIT ?", (query, limit)).fetchall()
+        return [(self.__to_entry(row[:-1]), row[-1]) for row in rows]
+
+
+    def tasks(self, path: str) -> list[ArchivedTask]:
+        """Returns the tasks of the completed workorder at 'path', in order."""
+        with self.__lock:
+            rows = self.__connection().execute(
+                f"SELECT {TASK_COLUMNS} FROM archive_tasks WHERE path = ? ORDER BY position",
+                (path,)).fetchall()
+        return [ArchivedTask(row[0], row[1], row[2], self.__from_iso(row[3]), *row[4:])
+                for row in rows]
+
+
+    def comments(self, path: str) -> list[ArchivedComment]:
+        """Returns the log comments of the completed workorder at 'path', in order."""
+        with self.__lock:
+            rows = self.__connection().execute(
+                "SELECT text, person, date FROM archive_comments WHERE path = ? "
+                "ORDER BY position", (path,)).fetchall()
+        return [ArchivedComment(row[0], row[1], self.__from_iso(row[2])) for row in rows]
+
+
+    def technician_hours(self, start: date | None = None,
+                         end: date | None = None) -> dict[str, float]:
+        """Returns the total hours logged by each technician on the tasks that were completed
+        between 'start' and 'end', inclusive."""
+        with self.__lock:
+            rows = self.__connection().execute(
+                "SELECT technician, SUM(hours) FROM archive_tasks WHERE technician IS NOT NULL "
+                "AND hours IS NOT NULL AND completion_date >= ? AND completion_date <= ? "
+                "GROUP BY technician ORDER BY technician",
+                ((start or date.min).isoformat(), (end or date.max).isoformat())).fetchall()
+        return dict(rows)
+
+
+    def close(self) -> None:
+        """Closes the database connection. It is reopened automatically on next use."""
+        with self.__lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def parse_archived_files(paths: list[str], root: str,
+                         workers: int | None = None,
+                         processes: bool = True) -> list[ArchivedWorkOrder | None]:
+    """Parses every file with parse_archived_file(), in parallel across a pool of 'workers'
+    processes, and returns the results in the same order. If 'processes' is false the pool is
+    made of threads instead."""
+    if workers == 1 or len(paths) < 2:
+        return [parse_archived_file(path, root) for path in paths]
+    executor: type[Executor] = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(parse_archived_file, paths, repeat(root), chunksize=CHUNKSIZE))
+
+
+def parse_archived_file(path: str, root: str) -> ArchivedWorkOrder | None:
+    """Takes a path to a completed TWOIS spreadsheet and the directory it is archived under,
+    and returns everything the archive index stores about it, or None if it is not a TWOIS
+    spreadsheet. The description is read from the _description.txt file next to it."""
+    try:
+        stat: os.stat_result = os.stat(path)
+        sv: SheetValues = scan_cells(path, ARCHIVE_CELLS)
+    except (OSError, XlsxScanError):
+        return None
+    if woutils.worksheet_input_status(sv) != ExcelFileStatus.IS_VALID:
+        return None
+
+    full_number: str = "".join(__text(sv.field(name)) or ""
+                               for name in ('wo_number', 'site', 'special'))
+    cells: dict[str, str] = layout.COMPLETION_CELLS
+    entry: ArchiveEntry = ArchiveEntry(
+        os.path.relpath(path, root), stat.st_mtime_ns, stat.st_size, full_number,
+        woutils.get_title_from_xlsx_cell(sv),
+        woutils.get_optional_date_from_xlsx_cell(sv, layout.HEADER_CELLS['due_date']),
+        __text(sv.field('site')), __text(sv.field('special')), __text(sv.field('type')),
+        __text(sv.field('priority')), __text(sv.field('creator')),
+        __text(sv.field('building')), __text(sv.field('room')),
+        woutils.get_optional_date_from_xlsx_cell(sv, cells['startdate']),
+        woutils.get_optional_date_from_xlsx_cell(sv, cells['enddate']),
+        woutils.get_optional_date_from_xlsx_cell(sv, cells['restoredate']),
+        __text(sv.field('repairtime')),
+        __read_description(os.path.join(os.path.dirname(path),
+                                        f"{full_number}{DESCRIPTION_SUFFIX}")))
+    return ArchivedWorkOrder(entry, __read_tasks(sv), __read_comments(sv))
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+def __read_tasks(sv: SheetValues) -> tuple[ArchivedTask, ...]:
+    resp: list[ArchivedTask] = []
+    date_col: str = layout.TASK_ACTUALS.columns['completion_date']
+    for (_, plan), (row, actual) in zip(sv.block_rows(layout.TASK_PLANS),
+                                        sv.block_rows(layout.TASK_ACTUALS)):
+        if plan['summary'] is None:
+            continue
+        resp.append(ArchivedTask(
+            __number(plan['number'], int), str(plan['summary']), __text(plan['reference']),
+            woutils.get_optional_date_from_xlsx_cell(sv, f"{date_col}{row}"),
+            __text(actual['technician']), __number(actual['qty_techs'], int),
+            __number(actual['hours'], float)))
+    return tuple(resp)
+
+
+def __read_comments(sv: SheetValues) -> tuple[ArchivedComment, ...]:
+    resp: list[ArchivedComment] = []
+    date_col: str = layout.LOG_COMMENTS.columns['date']
+    for row, cells in sv.block_rows(layout.LOG_COMMENTS):
+        if cells['text'] is not None:
+            resp.append(ArchivedComment(
+                str(cells['text']), __text(cells['person']),
+                woutils.get_optional_date_from_xlsx_cell(sv, f"{date_col}{row}")))
+    return tuple(resp)
+
+
+def __read_description(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as infile:
+            return infile.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def __text(value: object) -> str | None:
+    return None if value is None or value == "" else str(value)
+
+
+def __number(value: object, kind: type) -> Any:
+    """Converts a cell that should hold a number to 'kind', or None if it does not."""
+    try:
+        return None if value is None or value == "" else kind(float(str(value)))
+    except ValueError:
+        return None
+
+
+archive_index: ArchiveIndex = ArchiveIndex()
+
+
+if __name__ == '__main__':
+    parsed_count: int = archive_index.refresh()
+    print(f"Parsed {parsed_count} spreadsheets; {len(archive_index.entries())} completed "
+          f"workorders indexed from '{archive_index.directory}'")
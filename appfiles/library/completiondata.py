@@ -1,10 +1,14 @@
 """Yo!"""
 
-from dataclasses import dataclass
 from datetime import date
+import sys
+
+from appfiles.utils.utils import restore_slots
 
 class WorkorderCompletionData():
     """Yo!"""
+    __slots__ = ('startdate', 'enddate', 'restoredate', 'minutes', 'hours', 'days')
+
     def __init__(self, startdate: date, enddate: date, restoredate: date, repairtime: str) -> None:
         self.startdate: date = startdate
         self.enddate: date = enddate
@@ -30,12 +34,16 @@ class WorkorderCompletionData():
             resp += str(self.minutes) + "m"
         return resp
 
-@dataclass
+    def __setstate__(self, state: dict | tuple) -> None:
+        restore_slots(self, state)
+
 class TaskCompletionData():
     """Yo!"""
+    __slots__ = ('cdate', 'tech', 'qty_techs', 'hours')
+
     def __init__(self, cdate: date, tech: str, qty_techs: int, hours: float):
         self.cdate = cdate
-        self.tech = tech
+        self.tech = sys.intern(tech)
         self.qty_techs = qty_techs
         self.hours = hours
     
\ No newline at end of file
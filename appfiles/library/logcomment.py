@@ -1,8 +1,9 @@
-from dataclasses import dataclass
 from datetime import date
-from appfiles.utils.utils import clamp, date_to_string
+import sys
+from typing import Self
+
+from appfiles.utils.utils import clamp, date_to_string, restore_slots
 
-@dataclass
 class LogComment:
     """A data class which stores the basic information of a log comment on a Work Order.
     
@@ -20,16 +21,47 @@ class LogComment:
         row: int
             This is the excel row that the entry goes on. Will be clamped between 86 and 109.
             Mangled field, should not be used directly.
+
+    LogComments use __slots__, and the names of the people who leave them are interned, since
+    an archive holds up to 24 of them for every workorder. Two LogComments are equal if all of
+    their fields are equal.
     """
+    __slots__ = ('text', 'person', 'date', '__row')
+
     def __init__(self, text: str, person: str, c_date: date, listsize: int) -> None:
         self.text: str = text
-        self.person: str = person
+        self.person: str = sys.intern(person)
         self.date: date = c_date
         self.__row: int = clamp(listsize + 86, 86, 109)
 
     def __str__(self) -> str:
         return f"{date_to_string(self.date)}\t{self.text}"
 
+    def __repr__(self) -> str:
+        return f"LogComment({self.text!r}, {self.person!r}, {self.date!r}, row={self.__row})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LogComment):
+            return NotImplemented
+        return ((self.text, self.person, self.date, self.__row) ==
+                (other.text, other.person, other.date, other.get_row()))
+
+    __hash__ = None     #type: ignore
+
+    def __setstate__(self, state: dict | tuple) -> None:
+        restore_slots(self, state)
+
+    @classmethod
+    def from_record(cls, text: str, person: str, c_date: date, row: int) -> Self:
+        """Rebuilds a LogComment from its fields, as stored by a serializer. The row is taken
+        as it is, since it was already clamped when the comment was made."""
+        resp: Self = cls.__new__(cls)
+        resp.text = text
+        resp.person = sys.intern(person)
+        resp.date = c_date
+        resp.__row = row
+        return resp
+
     def set_row(self, newrow) -> None:
         """A method which will set the private row field to whatever is fed in, clamped between
         86 and 109.
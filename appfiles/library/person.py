@@ -1,4 +1,5 @@
 from enum import Enum
+import sys
 
 from appfiles.utils.utils import name_to_initials
 
@@ -8,8 +9,10 @@ class Group(Enum):
     PC = 2
 
 class Person:
+    __slots__ = ('name', 'email', 'group', 'is_technician', 'bems')
+
     def __init__(self, name: str, email: str, group: Group,technician: bool, bems: int = -1):
-        self.name: str = name
+        self.name: str = sys.intern(name)
         self.email: str = email
         self.group: Group = group
         self.is_technician: bool = technician
@@ -0,0 +1,178 @@
+"""Module which provides the RecurringScheduler class, which turns recurring tasks into pending
+workorders ahead of the day they are due.\n
+Every scheduled RecurringTask sits in a min-heap keyed on its due date, which is the next
+occurrence that has no workorder yet. run() pops the tasks that fall due within the lead time,
+creates a pending WorkOrder from each task's template for each of its occurrences in that
+window, and pushes the task back under its next occurrence. Only the tasks at the top of the
+heap are ever looked at, so a run with nothing to do is O(1).\n
+Occurrences are worked out from the cycle directly (see RecurringTask.next_occurrence()) rather
+than by stepping one cycle at a time. When the app has been closed for a while, every task
+whose occurrences were missed gets a single workorder for the latest one, and its older missed
+occurrences are counted in the result instead of each becoming a workorder. Catching up after
+any length of time is therefore O(tasks log tasks).
+"""
+
+from datetime import date, timedelta
+from heapq import heapify, heappop, heappush
+from itertools import count
+from threading import RLock
+from typing import Callable, NamedTuple
+
+from appfiles.library.recurringtask import RecurringTask
+from appfiles.library.workorder import WorkOrder
+from appfiles.utils.appglobals import recurring_lead_days
+from appfiles.utils.twois_codec import TwoisFormatError
+
+
+class ScheduledWorkOrder(NamedTuple):
+    """A pending workorder that run() created for one occurrence of a recurring task."""
+    task: RecurringTask
+    due_date: date
+    workorder: WorkOrder
+
+
+class ScheduleResult(NamedTuple):
+    """What a call to run() did: the workorders it created, the number of missed occurrences
+    that were folded into a later one, and the tasks whose template could not be loaded."""
+    created: list[ScheduledWorkOrder]
+    skipped: int
+    failed: list[RecurringTask]
+
+
+class RecurringScheduler:
+    """A class which keeps every recurring task in a min-heap by due date and creates their
+    workorders a set number of days before they are due.
+
+    Public Methods
+    -------------------------
+        add(task: RecurringTask) -> None:
+            Schedules a task, or reschedules it if its due date has changed.
+
+        remove(task: RecurringTask) -> None:
+            Stops scheduling a task.
+
+        tasks() -> list[RecurringTask]:
+            Returns every scheduled task, soonest due first.
+
+        peek() -> RecurringTask | None:
+            Returns the task due soonest without changing anything.
+
+        run(today: date | None = None, save: bool = True) -> ScheduleResult:
+            Creates the workorders for every occurrence due within the lead time.
+    """
+    def __init__(self, lead_days: int = recurring_lead_days,
+                 load_template: Callable[[RecurringTask], WorkOrder] | None = None) -> None:
+        self.lead_days: int = lead_days
+        self.__load_template: Callable[[RecurringTask], WorkOrder] = (
+            load_template or RecurringTask.get_template_workorder)
+        self.__heap: list[tuple[int, int, RecurringTask]] = []
+        self.__tokens: dict[int, int] = {}
+        self.__tasks: dict[int, RecurringTask] = {}
+        self.__counter = count()
+        self.__lock: RLock = RLock()
+
+
+    def __len__(self) -> int:
+        return len(self.__tasks)
+
+
+    ########### PRIVATE METHODS
+    def __push(self, task: RecurringTask) -> None:
+        """Pushes a heap entry for the task under its current due date. Any entry pushed for it
+        earlier is left in the heap, but its token no longer matches, so it is dropped when it
+        reaches the top."""
+        token: int = next(self.__counter)
+        self.__tokens[id(task)] = token
+        heappush(self.__heap, (task.due_date.toordinal(), token, task))
+
+
+    def __top(self) -> tuple[int, int, RecurringTask] | None:
+        """Returns the live entry at the top of the heap, discarding stale ones."""
+        while self.__heap:
+            entry: tuple[int, int, RecurringTask] = self.__heap[0]
+            if self.__tokens.get(id(entry[2])) == entry[1]:
+                return entry
+            heappop(self.__heap)
+        return None
+
+
+    def __compact(self) -> None:
+        """Rebuilds the heap without its stale entries once they outnumber the live ones."""
+        if len(self.__heap) > 2 * len(self.__tasks) + 16:
+            self.__heap = [entry for entry in self.__heap
+                           if self.__tokens.get(id(entry[2])) == entry[1]]
+            heapify(self.__heap)
+
+
+    ########### PUBLIC METHODS
+    def add(self, task: RecurringTask) -> None:
+        """Schedules a task under its due date. Adding a task that is already scheduled moves
+        it to its current due date, so call this again after changing a task's due date."""
+        with self.__lock:
+            self.__tasks[id(task)] = task
+            self.__push(task)
+            self.__compact()
+
+
+    def remove(self, task: RecurringTask) -> None:
+        """Stops scheduling a task. Does nothing if it is not scheduled."""
+        with self.__lock:
+            self.__tasks.pop(id(task), None)
+            self.__tokens.pop(id(task), None)
+            self.__compact()
+
+
+    def tasks(self) -> list[RecurringTask]:
+        """Returns every scheduled task, soonest due first."""
+        with self.__lock:
+            return sorted(self.__tasks.values(), key=lambda task: (task.due_date, str(task)))
+
+
+    def peek(self) -> RecurringTask | None:
+        """Returns the task that is due soonest, or None if nothing is scheduled."""
+        with self.__lock:
+            entry: tuple[int, int, RecurringTask] | None = self.__top()
+            return None if entry is None else entry[2]
+
+
+    def run(self, today: date | None = None, save: bool = True) -> ScheduleResult:
+        """Creates a pending workorder for every occurrence of every task that is due on or
+        before 'lead_days' after today, saving each one unless 'save' is false, and moves each
+        task's due date past the occurrences it created. Missed occurrences before today only
+        get one workorder per task, for the latest of them. Each task's template is loaded once
+        per run, however many workorders it makes, and the number of every workorder it makes is
+        added to its history. A task whose template cannot be loaded is reported in the result
+        and tried again on the next run."""
+        today = date.today() if today is None else today
+        horizon: int = (today + timedelta(days=self.lead_days)).toordinal()
+        created: list[ScheduledWorkOrder] = []
+        failed: list[RecurringTask] = []
+        skipped: int = 0
+        with self.__lock:
+            while (entry := self.__top()) is not None and entry[0] <= horizon:
+                task: RecurringTask = heappop(self.__heap)[2]
+                latest_missed: date | None = task.last_occurrence(today - timedelta(days=1))
+                if latest_missed is not None and latest_missed > task.due_date:
+                    skipped += (latest_missed - task.due_date).days // task.recur
+                    task.due_date = latest_missed
+
+                try:
+                    template: WorkOrder = self.__load_template(task)
+                    while task.due_date.toordinal() <= horizon:
+                        wo: WorkOrder = task.create_workorder(task.due_date, template)
+                        if save:
+                            wo.save()
+                        task.history.append(wo.wo_number)
+                        created.append(ScheduledWorkOrder(task, task.due_date, wo))
+                        task.due_date += timedelta(days=task.recur)
+                except (OSError, TwoisFormatError):
+                    failed.append(task)
+                    continue
+                self.__push(task)
+
+            for task in failed:
+                self.__push(task)
+        return ScheduleResult(created, skipped, failed)
+
+
+recurring_scheduler: RecurringScheduler = RecurringScheduler()
@@ -0,0 +1,218 @@
+"""Module which provides the RecurringStore class, the SQLite database that recurring tasks and
+their history are kept in.\n
+A RecurringTask only ever lived in memory, and the numbers of the workorders it produced were
+lost when the app closed. The store keeps one row per task with its cycle, next due date and
+the path of its template .twois file, plus one row per workorder in its history. Tasks are
+indexed by system and by title.\n
+Loading every task at startup is two queries. The template files are not opened: each task
+only holds the path to its template, which is read when a workorder is made from it.
+"""
+
+from contextlib import contextmanager
+from datetime import date
+import sqlite3
+from threading import RLock
+from typing import Iterable, Iterator
+
+from appfiles.library.recurringtask import RecurringTask
+from appfiles.utils.appglobals import RECURRING_DB
+
+SCHEMA_VERSION: int = 1
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS recurring (
+    task_id         INTEGER PRIMARY KEY,
+    title           TEXT NOT NULL,
+    system          TEXT NOT NULL,
+    recur           INTEGER NOT NULL,
+    due_date        TEXT NOT NULL,
+    template_file   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recurring_system ON recurring (system, title);
+CREATE INDEX IF NOT EXISTS recurring_title ON recurring (title);
+CREATE TABLE IF NOT EXISTS recurring_history (
+    task_id         INTEGER NOT NULL REFERENCES recurring (task_id) ON DELETE CASCADE,
+    position        INTEGER NOT NULL,
+    wo_number       TEXT NOT NULL,
+    PRIMARY KEY (task_id, position)
+);
+"""
+# The script that upgrades a store from each older version to the next one
+MIGRATIONS: dict[int, str] = {}
+COLUMNS: str = "task_id, due_date, title, system, recur, template_file"
+
+
+class RecurringStore:
+    """A persistent store of RecurringTasks and the workorders each one has produced.
+
+    Public Methods
+    -------------------------
+        save(task: RecurringTask) -> int:
+            Adds or updates a task and any new entries in its history, and returns its id.
+
+        save_all(tasks: Iterable[RecurringTask]) -> None:
+            Saves several tasks in one transaction.
+
+        remove(task: RecurringTask) -> None:
+            Deletes a task and its history.
+
+        load_all() -> list[RecurringTask]:
+            Every stored task, soonest due first, without reading any template file.
+
+        find_by_system(system: str) -> list[RecurringTask]:
+            The tasks for a system, by title.
+
+        find_by_title(title: str) -> list[RecurringTask]:
+            The tasks with a title, by system.
+
+        history(task_id: int) -> list[str]:
+            The workorder numbers a task has produced, oldest first.
+    """
+    def __init__(self, db_path: str = RECURRING_DB) -> None:
+        self.db_path: str = db_path
+        self.__conn: sqlite3.Connection | None = None
+        self.__lock: RLock = RLock()
+
+
+    ########### PRIVATE METHODS
+    def __connection(self) -> sqlite3.Connection:
+        """Opens the database on first use, so that importing this module never touches disk.
+        Unlike the workorder indexes, the store is the only copy of what it holds, so an older
+        layout is migrated with MIGRATIONS rather than dropped. A store written by a newer
+        version of the app is refused with an sqlite3.DatabaseError."""
+        if self.__conn is None:
+            conn: sqlite3.Connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            try:
+                stored: int = conn.execute("PRAGMA user_version").fetchone()[0]
+                if stored > SCHEMA_VERSION:
+                    raise sqlite3.DatabaseError(
+                        f"'{self.db_path}' was written by a newer version of the app "
+                        f"(schema {stored}, expected {SCHEMA_VERSION})")
+                if stored == 0:
+                    conn.executescript(SCHEMA)
+                    stored = SCHEMA_VERSION
+                for version in range(stored, SCHEMA_VERSION):
+                    conn.executescript(MIGRATIONS[version])
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.execute("PRAGMA foreign_keys = ON")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self.__conn = conn
+        return self.__conn
+
+
+    @contextmanager
+    def __transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yields the connection inside a transaction that is committed on exit. Must be
+        called holding the lock."""
+        conn: sqlite3.Connection = self.__connection()
+        with conn:
+            yield conn
+
+
+    @staticmethod
+    def __store(conn: sqlite3.Connection, task: RecurringTask) -> int:
+        """Writes a task's row, giving it an id if it has none, and appends the entries of its
+        history that are not stored yet. History is only ever added to."""
+        row: tuple = (task.due_date.isoformat(), task.title, task.system, task.recur,
+                      task.template_file)
+        if task.task_id is None:
+            task.task_id = conn.execute(
+                "INSERT INTO recurring (due_date, title, system, recur, template_file) "
+                "VALUES (?, ?, ?, ?, ?)", row).lastrowid
+        else:
+            conn.execute("INSERT INTO recurring (task_id, due_date, title, system, recur, "
+                         "template_file) VALUES (?, ?, ?, ?, ?, ?) "
+                         "ON CONFLICT (task_id) DO UPDATE SET due_date = excluded.due_date, "
+                         "title = excluded.title, system = excluded.system, "
+                         "recur = excluded.recur, template_file = excluded.template_file",
+                         (task.task_id, *row))
+        stored: int = conn.execute("SELECT COUNT(*) FROM recurring_history WHERE task_id = ?",
+                                   (task.task_id,)).fetchone()[0]
+        conn.executemany("INSERT INTO recurring_history (task_id, position, wo_number) "
+                         "VALUES (?, ?, ?)", [(task.task_id, i, wo_number) for i, wo_number
+                                              in enumerate(task.history[stored:], stored)])
+        return task.task_id
+
+
+    def __load(self, where: str = "", params: tuple = (),
+               order: str = "due_date, title") -> list[RecurringTask]:
+        """Builds the tasks matching a WHERE clause, along with their history, from two
+        queries."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            rows = conn.execute(f"SELECT {COLUMNS} FROM recurring {where} ORDER BY {order}",
+                                params).fetchall()
+            history: dict[int, list[str]] = {row[0]: [] for row in rows}
+            for task_id, wo_number in conn.execute(
+                    "SELECT task_id, wo_number FROM recurring_history WHERE task_id IN "
+                    f"(SELECT task_id FROM recurring {where}) ORDER BY task_id, position",
+                    params):
+                history[task_id].append(wo_number)
+        return [RecurringTask.from_record(task_id, date.fromisoformat(due_date), title, system,
+                                          recur, template_file, history[task_id])
+                for task_id, due_date, title, system, recur, template_file in rows]
+
+
+    ########### PUBLIC METHODS
+    def save(self, task: RecurringTask) -> int:
+        """Adds a task to the store, or updates it if it is already stored, along with any
+        entries added to its history since it was last saved. Returns the task's id, which is
+        also set on the task."""
+        with self.__lock:
+            with self.__transaction() as conn:
+                return self.__store(conn, task)
+
+
+    def save_all(self, tasks: Iterable[RecurringTask]) -> None:
+        """Saves every task in one transaction, such as the tasks whose due dates a run of the
+        scheduler has moved."""
+        with self.__lock:
+            with self.__transaction() as conn:
+                for task in tasks:
+                    self.__store(conn, task)
+
+
+    def remove(self, task: RecurringTask) -> None:
+        """Deletes a task and its history from the store. Its template file is left alone."""
+        if task.task_id is None:
+            return
+        with self.__lock:
+            with self.__transaction() as conn:
+                conn.execute("DELETE FROM recurring WHERE task_id = ?", (task.task_id,))
+        task.task_id = None
+
+
+    def load_all(self) -> list[RecurringTask]:
+        """Returns every stored task, soonest due first. No template file is read."""
+        return self.__load()
+
+
+    def find_by_system(self, system: str) -> list[RecurringTask]:
+        """Returns the tasks for a system, ordered by title."""
+        return self.__load("WHERE system = ?", (system,), "title, due_date")
+
+
+    def find_by_title(self, title: str) -> list[RecurringTask]:
+        """Returns the tasks with a title, ordered by system."""
+        return self.__load("WHERE title = ?", (title,), "system, due_date")
+
+
+    def history(self, task_id: int) -> list[str]:
+        """Returns the numbers of the workorders a task has produced, oldest first."""
+        with self.__lock:
+            rows = self.__connection().execute(
+                "SELECT wo_number FROM recurring_history WHERE task_id = ? ORDER BY position",
+                (task_id,)).fetchall()
+        return [row[0] for row in rows]
+
+
+    def close(self) -> None:
+        """Closes the database connection. It is reopened automatically on next use."""
+        with self.__lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+
+recurring_store: RecurringStore = RecurringStore()
@@ -1,6 +1,8 @@
 
 from datetime import date, timedelta
+from typing import Self
 
+from appfiles.library.template_library import template_library
 from appfiles.library.workorder import WorkOrder
 
 # BCOBB: Create a "routine task" class that will be used for standard scheduling
@@ -32,44 +34,90 @@ class RecurringTask:
     """A relatively simple class with a few fields which defines WorkOrders which are meant to
     be repeated.\n
     It does not inherit the WorkOrder class: instead, it stores a reference to a .twois file which
-    acts as a template from which workorder objects are created.
+    acts as a template from which workorder objects are created.\n
+    'task_id' is the key of the task in the RecurringStore, or None if it has not been stored.
     """
     def __init__(self, template: WorkOrder, due_date: date, title: str, sys: str, cycle: int):
+        if cycle < 1:
+            raise ValueError(f"A recurring task must recur at least every day, not {cycle}")
         self.due_date: date = due_date
         self.title: str = title
         self.system: str = sys
         self.recur: int = cycle
         self.history: list[str] = []
         self.template_file = template.save_as_wo_template(f"{sys} - {cycle}")
+        self.task_id: int | None = None
         self.active_workorder: WorkOrder
 
     def __str__(self) -> str:
         resp: str = f"{self.recur}-Day {self.title} ({self.system})"
         return resp
 
+    @classmethod
+    def from_record(cls, task_id: int, due_date: date, title: str, system: str, cycle: int,
+                    template_file: str, history: list[str]) -> Self:
+        """Rebuilds a RecurringTask from its fields, as stored by the RecurringStore. Unlike
+        the constructor, this does not write a template: 'template_file' is the one that was
+        written when the task was created, and it is not read until it is needed."""
+        resp: Self = cls.__new__(cls)
+        resp.due_date = due_date
+        resp.title = title
+        resp.system = system
+        resp.recur = cycle
+        resp.history = history
+        resp.template_file = template_file
+        resp.task_id = task_id
+        return resp
+
     def iterate(self, wo: WorkOrder) -> None:
         """Signals the completion of the task"""
         self.history.append(wo.wo_number)
         self.update_due_date()
 
-    #BCOBB: Finish this method
-    def update_due_date(self) -> None:
-        """Increase the due date by 'd' number of days, where 'd' is the integervalue of the
-        recurrence field.
+    def update_due_date(self, today: date | None = None) -> None:
+        """Moves the due date to the first occurrence after today, however many cycles that
+        skips. A due date that is already in the future is left alone.
         """
-        if self.due_date > date.today():
+        today = date.today() if today is None else today
+        if self.due_date > today:
             return
-        self.due_date += timedelta(days=self.recur)
+        self.due_date = self.next_occurrence(today + timedelta(days=1))
+
+    def next_occurrence(self, day: date) -> date:
+        """Returns the first occurrence of the task on or after 'day'. Occurrences fall every
+        'recur' days from the due date, and are worked out directly rather than by stepping
+        through each cycle."""
+        if day <= self.due_date:
+            return self.due_date
+        cycles: int = -(-(day - self.due_date).days // self.recur)
+        return self.due_date + timedelta(days=cycles * self.recur)
+
+    def last_occurrence(self, day: date) -> date | None:
+        """Returns the last occurrence of the task on or before 'day', or None if the due date
+        is after 'day'."""
+        if day < self.due_date:
+            return None
+        cycles: int = (day - self.due_date).days // self.recur
+        return self.due_date + timedelta(days=cycles * self.recur)
 
     def update_template(self, wo: WorkOrder) -> None: #type:ignore
         """(will update the workorder by passing in a new work order object)"""
         wo.save_as_wo_template(self.template_file)
 
-    #BCOBB: Finish this method (load .twois file into WO object and return the WO object)
     def get_template_workorder(self) -> WorkOrder:
-        """will load the .twois file into a WorkOrder object and return it."""
-        print("BCOBB: TO-DO! - Get workorder template from the recurring task")
-        return WorkOrder()
+        """Returns the template .twois file as a WorkOrder object from the template library,
+        which only reads the file if it has changed since it was last used. The WorkOrder is
+        shared, so use create_workorder() to get one that can be changed. Raises an OSError
+        if the template cannot be read, or a TwoisFormatError if it is corrupt."""
+        return template_library.prototype(self.template_file)
+
+    def create_workorder(self, due_date: date, template: WorkOrder | None = None) -> WorkOrder:
+        """Returns a new, unsaved pending WorkOrder for the occurrence of the task due on
+        'due_date', made from the task's template. A template that has already been loaded can
+        be passed in so that it is not read again."""
+        if template is None:
+            template = self.get_template_workorder()
+        return WorkOrder.from_template(template, due_date)
 
         #BCOBB: Have enums to support the following:
         # recurring task type (AV scan, AV Update, CVA Scan, Root Password Update)
@@ -1,12 +1,12 @@
-from dataclasses import dataclass
 from datetime import date
+import sys
+from typing import Self
 
 from appfiles.library.completiondata import TaskCompletionData
-from appfiles.utils.utils import clamp
+from appfiles.utils.utils import clamp, restore_slots
 
 ARBITRARY_DATE: date = date(1989,5,30)
 
-@dataclass
 class TaskItem:
     """A data class which stores the basic information of a task item on a Work Order.
     Initially it only takes in a task number, summary, reference, and row number.
@@ -44,7 +44,13 @@ class TaskItem:
         self.hours: float
             This is the number of hours that the work took to complete. Needs to be in increments of
             0.1, Defaults to -1.0.
+
+    TaskItems use __slots__, since an archive holds one for every task of every workorder. Two
+    TaskItems are equal if all of their fields are equal.
     """
+    __slots__ = ('number', 'summary', 'reference', 'planned_row', 'actuals_row',
+                 'completion_date', 'technician', 'qty_techs', 'hours')
+
     def __init__(self, task_number: int, summary: str, ref: str, row: int) -> None:
         self.number: int = task_number
         self.summary: str = summary
@@ -59,12 +65,46 @@ class TaskItem:
     def __str__(self) -> str:
         return self.summary
 
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.number}, {self.summary!r}, {self.reference!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TaskItem):
+            return NotImplemented
+        return self.fields() == other.fields()
+
+    __hash__ = None     #type: ignore
+
+    def __setstate__(self, state: dict | tuple) -> None:
+        restore_slots(self, state)
+
+    @classmethod
+    def from_record(cls, number: int, summary: str, reference: str, planned_row: int,
+                    actuals_row: int, completion_date: date, technician: str, qty_techs: int,
+                    hours: float) -> Self:
+        """Rebuilds a TaskItem from the values of fields(), as stored by a serializer. The
+        rows are taken as they are, since they were already clamped when the task was made."""
+        resp: Self = cls.__new__(cls)
+        for name, value in zip(TaskItem.__slots__, (number, summary, reference, planned_row,
+                                                   actuals_row, completion_date,
+                                                   sys.intern(technician), qty_techs, hours)):
+            object.__setattr__(resp, name, value)
+        return resp
+
+    def fields(self) -> tuple:
+        """Returns the value of every field, in the order they are declared in __slots__."""
+        return tuple(getattr(self, name) for name in TaskItem.__slots__)
+
+    def copy(self) -> 'TaskItem':
+        """Returns a mutable copy of this task item."""
+        return TaskItem.from_record(*self.fields())
+
     def complete(self, data: TaskCompletionData) -> bool:
         """Applies completion data to the task item object."""
         if self.is_complete():
             return False
         self.completion_date = data.cdate
-        self.technician = data.tech
+        self.technician = sys.intern(data.tech)
         self.qty_techs = data.qty_techs
         self.hours = data.hours
         return True
@@ -72,3 +112,38 @@ class TaskItem:
     def is_complete(self) -> bool:
         """Checks if the workorder is complete by checking some completion values"""
         return self.qty_techs > 0 and self.hours > 0
+
+
+class FrozenTaskItem(TaskItem):
+    """An immutable TaskItem. The standard safety and 'required' tasks are shared by every
+    workorder that uses them, so they are frozen to stop a change to one workorder's task from
+    showing up in all of the others. Use copy() to get a TaskItem that can be changed.
+    """
+    __slots__ = ()
+
+    def __init__(self, task_number: int, summary: str, ref: str, row: int) -> None:
+        for name, value in zip(TaskItem.__slots__,
+                               TaskItem(task_number, summary, ref, row).fields()):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"'{type(self).__name__}' is immutable, use copy() to change it")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"'{type(self).__name__}' is immutable, use copy() to change it")
+
+    def __reduce__(self) -> tuple:
+        return (shared_task, (self.copy(),))
+
+
+SAFETY_TASK: FrozenTaskItem = FrozenTaskItem(0, "Safety Message", "", 15)
+REQUIRED_TASK: FrozenTaskItem = FrozenTaskItem(10, "TASK DESCRIPTION REQUIRED",
+                                               "REFERENCE REQUIRED", 16)
+__SHARED_TASKS: dict[tuple, FrozenTaskItem] = {task.fields(): task
+                                               for task in (SAFETY_TASK, REQUIRED_TASK)}
+
+
+def shared_task(task: TaskItem) -> TaskItem:
+    """Takes a TaskItem and returns the shared, frozen copy of it if it is one of the standard
+    tasks, or the TaskItem itself if it is not."""
+    return __SHARED_TASKS.get(task.fields(), task)
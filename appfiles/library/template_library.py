@@ -0,0 +1,191 @@
+"""Module which provides the TemplateLibrary class, which lists the workorder templates in the
+templates directory and stamps out new pending workorders from them.\n
+Templates are .twois files saved with WorkOrder.save_as_wo_template(). The library keeps the
+header of every template (its title, site, special, type and so on) keyed by path, and only
+reads the header of a file again when its modification time or size changes.\n
+Making a workorder from a template used to mean loading the template's file. The library
+instead keeps a fully loaded prototype WorkOrder for each of the most recently used templates,
+evicting the least recently used one once it holds 'capacity' of them. The tasks of a prototype
+are frozen, so every workorder made from it shares them, and a task is only copied when it is
+completed (see WorkOrder.complete_task()). Making a workorder from a cached prototype therefore
+copies a dict of fields and reads nothing from disk.
+"""
+
+from collections import OrderedDict
+from datetime import date
+import os
+from threading import RLock
+from typing import Iterable, NamedTuple
+
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.taskitem import FrozenTaskItem, shared_task
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_type import WorkOrderType
+from appfiles.utils.appglobals import TEMPLATE_DIR
+from appfiles.utils import twois_codec
+from appfiles.utils.twois_codec import TwoisFormatError
+
+DEFAULT_CAPACITY: int = 32
+
+
+class TemplateInfo(NamedTuple):
+    """The header of one template file, as listed by the library."""
+    filepath: str
+    name: str
+    title: str
+    site: Site
+    special: Special
+    type: WorkOrderType
+    priority: int
+    building: int
+    room: int
+
+
+class _CachedPrototype(NamedTuple):
+    """A loaded template along with the (mtime, size) of the file it was loaded from."""
+    stamp: tuple[int, int]
+    workorder: WorkOrder
+
+
+class TemplateLibrary:
+    """A class which lists the templates in a directory and keeps the most recently used of them
+    loaded, so that workorders can be made from them without reading their files.
+
+    Public Methods
+    -------------------------
+        refresh() -> bool:
+            Brings the list of templates up to date with the directory.
+
+        templates() -> list[TemplateInfo]:
+            Every template in the directory, ordered by title.
+
+        prototype(filepath: str) -> WorkOrder:
+            The loaded template at a path. It is shared and must not be changed.
+
+        create(filepath: str, due_date: date | None = None) -> WorkOrder:
+            A new, unsaved pending workorder made from a template.
+
+        create_many(filepath: str, due_dates: Iterable[date]) -> list[WorkOrder]:
+            One new, unsaved pending workorder per due date, made from a template.
+
+        invalidate(filepath: str | None = None) -> None:
+            Forgets one cached template, or all of them.
+    """
+    def __init__(self, directory: str = TEMPLATE_DIR, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.directory: str = directory
+        self.capacity: int = capacity
+        self.__infos: dict[str, tuple[tuple[int, int], TemplateInfo | None]] = {}
+        self.__prototypes: OrderedDict[str, _CachedPrototype] = OrderedDict()
+        self.__lock: RLock = RLock()
+
+
+    ########### PRIVATE METHODS
+    @staticmethod
+    def __stamp(filepath: str) -> tuple[int, int]:
+        stat: os.stat_result = os.stat(filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+    @staticmethod
+    def __read_info(filepath: str, name: str) -> TemplateInfo:
+        header: dict = twois_codec.load_header(filepath)
+        return TemplateInfo(filepath, name, header['title'], header['site'], header['special'],
+                            header['type'], header['priority'], header['building'],
+                            header['room'])
+
+
+    @staticmethod
+    def __load_prototype(filepath: str) -> WorkOrder:
+        """Loads a template and freezes its tasks, clearing anything that was recorded against
+        them, so that every workorder made from it can share them."""
+        resp: WorkOrder = WorkOrder.from_twois(filepath)
+        resp.task_list = [shared_task(FrozenTaskItem(task.number, task.summary, task.reference,
+                                                     task.planned_row))
+                          for task in resp.task_list]
+        return resp
+
+
+    ########### PUBLIC METHODS
+    def refresh(self) -> bool:
+        """Lists the directory and re-reads the header of every template that is new or has
+        changed since the last refresh. Templates that cannot be read are left out, and are
+        not read again until they change. Returns true if anything changed."""
+        found: dict[str, tuple[tuple[int, int], TemplateInfo | None]] = {}
+        changed: bool = False
+        try:
+            with os.scandir(self.directory) as entries:
+                files: list[tuple[str, str, tuple[int, int]]] = [
+                    (entry.path, entry.name[:-len(".twois")],
+                     (entry.stat().st_mtime_ns, entry.stat().st_size))
+                    for entry in entries if entry.name.endswith(".twois") and entry.is_file()]
+        except OSError:
+            files = []
+        with self.__lock:
+            for filepath, name, stamp in files:
+                known: tuple[tuple[int, int], TemplateInfo | None] | None = \
+                    self.__infos.get(filepath)
+                if known is not None and known[0] == stamp:
+                    found[filepath] = known
+                    continue
+                changed = True
+                try:
+                    found[filepath] = (stamp, self.__read_info(filepath, name))
+                except (OSError, KeyError, TwoisFormatError):
+                    found[filepath] = (stamp, None)
+            changed = changed or found.keys() != self.__infos.keys()
+            self.__infos = found
+        return changed
+
+
+    def templates(self) -> list[TemplateInfo]:
+        """Returns the header of every template found by the last refresh(), ordered by title
+        and then by name."""
+        with self.__lock:
+            return sorted((info for _, info in self.__infos.values() if info is not None),
+                          key=lambda info: (info.title.casefold(), info.name))
+
+
+    def prototype(self, filepath: str) -> WorkOrder:
+        """Returns the loaded template at 'filepath', reading the file only if it is not cached
+        or has changed since it was cached. The WorkOrder returned is shared by every caller, so
+        it must not be changed or saved; use create() to get one that can be. Raises an OSError
+        if the file cannot be read, or a TwoisFormatError if it is corrupt."""
+        stamp: tuple[int, int] = self.__stamp(filepath)
+        with self.__lock:
+            cached: _CachedPrototype | None = self.__prototypes.get(filepath)
+            if cached is not None and cached.stamp == stamp:
+                self.__prototypes.move_to_end(filepath)
+                return cached.workorder
+            cached = _CachedPrototype(stamp, self.__load_prototype(filepath))
+            self.__prototypes[filepath] = cached
+            self.__prototypes.move_to_end(filepath)
+            while len(self.__prototypes) > self.capacity:
+                self.__prototypes.popitem(last=False)
+            return cached.workorder
+
+
+    def create(self, filepath: str, due_date: date | None = None) -> WorkOrder:
+        """Returns a new, unsaved pending workorder made from the template at 'filepath'. See
+        WorkOrder.from_template()."""
+        return WorkOrder.from_template(self.prototype(filepath), due_date)
+
+
+    def create_many(self, filepath: str, due_dates: Iterable[date]) -> list[WorkOrder]:
+        """Returns one new, unsaved pending workorder per due date, all made from the template
+        at 'filepath', which is checked on disk once."""
+        template: WorkOrder = self.prototype(filepath)
+        return [WorkOrder.from_template(template, due_date) for due_date in due_dates]
+
+
+    def invalidate(self, filepath: str | None = None) -> None:
+        """Forgets the cached prototype of 'filepath', or every cached prototype if it is
+        None."""
+        with self.__lock:
+            if filepath is None:
+                self.__prototypes.clear()
+            else:
+                self.__prototypes.pop(filepath, None)
+
+
+template_library: TemplateLibrary = TemplateLibrary()
@@ -0,0 +1,192 @@
+"""Module which provides the TWOISWorkbook class, a single-open parsing session for TWOIS
+excel spreadsheets."""
+
+from typing import Self
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook, Workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from openpyxl.worksheet.worksheet import Worksheet
+
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.workorder_dict import WorkOrderDict
+from appfiles.library.workorder_type import WorkOrderType
+from appfiles.utils.twois_layout import CLASSIFICATION_CELLS, HEADER_CELLS, MATCH_CELLS
+from appfiles.utils.twois_layout import SheetValues
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
+from appfiles.utils.utils import yes_no_string_to_bool
+import appfiles.utils.workorder as woutils
+
+
+class TWOISWorkbook:
+    """A parsing session for a single TWOIS .xlsx file.\n
+    The status checks are answered by the streaming reader in xlsx_scan, which only reads the
+    first few rows of the sheet. The file is opened with openpyxl at most once, the first time
+    the session is asked for its fields or its workbook, and every field is then answered from
+    one bulk SheetValues snapshot of that Worksheet. A caller like WorkOrder.approve() that
+    rejects a file therefore never pays for a full parse, and one that accepts it pays once.
+
+    Public Methods
+    -------------------------
+        input_status() -> ExcelFileStatus:
+            The same result as woutils.input_file_status() for this file.
+
+        approved_status() -> ExcelFileStatus:
+            The same result as woutils.approved_file_status() for this file.
+
+        get_worksheet() -> Worksheet:
+            The active worksheet of the loaded workbook. Only valid if input_status() is
+            ExcelFileStatus.IS_VALID.
+
+        get_workbook() -> Workbook:
+            The loaded workbook itself, so that it can be modified and saved back out.
+
+        get_values() -> SheetValues:
+            The snapshot of every mapped TWOIS cell, taken once from the worksheet.
+
+        get_match_values() -> SheetValues:
+            The cells in twois_layout.MATCH_CELLS, read with the streaming reader unless the
+            workbook is already loaded, so that a file can be matched to a workorder without
+            a full parse.
+
+        get_workorder_kwargs(description: str) -> WorkOrderDict:
+            Builds the kwargs for a WorkOrder object from the contents of the worksheet.
+
+        close() -> None:
+            Releases the workbook. The session can also be used as a context manager.
+    """
+    def __init__(self, filepath: str) -> None:
+        self.filepath: str = filepath
+        self.__workbook: Workbook | None = None
+        self.__values: SheetValues | None = None
+        self.__match_values: SheetValues | None = None
+        self.__sentinels: SheetValues | None = None
+        self.__input_status: ExcelFileStatus | None = None
+        self.__approved_status: ExcelFileStatus | None = None
+
+
+    def __enter__(self) -> Self:
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def __classify(self) -> ExcelFileStatus:
+        """Reads the sentinel cells with the streaming reader if that has not been attempted
+        yet and records the result of the basic TWOIS check."""
+        if self.__input_status is not None:
+            return self.__input_status
+
+        self.__input_status = woutils.filepath_status(self.filepath)
+        if self.__input_status != ExcelFileStatus.IS_VALID:
+            return self.__input_status
+
+        try:
+            self.__sentinels = scan_cells(self.filepath, CLASSIFICATION_CELLS)
+        except XlsxScanError:
+            self.__input_status = ExcelFileStatus.NOT_TWOIS
+            return self.__input_status
+
+        self.__input_status = woutils.worksheet_input_status(self.__sentinels)
+        return self.__input_status
+
+
+    def input_status(self) -> ExcelFileStatus:
+        """Returns the result of the basic TWOIS file check."""
+        return self.__classify()
+
+
+    def approved_status(self) -> ExcelFileStatus:
+        """Returns the result of the approved TWOIS file check."""
+        if self.__approved_status is None:
+            self.__approved_status = self.__classify()
+            if self.__approved_status == ExcelFileStatus.IS_VALID:
+                self.__approved_status = woutils.worksheet_approved_status(self.__sentinels)
+        return self.__approved_status
+
+
+    def get_worksheet(self) -> Worksheet:
+        """Returns the active worksheet of the loaded workbook."""
+        return self.get_workbook().active
+
+
+    def get_workbook(self) -> Workbook:
+        """Returns the loaded workbook, loading it on first use. Raises a ValueError if the
+        file is not a valid TWOIS file."""
+        if self.__workbook is None:
+            if self.__classify() != ExcelFileStatus.IS_VALID:
+                raise ValueError(f"'{self.filepath}' is not a readable TWOIS file")
+            try:
+                self.__workbook = load_workbook(filename=self.filepath)
+            except (InvalidFileException, BadZipFile, KeyError) as ex:
+                raise ValueError(f"'{self.filepath}' is not a readable TWOIS file") from ex
+        return self.__workbook
+
+
+    def get_values(self) -> SheetValues:
+        """Returns the bulk snapshot of the worksheet's mapped cells, taking it on first use.
+        The snapshot is not refreshed if the workbook is modified afterwards."""
+        if self.__values is None:
+            self.__values = SheetValues.from_worksheet(self.get_worksheet())
+        return self.__values
+
+
+    def get_match_values(self) -> SheetValues:
+        """Returns the values of the cells that identify a workorder. If the workbook has not
+        been loaded, they are read with the streaming reader instead, which leaves dates as
+        serial numbers. Raises a ValueError if the file is not a valid TWOIS file."""
+        if self.__workbook is not None or self.__values is not None:
+            return self.get_values()
+        if self.__match_values is None:
+            if self.__classify() != ExcelFileStatus.IS_VALID:
+                raise ValueError(f"'{self.filepath}' is not a readable TWOIS file")
+            try:
+                self.__match_values = scan_cells(self.filepath, MATCH_CELLS)
+            except XlsxScanError as ex:
+                raise ValueError(f"'{self.filepath}' is not a readable TWOIS file") from ex
+        return self.__match_values
+
+
+    def get_workorder_kwargs(self, description: str) -> WorkOrderDict:
+        """Builds and returns the kwargs for a WorkOrder object from the worksheet. The
+        description is passed straight through, since it is not part of the excel file.
+        """
+        ws: SheetValues = self.get_values()
+        _ncr_required: bool = yes_no_string_to_bool(str(ws.field('ncr_required')))
+
+        resp: WorkOrderDict = WorkOrderDict(
+            due_date = woutils.get_date_from_xlsx_cell(ws, HEADER_CELLS['due_date']),
+            wo_number = woutils.get_wo_number_from_xlsx_cell(ws),
+            site = Site.parse(str(ws.field('site'))),
+            special = Special.parse(str(ws.field('special'))),
+            title = woutils.get_title_from_xlsx_cell(ws),
+            type = WorkOrderType.parse(str(ws.field('type'))),
+            priority = woutils.get_priority_from_xlsx_cell(ws),
+            creator = woutils.get_creator_from_xlsx_cell(ws),
+            building = woutils.get_building_from_xlsx_cell(ws),
+            room = woutils.get_room_from_xlsx_cell(ws),
+            related_wo = woutils.get_related_wo_from_xlsx_cell(ws),
+            pac_required = woutils.is_pac_required_per_xlsx(ws),
+            ncr_required = _ncr_required,
+            ncr_number = woutils.get_ncr_number_from_xlsx_cell(ws, _ncr_required),
+            task_lead_required = yes_no_string_to_bool(str(ws.field('task_lead_required'))),
+            tech_witness_point = yes_no_string_to_bool(str(ws.field('tech_witness_point'))),
+            peer_review_required = yes_no_string_to_bool(str(ws.field('peer_review_required'))),
+            peer_review_attached = yes_no_string_to_bool(str(ws.field('peer_review_attached'))),
+            ehs_required = yes_no_string_to_bool(str(ws.field('ehs_required'))),
+            qamip = yes_no_string_to_bool(str(ws.field('qamip'))),
+            qa_review_required = yes_no_string_to_bool(str(ws.field('qa_review_required'))),
+            task_list = woutils.get_task_list_from_xlsx_cells(ws),
+            comments = woutils.get_comments_from_xlsx_cells(ws),
+            description=description)
+        return resp
+
+
+    def close(self) -> None:
+        """Closes the workbook if one was loaded."""
+        if self.__workbook is not None:
+            self.__workbook.close()
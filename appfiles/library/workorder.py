@@ -4,34 +4,40 @@
 ############### IMPORT STATEMENTS #############################################
 
 import os
-import pickle
+from contextlib import contextmanager
 from datetime import date
-from typing import Self, Unpack
+from typing import Iterator, Self, Unpack
 
-from openpyxl import load_workbook, Workbook
+from openpyxl import Workbook
 from openpyxl.styles import Alignment
 from openpyxl.worksheet.worksheet import Worksheet
 
-from appfiles.library.completiondata import WorkorderCompletionData
+from appfiles.library.completiondata import TaskCompletionData, WorkorderCompletionData
 from appfiles.utils.appglobals import COMPLETE_DIR, IN_PROGRESS_DIR, TEMPLATE_DIR, TEMPLATE_TWOIS
 from appfiles.utils.appglobals import default_building, default_room
 from appfiles.utils.appglobals import primary_user
 from appfiles.utils.utils import bool_to_yes_no_string, name_to_initials
-from appfiles.utils.utils import create_dated_directories, yes_no_string_to_bool, is_within_bounds
-from appfiles.utils.utils import safe_rename, date_to_string, make_string_filepath_friendly
+from appfiles.utils.utils import create_dated_directories, is_within_bounds
+from appfiles.utils.utils import date_to_string, make_string_filepath_friendly
 import appfiles.utils.workorder as woutils
+from appfiles.utils.file_transaction import FileTransaction
+from appfiles.utils.fingerprint import workorder_fingerprint
+from appfiles.utils.template_cache import load_template
+from appfiles.utils import twois_codec
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.twois_layout import SheetValues
+from appfiles.utils.xlsx_patch import XlsxPatchError, patch_cells
 
 from appfiles.library.excelfilestatus import ExcelFileStatus
 from appfiles.library.logcomment import LogComment
 from appfiles.library.site import Site, default_site
 from appfiles.library.special import Special, default_special
-from appfiles.library.taskitem import TaskItem
+from appfiles.library.taskitem import FrozenTaskItem, REQUIRED_TASK, SAFETY_TASK, TaskItem
+from appfiles.library.twoisworkbook import TWOISWorkbook
+from appfiles.library.workorder_index import workorder_index
 from appfiles.library.workorder_dict import WorkOrderDict
 from appfiles.library.workorder_type import WorkOrderType, default_wotype
 
-SAFETY_TASK: TaskItem = TaskItem(0, "Safety Message", "", 15)
-REQUIRED_TASK: TaskItem = TaskItem(10, "TASK DESCRIPTION REQUIRED", "REFERENCE REQUIRED", 16)
-
 
 ############### PRIMARY CLASS DEFINITION ######################################
 
@@ -57,7 +63,9 @@ class WorkOrder:
         wo_number : str
             The string that represents the workorder. Is either \"Pending-###\"
             or a six-digit approved TWOIS number.
-            Default: The next available "Pending" workorder number.
+            Default: The next available "Pending" workorder number. It is reserved the first
+            time the field is read, and committed when the workorder is saved. A reservation
+            that is never saved is given back when the object is garbage collected.
 
         site : Site(Enum) = 
             An enum that represents all of the different sites available on the
@@ -156,7 +164,9 @@ class WorkOrder:
                 planned_row = 15
                 actuals_row = 32
             Note: For more details on the TaskItem object, check the documentation
-            associated with the TaskItem class.
+            associated with the TaskItem class. The default tasks are the shared, frozen
+            SAFETY_TASK and REQUIRED_TASK, which are replaced with a copy of themselves if they
+            ever need to change.
 
         comments: list[LogComments]
             A list of all of the log comments. Must be in the
@@ -170,10 +180,14 @@ class WorkOrder:
             the workorder is completed. It consists of a start date, end date,
             restoration date, and repair time.
 
+        Note: A WorkOrder loaded with from_twois_header() only reads the header of its .twois
+        file. The description, task_list, comments and completion_data fields are read from
+        the rest of the file the first time one of them is used.
+
     Public Methods        
     -------------------------
         save() -> None:
-            Method which saves the workorder both as a .twois file, which is a pickle serialization
+            Method which saves the workorder both as a .twois file, which is a binary serialization
             of the object, as well as saves the .xlsx workorder spreadsheet. An optional filepath
             can be provided to determine the location of the file. If left blank, the files will be
             saved into the in_progress directory.
@@ -182,7 +196,8 @@ class WorkOrder:
             A method which enables a user to edit an existing WorkOrder object by entering a new
             value for any of its fields using kwargs.
 
-        approve(filename: str) -> ExcelFileStatus:
+        approve(filename: str, override: bool = False,
+                remove_source: bool = False) -> ExcelFileStatus:
             A method which "approves" the WorkOrder object. It takes in a path to a file and
             analyzes it, and if it determines that the workorder is approved, it delets the
             existing work order files and replaces them with the approved files. This should
@@ -191,12 +206,20 @@ class WorkOrder:
         delete() -> None:
             A method which is used to permanently delete a work order's files.
 
+        from_twois_header(filename: str) -> WorkOrder:
+            A factory method which loads only the header of a .twois file, leaving the heavy
+            fields to be read on first use.
+
+        from_template(template: WorkOrder, due_date: date | None = None) -> WorkOrder:
+            A factory method which returns a new, unsaved pending workorder with the header,
+            description and tasks of a template workorder.
+
         save_as_wo_template(filename: str) -> str:
             Method which serializes the WorkOrder object as a .twois file using the
-            pickle library. This file is typically saved in the 'templates' directory. It takes in a
-            name for the file. If you put a full existsing filepath or a filename including the
-            .twois in as the argument, the workorder will simply be created, overwriting the
-            existing file.
+            twois_codec module. This file is typically saved in the 'templates' directory. It
+            takes in a name for the file. If you put a full existsing filepath or a filename
+            including the .twois in as the argument, the workorder will simply be created,
+            overwriting the existing file.
 
         get_full_workorder_number() -> str:
             A simple method which returns the full workorder number, which is formatted as
@@ -209,6 +232,10 @@ class WorkOrder:
             Returns true if the operation was successful, and false if the list is full. The list
             maxes out at 24 logs.
 
+        complete_task(index: int, data: TaskCompletionData) -> bool:
+            Applies completion data to the task at 'index' in the task list. Returns false if
+            the task was already complete.
+
         complete(completion_date: date) -> None:
             Method that is called when a workorder is complete. Takes in a completion date which
             should be gotten from the form that will call this method. It deletes the .twois
@@ -221,6 +248,25 @@ class WorkOrder:
             excel TWOIS file that matches the details of this workorder. Otherwise, it returns 
             false.
 
+        fingerprint() -> str:
+            The fingerprint of the title, due date and task summaries, which is what an
+            approved spreadsheet is matched against. See appfiles.utils.fingerprint.
+
+        batch() -> Iterator[WorkOrder]:
+            A context manager which holds back every save() made inside it, such as the one
+            made by log_comment(), and saves once when it exits if any were made.
+
+        has_unsaved_changes() -> bool:
+            Returns true if any field has changed since the workorder was last saved or loaded.
+
+        Note: A WorkOrder keeps track of which fields have changed since it was last saved or
+        loaded. save() does nothing if none have, and otherwise only rewrites the cells of the
+        spreadsheet that those fields fill.
+
+        Note: save(), edit(), approve(), delete() and complete() each apply all of their file
+        changes in a single FileTransaction, so a crash or a locked file cannot leave an
+        orphaned or half-written pair of files behind. See appfiles.utils.file_transaction.
+
         is_approved() -> bool:
             Analyzes the work order number which is either "Pending-###" or "######ABC" and
             determines whether or not a workorder is approved. If the workorder has been assigned
@@ -240,14 +286,23 @@ class WorkOrder:
     DEFAULT_DESCRIPTION: str = "No description of task provided"
     MAX_TITLE: int = 60
     DEFAULT_TITLE: str = "No title provided"
+    # The block of spreadsheet cells that each field fills, for the fields that do not fill the
+    # header. The description is only stored in the .twois file.
+    FIELD_SECTIONS: dict[str, str | None] = {'task_list': 'tasks', 'comments': 'comments',
+                                             'completion_data': 'completion',
+                                             'description': None}
 
 
     ########### DUNDER METHODS
     def __init__(self, **kwargs: Unpack[WorkOrderDict]) -> None: #type:ignore
+        # A new workorder has no files yet, so all of it is unsaved
+        self.__dirty: set[str] | None = None
+
         # Declare fields and set defaults
         self.description: str = self.DEFAULT_DESCRIPTION
         self.due_date: date = date.today()
-        self.wo_number: str = woutils.determine_pending_number()
+        self.__wo_number: str | None = None
+        self.__reservation: int | None = None
         self.site: Site = default_site
         self.special: Special = default_special
         self.title: str = self.DEFAULT_TITLE
@@ -274,8 +329,55 @@ class WorkOrder:
         # Populate the fields with kwargs and establish private filenames
         self.__populate_fields(**kwargs)
         self.__save_dir: str = IN_PROGRESS_DIR
-        self.__twois_filename: str = f"{self.get_full_workorder_number()}.twois"
-        self.__excel_filename: str = f"{self.get_full_workorder_number()} - {self.title}.xlsx"
+        self.__lazy_source: str | None = None
+        self.__header_fingerprint: str | None = None
+        self.__batch_depth: int = 0
+        self.__save_deferred: bool = False
+
+
+    def __getstate__(self) -> dict:
+        self.__hydrate()
+        state: dict = self.__dict__.copy()
+        state['_WorkOrder__reservation'] = None
+        state['_WorkOrder__batch_depth'] = 0
+        state['_WorkOrder__save_deferred'] = False
+        state.pop('_WorkOrder__dirty', None)
+        return state
+
+
+    def __setstate__(self, state: dict) -> None:
+        # Files pickled before wo_number became a property store it as a plain attribute,
+        # along with filenames that are now derived from the other fields.
+        if 'wo_number' in state:
+            state['_WorkOrder__wo_number'] = state.pop('wo_number')
+        state.pop('_WorkOrder__twois_filename', None)
+        state.pop('_WorkOrder__excel_filename', None)
+        state['_WorkOrder__reservation'] = None
+        state.setdefault('_WorkOrder__save_dir', IN_PROGRESS_DIR)
+        state.setdefault('_WorkOrder__lazy_source', None)
+        state.setdefault('_WorkOrder__header_fingerprint', None)
+        state.setdefault('_WorkOrder__batch_depth', 0)
+        state.setdefault('_WorkOrder__save_deferred', False)
+        state.setdefault('_WorkOrder__dirty', set())
+        self.__dict__.update(state)
+
+
+    def __setattr__(self, name: str, value) -> None:
+        # Every public field that is assigned is recorded, so that save() knows what to write
+        if not name.startswith('_'):
+            dirty: set[str] | None = self.__dict__.get('_WorkOrder__dirty')
+            if dirty is not None:
+                dirty.add(name)
+        super().__setattr__(name, value)
+
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are missing, which on a workorder loaded with
+        # from_twois_header() are the body fields that have not been read from its file yet.
+        if name in twois_codec.BODY_FIELDS and self.__dict__.get('_WorkOrder__lazy_source'):
+            self.__hydrate()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
 
     def __str__(self) -> str:
@@ -290,7 +392,52 @@ class WorkOrder:
                 self.due_date != other.due_date)
 
 
+    ########### PROPERTIES
+    @property
+    def wo_number(self) -> str:
+        """The workorder number. A pending workorder without one reserves the lowest available
+        Pending number the first time this is read."""
+        if self.__wo_number is None:
+            self.__wo_number, self.__reservation = woutils.reserve_pending_number(self)
+        return self.__wo_number
+
+
+    @wo_number.setter
+    def wo_number(self, value: str) -> None:
+        if self.__wo_number is not None and self.__reservation is not None:
+            woutils.cancel_pending_number(self.__wo_number, self.__reservation)
+        self.__wo_number = value
+        self.__reservation = None
+
+
     ########### PRIVATE METHODS
+    def __hydrate(self) -> None:
+        """Reads the body fields of a workorder loaded with from_twois_header() from its file.
+        Fields that have been assigned since it was loaded are kept."""
+        source: str | None = self.__dict__.get('_WorkOrder__lazy_source')
+        if source is None:
+            return
+        for name, value in twois_codec.load_body(source).items():
+            self.__dict__.setdefault(name, value)
+        self.__lazy_source = None
+        self.__header_fingerprint = None
+
+
+    def __mark_dirty(self, name: str) -> None:
+        """Records a change to a field that was made in place, which __setattr__ cannot see."""
+        if self.__dirty is not None:
+            self.__dirty.add(name)
+
+
+    def __mutable_task(self, index: int) -> TaskItem:
+        """Returns the task at 'index', first replacing it with a copy of itself if it is one
+        of the shared, frozen standard tasks."""
+        task: TaskItem = self.task_list[index]
+        if isinstance(task, FrozenTaskItem):
+            task = self.task_list[index] = task.copy()
+        return task
+
+
     def __populate_fields(self, **kwargs: Unpack[WorkOrderDict]) -> None: #type:ignore
         kw = kwargs.keys()
         if 'description' in kw and kwargs['description'].isalnum():
@@ -368,122 +515,242 @@ class WorkOrder:
             self.comments = kwargs['comments']
 
 
-    @staticmethod
-    def __get_kwargs_from_xlsx(filepath: str, descrip: str) -> WorkOrderDict:
-        wb: Workbook = load_workbook(filepath)
-        ws: Worksheet = wb.active
+    @classmethod
+    def __from_workbook(cls, book: TWOISWorkbook, description: str) -> Self:
+        """Builds a WorkOrder from an already open parsing session, or a 'default' WorkOrder
+        object if the session's file is not a valid TWOIS file."""
+        if book.input_status() == ExcelFileStatus.IS_VALID:
+            return cls(**book.get_workorder_kwargs(description))
+        return cls()
 
-        _ncr_required: bool = yes_no_string_to_bool(str(ws['A12'].value))
-
-        resp: WorkOrderDict = WorkOrderDict(
-            due_date = woutils.get_date_from_xlsx_cell(ws, 'B3'),
-            wo_number = woutils.get_wo_number_from_xlsx_cell(ws),
-            site = Site.parse(str(ws['B7'].value)),
-            special = Special.parse(str(ws['C7'].value)),
-            title = woutils.get_title_from_xlsx_cell(ws),
-            type = WorkOrderType.parse(str(ws['I7'].value)),
-            priority = woutils.get_priority_from_xlsx_cell(ws),
-            creator = woutils.get_creator_from_xlsx_cell(ws),
-            building = woutils.get_building_from_xlsx_cell(ws),
-            room = woutils.get_room_from_xlsx_cell(ws),
-            related_wo = woutils.get_related_wo_from_xlsx_cell(ws),
-            pac_required = woutils.is_pac_required_per_xlsx(ws),
-            ncr_required = _ncr_required,
-            ncr_number = woutils.get_ncr_number_from_xlsx_cell(ws, _ncr_required),
-            task_lead_required = yes_no_string_to_bool(str(ws['E12'].value)),
-            tech_witness_point = yes_no_string_to_bool(str(ws['F12'].value)),
-            peer_review_required = yes_no_string_to_bool(str(ws['G12'].value)),
-            peer_review_attached = yes_no_string_to_bool(str(ws['H12'].value)),
-            ehs_required = yes_no_string_to_bool(str(ws['I12'].value)),
-            qamip = yes_no_string_to_bool(str(ws['J12'].value)),
-            qa_review_required = yes_no_string_to_bool(str(ws['K12'].value)),
-            task_list = woutils.get_task_list_from_xlsx_cells(ws),
-            comments = woutils.get_comments_from_xlsx_cells(ws),
-            description=descrip)
-        return resp
 
+    def __matches_workbook(self, book: TWOISWorkbook, preapproved: bool = False) -> bool:
+        """The body of matches_file(), working from an already open parsing session so that
+        the caller's single load of the file can be reused."""
+        fstatus: ExcelFileStatus = ExcelFileStatus.IS_VALID
+        if not preapproved:
+            fstatus = book.approved_status()
+            if fstatus != ExcelFileStatus.IS_VALID and fstatus != ExcelFileStatus.NOT_APPROVED:
+                return False
+        elif book.input_status() != ExcelFileStatus.IS_VALID:
+            return False
+
+        ws: SheetValues = book.get_match_values()
+        if fstatus == ExcelFileStatus.IS_VALID and self.__is_approved_per(book):
+            return (self.get_full_workorder_number()
+                    == woutils.get_full_wo_number_from_xlsx_cell(ws))
 
-    def __save_as_twois_file(self) -> str:
-        """Method which serializes the WorkOrder object as a .twois file using the
-        pickle library.
+        othertasks: list[TaskItem] = woutils.get_task_list_from_xlsx_cells(ws)
+        alltasksaregood: bool = len(othertasks) >= len(self.task_list)
+        for thistask, othertask in zip(self.task_list, othertasks):
+            if othertask.summary != thistask.summary:
+                alltasksaregood = False
+                break
+        due_date: date = woutils.get_date_from_xlsx_cell(ws, layout.HEADER_CELLS['due_date'])
+        return (self.due_date == due_date and
+                self.title == woutils.get_title_from_xlsx_cell(ws) and
+                alltasksaregood)
+
+
+    def __is_approved_per(self, book: TWOISWorkbook) -> bool:
+        """Same as is_approved(), but if the open session is this workorder's own excel file
+        then the session's approval check is reused instead of loading the file again."""
+        if book.filepath != self.get_excel_filepath():
+            return self.is_approved()
+        return (book.approved_status() == ExcelFileStatus.IS_VALID and
+                self.is_approved(False))
+
+
+    def __changed_sections(self) -> set[str] | None:
+        """Returns the blocks of spreadsheet cells that hold fields which have changed since the
+        last save, or None if the whole spreadsheet has to be written."""
+        if self.__dirty is None:
+            return None
+        return {self.FIELD_SECTIONS.get(name, 'header') for name in self.__dirty} - {None}
+
+
+    def __get_cell_values(self, sections: set[str] | None = None
+                          ) -> dict[tuple[int, int], str | int | None]:
+        """Builds the value of every TWOIS cell that this workorder writes, keyed by (row, column)
+        position according to the maps in twois_layout. Also updates the row fields of the task
+        items and log comments to match the rows they are written to. If 'sections' is given,
+        only the cells of those blocks ('header', 'tasks', 'comments', 'completion') are built.
         """
-        fp = f"{self.__save_dir}\\{self.__twois_filename}"
-        with open(fp, "wb") as outfile:
-            pickle.dump(self, outfile)
-        return fp
+        resp: dict[tuple[int, int], str | int | None] = {}
+        if sections is None or 'header' in sections:
+            resp.update(self.__get_header_values())
+        if sections is None or 'tasks' in sections:
+            resp.update(self.__get_task_values())
+        if sections is None or 'comments' in sections:
+            logs: layout.RowBlock = layout.LOG_COMMENTS
+            for i, comment in enumerate(self.comments[:logs.size]):
+                comment.set_row(logs.first_row + i)
+                resp[logs.position(i, 'text')] = comment.text
+                resp[logs.position(i, 'person')] = str(comment.person)
+                resp[logs.position(i, 'date')] = date_to_string(comment.date)
+        if (sections is None or 'completion' in sections) and self.completion_data is not None:
+            cells: dict[str, tuple[int, int]] = layout.COMPLETION_POSITIONS
+            resp[cells['startdate']] = date_to_string(self.completion_data.startdate)
+            resp[cells['enddate']] = date_to_string(self.completion_data.enddate)
+            resp[cells['restoredate']] = date_to_string(self.completion_data.restoredate)
+            resp[cells['repairtime']] = f"{str(self.completion_data)}"
+        return resp
+
+
+    def __get_header_values(self) -> dict[tuple[int, int], str | int | None]:
+        header: dict[str, str | int | None] = {
+            'due_date': date_to_string(self.due_date),
+            'status': 'RS',
+            'creator_initials': name_to_initials(self.creator),
+            'wo_number': "" if self.wo_number.startswith("Pending") else self.wo_number[:6],
+            'site': self.site.name,
+            'special': self.special.name,
+            'title': self.title,
+            'type': self.type.name,
+            'building': f"B{self.building}",
+            'room': woutils.format_room_number(self.room, self.building),
+            'priority': f"{self.priority}",
+            'creator': self.creator,
+            'related_wo': self.related_wo,
+            'pac_required': "PAC - YES" if self.pac_required else "PAC - NO",
+            'ncr_required': bool_to_yes_no_string(self.ncr_required),
+            'ncr_number': self.ncr_number if self.ncr_required else "N/A",
+            'task_lead_required': bool_to_yes_no_string(self.task_lead_required),
+            'tech_witness_point': bool_to_yes_no_string(self.tech_witness_point),
+            'peer_review_required': bool_to_yes_no_string(self.peer_review_required),
+            'peer_review_attached': bool_to_yes_no_string(self.peer_review_attached),
+            'ehs_required': bool_to_yes_no_string(self.ehs_required),
+            'qamip': bool_to_yes_no_string(self.qamip),
+            'qa_review_required': bool_to_yes_no_string(self.qa_review_required)}
+        return {layout.HEADER_POSITIONS[field]: value for field, value in header.items()}
+
+
+    def __get_task_values(self) -> dict[tuple[int, int], str | int | None]:
+        resp: dict[tuple[int, int], str | int | None] = {}
+        plans: layout.RowBlock = layout.TASK_PLANS
+        actuals: layout.RowBlock = layout.TASK_ACTUALS
+        for i, task in enumerate(self.task_list[:plans.size]):
+            if (task.planned_row != plans.first_row + i or
+                    task.actuals_row != actuals.first_row + i):
+                task = self.__mutable_task(i)
+                task.planned_row = plans.first_row + i
+                task.actuals_row = actuals.first_row + i
+            resp[plans.position(i, 'number')] = task.number
+            resp[plans.position(i, 'summary')] = task.summary
+            resp[plans.position(i, 'reference')] = task.reference
+            if task.is_complete():
+                resp[actuals.position(i, 'number')] = task.number
+                resp[actuals.position(i, 'completion_date')] = date_to_string(task.completion_date)
+                resp[actuals.position(i, 'technician')] = task.technician
+                resp[actuals.position(i, 'qty_techs')] = task.qty_techs
+                resp[actuals.position(i, 'hours')] = f"{task.hours:0.1f}"
+        return resp
+
+
+    def __get_twois_filename(self) -> str:
+        return f"{self.get_full_workorder_number()}.twois"
+
+
+    def __get_excel_filename(self) -> str:
+        return f"{self.get_full_workorder_number()} - {self.title}.xlsx"
+
+
+    def __get_twois_state(self) -> dict:
+        """Returns the fields that are written to a .twois file, keyed by name, in the form
+        that twois_codec encodes and that __setstate__ accepts back."""
+        self.__hydrate()
+        state: dict = {key: value for key, value in self.__dict__.items()
+                       if not key.startswith('_WorkOrder__')}
+        state['wo_number'] = self.__wo_number
+        return state
+
+
+    def __stage_files(self, tx: FileTransaction, load_file: str | None = None) -> None:
+        """Stages both of the workorder's files in 'tx': the .xlsx spreadsheet, built on top
+        of 'load_file' (by default the workorder's own spreadsheet), and the .twois file."""
+        self.__save_as_excel_file(tx, load_file or self.get_excel_filepath())
+        tx.write_bytes(self.get_twois_filepath(), self.to_twois_bytes())
+
+
+    def __stage_removal(self, tx: FileTransaction) -> None:
+        """Stages the removal of both of the workorder's files in 'tx'. A save held back by
+        an open batch() is dropped, since it would only bring the files back."""
+        self.__hydrate()
+        self.__save_deferred = False
+        tx.remove(self.get_excel_filepath())
+        tx.remove(self.get_twois_filepath())
+
+
+    def __after_write(self) -> None:
+        """Records a save that has been committed to disk: its pending number is now in use,
+        its index entry is brought up to date, and it has no unsaved changes."""
+        self.__dirty = set()
+        if self.__reservation is not None:
+            woutils.commit_pending_number(self.wo_number)
+            self.__reservation = None
+        if self.__save_dir == workorder_index.directory:
+            workorder_index.record(self, self.__get_twois_filename(), self.__get_excel_filename())
+
 
+    def __after_removal(self) -> None:
+        if self.__save_dir == workorder_index.directory:
+            workorder_index.remove(self.__get_twois_filename())
+            if self.__reservation is None:
+                woutils.release_pending_number(self.wo_number)
 
-    def __save_as_excel_file(self, load_file: str = TEMPLATE_TWOIS) -> str:
-        """Method which saves the WorkOrder's data into a properly formatted .xlsx
+
+    def __save_as_excel_file(self, tx: FileTransaction, load_file: str = TEMPLATE_TWOIS,
+                             directory: str | None = None) -> str:
+        """Method which stages the WorkOrder's data in 'tx' as a properly formatted .xlsx
         file using the openpyxl library. Takes in an optional filename, so that it could start
         by using an existing excel spreadsheet. If none is provided, it will use a blank template.
+        The file is written to 'directory', which defaults to the save directory.\n
+        When the existing spreadsheet is used, only the cells of the fields that have changed
+        since the last save are patched into its sheet XML, and the rest of the file is copied
+        as it is. The blank template, or a file that cannot be patched, is written in full.
         """
-        if (woutils.input_file_status(load_file) != ExcelFileStatus.IS_VALID or
-                                                not self.matches_file(load_file)):
-            load_file = TEMPLATE_TWOIS
-        wb: Workbook = load_workbook(load_file)
+        fp: str = f'{directory or self.__save_dir}\\{self.__get_excel_filename()}'
+        book: TWOISWorkbook = TWOISWorkbook(load_file)
+        wb: Workbook
+        sections: set[str] | None = None
+        if (book.input_status() == ExcelFileStatus.IS_VALID and
+                                                self.__matches_workbook(book)):
+            sections = self.__changed_sections()
+            if sections is not None and self.__patch_excel_file(tx, load_file, fp, sections):
+                book.close()
+                return fp
+            wb = book.get_workbook()
+        else:
+            book.close()
+            wb = load_template(TEMPLATE_TWOIS)
         ws: Worksheet = wb.active
 
-        ws['B3'].value = date_to_string(self.due_date)
-        ws['B3'].alignment = Alignment(wrap_text=False, horizontal='center', vertical='center')
-        ws['B4'].value = 'RS'
-        ws['B5'].value = name_to_initials(self.creator)
-        ws['A7'].value = "" if self.wo_number.startswith("Pending") else self.wo_number[:6]
-        ws['B7'].value = self.site.name
-        ws['C7'].value = self.special.name
-        ws['D7'].value = self.title
-        ws['I7'].value = self.type.name
-        ws['D8'].value = f"B{self.building}"
-        ws['F8'].value = woutils.format_room_number(self.room, self.building)
-        ws['A10'].value = f"{self.priority}"
-        ws['B10'].value = self.creator
-        ws['G10'].value = self.related_wo
-        ws['I10'].value = "PAC - YES" if self.pac_required else "PAC - NO"
-        ws['A12'].value = bool_to_yes_no_string(self.ncr_required)
-        ws['B12'].value = self.ncr_number if self.ncr_required else "N/A"
-        ws['E12'].value = bool_to_yes_no_string(self.task_lead_required)
-        ws['F12'].value = bool_to_yes_no_string(self.tech_witness_point)
-        ws['G12'].value = bool_to_yes_no_string(self.peer_review_required)
-        ws['H12'].value = bool_to_yes_no_string(self.peer_review_attached)
-        ws['I12'].value = bool_to_yes_no_string(self.ehs_required)
-        ws['J12'].value = bool_to_yes_no_string(self.qamip)
-        ws['K12'].value = bool_to_yes_no_string(self.qa_review_required)
-
-        for i, task in enumerate(self.task_list):
-            if i > 15:
-                break
-            task.planned_row = i + 15
-            task.actuals_row = i + 32
-            ws[f'A{str(task.planned_row)}'].value = task.number
-            ws[f'B{str(task.planned_row)}'].value = task.summary
-            ws[f'G{str(task.planned_row)}'].value = task.reference
-            if task.is_complete():
-                ws[f'A{str(task.actuals_row)}'].value = task.number
-                ws[f'C{str(task.actuals_row)}'].value = date_to_string(task.completion_date)
-                ws[f'E{str(task.actuals_row)}'].value = task.technician
-                ws[f'H{str(task.actuals_row)}'].value = task.qty_techs
-                ws[f'J{str(task.actuals_row)}'].value = f"{task.hours:0.1f}"
-
-        for i, comment in enumerate(self.comments):
-            if i > 24:
-                break
-            comment.set_row(i + 86)
-            ws[f'A{str(comment.get_row())}'].value = comment.text
-            ws[f'I{str(comment.get_row())}'].value = str(comment.person)
-            ws[f'K{str(comment.get_row())}'].value = date_to_string(comment.date)
-
-        if self.completion_data is not None:
-            ws['A78'].value = date_to_string(self.completion_data.startdate)
-            ws['C78'].value = date_to_string(self.completion_data.enddate)
-            ws['A80'].value = date_to_string(self.completion_data.restoredate)
-            ws['C80'].value = f"{str(self.completion_data)}"
-
-        fp: str = f'{self.__save_dir}\\{self.__excel_filename}'
-        wb.save(fp)
+        for (row, col), value in self.__get_cell_values(sections).items():
+            ws.cell(row=row, column=col).value = value
+        ws[layout.HEADER_CELLS['due_date']].alignment = Alignment(wrap_text=False,
+                                                                  horizontal='center',
+                                                                  vertical='center')
+
+        wb.save(tx.stage(fp))
         wb.close()
         return fp
 
 
+    def __patch_excel_file(self, tx: FileTransaction, load_file: str, fp: str,
+                           sections: set[str]) -> bool:
+        """Stages a copy of 'load_file' at 'fp' with only the cells of 'sections' rewritten.
+        If there is nothing to rewrite and the file is not moving, nothing is staged at all.
+        Returns false if the file cannot be patched and has to be written in full."""
+        values: dict[tuple[int, int], str | int | None] = self.__get_cell_values(sections)
+        if not values and load_file == fp:
+            return True
+        try:
+            patch_cells(load_file, tx.stage(fp), values)
+        except XlsxPatchError:
+            return False
+        return True
+
+
     ########### PUBLIC METHODS
     @classmethod
     def from_xlsx(cls, filename: str, description: str = DEFAULT_DESCRIPTION) -> Self:
@@ -494,32 +761,92 @@ class WorkOrder:
         Typically, the description would be passed in either from the UI or from a WorkOrder
         object that is being approved.
         """
-        if woutils.input_file_status(filename) == ExcelFileStatus.IS_VALID:
-            resp: Self = cls(**WorkOrder.__get_kwargs_from_xlsx(filename, description))
-            return resp
-        return cls()
+        with TWOISWorkbook(filename) as book:
+            resp: Self = cls.__from_workbook(book, description)
+        return resp
 
 
     @classmethod
     def from_twois(cls, filename: str) -> Self:
-        """A factory method which takes in the name of a file and uses the pickle library to
-        load that serialized object into memory. File must be a .twois file.
+        """A factory method which takes in the name of a file and uses the twois_codec module
+        to load that serialized object into memory. File must be a .twois file, in either the
+        binary format or the legacy pickle format. Raises a TwoisFormatError if it is corrupt.
         """
         if filename.endswith(".twois") and os.path.isfile(filename):
             with open(filename, "rb") as infile:
-                resp: Self = pickle.load(infile)
-            return resp
+                return cls.from_twois_bytes(infile.read())
         return cls()
 
 
+    @classmethod
+    def from_twois_bytes(cls, data: bytes) -> Self:
+        """A factory method which takes in the contents of a .twois file and returns the
+        WorkOrder stored in it. Raises a TwoisFormatError if the data is corrupt.
+        """
+        resp: Self = cls.__new__(cls)
+        resp.__setstate__(twois_codec.loads(data))
+        return resp
+
+
+    @classmethod
+    def from_twois_header(cls, filename: str) -> Self:
+        """A factory method which reads only the header of a .twois file: the fields needed to
+        list and identify the workorder. The description, tasks, comments and completion data
+        are read from the file the first time they are used. Raises an OSError if the file
+        cannot be read, or a TwoisFormatError if it is corrupt.
+        """
+        state: dict = twois_codec.load_header(filename)
+        fingerprint: str | None = state.pop('fingerprint')
+        resp: Self = cls.__new__(cls)
+        resp.__setstate__(state)
+        resp.__lazy_source = filename
+        resp.__header_fingerprint = fingerprint
+        return resp
+
+
+    def to_twois_bytes(self) -> bytes:
+        """Returns the contents of the .twois file for this workorder."""
+        return twois_codec.dumps(self.__get_twois_state())
+
+
     def save(self) -> None:
-        """Method which saves the workorder both as a .twois file, which is a pickle serialization
+        """Method which saves the workorder both as a .twois file, which is a binary serialization
         of the object, as well as saves the .xlsx workorder spreadsheet. An optional filepath
         can be provided to determine the location of the file. If left blank, the files will be
-        saved into the in_progress directory.
+        saved into the in_progress directory.\n
+        Both files are written in one FileTransaction. Inside a batch(), the save is held back
+        until the batch exits. Nothing is written if no field has changed since the last save
+        and both files are still there.
         """
-        self.__save_as_excel_file(f"{self.__save_dir}\\{self.__excel_filename}")
-        self.__save_as_twois_file()
+        if self.__batch_depth:
+            self.__save_deferred = True
+            return
+        if (not self.has_unsaved_changes() and os.path.isfile(self.get_excel_filepath()) and
+                os.path.isfile(self.get_twois_filepath())):
+            return
+        with FileTransaction() as tx:
+            self.__stage_files(tx)
+        self.__after_write()
+
+
+    @contextmanager
+    def batch(self) -> Iterator[Self]:
+        """A context manager which holds back every save() made inside it, including the ones
+        made by methods such as log_comment(), and saves the workorder once when it exits if
+        any save was asked for. Batches may be nested; only the outermost one saves. Nothing
+        is saved if the block raises."""
+        self.__batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                self.__save_deferred = False
+            raise
+        self.__batch_depth -= 1
+        if not self.__batch_depth and self.__save_deferred:
+            self.__save_deferred = False
+            self.save()
 
 
     def edit(self, **kwargs: Unpack[WorkOrderDict]) -> None: #type:ignore
@@ -527,79 +854,110 @@ class WorkOrder:
         value for any of its fields using kwargs.\n
         See the documentation for the WorkOrder class for a description of those fields.
         """
+        self.__hydrate()
         previous_excel: str = self.get_excel_filepath()
         previous_twois: str = self.get_twois_filepath()
+        previous_twois_name: str = self.__get_twois_filename()
+        previous_number: str = self.wo_number
         self.__populate_fields(**kwargs)
-        self.__twois_filename = f"{self.get_full_workorder_number()}.twois"
-        self.__excel_filename = f"{self.get_full_workorder_number()} - {self.title}.xlsx"
-        safe_rename(previous_excel, self.get_excel_filepath())
-        safe_rename(previous_twois, self.get_twois_filepath())
-        self.save()
-
-
-    def approve(self, filename: str, override: bool = False) -> ExcelFileStatus:
+        if previous_number != self.wo_number:
+            woutils.release_pending_number(previous_number)
+        with FileTransaction() as tx:
+            self.__stage_files(tx, previous_excel)
+            if previous_excel != self.get_excel_filepath():
+                tx.remove(previous_excel)
+            if previous_twois != self.get_twois_filepath():
+                tx.remove(previous_twois)
+        if previous_twois_name != self.__get_twois_filename():
+            workorder_index.remove(previous_twois_name)
+        self.__after_write()
+
+
+    def approve(self, filename: str, override: bool = False,
+                remove_source: bool = False) -> ExcelFileStatus:
         """A method which "approves" the WorkOrder object. It takes in a path to a file and
         analyzes it, and if it determines that the workorder is approved, it delets the
         existing work order files and replaces them with the approved files. This should
-        only be called on a pending workorder.
+        only be called on a pending workorder. If 'remove_source' is true, the approved file
+        itself is removed in the same step, unless it is where the approved files are written.
         """
         fstatus: ExcelFileStatus = ExcelFileStatus.IS_VALID
-        if not override:
-            if self.is_approved():
-                return ExcelFileStatus.WO_ALREADY_APPROVED
-
-            fstatus = woutils.approved_file_status(filename)
-            if fstatus != ExcelFileStatus.IS_VALID:
-                return fstatus
+        with TWOISWorkbook(filename) as book:
+            if not override:
+                if self.is_approved():
+                    return ExcelFileStatus.WO_ALREADY_APPROVED
+
+                fstatus = book.approved_status()
+                if fstatus != ExcelFileStatus.IS_VALID:
+                    return fstatus
+
+                if not self.__matches_workbook(book, True):
+                    return ExcelFileStatus.FILES_UNMATCHED
+
+            new_workorder: WorkOrder = WorkOrder.__from_workbook(book, self.description)
+        # The replacement is written and the pending files removed in one step, so a failure
+        # part way through never leaves the workorder with no files at all.
+        with FileTransaction() as tx:
+            self.__stage_removal(tx)
+            new_workorder.__stage_files(tx)
+            if remove_source:
+                tx.remove(filename)
+        self.__after_removal()
+        new_workorder.__after_write()
+        return fstatus
 
-            if not self.matches_file(filename, True):
-                return ExcelFileStatus.FILES_UNMATCHED
 
-        new_workorder: WorkOrder = WorkOrder.from_xlsx(filename, self.description)
-        self.delete()
-        new_workorder.save()
-        return fstatus
+    @classmethod
+    def from_template(cls, template: 'WorkOrder', due_date: date | None = None) -> Self:
+        """A factory method which returns a new pending workorder with the header, description
+        and tasks of 'template', such as a workorder loaded from the templates directory. The
+        new workorder has no number yet, no log comments and no completion data, and none of
+        its tasks are complete. It is not saved. If 'due_date' is given, it is due then.
+        """
+        state: dict = template.__get_twois_state()
+        state['wo_number'] = None
+        state['comments'] = []
+        state['completion_data'] = None
+        state['task_list'] = [task if isinstance(task, FrozenTaskItem) else
+                              TaskItem(task.number, task.summary, task.reference,
+                                       task.planned_row) for task in template.task_list]
+        if due_date is not None:
+            state['due_date'] = due_date
+        resp: Self = cls.__new__(cls)
+        resp.__setstate__(state)
+        resp.__dirty = None
+        return resp
 
 
     def delete(self) -> None:
         """A method which is used to permanently delete a work order's files."""
-        excel_file = f"{self.__save_dir}\\{self.__excel_filename}"
-        twois_file = f"{self.__save_dir}\\{self.__twois_filename}"
-        if os.path.exists(excel_file):
-            os.remove(excel_file)
-        if os.path.exists(twois_file):
-            os.remove(twois_file)
+        with FileTransaction() as tx:
+            self.__stage_removal(tx)
+        self.__after_removal()
 
 
     def save_as_wo_template(self, filename: str) -> str:
         """Method which serializes the WorkOrder object as a .twois file using the
-        pickle library. This file is typically saved in the 'templates' directory. It takes in a
-        name for the file. If you put a full existsing filepath or a filename including the .twois
-        in as the argument, the workorder will simply be created, overwriting the existing
-        file.
+        twois_codec module. This file is typically saved in the 'templates' directory. It takes
+        in a name for the file. If you put a full existsing filepath or a filename including the
+        .twois in as the argument, the workorder will simply be created, overwriting the existing
+        file. Otherwise the file is named after the lowest unused number under that name, as in
+        'name-3.twois'. Returns the path that was written.
         """
         if filename.endswith(".twois"):
             if os.path.exists(filename):
-                with open(filename, "wb") as outfile:
-                    pickle.dump(self, outfile)
+                twois_codec.dump(self.__get_twois_state(), filename)
                 return filename
             elif len(filename.split("\\")) > 1:
                 filedir: str = "\\".join(filename.split("\\")[:-1])
                 if os.path.isdir(filedir):
-                    with open(filename, "wb") as outfile:
-                        pickle.dump(self, outfile)
+                    twois_codec.dump(self.__get_twois_state(), filename)
                     return filename
             else:
                 filename = filename[:-6]
 
-        new_fn: str = f"{TEMPLATE_DIR}\\{filename}-1.twois"
-        i: int = 2
-        while os.path.exists(new_fn) and os.path.isfile(new_fn) and i < 999:
-            new_fn = f"{TEMPLATE_DIR}\\{filename}-{i}.twois"
-            i += 1
-
-        with open(new_fn, "wb") as outfile:
-            pickle.dump(self, outfile)
+        new_fn: str = woutils.allocate_template_filepath(filename, TEMPLATE_DIR)
+        twois_codec.dump(self.__get_twois_state(), new_fn)
         return new_fn
 
 
@@ -634,10 +992,20 @@ class WorkOrder:
                 continue
             new_comment.set_row(len(self.comments) + 86)
             self.comments.append(new_comment)
+            self.__mark_dirty('comments')
         self.save()
         return success
 
 
+    def complete_task(self, index: int, data: TaskCompletionData) -> bool:
+        """Applies completion data to the task at 'index' in the task list. Returns false if
+        the task was already complete."""
+        if not self.__mutable_task(index).complete(data):
+            return False
+        self.__mark_dirty('task_list')
+        return True
+
+
     def complete(self, completion_data: WorkorderCompletionData) -> bool:
         """Method that is called when a workorder is complete. Takes in a completion date which
         should be gotten from the form that will call this method. It deletes the .twois
@@ -658,45 +1026,44 @@ class WorkOrder:
             return False
 
         self.completion_data = completion_data
-        old_dir: str = self.__save_dir
-        self.__save_dir = create_dated_directories(COMPLETE_DIR, completion_data.enddate)
-        self.__save_as_excel_file(f"{old_dir}\\{self.__excel_filename}")
+        done_dir: str = create_dated_directories(COMPLETE_DIR, completion_data.enddate)
+        description_file: str = f"{done_dir}\\{self.get_full_workorder_number()}_description.txt"
+        if os.path.exists(description_file):
+            raise FileExistsError(description_file)
 
         print("BCOBB: YOU HAVEN'T ADDED THE COMPLETION DATA TO THOSE CELLS YET!")
 
-        with open(f"{self.__save_dir}\\{self.get_full_workorder_number()}_description.txt",
-                  'x', encoding='utf-8') as file:
-            file.write(self.description)
-        self.__save_dir = old_dir
-        self.delete()
+        # The completed spreadsheet and description appear in the same step that removes the
+        # in_progress files, so the workorder is never in both places or in neither.
+        with FileTransaction() as tx:
+            self.__save_as_excel_file(tx, self.get_excel_filepath(), done_dir)
+            tx.write_text(description_file, self.description)
+            self.__stage_removal(tx)
+        self.__after_removal()
         return True
 
 
+    def has_unsaved_changes(self) -> bool:
+        """Returns true if any field has changed since the workorder was last saved or loaded
+        from its .twois file."""
+        return self.__dirty is None or bool(self.__dirty)
+
+
+    def fingerprint(self) -> str:
+        """Returns the fingerprint of the workorder's title, due date and task summaries. A
+        workorder loaded with from_twois_header() answers from the fingerprint stored in its
+        header, so its tasks are not read from its file until they are used."""
+        if self.__lazy_source is not None and self.__header_fingerprint is not None:
+            return self.__header_fingerprint
+        return workorder_fingerprint(self.title, self.due_date,
+                                     (task.summary for task in self.task_list))
+
+
     def matches_file(self, filepath: str, preapproved: bool = False) -> bool:
         """A method which takes in a path to a file. It returns true if the file is a legitimate
         excel TWOIS file that matches the details of this workorder. Otherwise, it returns false."""
-        fstatus: ExcelFileStatus = ExcelFileStatus.IS_VALID
-        if not preapproved:
-            fstatus = woutils.approved_file_status(filepath)
-            if fstatus != ExcelFileStatus.IS_VALID and fstatus != ExcelFileStatus.NOT_APPROVED:
-                return False
-
-        wb: Workbook = load_workbook(filepath)
-        ws: Worksheet = wb.active
-        resp: bool = False
-        if fstatus == ExcelFileStatus.IS_VALID and self.is_approved():
-            resp = self.get_full_workorder_number() == woutils.get_full_wo_number_from_xlsx_cell(ws)
-        else:
-            alltasksaregood: bool = True
-            for i, thistask in enumerate(self.task_list):
-                othertasks: list[TaskItem] = woutils.get_task_list_from_xlsx_cells(ws)
-                if othertasks[i].summary != thistask.summary:
-                    alltasksaregood = False
-                    break
-            resp = (self.due_date == woutils.get_date_from_xlsx_cell(ws, 'B3') and
-                    self.title == woutils.get_title_from_xlsx_cell(ws) and
-                    alltasksaregood)
-        wb.close()
+        with TWOISWorkbook(filepath) as book:
+            resp: bool = self.__matches_workbook(book, preapproved)
         return resp
 
 
@@ -705,6 +1072,8 @@ class WorkOrder:
         determines whether or not a workorder is approved. If the workorder has been assigned
         a valid workorder number, it returns true. Otherwise, it returns false.
         """
+        if self.__wo_number is None:
+            return False
         file_status: ExcelFileStatus = ExcelFileStatus.IS_VALID
         if check_xlsx_file:
             file_status = woutils.approved_file_status(self.get_excel_filepath())
@@ -714,12 +1083,12 @@ class WorkOrder:
 
     def get_excel_filepath(self) -> str:
         """Returns the excel filepath associated with this work order."""
-        return f"{self.__save_dir}\\{self.__excel_filename}"
+        return f"{self.__save_dir}\\{self.__get_excel_filename()}"
 
 
     def get_twois_filepath(self) -> str:
         """Returns the twois filepath associated with this work order."""
-        return f"{self.__save_dir}\\{self.__twois_filename}"
+        return f"{self.__save_dir}\\{self.__get_twois_filename()}"
 
 
 
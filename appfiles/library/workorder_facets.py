@@ -0,0 +1,229 @@
+"""Module which provides the FacetView class, a columnar view of the loaded workorders that the
+status list filters and sorts by.\n
+Each facet of a workorder (its site, special, type, priority, building, room, whether it is
+approved and whether it is overdue) is stored once as a code in an array, one entry per row.
+For every value of a facet the view also keeps a bitset of the rows holding it, and for every
+sort order a permutation of the rows. Filtering by any combination of facets is then a few
+ANDs and ORs of bitsets, counting the rows left for each value is a popcount, and re-sorting is
+a walk down a permutation, none of which touches the WorkOrder objects themselves.\n
+The view is a snapshot. It is built from the workorders in the order they are listed, and it
+is rebuilt whenever that list changes or the day rolls over.
+"""
+
+from array import array
+from datetime import date
+from enum import Enum
+from typing import Iterable, Mapping, Sequence
+
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_type import WorkOrderType
+
+Selection = Mapping['Facet', Iterable[int]]
+
+
+class Facet(Enum):
+    """A class which represents the facets that the workorder list can be filtered by.
+
+    Members
+    --------
+        SITE = 0\n
+        SPECIAL = 1\n
+        TYPE = 2\n
+        PRIORITY = 3\n
+        BUILDING = 4\n
+        ROOM = 5\n
+        APPROVAL = 6 (1 if approved, 0 if pending)\n
+        OVERDUE = 7 (1 if overdue, 0 if not)
+    """
+    SITE = 0
+    SPECIAL = 1
+    TYPE = 2
+    PRIORITY = 3
+    BUILDING = 4
+    ROOM = 5
+    APPROVAL = 6
+    OVERDUE = 7
+
+
+class SortKey(Enum):
+    """A class which represents the orders that the workorder list can be sorted in. Rows that
+    tie keep their due date order.
+
+    Members
+    --------
+        DUE_DATE = 0\n
+        PRIORITY = 1\n
+        NUMBER = 2\n
+        TITLE = 3
+    """
+    DUE_DATE = 0
+    PRIORITY = 1
+    NUMBER = 2
+    TITLE = 3
+
+
+class FacetView:
+    """A class which holds the facets of a list of workorders as columns of codes, and which
+    filters, counts and sorts the rows of that list by them. Rows are referred to by their
+    position in the list the view was built from.
+
+    Public Methods
+    -------------------------
+        rows(selection: Selection | None = None, sort: SortKey = SortKey.DUE_DATE,
+             descending: bool = False) -> array:
+            Returns the positions of the rows that pass a selection, in the given order.
+
+        keep(rows: Iterable[int], selection: Selection | None = None) -> list[int]:
+            Returns the given rows that pass a selection, in the order they were given.
+
+        counts(selection: Selection | None = None,
+               within: Iterable[int] | None = None) -> dict[Facet, dict[int, int]]:
+            Returns the number of rows holding each value of each facet.
+
+        label(facet: Facet, code: int) -> str:
+            Returns the text shown for a value of a facet.
+    """
+    def __init__(self, workorders: Sequence[WorkOrder], today: date | None = None) -> None:
+        self.today: date = date.today() if today is None else today
+        self.size: int = len(workorders)
+        self.columns: dict[Facet, array] = {facet: array('i') for facet in Facet}
+        self.due: array = array('i', (wo.due_date.toordinal() for wo in workorders))
+        for wo in workorders:
+            for facet, code in self.__codes(wo).items():
+                self.columns[facet].append(code)
+
+        self.__all: int = (1 << self.size) - 1
+        self.__bitsets: dict[Facet, dict[int, int]] = {
+            facet: self.__bitsets_for(column) for facet, column in self.columns.items()}
+
+        by_due: list[int] = sorted(range(self.size), key=self.due.__getitem__)
+        numbers: list[str] = [wo.get_full_workorder_number() for wo in workorders]
+        titles: list[str] = [wo.title.casefold() for wo in workorders]
+        priority: array = self.columns[Facet.PRIORITY]
+        self.__orders: dict[SortKey, array] = {
+            SortKey.DUE_DATE: array('i', by_due),
+            SortKey.PRIORITY: array('i', sorted(by_due, key=priority.__getitem__)),
+            SortKey.NUMBER: array('i', sorted(by_due, key=numbers.__getitem__)),
+            SortKey.TITLE: array('i', sorted(by_due, key=titles.__getitem__)),
+        }
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    ########### PRIVATE METHODS
+    def __codes(self, wo: WorkOrder) -> dict[Facet, int]:
+        return {Facet.SITE: wo.site.value,
+                Facet.SPECIAL: wo.special.value,
+                Facet.TYPE: wo.type.value,
+                Facet.PRIORITY: wo.priority,
+                Facet.BUILDING: wo.building,
+                Facet.ROOM: wo.room,
+                Facet.APPROVAL: int(wo.is_approved(False)),
+                Facet.OVERDUE: int(wo.due_date < self.today)}
+
+
+    def __bitsets_for(self, column: array) -> dict[int, int]:
+        """Returns a bitset of the rows holding each code in a column, built a byte at a time
+        so that the cost stays linear in the number of rows."""
+        buffers: dict[int, bytearray] = {}
+        nbytes: int = (self.size + 7) // 8
+        for row, code in enumerate(column):
+            buffer: bytearray | None = buffers.get(code)
+            if buffer is None:
+                buffer = buffers[code] = bytearray(nbytes)
+            buffer[row >> 3] |= 1 << (row & 7)
+        return {code: int.from_bytes(buffer, 'little') for code, buffer in buffers.items()}
+
+
+    def __facet_mask(self, facet: Facet, codes: Iterable[int]) -> int:
+        """Returns the rows holding any of the given codes of a facet."""
+        mask: int = 0
+        bitsets: dict[int, int] = self.__bitsets[facet]
+        for code in codes:
+            mask |= bitsets.get(code, 0)
+        return mask
+
+
+    def __rows_mask(self, rows: Iterable[int]) -> int:
+        buffer: bytearray = bytearray((self.size + 7) // 8)
+        for row in rows:
+            buffer[row >> 3] |= 1 << (row & 7)
+        return int.from_bytes(buffer, 'little')
+
+
+    def __mask(self, selection: Selection | None, skip: Facet | None = None,
+               base: int | None = None) -> int:
+        """Returns the rows of 'base', or every row, that pass every facet of a selection but
+        'skip'. A facet with no codes selected does not filter anything."""
+        mask: int = self.__all if base is None else base
+        for facet, codes in (selection or {}).items():
+            codes = list(codes)
+            if facet is not skip and codes:
+                mask &= self.__facet_mask(facet, codes)
+        return mask
+
+
+    def __mask_bytes(self, mask: int) -> bytes:
+        return mask.to_bytes((self.size + 7) // 8, 'little')
+
+
+    ########### PUBLIC METHODS
+    def rows(self, selection: Selection | None = None, sort: SortKey = SortKey.DUE_DATE,
+             descending: bool = False) -> array:
+        """Returns the positions of the rows which hold one of the selected codes of every
+        facet in 'selection', ordered by 'sort'."""
+        order: array = self.__orders[sort]
+        mask: int = self.__mask(selection)
+        if mask == self.__all:
+            return order[::-1] if descending else array('i', order)
+        bits: bytes = self.__mask_bytes(mask)
+        resp: array = array('i', (row for row in order if bits[row >> 3] >> (row & 7) & 1))
+        if descending:
+            resp.reverse()
+        return resp
+
+
+    def keep(self, rows: Iterable[int], selection: Selection | None = None) -> list[int]:
+        """Returns the given rows which pass 'selection', in the order they were given, such
+        as the rows of a search ranked by relevance."""
+        bits: bytes = self.__mask_bytes(self.__mask(selection))
+        return [row for row in rows if bits[row >> 3] >> (row & 7) & 1]
+
+
+    def counts(self, selection: Selection | None = None,
+               within: Iterable[int] | None = None) -> dict[Facet, dict[int, int]]:
+        """Returns, for every facet, how many rows hold each of its codes among the rows that
+        pass the other facets of 'selection'. These are the rows that selecting that code
+        would show, so a facet's own selection does not narrow its counts. If 'within' is
+        given, only those rows are counted."""
+        base: int | None = None if within is None else self.__rows_mask(within)
+        resp: dict[Facet, dict[int, int]] = {}
+        for facet, bitsets in self.__bitsets.items():
+            others: int = self.__mask(selection, skip=facet, base=base)
+            resp[facet] = {code: (bitset & others).bit_count()
+                           for code, bitset in sorted(bitsets.items())}
+        return resp
+
+
+    @staticmethod
+    def label(facet: Facet, code: int) -> str:
+        """Returns the text shown for a code of a facet in the filter menus."""
+        if facet is Facet.SITE:
+            return Site(code).name
+        if facet is Facet.SPECIAL:
+            return Special(code).name
+        if facet is Facet.TYPE:
+            return WorkOrderType(code).name
+        if facet is Facet.BUILDING:
+            return f"Bldg. {code}"
+        if facet is Facet.ROOM:
+            return f"Rm. {code}"
+        if facet is Facet.APPROVAL:
+            return "Approved" if code else "Pending"
+        if facet is Facet.OVERDUE:
+            return "Overdue" if code else "On time"
+        return str(code)
@@ -0,0 +1,608 @@
+"""Module which provides the WorkOrderIndex class, a persistent SQLite index of every WorkOrder
+tracked in the in_progress directory.\n
+Listing the open workorders, looking one up by number and working out the next pending number
+used to mean walking the directory and unpickling every .twois file in it. The index keeps one
+row per .twois file with the fields those jobs need, so they become indexed queries instead.
+WorkOrder keeps the index in sync whenever it writes or removes its own files, and the index
+reconciles itself against the directory whenever the directory's modification time changes,
+so files that are dropped in or removed by hand are still picked up.\n
+Each row also holds the workorder's fingerprint (see appfiles.utils.fingerprint), so the pending
+workorder that an approved spreadsheet belongs to is found with one indexed lookup of the
+spreadsheet's fingerprint instead of by comparing the spreadsheet against every pending one.\n
+The title, description, tasks and log comments of every workorder are also kept in a full-text
+table, so search() finds and ranks workorders by their text (see appfiles.utils.fulltext).
+Only the header of a .twois file is read to list it, so a file that is picked up from disk is
+queued for the full-text table instead, and its body is read by the next search().\n
+Every change to the index is stamped with an increasing version number, and removed files leave
+a tombstone behind, so a view of the index can ask for only what changed since it last looked
+with changes_since() instead of reloading everything.\n
+Changes that belong together, such as approving a whole batch of workorders, can be grouped
+with WorkOrderIndex.batch() so that they are committed to the database in one transaction.\n
+The index can be rebuilt from disk at any time with WorkOrderIndex.rebuild(), or from the
+command line with:
+    python -m appfiles.library.workorder_index
+"""
+
+import ntpath
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from threading import RLock
+from typing import TYPE_CHECKING, Container, Iterator, NamedTuple
+
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.utils.appglobals import IN_PROGRESS_DIR, INDEX_DB
+from appfiles.utils.fingerprint import MatchKey
+from appfiles.utils.fulltext import bm25, document_text, fts_table
+from appfiles.utils.twois_codec import TwoisFormatError
+from appfiles.utils.twois_layout import MATCH_CELLS
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
+
+if TYPE_CHECKING:
+    from appfiles.library.workorder import WorkOrder
+
+SCHEMA_VERSION: int = 5
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS workorders (
+    twois_name      TEXT PRIMARY KEY,
+    excel_name      TEXT NOT NULL,
+    wo_number       TEXT NOT NULL,
+    full_number     TEXT NOT NULL,
+    pending_number  INTEGER,
+    title           TEXT NOT NULL,
+    due_date        TEXT NOT NULL,
+    site            TEXT NOT NULL,
+    special         TEXT NOT NULL,
+    approved        INTEGER NOT NULL,
+    twois_mtime     INTEGER NOT NULL,
+    excel_mtime     INTEGER,
+    fingerprint     TEXT NOT NULL,
+    version         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workorders_due_date ON workorders (due_date);
+CREATE INDEX IF NOT EXISTS workorders_version ON workorders (version);
+CREATE INDEX IF NOT EXISTS workorders_full_number ON workorders (full_number);
+CREATE INDEX IF NOT EXISTS workorders_pending_number ON workorders (pending_number)
+    WHERE pending_number IS NOT NULL;
+CREATE INDEX IF NOT EXISTS workorders_fingerprint ON workorders (fingerprint)
+    WHERE approved = 0;
+CREATE TABLE IF NOT EXISTS removed (
+    twois_name      TEXT PRIMARY KEY,
+    version         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS removed_version ON removed (version);
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS unsearched (
+    twois_name      TEXT PRIMARY KEY
+);
+""" + fts_table("search", "twois_name")
+
+COLUMNS: str = ("twois_name, excel_name, wo_number, full_number, pending_number, title, "
+                "due_date, site, special, approved, twois_mtime, excel_mtime, fingerprint")
+
+
+class IndexEntry(NamedTuple):
+    """One row of the index, describing a single tracked WorkOrder and its files."""
+    twois_name: str
+    excel_name: str
+    wo_number: str
+    full_number: str
+    pending_number: int | None
+    title: str
+    due_date: date
+    site: str
+    special: str
+    approved: bool
+    twois_mtime: int
+    excel_mtime: int | None
+    fingerprint: str
+
+
+class IndexChanges(NamedTuple):
+    """What changed in the index after a given version: the entries that were added or
+    rewritten, the .twois names that were removed, and the version to ask from next time."""
+    version: int
+    changed: list[IndexEntry]
+    removed: list[str]
+
+
+class WorkOrderIndex:
+    """A persistent index of the WorkOrders stored as .twois files in a single directory.
+
+    Public Methods
+    -------------------------
+        record(wo: WorkOrder, twois_name: str, excel_name: str) -> None:
+            Adds or replaces the entry for a WorkOrder whose files have just been written.
+
+        remove(twois_name: str) -> None:
+            Drops the entry for a .twois file that has been removed.
+
+        entries() -> list[IndexEntry]:
+            Every entry in the index, ordered by due date.
+
+        find(full_number: str) -> IndexEntry | None:
+            The entry for a full workorder number such as 123456VBS or Pending-004.
+
+        search(query: str, limit: int) -> list[tuple[IndexEntry, float]]:
+            The entries whose text matches an FTS5 query, best match first.
+
+        find_pending_match(filepath: str) -> WorkOrder | None:
+            The pending WorkOrder that an approved TWOIS spreadsheet belongs to, if any.
+
+        find_pending(key: MatchKey, exclude: Container[str]) -> WorkOrder | None:
+            The pending WorkOrder that a spreadsheet with the given identifying fields belongs
+            to, if any.
+
+        pending_numbers() -> set[int]:
+            The numbers of every Pending-### workorder.
+
+        load(entry: IndexEntry) -> WorkOrder | None:
+            Loads and returns the WorkOrder behind a single entry.
+
+        load_workorders() -> list[WorkOrder]:
+            Loads and returns every indexed WorkOrder, ordered by due date.
+
+        version() -> int:
+            The version number of the most recent change to the index.
+
+        changes_since(version: int) -> IndexChanges:
+            The entries added, rewritten or removed after 'version'.
+
+        external_version() -> int:
+            A number which changes only when files are changed behind the index's back.
+
+        reconcile() -> bool:
+            Brings the index up to date with the directory if the directory has changed.
+
+        rebuild() -> int:
+            Throws the index away and rebuilds it from the .twois files on disk.
+
+        batch() -> Iterator[None]:
+            A context manager which commits every change made inside it in one transaction.
+    """
+    def __init__(self, db_path: str = INDEX_DB, directory: str = IN_PROGRESS_DIR) -> None:
+        self.db_path: str = db_path
+        self.directory: str = directory
+        self.__conn: sqlite3.Connection | None = None
+        self.__lock: RLock = RLock()
+        self.__batch_depth: int = 0
+
+
+    ########### PRIVATE METHODS
+    def __connection(self) -> sqlite3.Connection:
+        """Opens the database on first use, so that importing this module never touches disk."""
+        if self.__conn is None:
+            self.__conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            if self.__conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # The index only caches what is on disk, so an old layout is simply rebuilt
+                self.__conn.executescript("DROP TABLE IF EXISTS workorders; "
+                                          "DROP TABLE IF EXISTS removed; "
+                                          "DROP TABLE IF EXISTS meta; "
+                                          "DROP TABLE IF EXISTS search; "
+                                          "DROP TABLE IF EXISTS unsearched;")
+                self.__conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.__conn.executescript(SCHEMA)
+        return self.__conn
+
+
+    @contextmanager
+    def __transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yields the connection inside a transaction that is committed on exit, unless a
+        batch() is open, in which case the batch commits it. Must be called holding the lock."""
+        conn: sqlite3.Connection = self.__connection()
+        if self.__batch_depth:
+            yield conn
+            return
+        with conn:
+            yield conn
+
+
+    @staticmethod
+    def __bump_version(conn: sqlite3.Connection, key: str = 'version') -> int:
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, '1') ON CONFLICT (key) "
+                     "DO UPDATE SET value = CAST(value AS INTEGER) + 1", (key,))
+        return int(conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0])
+
+
+    @staticmethod
+    def __store(conn: sqlite3.Connection, row: tuple, version: int) -> None:
+        conn.execute(f"INSERT OR REPLACE INTO workorders ({COLUMNS}, version) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (*row, version))
+
+
+    @staticmethod
+    def __store_text(conn: sqlite3.Connection, wo: 'WorkOrder', twois_name: str) -> None:
+        """Replaces the full-text row of a workorder. Reading the text of a workorder that
+        was loaded with only its header reads the rest of its file."""
+        conn.execute("DELETE FROM unsearched WHERE twois_name = ?", (twois_name,))
+        conn.execute("DELETE FROM search WHERE twois_name = ?", (twois_name,))
+        conn.execute("INSERT INTO search VALUES (?, ?, ?, ?, ?)",
+                     (twois_name, *document_text(
+                         wo.title, wo.description,
+                         ((task.summary, task.reference) for task in wo.task_list),
+                         (comment.text for comment in wo.comments))))
+
+
+    @staticmethod
+    def __drop(conn: sqlite3.Connection, names: list[str], version: int) -> None:
+        conn.executemany("DELETE FROM workorders WHERE twois_name = ?", [(n,) for n in names])
+        conn.executemany("DELETE FROM search WHERE twois_name = ?", [(n,) for n in names])
+        conn.executemany("DELETE FROM unsearched WHERE twois_name = ?", [(n,) for n in names])
+        conn.executemany("INSERT OR REPLACE INTO removed (twois_name, version) VALUES (?, ?)",
+                         [(n, version) for n in names])
+
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+
+    def __mtime(self, name: str) -> int | None:
+        try:
+            return os.stat(self.__path(name)).st_mtime_ns
+        except OSError:
+            return None
+
+
+    def __directory_stamp(self) -> str:
+        try:
+            return str(os.stat(self.directory).st_mtime_ns)
+        except OSError:
+            return ""
+
+
+    def __row_for(self, wo: 'WorkOrder', twois_name: str, excel_name: str,
+                  twois_mtime: int) -> tuple:
+        pending: int | None = None
+        if wo.wo_number.startswith("Pending-"):
+            pending = int(wo.wo_number.split("-")[1])
+        return (twois_name, excel_name, wo.wo_number, wo.get_full_workorder_number(), pending,
+                wo.title, wo.due_date.isoformat(), wo.site.name, wo.special.name,
+                int(wo.is_approved(False)), twois_mtime, self.__mtime(excel_name),
+                wo.fingerprint())
+
+
+    def __read_twois(self, twois_name: str) -> tuple['WorkOrder', int] | None:
+        """Loads the header of a .twois file in the directory, returning the WorkOrder along
+        with the file's mtime, or None if the file is missing or unreadable. The index row
+        comes from the header; the rest of the file is only read when the WorkOrder's tasks,
+        comments or description are used, such as by __index_unsearched()."""
+        # Imported here because the workorder module imports this one.
+        from appfiles.library.workorder import WorkOrder # pylint: disable=import-outside-toplevel
+        mtime: int | None = self.__mtime(twois_name)
+        if mtime is None:
+            return None
+        try:
+            wo: WorkOrder = WorkOrder.from_twois_header(self.__path(twois_name))
+        except (OSError, TwoisFormatError):
+            return None
+        return (wo, mtime)
+
+
+    def __index_file(self, conn: sqlite3.Connection, twois_name: str, version: int) -> None:
+        """Reads the header of a single .twois file from disk and stores its entry. Its
+        full-text row is dropped and queued for __index_unsearched() to store."""
+        loaded: tuple['WorkOrder', int] | None = self.__read_twois(twois_name)
+        if loaded is None:
+            self.__drop(conn, [twois_name], version)
+            return
+        wo, mtime = loaded
+        excel_name: str = ntpath.basename(wo.get_excel_filepath())
+        self.__store(conn, self.__row_for(wo, twois_name, excel_name, mtime), version)
+        conn.execute("DELETE FROM search WHERE twois_name = ?", (twois_name,))
+        conn.execute("INSERT OR REPLACE INTO unsearched (twois_name) VALUES (?)", (twois_name,))
+
+
+    def __index_unsearched(self, conn: sqlite3.Connection) -> None:
+        """Reads the body of every .twois file that was queued by __index_file() and stores
+        its full-text row. A file whose body cannot be read is still listed, it just cannot be
+        searched."""
+        names: list[str] = [row[0] for row in conn.execute("SELECT twois_name FROM unsearched")]
+        for twois_name in names:
+            loaded: tuple['WorkOrder', int] | None = self.__read_twois(twois_name)
+            try:
+                if loaded is not None:
+                    self.__store_text(conn, loaded[0], twois_name)
+            except (OSError, TwoisFormatError):
+                pass
+            conn.execute("DELETE FROM unsearched WHERE twois_name = ?", (twois_name,))
+
+
+    def __twois_files(self) -> Iterator[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".twois") and entry.is_file():
+                        yield entry
+        except OSError:
+            return
+
+
+    def __set_stamp(self, conn: sqlite3.Connection, stamp: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)",
+                     (stamp,))
+
+
+    @staticmethod
+    def __to_entry(row: tuple) -> IndexEntry:
+        return IndexEntry(row[0], row[1], row[2], row[3], row[4], row[5],
+                          date.fromisoformat(row[6]), row[7], row[8], bool(row[9]),
+                          row[10], row[11], row[12])
+
+
+    ########### PUBLIC METHODS
+    def record(self, wo: 'WorkOrder', twois_name: str, excel_name: str) -> None:
+        """Adds or replaces the entry for a WorkOrder whose .twois and .xlsx files have just been
+        written to the directory under the given names. Writing them changed the directory's
+        modification time, so the new one is stored along with the entry, and the next call
+        does not reconcile the whole directory because of the app's own save."""
+        with self.__lock:
+            mtime: int | None = self.__mtime(twois_name)
+            if mtime is None:
+                return
+            with self.__transaction() as conn:
+                self.__store(conn, self.__row_for(wo, twois_name, excel_name, mtime),
+                             self.__bump_version(conn))
+                self.__store_text(conn, wo, twois_name)
+                self.__set_stamp(conn, self.__directory_stamp())
+
+
+    def remove(self, twois_name: str) -> None:
+        """Drops the entry for a .twois file, if there is one, and stores the directory's new
+        modification time, as record() does."""
+        with self.__lock:
+            with self.__transaction() as conn:
+                self.__drop(conn, [twois_name], self.__bump_version(conn))
+                self.__set_stamp(conn, self.__directory_stamp())
+
+
+    def entries(self) -> list[IndexEntry]:
+        """Returns every entry in the index, ordered by due date and then workorder number."""
+        self.reconcile()
+        with self.__lock:
+            rows = self.__connection().execute(
+                f"SELECT {COLUMNS} FROM workorders ORDER BY due_date, full_number").fetchall()
+        return [self.__to_entry(row) for row in rows]
+
+
+    def find(self, full_number: str) -> IndexEntry | None:
+        """Returns the entry for a full workorder number, or None if it is not tracked."""
+        self.reconcile()
+        with self.__lock:
+            row = self.__connection().execute(
+                f"SELECT {COLUMNS} FROM workorders WHERE full_number = ?",
+                (full_number,)).fetchone()
+        return None if row is None else self.__to_entry(row)
+
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[IndexEntry, float]]:
+        """Takes an FTS5 query, such as one built by fulltext.to_fts_query(), and returns the
+        entries whose text matches it along with their bm25 rank, best match (lowest rank)
+        first. The text of files picked up from disk since the last search is indexed first.
+        Raises an sqlite3.OperationalError if the query is malformed."""
+        self.reconcile()
+        columns: str = ", ".join(f"w.{column.strip()}" for column in COLUMNS.split(","))
+        with self.__lock:
+            with self.__transaction() as conn:
+                self.__index_unsearched(conn)
+            rows = self.__connection().execute(
+                f"SELECT {columns}, {bm25('search')} AS rank FROM search "
+                "JOIN workorders w ON w.twois_name = search.twois_name "
+                "WHERE search MATCH ? ORDER BY rank LIMIT ?", (query, limit)).fetchall()
+        return [(self.__to_entry(row[:-1]), row[-1]) for row in rows]
+
+
+    def find_pending_match(self, filepath: str) -> 'WorkOrder | None':
+        """Takes a path to an approved TWOIS spreadsheet and returns the pending WorkOrder that
+        it was approved from, or None if no pending workorder matches it. The spreadsheet is
+        scanned once for its identifying fields, which are then looked up with find_pending().
+        Spreadsheets that already belong to a tracked workorder are skipped without being
+        opened."""
+        # Imported here because the workorder utilities import this module.
+        import appfiles.utils.workorder as woutils # pylint: disable=import-outside-toplevel
+        self.reconcile()
+        with self.__lock:
+            tracked = self.__connection().execute(
+                "SELECT 1 FROM workorders WHERE excel_name = ?",
+                (ntpath.basename(filepath),)).fetchone()
+        if tracked is not None:
+            return None
+        try:
+            sv = scan_cells(filepath, MATCH_CELLS)
+        except (OSError, XlsxScanError):
+            return None
+        if woutils.worksheet_input_status(sv) != ExcelFileStatus.IS_VALID:
+            return None
+        return self.find_pending(woutils.get_match_key_from_xlsx_cells(sv))
+
+
+    def find_pending(self, key: MatchKey, exclude: Container[str] = ()) -> 'WorkOrder | None':
+        """Takes the identifying fields of an approved spreadsheet and returns the pending
+        WorkOrder that it was approved from, or None. Workorders whose .twois names are in
+        'exclude' are skipped.\n
+        The fingerprint of 'key' is looked up first, which finds a workorder whose title, due
+        date and tasks are exactly those of the spreadsheet without loading any other. A
+        spreadsheet may also have had tasks added below the workorder's own, so failing that,
+        the pending workorders with the same title and due date are loaded and accepted if
+        their task summaries begin the spreadsheet's, the same test as matches_file()."""
+        self.reconcile()
+        fingerprint: str = key.fingerprint()
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            exact = conn.execute(
+                f"SELECT {COLUMNS} FROM workorders WHERE approved = 0 AND fingerprint = ? "
+                "ORDER BY due_date, full_number", (fingerprint,)).fetchall()
+            similar = conn.execute(
+                f"SELECT {COLUMNS} FROM workorders WHERE approved = 0 AND due_date = ? "
+                "AND title = ? AND fingerprint != ? ORDER BY full_number",
+                (key.due_date.isoformat(), key.title, fingerprint)).fetchall()
+
+        for row in exact:
+            if row[0] not in exclude:
+                wo: 'WorkOrder | None' = self.load(self.__to_entry(row))
+                if wo is not None:
+                    return wo
+        for row in similar:
+            if row[0] in exclude:
+                continue
+            wo = self.load(self.__to_entry(row))
+            if wo is None:
+                continue
+            summaries: tuple[str, ...] = tuple(task.summary for task in wo.task_list)
+            if key.summaries[:len(summaries)] == summaries:
+                return wo
+        return None
+
+
+    def pending_numbers(self) -> set[int]:
+        """Returns the number of every tracked Pending-### workorder."""
+        self.reconcile()
+        with self.__lock:
+            rows = self.__connection().execute(
+                "SELECT pending_number FROM workorders WHERE pending_number IS NOT NULL")
+            return {row[0] for row in rows}
+
+
+    def load(self, entry: IndexEntry) -> 'WorkOrder | None':
+        """Loads and returns the WorkOrder behind an entry. If its file has disappeared or
+        can no longer be read, the entry is dropped from the index and None is returned."""
+        loaded: tuple['WorkOrder', int] | None = self.__read_twois(entry.twois_name)
+        if loaded is None:
+            self.remove(entry.twois_name)
+            return None
+        return loaded[0]
+
+
+    def load_workorders(self) -> list['WorkOrder']:
+        """Loads and returns every indexed WorkOrder, ordered by due date. Files that have
+        disappeared or can no longer be read are dropped from the index."""
+        resp: list['WorkOrder'] = []
+        for entry in self.entries():
+            wo: 'WorkOrder | None' = self.load(entry)
+            if wo is not None:
+                resp.append(wo)
+        return resp
+
+
+    def version(self) -> int:
+        """Returns the version number of the most recent change to the index."""
+        self.reconcile()
+        with self.__lock:
+            row = self.__connection().execute(
+                "SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return 0 if row is None else int(row[0])
+
+
+    def changes_since(self, version: int) -> IndexChanges:
+        """Returns the entries added or rewritten and the .twois names removed after
+        'version', along with the current version. A name can be both removed and changed if
+        it was removed and then written again, in which case the entry is the current state."""
+        self.reconcile()
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            rows = conn.execute(f"SELECT {COLUMNS} FROM workorders WHERE version > ? "
+                                "ORDER BY due_date, full_number", (version,)).fetchall()
+            removed = conn.execute("SELECT twois_name FROM removed WHERE version > ?",
+                                   (version,)).fetchall()
+        return IndexChanges(0 if row is None else int(row[0]),
+                            [self.__to_entry(r) for r in rows], [r[0] for r in removed])
+
+
+    def external_version(self) -> int:
+        """Returns a number which changes whenever reconcile() or rebuild() finds .twois files
+        that were added, rewritten or removed outside of the app, but not when the app records
+        its own writes with record() or remove(). Caches of the directory that are kept up to
+        date with the app's own writes, like the pending number allocator, use it to tell when
+        they must be reloaded."""
+        self.reconcile()
+        with self.__lock:
+            row = self.__connection().execute(
+                "SELECT value FROM meta WHERE key = 'external'").fetchone()
+        return 0 if row is None else int(row[0])
+
+
+    def reconcile(self) -> bool:
+        """Compares the directory's modification time against the one stored at the last
+        reconciliation. If it has changed, every .twois file whose mtime differs from its entry
+        is re-read and entries for missing files are dropped. Returns true if the directory was
+        examined."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            stamp: str = self.__directory_stamp()
+            row = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+            if row is not None and row[0] == stamp:
+                return False
+
+            known: dict[str, int] = dict(conn.execute(
+                "SELECT twois_name, twois_mtime FROM workorders").fetchall())
+            with self.__transaction():
+                version: int | None = None
+                for entry in self.__twois_files():
+                    mtime: int | None = known.pop(entry.name, None)
+                    if mtime != entry.stat().st_mtime_ns:
+                        version = version or self.__bump_version(conn)
+                        self.__index_file(conn, entry.name, version)
+                if known:
+                    self.__drop(conn, list(known), version or self.__bump_version(conn))
+                if version is not None or known:
+                    self.__bump_version(conn, 'external')
+                self.__set_stamp(conn, stamp)
+            return True
+
+
+    def rebuild(self) -> int:
+        """Deletes every entry and re-indexes every .twois file in the directory. Returns the
+        number of workorders indexed."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            stamp: str = self.__directory_stamp()
+            with self.__transaction():
+                version: int = self.__bump_version(conn)
+                old: list[str] = [row[0] for row in
+                                  conn.execute("SELECT twois_name FROM workorders")]
+                conn.execute("DELETE FROM removed")
+                self.__drop(conn, old, version)
+                for entry in self.__twois_files():
+                    self.__index_file(conn, entry.name, version)
+                self.__bump_version(conn, 'external')
+                self.__set_stamp(conn, stamp)
+            return conn.execute("SELECT COUNT(*) FROM workorders").fetchone()[0]
+
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """A context manager which holds the index for the calling thread and commits every
+        change made inside it in a single transaction when it exits, or rolls them all back if
+        it exits with an exception. Batches may be nested; only the outermost one commits."""
+        with self.__lock:
+            conn: sqlite3.Connection = self.__connection()
+            self.__batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self.__batch_depth -= 1
+                if not self.__batch_depth:
+                    conn.rollback()
+                raise
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                conn.commit()
+
+
+    def close(self) -> None:
+        """Closes the database connection. It is reopened automatically on next use."""
+        with self.__lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+
+workorder_index: WorkOrderIndex = WorkOrderIndex()
+
+
+if __name__ == '__main__':
+    print(f"Indexed {workorder_index.rebuild()} workorders from '{workorder_index.directory}'")
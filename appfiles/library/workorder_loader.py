@@ -0,0 +1,102 @@
+"""Module which provides the WorkOrderLoader class, which reads the workorders tracked by a
+WorkOrderIndex on a worker thread.\n
+Reading every tracked .twois file on the Tk thread froze the window until the last one was read.
+The loader reads them on a worker thread instead and hands them back through a queue, which the
+window drains a few at a time with after() polling. Each load is tagged with a generation
+number, so when a load is started over, whatever the earlier one still puts on the queue is
+dropped rather than shown.
+"""
+
+from queue import Empty, SimpleQueue
+from threading import Thread
+from typing import Any
+
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import IndexEntry, WorkOrderIndex, workorder_index
+
+
+class WorkOrderLoader:
+    """A background loader of the workorders tracked by a WorkOrderIndex. Each load hands back
+    (kind, payload) messages, in order: a 'total' message with the number of workorders to
+    expect and the index version they reflect, one 'workorder' or 'skipped' message per entry
+    with its (IndexEntry, WorkOrder | None) pair, and a final 'done' message.
+
+    Public Methods
+    -------------------------
+        start(rebuild: bool = False) -> int:
+            Starts a new load, abandoning any load still running, and returns its generation.
+
+        drain(limit: int) -> list[tuple[str, Any]]:
+            The messages of the current load that have arrived, at most 'limit' of them.
+
+        generation() -> int:
+            The generation of the most recently started load.
+
+        is_loading() -> bool:
+            Whether the current load has messages that have not been drained yet.
+    """
+    def __init__(self, index: WorkOrderIndex = workorder_index) -> None:
+        self.index: WorkOrderIndex = index
+        self.__queue: SimpleQueue = SimpleQueue()
+        self.__generation: int = 0
+        self.__loading: bool = False
+
+
+    ########### PRIVATE METHODS
+    @staticmethod
+    def __load(index: WorkOrderIndex, generation: int, queue: SimpleQueue,
+               rebuild: bool) -> None:
+        """The body of the worker thread. Puts (generation, kind, payload) messages on the
+        queue, finishing with 'done' even if reading the index fails."""
+        try:
+            if rebuild:
+                index.rebuild()
+            version: int = index.version()
+            entries: list[IndexEntry] = index.entries()
+            queue.put((generation, 'total', (len(entries), version)))
+            for entry in entries:
+                wo: WorkOrder | None = index.load(entry)
+                queue.put((generation, 'workorder' if wo is not None else 'skipped', (entry, wo)))
+        finally:
+            queue.put((generation, 'done', None))
+
+
+    ########### PUBLIC METHODS
+    def start(self, rebuild: bool = False) -> int:
+        """Starts a worker thread which reads every workorder tracked by the index, rebuilding
+        the index from disk first if 'rebuild' is true. Messages from any earlier load are
+        ignored from now on. Returns the generation of the new load."""
+        self.__generation += 1
+        self.__loading = True
+        Thread(target=self.__load, args=(self.index, self.__generation, self.__queue, rebuild),
+               daemon=True).start()
+        return self.__generation
+
+
+    def drain(self, limit: int) -> list[tuple[str, Any]]:
+        """Returns at most 'limit' of the messages of the current load that have arrived so far,
+        without waiting for more. Messages left over from earlier loads are discarded. Once the
+        'done' message has been returned, the load is over and nothing more is returned."""
+        resp: list[tuple[str, Any]] = []
+        while self.__loading and len(resp) < limit:
+            try:
+                generation, kind, payload = self.__queue.get_nowait()
+            except Empty:
+                break
+            if generation != self.__generation:
+                continue
+            resp.append((kind, payload))
+            if kind == 'done':
+                self.__loading = False
+        return resp
+
+
+    def generation(self) -> int:
+        """Returns the generation of the most recently started load."""
+        return self.__generation
+
+
+    def is_loading(self) -> bool:
+        """Returns true if a load has been started and its 'done' message has not been drained
+        yet."""
+        return self.__loading
@@ -0,0 +1,53 @@
+"""Module which searches the text of every workorder, open and completed, in one query.\n
+The open workorders are searched through the full-text table of the workorder index and the
+completed ones through that of the archive index. Both tables use the same bm25 weights (see
+appfiles.utils.fulltext), but a bm25 score depends on the term and length statistics of the
+table it comes from, so ranks from the two tables cannot be compared. The two lists are
+returned separately, each in its own order of relevance.
+"""
+
+from datetime import date
+from typing import NamedTuple
+
+from appfiles.library.archive_index import ArchiveIndex, archive_index
+from appfiles.library.workorder_index import WorkOrderIndex, workorder_index
+from appfiles.utils.fulltext import to_fts_query
+
+DEFAULT_LIMIT: int = 50
+
+
+class SearchHit(NamedTuple):
+    """One workorder found by a search. 'key' is the name of the .twois file of an open
+    workorder, or the archive path of a completed one. 'date' is the due date of an open
+    workorder and the end date of a completed one. A lower rank is a better match than the
+    other hits in the same list."""
+    rank: float
+    key: str
+    full_number: str
+    title: str
+    date: date | None
+
+
+class SearchResults(NamedTuple):
+    """The hits of a search, in two lists that are each ordered best match first: the open
+    workorders from the workorder index, and the completed ones from the archive index."""
+    open: list[SearchHit]
+    completed: list[SearchHit]
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def search_workorders(text: str, limit: int = DEFAULT_LIMIT,
+                      index: WorkOrderIndex = workorder_index,
+                      archive: ArchiveIndex = archive_index) -> SearchResults:
+    """Takes the text typed into a search box and returns at most 'limit' open workorders and
+    at most 'limit' completed ones that match it, each list best match first. See
+    appfiles.utils.fulltext for the query syntax."""
+    query: str | None = to_fts_query(text)
+    if query is None:
+        return SearchResults([], [])
+    return SearchResults(
+        [SearchHit(rank, e.twois_name, e.full_number, e.title, e.due_date)
+         for e, rank in index.search(query, limit)],
+        [SearchHit(rank, e.path, e.full_number, e.title, e.enddate)
+         for e, rank in archive.search(query, limit)])
@@ -0,0 +1,182 @@
+"""Module which provides the NumberAllocator class, a cached allocator for the lowest unused
+positive integer in some numbering scheme, such as the ### in a "Pending-###" workorder
+number.\n
+Finding the lowest gap in a set of numbers by listing where they are stored and then walking
+upwards from 1 costs O(n) every time a number is needed. The allocator instead keeps the numbers
+that are in use, a min-heap of the free numbers below the highest one handed out so far, and
+that high-water mark, so handing out or giving back a number is O(log n). It only goes back to
+the storage when a cheap 'stamp' of that storage (such as a directory's mtime) changes.\n
+Numbers can be reserved for an object that has not been saved yet. A reservation is released
+automatically if the object is garbage collected before the number is committed, so objects
+that are created and then thrown away never use up a number. The garbage collector can run in
+the middle of any call, including one that holds the allocator's lock, so a collected owner
+only queues its cancellation, and the next call that takes the lock applies it.
+"""
+
+from heapq import heappop, heappush
+from itertools import count
+from queue import Empty, SimpleQueue
+from threading import Lock
+from typing import Callable, Hashable, Iterable
+import weakref
+
+_UNSYNCED: object = object()
+
+
+class NumberAllocator:
+    """A cached allocator of the lowest unused positive integer.
+
+    Public Methods
+    -------------------------
+        peek() -> int:
+            The number that the next call to allocate() would return, without reserving it.
+
+        allocate() -> int:
+            Reserves and returns the lowest unused number.
+
+        reserve_for(owner: object) -> tuple[int, int]:
+            Same as allocate(), but the reservation is cancelled if 'owner' is garbage
+            collected before the number is committed. Returns the number and a reservation
+            token that can be passed to cancel().
+
+        commit(num: int) -> None:
+            Records that a reserved number has been saved, so it stays in use.
+
+        cancel(num: int, token: int) -> None:
+            Gives back a reservation that was never committed.
+
+        release(num: int) -> None:
+            Records that a number is no longer in use, so that it can be handed out again.
+
+        invalidate() -> None:
+            Forces the numbers in use to be reloaded from storage on next use.
+    """
+    def __init__(self, load_used: Callable[[], Iterable[int]],
+                 stamp: Callable[[], Hashable]) -> None:
+        self.__load_used: Callable[[], Iterable[int]] = load_used
+        self.__stamp: Callable[[], Hashable] = stamp
+        self.__last_stamp: Hashable = _UNSYNCED
+        self.__used: set[int] = set()
+        self.__reserved: dict[int, int] = {}
+        self.__free: list[int] = []
+        self.__high: int = 0
+        self.__tokens = count(1)
+        self.__lock: Lock = Lock()
+        self.__collected: SimpleQueue = SimpleQueue()
+
+
+    ########### PRIVATE METHODS
+    def __drain_collected(self) -> None:
+        """Cancels the reservations of owners that were garbage collected since the last call.
+        Must be called with the lock held."""
+        while True:
+            try:
+                num, token = self.__collected.get_nowait()
+            except Empty:
+                return
+            self.__cancel(num, token)
+
+
+    def __cancel(self, num: int, token: int) -> None:
+        if self.__reserved.get(num) == token:
+            del self.__reserved[num]
+            heappush(self.__free, num)
+
+
+    def __sync(self) -> None:
+        """Reloads the numbers in use from storage if the storage's stamp has changed, and
+        rebuilds the free-list from the gaps. Outstanding reservations are kept."""
+        self.__drain_collected()
+        stamp: Hashable = self.__stamp()
+        if stamp == self.__last_stamp:
+            return
+        self.__used = {num for num in self.__load_used() if num > 0}
+        taken: set[int] = self.__used | self.__reserved.keys()
+        self.__high = max(taken, default=0)
+        self.__free = [num for num in range(1, self.__high) if num not in taken]
+        self.__last_stamp = stamp
+
+
+    def __is_taken(self, num: int) -> bool:
+        return num in self.__used or num in self.__reserved
+
+
+    def __next_free(self, pop: bool) -> int:
+        """Returns the lowest free number. Stale heap entries for numbers that were taken some
+        other way are discarded as they are found."""
+        while self.__free and self.__is_taken(self.__free[0]):
+            heappop(self.__free)
+        if self.__free:
+            return heappop(self.__free) if pop else self.__free[0]
+        num: int = self.__high + 1
+        while self.__is_taken(num):
+            num += 1
+        if pop:
+            self.__high = num
+        return num
+
+
+    def __reserve(self) -> tuple[int, int]:
+        self.__sync()
+        num: int = self.__next_free(True)
+        token: int = next(self.__tokens)
+        self.__reserved[num] = token
+        return (num, token)
+
+
+    ########### PUBLIC METHODS
+    def peek(self) -> int:
+        """Returns the number that the next call to allocate() would return."""
+        with self.__lock:
+            self.__sync()
+            return self.__next_free(False)
+
+
+    def allocate(self) -> int:
+        """Reserves and returns the lowest unused number."""
+        with self.__lock:
+            return self.__reserve()[0]
+
+
+    def reserve_for(self, owner: object) -> tuple[int, int]:
+        """Reserves the lowest unused number on behalf of 'owner' and returns it along with a
+        reservation token. The reservation is cancelled if 'owner' is garbage collected before
+        the number is committed."""
+        with self.__lock:
+            num, token = self.__reserve()
+        weakref.finalize(owner, self.__collected.put, (num, token))
+        return (num, token)
+
+
+    def commit(self, num: int) -> None:
+        """Records that 'num' has been saved to storage, so that it stays in use even after
+        the object that reserved it is gone."""
+        with self.__lock:
+            self.__drain_collected()
+            self.__reserved.pop(num, None)
+            self.__used.add(num)
+            self.__high = max(self.__high, num)
+
+
+    def cancel(self, num: int, token: int) -> None:
+        """Gives back the reservation of 'num' identified by 'token', if it is still held and
+        has not been committed."""
+        with self.__lock:
+            self.__drain_collected()
+            self.__cancel(num, token)
+
+
+    def release(self, num: int) -> None:
+        """Records that 'num' is no longer in use, so that it can be handed out again."""
+        with self.__lock:
+            self.__drain_collected()
+            if num in self.__used or num in self.__reserved:
+                self.__used.discard(num)
+                self.__reserved.pop(num, None)
+                heappush(self.__free, num)
+
+
+    def invalidate(self) -> None:
+        """Forces the numbers in use to be reloaded from storage on next use."""
+        with self.__lock:
+            self.__last_stamp = _UNSYNCED
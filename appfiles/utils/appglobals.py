@@ -12,6 +12,10 @@ IN_PROGRESS_DIR: str = os.getcwd() + "\\data\\in_progress"
 COMPLETE_DIR: str = os.getcwd() + "\\data\\complete"
 TEMPLATE_DIR: str = os.getcwd() + "\\data\\templates"
 TEMPLATE_TWOIS: str = os.getcwd() + "\\appfiles\\res\\TWOIS_template-3-20.xlsx"
+INDEX_DB: str = os.getcwd() + "\\data\\workorders.db"
+ARCHIVE_DB: str = os.getcwd() + "\\data\\archive.db"
+RECURRING_DB: str = os.getcwd() + "\\data\\recurring.db"
+JOURNAL_DIR: str = os.getcwd() + "\\data\\journal"
 TESTFILE: str = os.getcwd() + "\\appfiles\\res\\testfile.xlsx"
 FONTSIZE: int = 9
 NUMROWS: int = 1
@@ -29,6 +33,7 @@ default_room: int = 6
 default_site: Site = Site.VB
 default_special: Special = Special.S
 default_wotype: WorkOrderType = WorkOrderType.OTH
+recurring_lead_days: int = 7
 
 
 
@@ -0,0 +1,160 @@
+"""Bulk approval of a folder, or a zip archive, of approved TWOIS spreadsheets.\n
+Approving a returned spreadsheet one at a time means picking the file, loading it, and then
+comparing it against the pending workorders one by one with WorkOrder.matches_file(), which
+loads the spreadsheet again for every candidate. The bulk importer instead classifies every
+file once, in parallel across a process pool, with the streaming reader behind
+approved_file_status(). Each worker also pulls the cells that identify a workorder (the title,
+the due date and the task summaries) out of the same scan, so the files are never opened with
+openpyxl just to be matched.\n
+Each approved file is then matched to its pending workorder by looking its fingerprint up in
+the workorder index, so only the workorders that are matched are ever loaded, and each one can
+only be claimed by one file. Every match is approved inside one index batch. Each approval is
+its own file transaction, so a file that cannot be approved is recorded in the ImportReport
+along with the reason, and the approvals before and after it still go through.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import ntpath
+import os
+import sqlite3
+from tempfile import TemporaryDirectory
+from typing import NamedTuple
+from zipfile import BadZipFile, ZipFile
+
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import WorkOrderIndex, workorder_index
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.fingerprint import MatchKey
+from appfiles.utils.twois_layout import SheetValues
+from appfiles.utils.twois_codec import TwoisFormatError
+import appfiles.utils.workorder as woutils
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
+
+CHUNKSIZE: int = 4
+
+
+class ClassifiedFile(NamedTuple):
+    """The result of classifying one spreadsheet. 'key' is only set if the file is valid."""
+    path: str
+    status: ExcelFileStatus
+    key: MatchKey | None
+
+
+class ImportReport(NamedTuple):
+    """The outcome of a bulk import. Files are named relative to the folder or zip archive
+    they were imported from.\n
+    approved: (file, pending workorder number) for every workorder that was approved.\n
+    unmatched: approved spreadsheets that do not belong to any pending workorder.\n
+    invalid: (file, status) for every file that is not an approved TWOIS spreadsheet.\n
+    failed: (file, reason) for every file that matched a pending workorder but could not be
+    approved, such as one that is locked.
+    """
+    approved: list[tuple[str, str]]
+    unmatched: list[str]
+    invalid: list[tuple[str, ExcelFileStatus]]
+    failed: list[tuple[str, str]]
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def import_approved_workorders(source: str, workers: int | None = None,
+                               index: WorkOrderIndex = workorder_index) -> ImportReport:
+    """Takes a path to a directory, or to a .zip archive, of approved TWOIS spreadsheets and
+    approves the pending workorder in 'index' that each one belongs to. Only the files directly
+    inside the directory, or anywhere inside the archive, are considered. 'workers' is the size
+    of the process pool used to classify the files; 1 classifies them on the calling thread.
+    Raises an OSError if the source cannot be read, or an sqlite3.Error if the index cannot.
+    """
+    if os.path.isdir(source):
+        files: list[str] = sorted(entry.path for entry in os.scandir(source) if entry.is_file())
+        return __import_files(files, source, workers, index)
+
+    with TemporaryDirectory() as tmpdir:
+        try:
+            with ZipFile(source) as zf:
+                zf.extractall(tmpdir)
+        except BadZipFile as ex:
+            raise OSError(f"'{source}' is neither a directory nor a zip archive") from ex
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(tmpdir)
+                       for name in names)
+        return __import_files(files, tmpdir, workers, index)
+
+
+def classify_files(files: list[str], workers: int | None = None,
+                   processes: bool = True) -> list[ClassifiedFile]:
+    """Classifies every file with the same checks as approved_file_status(), in parallel
+    across a pool of 'workers' processes, and returns the results in the same order. If
+    'processes' is false the pool is made of threads instead."""
+    if workers == 1 or len(files) < 2:
+        return [__classify_file(path) for path in files]
+    executor: type[Executor] = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(__classify_file, files, chunksize=CHUNKSIZE))
+
+
+def match_pending_workorders(files: list[ClassifiedFile],
+                             index: WorkOrderIndex = workorder_index
+                             ) -> tuple[dict[str, WorkOrder], list[str]]:
+    """Takes classified files and matches each valid one to the pending workorder in 'index'
+    that it was approved from. Returns a dict of file path to WorkOrder and the paths of the
+    valid files that matched nothing. A workorder is only matched to the first file that fits
+    it."""
+    claimed: set[str] = set()
+    matched: dict[str, WorkOrder] = {}
+    unmatched: list[str] = []
+    for file in files:
+        if file.key is None:
+            continue
+        wo: WorkOrder | None = index.find_pending(file.key, claimed)
+        if wo is None:
+            unmatched.append(file.path)
+        else:
+            claimed.add(ntpath.basename(wo.get_twois_filepath()))
+            matched[file.path] = wo
+    return (matched, unmatched)
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+def __import_files(files: list[str], root: str, workers: int | None,
+                   index: WorkOrderIndex) -> ImportReport:
+    """Approves every matched file in its own file transaction. A file that fails is
+    recorded and skipped, so the index batch only ever commits approvals that are on disk."""
+    classified: list[ClassifiedFile] = classify_files(files, workers)
+    matched, unmatched = match_pending_workorders(classified, index)
+
+    approved: list[tuple[str, str]] = []
+    failed: list[tuple[str, str]] = []
+    with index.batch():
+        for path, wo in matched.items():
+            pending_number: str = wo.get_full_workorder_number()
+            try:
+                wo.approve(path, override=True)
+            except (OSError, ValueError, TwoisFormatError, sqlite3.Error) as ex:
+                failed.append((os.path.relpath(path, root), str(ex)))
+                continue
+            approved.append((os.path.relpath(path, root), pending_number))
+
+    return ImportReport(approved,
+                        [os.path.relpath(path, root) for path in unmatched],
+                        [(os.path.relpath(f.path, root), f.status) for f in classified
+                         if f.status != ExcelFileStatus.IS_VALID],
+                        failed)
+
+
+def __classify_file(path: str) -> ClassifiedFile:
+    """Runs in a worker thread or process. Scans the cells needed to both classify and match a
+    file."""
+    status: ExcelFileStatus = woutils.filepath_status(path)
+    if status != ExcelFileStatus.IS_VALID:
+        return ClassifiedFile(path, status, None)
+    try:
+        sv: SheetValues = scan_cells(path, layout.MATCH_CELLS)
+    except XlsxScanError:
+        return ClassifiedFile(path, ExcelFileStatus.NOT_TWOIS, None)
+
+    status = woutils.worksheet_approved_status(sv)
+    if status != ExcelFileStatus.IS_VALID:
+        return ClassifiedFile(path, status, None)
+    return ClassifiedFile(path, status, woutils.get_match_key_from_xlsx_cells(sv))
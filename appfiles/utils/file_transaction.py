@@ -0,0 +1,256 @@
+"""Module which provides the FileTransaction class, a crash-safe way to write, replace and remove
+a group of files together, such as the .xlsx and .twois pair of a WorkOrder.\n
+Writing a file in place means that a crash, or a file that is locked on the network share,
+can leave it half-written, and a change that touches several files can be left half-done.
+A FileTransaction instead writes every new file to a temporary file next to its destination
+and flushes it to disk. Nothing that already exists is touched until commit(), which first
+writes a small write-ahead journal listing every replacement and removal, then applies them
+with os.replace() (an atomic rename), and only then deletes the journal.\n
+If the process dies, or a step fails, after the journal is written, recover() finishes the
+work from the journal the next time the app starts. Every step in a journal can safely be run
+again, so a journal that was partly applied is simply applied again. If the process dies
+before the journal is written, nothing was changed, and recover() only sweeps away the
+temporary files that were left behind.
+"""
+
+import json
+import os
+from types import TracebackType
+from typing import Iterable, Self
+from uuid import uuid4
+
+from appfiles.utils.appglobals import JOURNAL_DIR
+
+TEMP_SUFFIX: str = ".partial"
+JOURNAL_SUFFIX: str = ".journal"
+
+
+class FileTransaction:
+    """A group of file replacements and removals that are applied together, or not at all.
+    Used as a context manager, the transaction commits when the block exits normally and
+    rolls back if it raises.
+
+    Public Methods
+    -------------------------
+        stage(dest: str) -> str:
+            Returns a temporary path for a writer that needs a filename, such as openpyxl.
+            Whatever is written there replaces 'dest' on commit.
+
+        write_bytes(dest: str, data: bytes) -> None:
+            Stages 'data' as the new contents of 'dest'.
+
+        write_text(dest: str, text: str) -> None:
+            Stages 'text' as the new utf-8 contents of 'dest'.
+
+        remove(path: str) -> None:
+            Removes 'path' on commit, unless the same transaction writes a new file there.
+
+        commit() -> None:
+            Journals and applies every staged change.
+
+        rollback() -> None:
+            Throws every staged change away.
+    """
+    def __init__(self, journal_dir: str = JOURNAL_DIR) -> None:
+        self.journal_dir: str = journal_dir
+        self.__id: str = uuid4().hex
+        self.__replacements: dict[str, str] = {}
+        self.__removals: list[str] = []
+        self.__done: bool = False
+
+
+    def __enter__(self) -> Self:
+        return self
+
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None,
+                 tb: TracebackType | None) -> None:
+        if self.__done:
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+    ########### PRIVATE METHODS
+    def __journal_path(self) -> str:
+        return os.path.join(self.journal_dir, f"{self.__id}{JOURNAL_SUFFIX}")
+
+
+    def __operations(self) -> list[list[str]]:
+        """Returns the journal entries, replacements first. A removal of a path that is also
+        being replaced is left out, so that applying the journal twice cannot remove the file
+        that replaced it."""
+        ops: list[list[str]] = [["replace", temp, dest]
+                                for dest, temp in self.__replacements.items()]
+        ops.extend(["remove", path] for path in dict.fromkeys(self.__removals)
+                   if path not in self.__replacements)
+        return ops
+
+
+    ########### PUBLIC METHODS
+    def stage(self, dest: str) -> str:
+        """Returns the temporary path that the new contents of 'dest' should be written to."""
+        return self.__replacements.setdefault(dest, f"{dest}.{self.__id}{TEMP_SUFFIX}")
+
+
+    def write_bytes(self, dest: str, data: bytes) -> None:
+        """Writes 'data' to the temporary file for 'dest'."""
+        with open(self.stage(dest), "wb") as outfile:
+            outfile.write(data)
+
+
+    def write_text(self, dest: str, text: str) -> None:
+        """Writes 'text', encoded as utf-8, to the temporary file for 'dest'."""
+        self.write_bytes(dest, text.encode("utf-8"))
+
+
+    def remove(self, path: str) -> None:
+        """Removes 'path' when the transaction commits, if it exists then."""
+        self.__removals.append(path)
+
+
+    def commit(self) -> None:
+        """Flushes every staged file to disk, writes the journal, applies it, and deletes it.
+        If applying the journal fails, the journal is kept for recover() to finish and the
+        error is raised."""
+        if self.__done:
+            return
+        self.__done = True
+        ops: list[list[str]] = self.__operations()
+        if ops:
+            apply_journal(self.__journal_path(), ops)
+
+
+    def rollback(self) -> None:
+        """Deletes every staged temporary file. Nothing else has been touched."""
+        if self.__done:
+            return
+        self.__done = True
+        for temp in self.__replacements.values():
+            try:
+                os.remove(temp)
+            except FileNotFoundError:
+                pass
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Replaces the contents of a single file atomically: 'data' is written to a temporary
+    file, flushed to disk, and renamed over 'path', so 'path' always holds either the old or
+    the new contents in full."""
+    temp: str = f"{path}.{uuid4().hex}{TEMP_SUFFIX}"
+    try:
+        with open(temp, "wb") as outfile:
+            outfile.write(data)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        __remove_if_present(temp)
+        raise
+    __fsync_directory(os.path.dirname(path))
+
+
+def apply_journal(journal_path: str, ops: list[list[str]]) -> None:
+    """Flushes the temporary files that 'ops' rename into place to disk, writes 'ops' as a
+    journal to 'journal_path', applies them, and deletes the journal. If applying them fails,
+    the journal is kept for recover() to finish and the error is raised."""
+    for op in ops:
+        if op[0] == "replace":
+            __fsync_file(op[1])
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    write_atomic(journal_path, json.dumps(ops).encode("utf-8"))
+    __apply(ops)
+    os.remove(journal_path)
+
+
+def recover(directories: Iterable[str] = (), journal_dir: str = JOURNAL_DIR) -> int:
+    """Finishes every transaction that was journaled but not completed, then deletes the
+    temporary files left anywhere under 'directories' by transactions that never reached their
+    journal, including the dated folders that completed workorders are filed in. Should be
+    called at startup, before anything else writes to those directories. Returns
+    the number of journals that were replayed. A journal that still cannot be applied (say,
+    because a file is locked) is kept along with its temporary files, the rest are still
+    recovered, and then the first such error is raised."""
+    replayed: int = 0
+    pending: set[str] = set()
+    error: OSError | None = None
+    names: list[str] = []
+    if os.path.isdir(journal_dir):
+        names = sorted(n for n in os.listdir(journal_dir) if n.endswith(JOURNAL_SUFFIX))
+    for name in names:
+        path: str = os.path.join(journal_dir, name)
+        try:
+            with open(path, "rb") as infile:
+                ops: list[list[str]] = json.loads(infile.read())
+        except ValueError:
+            # Journals are written atomically, so an unreadable one was never committed
+            os.remove(path)
+            continue
+        try:
+            __apply(ops)
+        except OSError as ex:
+            pending.update(op[1] for op in ops if op[0] == "replace")
+            error = error or ex
+            continue
+        os.remove(path)
+        replayed += 1
+
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.endswith(TEMP_SUFFIX) and path not in pending:
+                    __remove_if_present(path)
+    if error is not None:
+        raise error
+    return replayed
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+def __apply(ops: list[list[str]]) -> None:
+    """Applies journal entries. Each one is skipped if it has already been applied."""
+    directories: set[str] = set()
+    for op in ops:
+        if op[0] == "replace":
+            if os.path.exists(op[1]):
+                os.replace(op[1], op[2])
+            directories.add(os.path.dirname(op[2]))
+        elif op[0] == "remove":
+            __remove_if_present(op[1])
+            directories.add(os.path.dirname(op[1]))
+    for directory in directories:
+        __fsync_directory(directory)
+
+
+def __fsync_file(path: str) -> None:
+    with open(path, "rb+") as file:
+        os.fsync(file.fileno())
+
+
+def __fsync_directory(directory: str) -> None:
+    """Flushes a directory's entries to disk, so that a rename in it survives a power cut.
+    Windows cannot open a directory as a file and does not need this, so it is skipped."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd: int = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def __remove_if_present(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
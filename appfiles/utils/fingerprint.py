@@ -0,0 +1,38 @@
+"""Canonical fingerprint of the fields that tie an approved TWOIS spreadsheet to the pending
+workorder it was approved from: the title, the due date and the summary of every task.\n
+A pending workorder and the spreadsheet that comes back from PC match when those fields are
+equal, so both sides are reduced to the same short digest. The digest of every workorder is
+stored in its .twois header and in the workorder index, and an incoming spreadsheet only has
+to be hashed once to be looked up, instead of being compared field by field against every
+pending workorder.\n
+Each field is length-prefixed before it is hashed, so that no two different lists of fields
+can run together into the same bytes.
+"""
+
+from datetime import date
+from hashlib import blake2b
+from typing import Iterable, NamedTuple
+
+DIGEST_SIZE: int = 16
+
+
+class MatchKey(NamedTuple):
+    """The fields that tie an approved spreadsheet to the pending workorder it came from."""
+    title: str
+    due_date: date
+    summaries: tuple[str, ...]
+
+    def fingerprint(self) -> str:
+        """Returns the fingerprint of these fields."""
+        return workorder_fingerprint(self.title, self.due_date, self.summaries)
+
+
+def workorder_fingerprint(title: str, due_date: date, summaries: Iterable[str]) -> str:
+    """Takes the identifying fields of a workorder and returns their fingerprint as a string
+    of 2 * DIGEST_SIZE hex digits."""
+    digest = blake2b(digest_size=DIGEST_SIZE)
+    for field in (title, due_date.isoformat(), *summaries):
+        data: bytes = str(field).encode("utf-8")
+        digest.update(len(data).to_bytes(4, "little"))
+        digest.update(data)
+    return digest.hexdigest()
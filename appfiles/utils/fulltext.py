@@ -0,0 +1,64 @@
+"""Shared pieces of the full-text search over workorders.\n
+Both the workorder index (open workorders) and the archive index (completed ones) keep an
+SQLite FTS5 table with the same four columns: the title, the description, the task summaries
+and references, and the log comments. This module defines those columns, their weights in the
+bm25 ranking, and how the text typed into the search box becomes an FTS5 query, so that hits
+from both indexes are ranked the same way.\n
+A query is a list of words and "quoted phrases". Every phrase must appear. The words are
+alternatives, and each one also matches any word it begins, so the more of them a workorder
+holds, and the rarer they are, the higher it ranks.
+"""
+
+import re
+from typing import Iterable
+
+FTS_OPTIONS: str = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+FTS_COLUMNS: tuple[str, ...] = ("title", "description", "tasks", "comments")
+# A match in the title counts for the most, and one in a log comment for the least
+FTS_WEIGHTS: tuple[float, ...] = (10.0, 2.0, 4.0, 1.0)
+MIN_PREFIX: int = 3
+
+PHRASE_RE: re.Pattern = re.compile(r'"([^"]*)"?')
+TOKEN_RE: re.Pattern = re.compile(r"\w+")
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def fts_table(name: str, key: str) -> str:
+    """Returns the statement that creates an FTS5 table called 'name' holding FTS_COLUMNS,
+    plus a 'key' column that ties each row back to the entry it was written for."""
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({key} UNINDEXED, "
+            f"{', '.join(FTS_COLUMNS)}, {FTS_OPTIONS});")
+
+
+def bm25(name: str) -> str:
+    """Returns the ranking expression for an FTS5 table made by fts_table(). Lower is better."""
+    return f"bm25({name}, 0, {', '.join(str(w) for w in FTS_WEIGHTS)})"
+
+
+def document_text(title: str, description: str | None, tasks: Iterable[tuple[str, str | None]],
+                  comments: Iterable[str]) -> tuple[str, str, str, str]:
+    """Takes the searchable fields of a workorder, with each task as a (summary, reference)
+    pair, and returns the text of each of FTS_COLUMNS."""
+    return (title, description or "",
+            "\n".join(f"{summary} {reference or ''}".strip() for summary, reference in tasks),
+            "\n".join(comments))
+
+
+def to_fts_query(text: str) -> str | None:
+    """Takes the text typed into a search box and returns the FTS5 query for it, or None if
+    it holds nothing to search for. Words of MIN_PREFIX letters or more also match as the
+    beginning of a longer word."""
+    phrases: list[str] = []
+    for found in PHRASE_RE.finditer(text):
+        tokens: list[str] = TOKEN_RE.findall(found.group(1))
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    words: list[str] = []
+    for token in dict.fromkeys(TOKEN_RE.findall(PHRASE_RE.sub(" ", text).lower())):
+        words.append(f'"{token}"*' if len(token) >= MIN_PREFIX else f'"{token}"')
+
+    clauses: list[str] = phrases.copy()
+    if words:
+        clauses.append("(" + " OR ".join(words) + ")")
+    return " AND ".join(clauses) or None
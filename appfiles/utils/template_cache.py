@@ -0,0 +1,70 @@
+"""In-process cache of parsed .xlsx templates.\n
+Parsing TWOIS_template-3-20.xlsx with load_workbook() takes far longer than writing a work
+order's values into it, and every save of a work order without a matching excel file starts
+from a fresh copy of the template. This module parses each template once, keeps a pickled
+snapshot of the resulting Workbook, and hands out independent clones of that snapshot.
+Unpickling a Workbook is more than an order of magnitude faster than parsing the file, and
+unlike copy.deepcopy() it rebuilds openpyxl's style tables correctly. A cached template is
+parsed again whenever its modification time or size on disk changes.
+"""
+
+import os
+import pickle
+from threading import Lock
+from typing import NamedTuple
+
+from openpyxl import load_workbook, Workbook
+
+
+class _CachedTemplate(NamedTuple):
+    """A pickled Workbook along with the (mtime, size) of the file it was parsed from."""
+    stamp: tuple[int, int]
+    snapshot: bytes
+
+
+class TemplateCache:
+    """Cache of parsed .xlsx templates, keyed by file path.
+
+    Public Methods
+    -------------------------
+        load(filepath: str) -> Workbook:
+            Returns a new Workbook equivalent to load_workbook(filepath), parsing the file only
+            if it is not cached or has changed since it was cached.
+
+        invalidate(filepath: str | None = None) -> None:
+            Drops one cached template, or all of them if no path is given.
+    """
+    def __init__(self) -> None:
+        self.__templates: dict[str, _CachedTemplate] = {}
+        self.__lock: Lock = Lock()
+
+
+    def load(self, filepath: str) -> Workbook:
+        """Returns an independent clone of the parsed template at 'filepath'. Changes made to
+        the returned Workbook never reach the cache or any other clone."""
+        stat: os.stat_result = os.stat(filepath)
+        stamp: tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+        with self.__lock:
+            cached: _CachedTemplate | None = self.__templates.get(filepath)
+            if cached is None or cached.stamp != stamp:
+                wb: Workbook = load_workbook(filepath)
+                cached = _CachedTemplate(stamp, pickle.dumps(wb, pickle.HIGHEST_PROTOCOL))
+                self.__templates[filepath] = cached
+        return pickle.loads(cached.snapshot)
+
+
+    def invalidate(self, filepath: str | None = None) -> None:
+        """Forgets the cached copy of 'filepath', or every cached template if it is None."""
+        with self.__lock:
+            if filepath is None:
+                self.__templates.clear()
+            else:
+                self.__templates.pop(filepath, None)
+
+
+template_cache: TemplateCache = TemplateCache()
+
+
+def load_template(filepath: str) -> Workbook:
+    """Returns a fresh copy of the template at 'filepath' from the shared TemplateCache."""
+    return template_cache.load(filepath)
@@ -0,0 +1,351 @@
+"""Compact, versioned binary format for .twois files.\n
+.twois files used to be a pickle of the whole WorkOrder object. A pickle stores every attribute
+name of every object in it, including the name-mangled private ones, rebuilds a TaskItem and a
+LogComment through the generic object machinery, and stops loading as soon as a class is moved
+or renamed. This module writes the same information as a fixed layout instead:\n
+    preamble    MAGIC, format version, and the sizes of the two sections below
+    header      the fields that identify and list a workorder (number, title, due date, site
+                and so on) as a string table and one fixed-size record, followed by the
+                workorder's fingerprint (see appfiles.utils.fingerprint)
+    body        the description, the task list, the log comments and the completion data, as
+                a string table, one fixed-size record per TaskItem and LogComment, and one
+                record for the WorkorderCompletionData if there is any\n
+A string table stores every string in its section once, as a table of lengths followed by a
+single utf-8 blob. Records refer to strings by their index in the table, store enums as their
+integer values and dates as ordinals.\n
+The header comes first and its size is in the preamble, so load_header() can list a workorder
+by reading only the first few hundred bytes of its file. load_body() reads the rest later, if
+it is ever needed.\n
+Files that do not start with MAGIC are read as legacy pickles, so existing .twois files keep
+loading and are rewritten in the binary format the next time they are saved.\n
+The codec works on the same state dicts that WorkOrder's __getstate__ and __setstate__ use,
+keyed by field name, with the workorder number under 'wo_number'. The save directory is not
+stored, since it is an absolute path that is only ever the in_progress directory once saved.
+"""
+
+from contextlib import contextmanager
+import pickle
+import struct
+from datetime import date
+from typing import Any, BinaryIO, Iterator
+
+from appfiles.library.completiondata import WorkorderCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.taskitem import TaskItem, shared_task
+from appfiles.library.workorder_type import WorkOrderType
+from appfiles.utils.file_transaction import write_atomic
+from appfiles.utils.fingerprint import DIGEST_SIZE, workorder_fingerprint
+
+MAGIC: bytes = b"TWOIS"
+FORMAT_VERSION: int = 1
+
+FLAG_FIELDS: tuple[str, ...] = ('pac_required', 'ncr_required', 'task_lead_required',
+                                'tech_witness_point', 'peer_review_required',
+                                'peer_review_attached', 'ehs_required', 'qamip',
+                                'qa_review_required')
+BODY_FIELDS: frozenset[str] = frozenset(('description', 'task_list', 'comments',
+                                         'completion_data'))
+HAS_COMPLETION: int = 1 << len(FLAG_FIELDS)
+NO_STRING: int = 0xFFFF
+
+_PREAMBLE: struct.Struct = struct.Struct("<5sB")
+_SECTIONS: struct.Struct = struct.Struct("<II")
+_COUNT: struct.Struct = struct.Struct("<I")
+_HEADER: struct.Struct = struct.Struct("<5HIBBBBiiH")
+_BODY: struct.Struct = struct.Struct("<HHH")
+_TASK: struct.Struct = struct.Struct("<iHHhhIHid")
+_COMMENT: struct.Struct = struct.Struct("<HHIh")
+_COMPLETION: struct.Struct = struct.Struct("<IIIiii")
+
+_SITES: dict[int, Site] = {member.value: member for member in Site}
+_SPECIALS: dict[int, Special] = {member.value: member for member in Special}
+_TYPES: dict[int, WorkOrderType] = {member.value: member for member in WorkOrderType}
+
+
+class TwoisFormatError(ValueError):
+    """Raised when the contents of a .twois file cannot be read or written."""
+
+
+class _StringTable:
+    """Collects the strings of a section being encoded, handing out one index per distinct
+    string."""
+    def __init__(self) -> None:
+        self.indexes: dict[str, int] = {}
+
+    def ref(self, value: str | None) -> int:
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        index: int | None = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.indexes)
+            if index >= NO_STRING:
+                raise TwoisFormatError("too many distinct strings in workorder")
+        return index
+
+    def to_bytes(self) -> bytes:
+        strings: list[str] = list(self.indexes)
+        blob: bytes = "".join(strings).encode("utf-8")
+        return b"".join((_COUNT.pack(len(strings)),
+                         struct.pack(f"<{len(strings)}I", *map(len, strings)),
+                         _COUNT.pack(len(blob)), blob))
+
+
+############### PUBLIC METHODS ################################################
+
+def is_legacy(data: bytes) -> bool:
+    """Returns True if 'data' is not in the binary format, and so must be a legacy pickle."""
+    return not data.startswith(MAGIC)
+
+
+def dumps(state: dict[str, Any]) -> bytes:
+    """Takes a WorkOrder state dict and returns it encoded in the current binary format.
+    Raises a TwoisFormatError if a field does not fit the format."""
+    try:
+        header: bytes = __encode_header(state)
+        body: bytes = __encode_body(state)
+    except (KeyError, AttributeError, TypeError, struct.error) as ex:
+        raise TwoisFormatError(f"workorder cannot be encoded: {ex}") from ex
+    return b"".join((_PREAMBLE.pack(MAGIC, FORMAT_VERSION),
+                     _SECTIONS.pack(len(header), len(body)), header, body))
+
+
+def loads(data: bytes) -> dict[str, Any]:
+    """Takes the contents of a .twois file and returns the WorkOrder state dict stored in it.
+    Legacy pickles are unpickled and their state is returned. Raises a TwoisFormatError if
+    the data is corrupt or was written by a newer version of the format."""
+    if is_legacy(data):
+        return __load_legacy(data)
+    with __decoding():
+        __check_version(data)
+        header_size, body_size = _SECTIONS.unpack_from(data, _PREAMBLE.size)
+        offset: int = _PREAMBLE.size + _SECTIONS.size
+        state: dict[str, Any] = __read_header(data[offset:offset + header_size])
+        offset += header_size
+        state.update(__read_body(data[offset:offset + body_size],
+                                 bool(state.pop('has_completion'))))
+        del state['fingerprint']
+        return state
+
+
+def dump(state: dict[str, Any], filepath: str) -> None:
+    """Encodes a WorkOrder state dict and writes it to 'filepath'. The file is replaced
+    atomically, so it never holds a half-written workorder."""
+    write_atomic(filepath, dumps(state))
+
+
+def load(filepath: str) -> dict[str, Any]:
+    """Reads a .twois file in either format and returns the WorkOrder state dict in it."""
+    with open(filepath, "rb") as infile:
+        return loads(infile.read())
+
+
+def load_header(filepath: str) -> dict[str, Any]:
+    """Reads only the header section of a .twois file and returns a state dict without any of
+    the BODY_FIELDS. The dict also holds the stored 'fingerprint' of the workorder, which is
+    not a WorkOrder field, or None if the file is a legacy pickle. Legacy pickles have no
+    separate header, so they are read whole and their body fields are dropped."""
+    with open(filepath, "rb") as infile:
+        sections: tuple[int, int] | None = __read_sections(infile)
+        if sections is None:
+            infile.seek(0)
+            state: dict[str, Any] = loads(infile.read())
+            return {**{k: v for k, v in state.items() if k not in BODY_FIELDS},
+                    'fingerprint': None}
+        header_size, _ = sections
+        with __decoding():
+            header: dict[str, Any] = __read_header(infile.read(header_size))
+    del header['has_completion']
+    return header
+
+
+def load_body(filepath: str) -> dict[str, Any]:
+    """Reads the body section of a .twois file and returns a dict holding just the
+    BODY_FIELDS, to complete a state dict returned by load_header()."""
+    with open(filepath, "rb") as infile:
+        sections: tuple[int, int] | None = __read_sections(infile)
+        if sections is None:
+            infile.seek(0)
+            state: dict[str, Any] = loads(infile.read())
+            return {k: v for k, v in state.items() if k in BODY_FIELDS}
+        header_size, body_size = sections
+        with __decoding():
+            header: dict[str, Any] = __read_header(infile.read(header_size))
+            return __read_body(infile.read(body_size), bool(header['has_completion']))
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+@contextmanager
+def __decoding() -> Iterator[None]:
+    """Turns any low-level error raised while decoding into a TwoisFormatError."""
+    try:
+        yield
+    except TwoisFormatError:
+        raise
+    except (struct.error, KeyError, IndexError, ValueError) as ex:
+        raise TwoisFormatError(f"corrupt .twois data: {ex}") from ex
+
+
+def __read_sections(infile: BinaryIO) -> tuple[int, int] | None:
+    """Reads the preamble from the start of an open file and returns the sizes of its header
+    and body sections, or None if the file is a legacy pickle."""
+    preamble: bytes = infile.read(_PREAMBLE.size + _SECTIONS.size)
+    if is_legacy(preamble):
+        return None
+    with __decoding():
+        __check_version(preamble)
+        header_size, body_size = _SECTIONS.unpack_from(preamble, _PREAMBLE.size)
+    return (header_size, body_size)
+
+
+def __check_version(data: bytes) -> None:
+    _, version = _PREAMBLE.unpack_from(data, 0)
+    if version != FORMAT_VERSION:
+        raise TwoisFormatError(f".twois format version {version} is not supported")
+
+
+def __load_legacy(data: bytes) -> dict[str, Any]:
+    try:
+        wo: Any = pickle.loads(data)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError,
+            TypeError, ValueError) as ex:
+        raise TwoisFormatError(f"unreadable legacy .twois data: {ex}") from ex
+    if not isinstance(getattr(wo, '__dict__', None), dict):
+        raise TwoisFormatError("legacy .twois data does not hold a workorder")
+    state: dict[str, Any] = {key: value for key, value in wo.__dict__.items()
+                             if not key.startswith('_WorkOrder__')}
+    state['wo_number'] = wo.__dict__.get('_WorkOrder__wo_number')
+    if 'task_list' in state:
+        state['task_list'] = [shared_task(task) for task in state['task_list']]
+    return state
+
+
+def __encode_header(state: dict[str, Any]) -> bytes:
+    strings: _StringTable = _StringTable()
+    flags: int = sum(1 << i for i, name in enumerate(FLAG_FIELDS) if state[name])
+    if state['completion_data'] is not None:
+        flags |= HAS_COMPLETION
+    record: bytes = _HEADER.pack(
+        strings.ref(state['wo_number']), strings.ref(state['title']),
+        strings.ref(state['creator']), strings.ref(state['related_wo']),
+        strings.ref(state['ncr_number']), state['due_date'].toordinal(), state['site'].value,
+        state['special'].value, state['type'].value, state['priority'], state['building'],
+        state['room'], flags)
+    digest: bytes = bytes.fromhex(workorder_fingerprint(
+        state['title'], state['due_date'], (task.summary for task in state['task_list'])))
+    return strings.to_bytes() + record + digest
+
+
+def __encode_body(state: dict[str, Any]) -> bytes:
+    strings: _StringTable = _StringTable()
+    tasks: list[TaskItem] = state['task_list']
+    comments: list[LogComment] = state['comments']
+    completion: WorkorderCompletionData | None = state['completion_data']
+    records: list[bytes] = [_BODY.pack(strings.ref(state['description']), len(tasks),
+                                       len(comments))]
+    for task in tasks:
+        records.append(_TASK.pack(task.number, strings.ref(task.summary),
+                                  strings.ref(task.reference), task.planned_row,
+                                  task.actuals_row, task.completion_date.toordinal(),
+                                  strings.ref(task.technician), task.qty_techs, task.hours))
+    for comment in comments:
+        records.append(_COMMENT.pack(strings.ref(comment.text), strings.ref(comment.person),
+                                     comment.date.toordinal(), comment.get_row()))
+    if completion is not None:
+        records.append(_COMPLETION.pack(completion.startdate.toordinal(),
+                                        completion.enddate.toordinal(),
+                                        completion.restoredate.toordinal(),
+                                        completion.days, completion.hours, completion.minutes))
+    return strings.to_bytes() + b"".join(records)
+
+
+def __read_strings(data: bytes, offset: int) -> tuple[list[str], int]:
+    """Reads a string table, decoding the whole blob at once and slicing it up."""
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    lengths: tuple[int, ...] = struct.unpack_from(f"<{count}I", data, offset)
+    offset += 4 * count
+    (size,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    if offset + size > len(data):
+        raise TwoisFormatError("corrupt .twois data: string table is truncated")
+    blob: str = data[offset:offset + size].decode("utf-8")
+    strings: list[str] = []
+    start: int = 0
+    for length in lengths:
+        strings.append(blob[start:start + length])
+        start += length
+    return (strings, offset + size)
+
+
+def __read_header(data: bytes) -> dict[str, Any]:
+    """Reads a header section. The result also holds a 'has_completion' flag, which the
+    caller needs to read the body, and the 'fingerprint', both of which must be removed
+    before using the state."""
+    strings, offset = __read_strings(data, 0)
+    (wo_number, title, creator, related_wo, ncr_number, due_date, site, special, wo_type,
+     priority, building, room, flags) = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    digest: bytes = data[offset:offset + DIGEST_SIZE]
+    if len(digest) != DIGEST_SIZE:
+        raise TwoisFormatError("corrupt .twois data: fingerprint is truncated")
+    state: dict[str, Any] = {
+        'due_date': date.fromordinal(due_date),
+        'wo_number': None if wo_number == NO_STRING else strings[wo_number],
+        'site': _SITES[site],
+        'special': _SPECIALS[special],
+        'title': strings[title],
+        'type': _TYPES[wo_type],
+        'priority': priority,
+        'creator': strings[creator],
+        'building': building,
+        'room': room,
+        'related_wo': strings[related_wo],
+        'ncr_number': strings[ncr_number]}
+    for i, name in enumerate(FLAG_FIELDS):
+        state[name] = bool(flags & (1 << i))
+    state['has_completion'] = flags & HAS_COMPLETION
+    state['fingerprint'] = digest.hex()
+    return state
+
+
+def __read_body(data: bytes, has_completion: bool) -> dict[str, Any]:
+    strings, offset = __read_strings(data, 0)
+    description, ntasks, ncomments = _BODY.unpack_from(data, offset)
+    offset += _BODY.size
+    state: dict[str, Any] = {'description': strings[description]}
+
+    # Standard tasks come back as the shared, frozen copies rather than one copy per workorder.
+    tasks: list[TaskItem] = []
+    for (number, summary, reference, planned_row, actuals_row, completion_date, technician,
+         qty_techs, hours) in _TASK.iter_unpack(data[offset:offset + ntasks * _TASK.size]):
+        tasks.append(shared_task(TaskItem.from_record(
+            number, strings[summary], strings[reference], planned_row, actuals_row,
+            date.fromordinal(completion_date), strings[technician], qty_techs, hours)))
+    if len(tasks) != ntasks:
+        raise TwoisFormatError("corrupt .twois data: task list is truncated")
+    offset += ntasks * _TASK.size
+    state['task_list'] = tasks
+
+    comments: list[LogComment] = []
+    for text, person, c_date, row in _COMMENT.iter_unpack(
+            data[offset:offset + ncomments * _COMMENT.size]):
+        comments.append(LogComment.from_record(strings[text], strings[person],
+                                               date.fromordinal(c_date), row))
+    if len(comments) != ncomments:
+        raise TwoisFormatError("corrupt .twois data: comment list is truncated")
+    offset += ncomments * _COMMENT.size
+    state['comments'] = comments
+
+    state['completion_data'] = None
+    if has_completion:
+        (startdate, enddate, restoredate, days, hours,
+         minutes) = _COMPLETION.unpack_from(data, offset)
+        completion: WorkorderCompletionData = WorkorderCompletionData(
+            date.fromordinal(startdate), date.fromordinal(enddate),
+            date.fromordinal(restoredate), f"{days}:{hours}:{minutes}")
+        state['completion_data'] = completion
+    return state
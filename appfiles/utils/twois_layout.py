@@ -0,0 +1,222 @@
+"""Declarative map of every cell that the app reads from or writes to on the
+TWOIS_template-3-20.xlsx spreadsheet.\n
+Both the excel readers in appfiles.utils.workorder and the WorkOrder excel writer are driven
+from the maps in this module, so a change to the template layout only has to be made here.
+The maps are compiled once, at import, into a READ_PLAN: a handful of rectangular ranges that
+cover every mapped cell and that can be pulled from a Worksheet with iter_rows(values_only=True)
+instead of one ws['X#'] lookup per cell.
+"""
+
+from typing import Any, Iterator, NamedTuple
+
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.worksheet.worksheet import Worksheet
+
+
+############### CELL MAPS #####################################################
+
+HEADER_CELLS: dict[str, str] = {
+    'form_title': 'D1',
+    'due_date': 'B3',
+    'pc_approval_date': 'C3',
+    'status': 'B4',
+    'pc_approval_group': 'C4',
+    'creator_initials': 'B5',
+    'pc_approval_initials': 'C5',
+    'wo_number': 'A7',
+    'site': 'B7',
+    'special': 'C7',
+    'title': 'D7',
+    'type': 'I7',
+    'building': 'D8',
+    'room': 'F8',
+    'priority': 'A10',
+    'creator': 'B10',
+    'related_wo': 'G10',
+    'pac_required': 'I10',
+    'ncr_required': 'A12',
+    'ncr_number': 'B12',
+    'task_lead_required': 'E12',
+    'tech_witness_point': 'F12',
+    'peer_review_required': 'G12',
+    'peer_review_attached': 'H12',
+    'ehs_required': 'I12',
+    'qamip': 'J12',
+    'qa_review_required': 'K12',
+    'plans_heading': 'A13',
+}
+
+COMPLETION_CELLS: dict[str, str] = {
+    'startdate': 'A78',
+    'enddate': 'C78',
+    'restoredate': 'A80',
+    'repairtime': 'C80',
+}
+
+LOCATION_CELLS: tuple[str, ...] = ('D8', 'F8', 'H8', 'J8')
+PC_APPROVAL_CELLS: tuple[str, ...] = ('C3', 'C4', 'C5')
+TASKITEM_SENTINEL_CELLS: tuple[str, ...] = ('A16', 'B16', 'G16', 'B15')
+
+CLASSIFICATION_CELLS: tuple[str, ...] = (HEADER_CELLS['form_title'], HEADER_CELLS['plans_heading'],
+                                          HEADER_CELLS['title'], HEADER_CELLS['wo_number'],
+                                          *PC_APPROVAL_CELLS, *TASKITEM_SENTINEL_CELLS)
+
+FORM_TITLE: str = 'Technician Work Order Information Sheet'
+PLANS_HEADING: str = 'Work Order Plans'
+
+
+class RowBlock(NamedTuple):
+    """A repeating block of rows on the template, such as the task list. Each row of the
+    block holds one record, and 'columns' maps the record's field names to column letters."""
+    first_row: int
+    size: int
+    columns: dict[str, str]
+
+    def rows(self) -> range:
+        """Returns the range of row numbers covered by the block."""
+        return range(self.first_row, self.first_row + self.size)
+
+    def position(self, index: int, field: str) -> tuple[int, int]:
+        """Returns the (row, column) position of a field for the record at 'index'."""
+        return (self.first_row + index, column_index_from_string(self.columns[field]))
+
+
+TASK_PLANS: RowBlock = RowBlock(15, 15, {'number': 'A', 'summary': 'B', 'reference': 'G'})
+TASK_ACTUALS: RowBlock = RowBlock(32, 15, {'number': 'A', 'completion_date': 'C',
+                                           'technician': 'E', 'qty_techs': 'H', 'hours': 'J'})
+LOG_COMMENTS: RowBlock = RowBlock(86, 24, {'text': 'A', 'person': 'I', 'date': 'K'})
+
+# Everything that the fingerprint of a spreadsheet is computed from: the title, the due date
+# and the task plans.
+FINGERPRINT_CELLS: tuple[str, ...] = (HEADER_CELLS['title'], HEADER_CELLS['due_date'],
+                                       *(f"{col}{row}" for row in TASK_PLANS.rows()
+                                         for col in TASK_PLANS.columns.values()))
+
+# Everything needed to classify a spreadsheet and to tell whether it belongs to a workorder:
+# the cells above, plus the site and special that complete an approved workorder number.
+MATCH_CELLS: tuple[str, ...] = tuple(dict.fromkeys((*CLASSIFICATION_CELLS, *FINGERPRINT_CELLS,
+                                                    HEADER_CELLS['site'],
+                                                    HEADER_CELLS['special'])))
+
+
+############### READ PLAN #####################################################
+
+class CellRange(NamedTuple):
+    """A rectangular range of cells, as taken by Worksheet.iter_rows()."""
+    min_row: int
+    max_row: int
+    min_col: int
+    max_col: int
+
+
+def to_position(coord: str) -> tuple[int, int]:
+    """Converts an excel coordinate such as 'B3' into a (row, column) tuple such as (3, 2)."""
+    col, row = coordinate_from_string(coord)
+    return (row, column_index_from_string(col))
+
+
+def mapped_positions() -> set[tuple[int, int]]:
+    """Returns the (row, column) position of every cell named in the maps above."""
+    resp: set[tuple[int, int]] = set()
+    for coord in (*HEADER_CELLS.values(), *COMPLETION_CELLS.values(), *LOCATION_CELLS,
+                  *PC_APPROVAL_CELLS, *TASKITEM_SENTINEL_CELLS):
+        resp.add(to_position(coord))
+    for block in (TASK_PLANS, TASK_ACTUALS, LOG_COMMENTS):
+        for i in range(block.size):
+            for field in block.columns:
+                resp.add(block.position(i, field))
+    return resp
+
+
+def compile_read_plan(positions: set[tuple[int, int]],
+                      max_row_gap: int = 2) -> tuple[CellRange, ...]:
+    """Takes a set of (row, column) positions and merges them into as few rectangular ranges
+    as is sensible. Rows that are no more than 'max_row_gap' apart are pulled in the same range,
+    since reading a couple of unneeded rows is much cheaper than another pass over the sheet.
+    """
+    by_row: dict[int, list[int]] = {}
+    for row, col in positions:
+        by_row.setdefault(row, []).append(col)
+
+    resp: list[CellRange] = []
+    for row in sorted(by_row):
+        lo, hi = min(by_row[row]), max(by_row[row])
+        if resp and row - resp[-1].max_row <= max_row_gap:
+            last = resp[-1]
+            resp[-1] = CellRange(last.min_row, row, min(last.min_col, lo), max(last.max_col, hi))
+        else:
+            resp.append(CellRange(row, row, lo, hi))
+    return tuple(resp)
+
+
+READ_PLAN: tuple[CellRange, ...] = compile_read_plan(mapped_positions())
+HEADER_POSITIONS: dict[str, tuple[int, int]] = {k: to_position(v)
+                                                for k, v in HEADER_CELLS.items()}
+COMPLETION_POSITIONS: dict[str, tuple[int, int]] = {k: to_position(v)
+                                                    for k, v in COMPLETION_CELLS.items()}
+_POSITIONS: dict[str, tuple[int, int]] = {
+    coord: to_position(coord) for coord in (*HEADER_CELLS.values(), *COMPLETION_CELLS.values(),
+                                            *LOCATION_CELLS, *PC_APPROVAL_CELLS,
+                                            *TASKITEM_SENTINEL_CELLS)}
+
+
+class SheetValues:
+    """A snapshot of the values of every mapped cell on a TWOIS worksheet, read in bulk
+    according to READ_PLAN. Values are looked up by coordinate string or by position, but
+    only cells inside the plan are available; anything else raises a KeyError.
+    """
+    def __init__(self, values: dict[tuple[int, int], Any]) -> None:
+        self.__values: dict[tuple[int, int], Any] = values
+
+
+    @classmethod
+    def from_worksheet(cls, ws: Worksheet,
+                       plan: tuple[CellRange, ...] = READ_PLAN) -> 'SheetValues':
+        """Reads every range of the plan from the worksheet and returns the snapshot."""
+        values: dict[tuple[int, int], Any] = {}
+        for rng in plan:
+            rows = ws.iter_rows(min_row=rng.min_row, max_row=rng.max_row,
+                                min_col=rng.min_col, max_col=rng.max_col, values_only=True)
+            for r, row in enumerate(rows, rng.min_row):
+                for c, value in enumerate(row, rng.min_col):
+                    values[(r, c)] = value
+            # read-only worksheets stop early on short sheets, so pad the range with None
+            for r in range(rng.min_row, rng.max_row + 1):
+                for c in range(rng.min_col, rng.max_col + 1):
+                    values.setdefault((r, c), None)
+        return cls(values)
+
+
+    def value(self, coord: str) -> Any:
+        """Returns the value of the cell at an excel coordinate such as 'B3'."""
+        pos: tuple[int, int] | None = _POSITIONS.get(coord)
+        if pos is None:
+            pos = to_position(coord)
+        return self.__values[pos]
+
+
+    def at(self, row: int, col: int) -> Any:
+        """Returns the value of the cell at a (row, column) position."""
+        return self.__values[(row, col)]
+
+
+    def field(self, name: str) -> Any:
+        """Returns the value of a named header or completion cell."""
+        if name in HEADER_CELLS:
+            return self.value(HEADER_CELLS[name])
+        return self.value(COMPLETION_CELLS[name])
+
+
+    def block_rows(self, block: RowBlock) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yields (row number, {field: value}) for every row of a RowBlock."""
+        cols: dict[str, int] = {f: column_index_from_string(c) for f, c in block.columns.items()}
+        for row in block.rows():
+            yield row, {f: self.__values[(row, c)] for f, c in cols.items()}
+
+
+def as_sheet_values(ws: Worksheet | SheetValues) -> SheetValues:
+    """Returns 'ws' unchanged if it is already a SheetValues snapshot, or takes a snapshot of
+    it if it is a Worksheet, so that the excel getters accept either."""
+    if isinstance(ws, SheetValues):
+        return ws
+    return SheetValues.from_worksheet(ws)
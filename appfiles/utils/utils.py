@@ -2,7 +2,8 @@
 
 from datetime import date, timedelta
 import os
-import re
+
+from appfiles.utils.validation import is_a_valid_date_string, parse_date_string
 
 def name_to_initials(chars: str) -> str:
     """Takes a string and converts it into initials. Should receive a first and last name."""
@@ -39,6 +40,16 @@ def bool_to_yes_no_string(val: bool) -> str:
     return 'Yes' if val else 'No'
 
 
+def restore_slots(obj: object, state: dict | tuple) -> None:
+    """Restores pickled state onto an object whose class uses __slots__. Takes either the
+    (dict, slots) pair that pickle writes for slotted objects, or the plain attribute dict that
+    was written before the class had __slots__."""
+    if isinstance(state, tuple):
+        state = {**(state[0] or {}), **state[1]}
+    for name, value in state.items():
+        object.__setattr__(obj, name, value)
+
+
 def yes_no_string_to_bool(val: str) -> bool:
     """Takes in a 'Yes' or 'No' string and returns a boolean."""
     return val.lower() == 'yes'
@@ -86,20 +97,5 @@ def date_to_string(d: date, strformat: str = "%#m/%#d/%Y") -> str:
 
 def string_to_date(s: str) -> date:
     """A method which takes in a date object and returns a formatted string."""
-    resp: date = date.today()    
-    date_re = re.compile(r"\d{1,2}(/|\\)\d{1,2}(/|\\)\d{4}")
-    reg = date_re.search(s)
-    if reg is not None:
-        ds: list[str] = str(reg.group()).split('/')
-        resp = date(int(ds[2]), int(ds[0]), int(ds[1]))
-    return resp
-
-
-def is_a_valid_date_string(s: str, regex: str = r"\d{1,2}(/|\\)\d{1,2}(/|\\)\d{4}"):
-    """A method which takes in a formatted date string and an optional regex pattern and returns
-    a boolean describing whether the string matches the regular expresion."""
-    date_re = re.compile(regex)
-    reg = date_re.match(s)
-    if reg is None:
-        return False
-    return True
+    resp: date | None = parse_date_string(s)
+    return date.today() if resp is None else resp
@@ -0,0 +1,130 @@
+"""Validators and parsers for the free-text fields of a workorder: workorder numbers, NCR
+numbers, dates, and the building and room numbers in the location cells.\n
+Every pattern is compiled once, at import, and the validators are memoized with an LRU cache,
+since the same handful of values is checked over and over: on every keystroke of a form, and
+for every row of every file that is parsed or indexed. The batch functions validate a whole
+column of values in one pass, checking each distinct value only once.
+"""
+
+from datetime import date
+from functools import lru_cache
+import re
+from typing import Callable, Iterable
+
+CACHE_SIZE: int = 4096
+
+DATE_PATTERN: str = r"\d{1,2}(/|\\)\d{1,2}(/|\\)\d{4}"
+
+WO_NUMBER_RE: re.Pattern = re.compile(r"\b\d{6}(FG|VB|CS|EA|FD|SX|FY|CL|BL|TH|)(S|N|I|\b)",
+                                      re.IGNORECASE)
+NCR_NUMBER_RE: re.Pattern = re.compile(r"NCR\d{6}W", re.IGNORECASE)
+DATE_RE: re.Pattern = re.compile(DATE_PATTERN)
+DATE_PARTS_RE: re.Pattern = re.compile(r"(\d{1,2})[/\\](\d{1,2})[/\\](\d{4})")
+BUILDING_RE: re.Pattern = re.compile(r"(b|bldg)\.{,1}\s{,1}\d{2,5}\b", re.IGNORECASE)
+BUILDING_NUMBER_RE: re.Pattern = re.compile(r"\d{2,5}")
+ROOM_RE: re.Pattern = re.compile(r"(r|rm|room)\.{,1}\s{,1}\d{1,3}(\b|,|\\|/)", re.IGNORECASE)
+ROOM_NUMBER_RE: re.Pattern = re.compile(r"\d{1,3}")
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_a_valid_wo_number(value: str) -> bool:
+    """A static method which analyzes a string using a regex pattern and
+    determines whether or not it is a valid workorder.
+    """
+    return WO_NUMBER_RE.search(value) is not None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_a_valid_ncr_number(value: str) -> bool:
+    """A static method which analyzes a string using a regex pattern and
+    determines whether or not it is a valid NCR number OR the word 'REQUIRED'.
+    """
+    return NCR_NUMBER_RE.search(value) is not None or value.upper() == "REQUIRED"
+
+
+def is_a_valid_date_string(s: str, regex: str = DATE_PATTERN) -> bool:
+    """A method which takes in a formatted date string and an optional regex pattern and returns
+    a boolean describing whether the string matches the regular expresion."""
+    if regex == DATE_PATTERN:
+        return __matches_date_pattern(s)
+    return re.match(regex, s) is not None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date_string(s: str) -> date | None:
+    """Takes a string and returns the first MM/DD/YYYY date in it, or None if there is none.
+    Raises a ValueError if the numbers found are not a real date."""
+    found: re.Match | None = DATE_PARTS_RE.search(s)
+    if found is None:
+        return None
+    month, day, year = found.groups()
+    return date(int(year), int(month), int(day))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_building(text: str) -> int | None:
+    """Takes the text of a location cell and returns the building number written in it as
+    'B1234' or 'Bldg. 1234', or None if there is none."""
+    found: re.Match | None = BUILDING_RE.search(text)
+    if found is None:
+        return None
+    return int(BUILDING_NUMBER_RE.search(found.group()).group()) #type:ignore
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_room(text: str) -> int | None:
+    """Takes the text of a location cell and returns the room number written in it as 'R12',
+    'Rm. 12' or 'Room 12', or None if there is none."""
+    found: re.Match | None = ROOM_RE.search(text)
+    if found is None:
+        return None
+    return int(ROOM_NUMBER_RE.search(found.group()).group()) #type:ignore
+
+
+def validate_wo_numbers(values: Iterable[str]) -> list[bool]:
+    """Validates a column of workorder numbers, returning one result per value."""
+    return __validate_column(values, is_a_valid_wo_number)
+
+
+def validate_ncr_numbers(values: Iterable[str]) -> list[bool]:
+    """Validates a column of NCR numbers, returning one result per value."""
+    return __validate_column(values, is_a_valid_ncr_number)
+
+
+def validate_date_strings(values: Iterable[str]) -> list[bool]:
+    """Validates a column of MM/DD/YYYY date strings, returning one result per value. A date
+    is only valid if it both matches the pattern and is a real calendar date."""
+    return __validate_column(values, __is_a_real_date_string)
+
+
+def clear_caches() -> None:
+    """Empties the memo of every validator."""
+    for func in (is_a_valid_wo_number, is_a_valid_ncr_number, __matches_date_pattern,
+                 parse_date_string, parse_building, parse_room):
+        func.cache_clear()
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+@lru_cache(maxsize=CACHE_SIZE)
+def __matches_date_pattern(s: str) -> bool:
+    return DATE_RE.match(s) is not None
+
+
+def __is_a_real_date_string(s: str) -> bool:
+    if not __matches_date_pattern(s):
+        return False
+    try:
+        return parse_date_string(s) is not None
+    except ValueError:
+        return False
+
+
+def __validate_column(values: Iterable[str], validator: Callable[[str], bool]) -> list[bool]:
+    """Runs 'validator' once per distinct value in a column and maps the results back onto
+    every row."""
+    column: list[str] = list(values)
+    results: dict[str, bool] = {value: validator(value) for value in dict.fromkeys(column)}
+    return [results[value] for value in column]
@@ -0,0 +1,193 @@
+"""Module which provides the DirectoryWatcher class, a polling watcher that reports which files
+were added, removed or modified in a set of directories.\n
+There is no filesystem notification API in the standard library that works the same way on
+every platform, and the data directories may live on a network share where notifications are
+unreliable anyway, so the watcher polls. Each poll stats the watched directories and their
+subdirectories. A directory's entries are only listed again when its own mtime has changed,
+which is what happens whenever a file is created, removed or renamed in it, including when a
+save replaces a file with os.replace(). So a poll of a large tree, such as the archive of
+completed workorders, costs one stat per directory rather than one per file. Files that are
+rewritten in place leave their directory's mtime alone, so they are only caught in the trees
+named in 'restat', whose known files are restatted on every poll.\n
+Bursts of changes, such as a save writing both a .twois and an .xlsx file, are coalesced: a
+batch is only published once a directory has been quiet for the debounce period. Batches are
+put on a queue so that a Tk window can drain it from its own thread with after() polling.
+"""
+
+import os
+from queue import SimpleQueue
+from threading import Event, Thread
+import time
+from typing import Iterable, NamedTuple
+
+
+class WatchEvent(NamedTuple):
+    """The coalesced changes to one watched directory tree. Paths are relative to 'directory'."""
+    directory: str
+    added: frozenset[str]
+    removed: frozenset[str]
+    modified: frozenset[str]
+
+
+class _Pending(NamedTuple):
+    added: set[str]
+    removed: set[str]
+    modified: set[str]
+
+
+class _DirState(NamedTuple):
+    """The last known state of one directory of a watched tree."""
+    mtime: int
+    files: dict[str, int]
+    subdirs: tuple[str, ...]
+
+
+class DirectoryWatcher:
+    """A background thread which polls a list of directories and puts a WatchEvent on 'events'
+    for each directory that changed, once it has been quiet for 'debounce' seconds. Files that
+    are modified in place are only reported in the directories listed in 'restat'.
+
+    Public Methods
+    -------------------------
+        start() -> None:
+            Takes the initial snapshot and starts polling in a daemon thread.
+
+        stop() -> None:
+            Stops polling.
+
+        poll() -> None:
+            Runs a single poll on the calling thread. The polling thread calls this in a loop.
+    """
+    def __init__(self, directories: list[str], interval: float = 1.0,
+                 debounce: float = 0.5, restat: Iterable[str] = ()) -> None:
+        self.directories: list[str] = list(directories)
+        self.restat: frozenset[str] = frozenset(restat)
+        self.interval: float = interval
+        self.debounce: float = debounce
+        self.events: SimpleQueue = SimpleQueue()
+        self.__trees: dict[str, dict[str, _DirState]] = {d: {} for d in self.directories}
+        self.__pending: dict[str, _Pending] = {}
+        self.__last_change: dict[str, float] = {}
+        self.__stop: Event = Event()
+        self.__thread: Thread | None = None
+
+
+    ########### PRIVATE METHODS
+    def __scan(self, root: str, relpath: str, old: dict[str, _DirState],
+               new: dict[str, _DirState]) -> None:
+        """Records the state of one directory of a watched tree in 'new', then walks its
+        subdirectories. The entries of a directory are only listed again if its mtime changed
+        since the last poll. Otherwise the files it held last time are kept as they were, or
+        restatted if the tree is in 'restat'."""
+        path: str = os.path.join(root, relpath) if relpath else root
+        try:
+            mtime: int = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        prev: _DirState | None = old.get(relpath)
+        files: dict[str, int] = {}
+        subdirs: list[str] = []
+        if prev is None or prev.mtime != mtime:
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            files[entry.name] = entry.stat().st_mtime_ns
+            except OSError:
+                return
+        elif root not in self.restat:
+            files = prev.files
+            subdirs = list(prev.subdirs)
+        else:
+            subdirs = list(prev.subdirs)
+            for name in prev.files:
+                try:
+                    files[name] = os.stat(os.path.join(path, name)).st_mtime_ns
+                except OSError:
+                    continue
+        new[relpath] = _DirState(mtime, files, tuple(subdirs))
+        for sub in subdirs:
+            self.__scan(root, os.path.join(relpath, sub) if relpath else sub, old, new)
+
+
+    def __record(self, root: str, old: dict[str, _DirState],
+                 new: dict[str, _DirState]) -> None:
+        """Adds the differences between two states of a tree to the root's pending batch."""
+        added: set[str] = set()
+        removed: set[str] = set()
+        modified: set[str] = set()
+        for relpath in old.keys() | new.keys():
+            before: dict[str, int] = old[relpath].files if relpath in old else {}
+            after: dict[str, int] = new[relpath].files if relpath in new else {}
+            if before == after:
+                continue
+            prefix: str = f"{relpath}{os.sep}" if relpath else ""
+            added.update(prefix + n for n in after.keys() - before.keys())
+            removed.update(prefix + n for n in before.keys() - after.keys())
+            modified.update(prefix + n for n in after.keys() & before.keys()
+                            if after[n] != before[n])
+        if not (added or removed or modified):
+            return
+        pending: _Pending = self.__pending.setdefault(root, _Pending(set(), set(), set()))
+        for name in added:
+            if name in pending.removed:
+                pending.removed.discard(name)
+                pending.modified.add(name)
+            else:
+                pending.added.add(name)
+        for name in removed:
+            if name in pending.added:
+                pending.added.discard(name)
+            else:
+                pending.modified.discard(name)
+                pending.removed.add(name)
+        pending.modified.update(modified - pending.added)
+        self.__last_change[root] = time.monotonic()
+
+
+    def __flush(self) -> None:
+        now: float = time.monotonic()
+        for root in list(self.__pending):
+            if now - self.__last_change[root] < self.debounce:
+                continue
+            pending: _Pending = self.__pending.pop(root)
+            if pending.added or pending.removed or pending.modified:
+                self.events.put(WatchEvent(root, frozenset(pending.added),
+                                           frozenset(pending.removed),
+                                           frozenset(pending.modified)))
+
+
+    def __run(self) -> None:
+        for root in self.directories:
+            tree: dict[str, _DirState] = {}
+            self.__scan(root, "", {}, tree)
+            self.__trees[root] = tree
+        while not self.__stop.wait(self.interval):
+            self.poll()
+
+
+    ########### PUBLIC METHODS
+    def start(self) -> None:
+        """Starts a daemon thread which takes the initial snapshot of every directory and
+        then polls them. Files that exist before the snapshot is taken are not reported."""
+        self.__stop.clear()
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+
+    def stop(self) -> None:
+        """Stops the polling thread."""
+        self.__stop.set()
+
+
+    def poll(self) -> None:
+        """Compares every directory against its last snapshot, records the differences, and
+        publishes the batches of any directory that has been quiet for the debounce period."""
+        for root in self.directories:
+            tree: dict[str, _DirState] = {}
+            self.__scan(root, "", self.__trees[root], tree)
+            self.__record(root, self.__trees[root], tree)
+            self.__trees[root] = tree
+        self.__flush()
@@ -1,20 +1,28 @@
 import os
-import re
-from datetime import date
+from datetime import date, datetime
+from functools import partial
 
-from openpyxl import load_workbook, Workbook
+from openpyxl.utils.datetime import from_excel
 from openpyxl.worksheet.worksheet import Worksheet
 
 from appfiles.library.excelfilestatus import ExcelFileStatus
 from appfiles.library.logcomment import LogComment
-from appfiles.library.taskitem import TaskItem
-from appfiles.utils.appglobals import default_building, default_room, IN_PROGRESS_DIR
+from appfiles.library.taskitem import REQUIRED_TASK, TaskItem, shared_task
+from appfiles.library.workorder_index import workorder_index
+from appfiles.utils.allocator import NumberAllocator
+from appfiles.utils.appglobals import TEMPLATE_DIR, default_building, default_room
 from appfiles.utils.appglobals import primary_user
+from appfiles.utils.fingerprint import MatchKey
 from appfiles.utils.utils import make_string_filepath_friendly, string_to_date
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.twois_layout import SheetValues, as_sheet_values
+from appfiles.utils.validation import is_a_valid_ncr_number, is_a_valid_wo_number
+from appfiles.utils.validation import parse_building, parse_date_string, parse_room
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
 
 ############### PUBLIC STATIC METHODS #########################################
 
-def get_full_wo_number_from_xlsx_cell(ws: Worksheet) -> str:
+def get_full_wo_number_from_xlsx_cell(ws: Worksheet | SheetValues) -> str:
     """A static method that gets the work order number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and either returns
     the work order number by aggregating the appropriate cells OR it will return the
@@ -25,13 +33,14 @@ def get_full_wo_number_from_xlsx_cell(ws: Worksheet) -> str:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    resp: str = f"{str(ws['A7'].value)[:6]}{str(ws['B7'].value)}{str(ws['C7'].value)}"
+    sv: SheetValues = as_sheet_values(ws)
+    resp: str = f"{str(sv.field('wo_number'))[:6]}{sv.field('site')}{sv.field('special')}"
     if not is_a_valid_wo_number(resp):
         return determine_pending_number()
     return resp
 
 
-def get_wo_number_from_xlsx_cell(ws: Worksheet) -> str:
+def get_wo_number_from_xlsx_cell(ws: Worksheet | SheetValues) -> str:
     """A static method that gets the work order number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and either returns
     the work order number by aggregating the appropriate cells OR it will return the
@@ -42,13 +51,13 @@ def get_wo_number_from_xlsx_cell(ws: Worksheet) -> str:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    resp: str = f"{str(ws['A7'].value)[:6]}"
+    resp: str = f"{str(as_sheet_values(ws).field('wo_number'))[:6]}"
     if not is_a_valid_wo_number(resp):
         return determine_pending_number()
     return resp
 
 
-def get_related_wo_from_xlsx_cell(ws: Worksheet, default: str = "N/A") -> str:
+def get_related_wo_from_xlsx_cell(ws: Worksheet | SheetValues, default: str = "N/A") -> str:
     """A static method that gets the related work order number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and an optional default value
     which defaults to "N/A", and it either returns the default value (whether provided or not)
@@ -59,24 +68,15 @@ def get_related_wo_from_xlsx_cell(ws: Worksheet, default: str = "N/A") -> str:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    if str(ws['G10'].value) == "None":
+    resp: str = str(as_sheet_values(ws).field('related_wo'))
+    if resp == "None":
         return default
-    resp: str = str(ws['G10'].value)
     if not is_a_valid_wo_number(resp):
         return default
     return resp
 
 
-def is_a_valid_wo_number(value: str) -> bool:
-    """A static method which analyzes a string using a regex pattern and
-    determines whether or not it is a valid workorder.
-    """
-    wo_number_re = re.compile(r"\b\d{6}(FG|VB|CS|EA|FD|SX|FY|CL|BL|TH|)(S|N|I|\b)", re.IGNORECASE)
-    regex = wo_number_re.search(value)
-    return regex is not None
-
-
-def get_ncr_number_from_xlsx_cell(ws: Worksheet, ncr_required: bool) -> str:
+def get_ncr_number_from_xlsx_cell(ws: Worksheet | SheetValues, ncr_required: bool) -> str:
     """A static method that gets the related ncr number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and a boolean value which
     represents whether or not an NCR is required, and it either returns the value from the cell,
@@ -89,23 +89,13 @@ def get_ncr_number_from_xlsx_cell(ws: Worksheet, ncr_required: bool) -> str:
     """
     if not ncr_required:
         return "N/A"
-    value = str(ws['B12'].value)
+    value = str(as_sheet_values(ws).field('ncr_number'))
     if is_a_valid_ncr_number(value):
         return value
     return "REQUIRED"
 
 
-
-def is_a_valid_ncr_number(value: str) -> bool:
-    """A static method which analyzes a string using a regex pattern and
-    determines whether or not it is a valid NCR number OR the word 'REQUIRED'.
-    """
-    ncr_number_re = re.compile(r"NCR\d{6}W", re.IGNORECASE)
-    regex = ncr_number_re.search(value)
-    return regex is not None or value.upper() == "REQUIRED"
-
-
-def get_date_from_xlsx_cell(ws: Worksheet, cellno: str) -> date:
+def get_date_from_xlsx_cell(ws: Worksheet | SheetValues, cellno: str) -> date:
     """A static method that gets the date from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either
     returns a date object representing the date in the planned execution cell
@@ -116,15 +106,26 @@ def get_date_from_xlsx_cell(ws: Worksheet, cellno: str) -> date:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    resp: date = date.today()
-    dateval = ws[cellno].value
-    if isinstance(dateval, date):
-        return dateval
-    resp = string_to_date(str(dateval))
-    return resp
+    return __date_from_value(as_sheet_values(ws).value(cellno))
 
 
-def get_creator_from_xlsx_cell(ws: Worksheet) -> str:
+def get_optional_date_from_xlsx_cell(ws: Worksheet | SheetValues, cellno: str) -> date | None:
+    """A static method that gets a date that may not have been filled in yet, such as a
+    completion date. It works like get_date_from_xlsx_cell(), but returns None instead of
+    today's date if the cell is blank or does not hold a date.
+    """
+    value: object = as_sheet_values(ws).value(cellno)
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            return parse_date_string(value)
+        except ValueError:
+            return None
+    return __date_from_value(value)
+
+
+def get_creator_from_xlsx_cell(ws: Worksheet | SheetValues) -> str:
     """A static method that gets the creator's name from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either
     returns the string in the associated cell or, if it's blank, the primary user's name.\n
@@ -134,13 +135,13 @@ def get_creator_from_xlsx_cell(ws: Worksheet) -> str:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    resp = str(ws['B10'].value)
+    resp = str(as_sheet_values(ws).field('creator'))
     if resp == "None":
         resp = primary_user.name
     return resp
 
 
-def get_priority_from_xlsx_cell(ws: Worksheet) -> int:
+def get_priority_from_xlsx_cell(ws: Worksheet | SheetValues) -> int:
     """A static method that gets the priority assignment from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either returns the priority
     integer in the priority cell (assuming the value is between 1 and 3 inclusive) or it returns
@@ -153,7 +154,7 @@ def get_priority_from_xlsx_cell(ws: Worksheet) -> int:
     """
     resp: int = 3
     try:
-        resp = int(ws['A10'].value)
+        resp = int(as_sheet_values(ws).field('priority'))
     except (TypeError, ValueError):
         resp = 3
     finally:
@@ -162,7 +163,7 @@ def get_priority_from_xlsx_cell(ws: Worksheet) -> int:
     return resp
 
 
-def get_building_from_xlsx_cell(ws: Worksheet) -> int:
+def get_building_from_xlsx_cell(ws: Worksheet | SheetValues) -> int:
     """A static method that gets the building number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either returns the building
     integer in the location cell or it returns the user-defined default value. It determines
@@ -173,28 +174,17 @@ def get_building_from_xlsx_cell(ws: Worksheet) -> int:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    cells: list[str] = ['D8', 'F8', 'H8', 'J8']
-    contents: str = 'D8'
-    bldg_reg = re.compile(r"(b|bldg)\.{,1}\s{,1}\d{2,5}\b", re.IGNORECASE)
-    num_reg = re.compile(r"\d{2,5}")
-    found: bool = False
-
-    for c in cells:
-        if str(ws[c].value) == "None":
+    sv: SheetValues = as_sheet_values(ws)
+    for c in layout.LOCATION_CELLS:
+        if str(sv.value(c)) == "None":
             continue
-        contents = str(ws[c].value)
-        bldg = bldg_reg.search(contents)
+        bldg: int | None = parse_building(str(sv.value(c)))
         if bldg is not None:
-            found = True
-            break
-
-    if not found:
-        return default_building
-    num = num_reg.search(bldg.group()) #type:ignore
-    return int(num.group()) #type:ignore
+            return bldg
+    return default_building
 
 
-def get_room_from_xlsx_cell(ws: Worksheet) -> int:
+def get_room_from_xlsx_cell(ws: Worksheet | SheetValues) -> int:
     """A static method that gets the room number from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either returns the room
     integer in the location cell or it returns the user-defined default value. It determines
@@ -205,31 +195,17 @@ def get_room_from_xlsx_cell(ws: Worksheet) -> int:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    cells: list[str] = ['D8', 'F8', 'H8', 'J8']
-    contents: str = 'D8'
-    room_reg = re.compile(r"(r|rm|room)\.{,1}\s{,1}\d{1,3}(\b|,|\\|/)", re.IGNORECASE)
-    num_reg = re.compile(r"\d{1,3}")
-    found: bool = False
-
-    for c in cells:
-        if str(ws[c].value) == "None":
+    sv: SheetValues = as_sheet_values(ws)
+    for c in layout.LOCATION_CELLS:
+        if str(sv.value(c)) == "None":
             continue
-        contents = str(ws[c].value)
-        room = room_reg.search(contents)
+        room: int | None = parse_room(str(sv.value(c)))
         if room is not None:
-            found = True
-            break
+            return room if room >= 1 else default_room
+    return default_room
 
-    if not found:
-        return default_room
-    num_str = num_reg.search(room.group()) #type:ignore
-    num = int(num_str.group()) #type:ignore
-    if num < 1:
-        return default_room
-    return num
 
-
-def get_title_from_xlsx_cell(ws: Worksheet) -> str:
+def get_title_from_xlsx_cell(ws: Worksheet | SheetValues) -> str:
     """A static method that gets the title string from the Excel workorder.\n
     It takes in a Worksheet object from the openpyxl library and it either returns the
     title string itself (up to a maximum of 90 characters, and will truncate otherwise) or
@@ -240,7 +216,7 @@ def get_title_from_xlsx_cell(ws: Worksheet) -> str:
     approved_file_status() method to ensure that a real, defined work order file is being
     analyzed.
     """
-    resp = str(ws['D7'].value)
+    resp = str(as_sheet_values(ws).field('title'))
     if resp == "None":
         return "No title provided"
     if len(resp) > 60:
@@ -248,45 +224,48 @@ def get_title_from_xlsx_cell(ws: Worksheet) -> str:
     return make_string_filepath_friendly(resp)
 
 
-def get_task_list_from_xlsx_cells(ws: Worksheet) -> list[TaskItem]:
+def get_task_list_from_xlsx_cells(ws: Worksheet | SheetValues) -> list[TaskItem]:
     """A static method which builds a list of TaskItem objects from the Excel workorder.
     It takes in a Worksheet object from the openpyxl library and analyzes the values from
     rows 15 through 29 Cells A, B, and G. If the cells have legitimate values, it stores
     their strings in a TaskItem data object.\n
     """
     resp: list[TaskItem] = []
-    for i in range(15, 30):
-        a_cell: str = f"A{i}"
-        b_cell: str = f"B{i}"
-        g_cell: str = f"G{i}"
-        if ws[b_cell].value is not None:
-            num: int = int(ws[a_cell].value)
-            smr: str = str(ws[b_cell].value)
-            ref: str = str(ws[g_cell].value)
-            if ref == "None" and i > 15:
+    for row, cells in as_sheet_values(ws).block_rows(layout.TASK_PLANS):
+        if cells['summary'] is not None:
+            num: int = int(cells['number'])
+            smr: str = str(cells['summary'])
+            ref: str = str(cells['reference'])
+            if ref == "None" and row > layout.TASK_PLANS.first_row:
                 ref = "REFERENCE REQUIRED"
-            resp.append(TaskItem(num, smr, ref, i))
+            resp.append(shared_task(TaskItem(num, smr, ref, row)))
     if len(resp) < 2:
-        resp.append(TaskItem(10, "TASK DESCRIPTION REQUIRED", "REFERENCE REQUIRED", 16))
+        resp.append(REQUIRED_TASK)
     return resp
 
 
-def get_comments_from_xlsx_cells(ws: Worksheet) -> list[LogComment]:
+def get_match_key_from_xlsx_cells(ws: Worksheet | SheetValues) -> MatchKey:
+    """A static method which reads the fields that an approved spreadsheet is matched to its
+    pending workorder by: the title, the due date and the task summaries. These are the cells
+    in twois_layout.FINGERPRINT_CELLS, so a streaming scan of just those cells is enough.
+    """
+    return MatchKey(get_title_from_xlsx_cell(ws),
+                    get_date_from_xlsx_cell(ws, layout.HEADER_CELLS['due_date']),
+                    tuple(task.summary for task in get_task_list_from_xlsx_cells(ws)))
+
+
+def get_comments_from_xlsx_cells(ws: Worksheet | SheetValues) -> list[LogComment]:
     """A static method which builds a list of LogComment objects from the Excel workorder.
     It takes in a Worksheet object from the openpyxl library and analyzes the values from
     rows 86 through 109 Cells A, I, and K. If the cells have legitimate values, it stores
     their strings in a LogComment data object.\n
     """
     resp: list[LogComment] = []
-    for i in range(24):
-        row = i + 86
-        a_cell: str = f"A{row}"
-        i_cell: str = f"I{row}"
-        k_cell: str = f"K{row}"
-        if ws[a_cell].value is not None:
-            text: str = str(ws[a_cell].value)
-            name: str = str(ws[i_cell].value)
-            c_date: date = get_date_from_xlsx_cell(ws, k_cell)
+    for i, (_, cells) in enumerate(as_sheet_values(ws).block_rows(layout.LOG_COMMENTS)):
+        if cells['text'] is not None:
+            text: str = str(cells['text'])
+            name: str = str(cells['person'])
+            c_date: date = __date_from_value(cells['date'])
             resp.append(LogComment(text, name, c_date, i))
     return resp
 
@@ -296,18 +275,60 @@ def determine_pending_number() -> str:
     other pending work orders are in the in_progress directory. It fills in the lowest available
     value.\n
     For example, if the list of pending workorders includes Pending-001, Pending-002, and
-    Pending-005, then the next available pending work order number would be Pending-003.
+    Pending-005, then the next available pending work order number would be Pending-003.\n
+    The number is not reserved, so two calls in a row return the same value. Use
+    reserve_pending_number() when the number is going to be kept.
     """
-    nums: set[int] = __get_enumerated_file_numbers_set()
-    if len(nums) < 1:
-        return "Pending-001"
-    resp: str = ""
-    for i in range(len(nums)):
-        index: int = i + 1
-        resp = __generate_pending_string(index + 1)
-        if index not in nums:
-            return __generate_pending_string(index)
-    return resp
+    return __generate_pending_string(pending_numbers.peek())
+
+
+def reserve_pending_number(owner: object) -> tuple[str, int]:
+    """Reserves the lowest available Pending work order number on behalf of 'owner', so that
+    several unsaved workorders never share a number. Returns the number along with the token
+    needed to cancel the reservation. The reservation is cancelled automatically if 'owner' is
+    garbage collected before commit_pending_number() is called.
+    """
+    num, token = pending_numbers.reserve_for(owner)
+    return (__generate_pending_string(num), token)
+
+
+def commit_pending_number(wo_number: str) -> None:
+    """Records that a Pending workorder has been saved under 'wo_number'."""
+    if wo_number.startswith("Pending-"):
+        pending_numbers.commit(extract_pending_twois_number(wo_number))
+
+
+def cancel_pending_number(wo_number: str, token: int) -> None:
+    """Gives back a reservation made by reserve_pending_number() that was never saved."""
+    if wo_number.startswith("Pending-"):
+        pending_numbers.cancel(extract_pending_twois_number(wo_number), token)
+
+
+def release_pending_number(wo_number: str) -> None:
+    """Records that the files of the Pending workorder 'wo_number' have been removed, so that
+    its number can be handed out again."""
+    if wo_number.startswith("Pending-"):
+        pending_numbers.release(extract_pending_twois_number(wo_number))
+
+
+def allocate_template_filepath(name: str, directory: str = TEMPLATE_DIR) -> str:
+    """Takes the name of a new template and returns the path to save it under in 'directory':
+    the name followed by its lowest unused number, as in 'OSB GMM - 14-3.twois'.\n
+    The numbers used under each name are read from the directory the first time that name is
+    allocated and are tracked in memory after that, so each allocation costs the same however
+    many templates there are. A number that something else has taken on disk in the meantime
+    is skipped.
+    """
+    allocator: NumberAllocator | None = template_numbers.get((directory, name))
+    if allocator is None:
+        allocator = template_numbers.setdefault((directory, name), NumberAllocator(
+            partial(__get_template_numbers_set, directory, name), partial(str, directory)))
+    while True:
+        num: int = allocator.allocate()
+        allocator.commit(num)
+        filepath: str = f"{directory}\\{name}-{num}.twois"
+        if not os.path.exists(filepath):
+            return filepath
 
 
 def extract_pending_twois_number(name: str) -> int:
@@ -326,20 +347,13 @@ def input_file_status(filepath: str) -> ExcelFileStatus:
     Potential members of the enum are defined in the documentation for the ExcelFileStatus
     enum class.
     """
-    if not os.path.isfile(filepath):
-        return ExcelFileStatus.NOT_FOUND
-    if not filepath.endswith('.xlsx') and not filepath.endswith('.xls'):
-        return ExcelFileStatus.NOT_XLSX
-
-    resp: ExcelFileStatus = ExcelFileStatus.IS_VALID
-    wb: Workbook = load_workbook(filename=filepath)
-    ws: Worksheet = wb.active
-    if (ws["D1"].value != 'Technician Work Order Information Sheet'
-                    or ws['A13'].value != 'Work Order Plans'):
-        resp = ExcelFileStatus.NOT_TWOIS
-
-    wb.close()
-    return resp
+    resp: ExcelFileStatus = filepath_status(filepath)
+    if resp != ExcelFileStatus.IS_VALID:
+        return resp
+    try:
+        return worksheet_input_status(scan_cells(filepath, layout.CLASSIFICATION_CELLS))
+    except XlsxScanError:
+        return ExcelFileStatus.NOT_TWOIS
 
 
 def approved_file_status(filepath: str) -> ExcelFileStatus:
@@ -349,32 +363,78 @@ def approved_file_status(filepath: str) -> ExcelFileStatus:
     Potential members of the enum are defined in the documentation for the ExcelFileStatus
     enum class.
     """
-    resp: ExcelFileStatus = input_file_status(filepath)
+    resp: ExcelFileStatus = filepath_status(filepath)
     if resp != ExcelFileStatus.IS_VALID:
         return resp
+    try:
+        return worksheet_approved_status(scan_cells(filepath, layout.CLASSIFICATION_CELLS))
+    except XlsxScanError:
+        return ExcelFileStatus.NOT_TWOIS
+
+
+def find_approved_twois_files(directory: str) -> list[str]:
+    """Takes a path to a directory and returns the paths of every approved TWOIS spreadsheet
+    directly inside it. Each file is classified with the streaming reader used by
+    approved_file_status(), so non-TWOIS spreadsheets are rejected after reading only the
+    first few rows of their sheet.
+    """
+    resp: list[str] = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and approved_file_status(entry.path) == ExcelFileStatus.IS_VALID:
+            resp.append(entry.path)
+    return resp
+
 
-    wb: Workbook = load_workbook(filename=filepath)
-    ws: Worksheet = wb.active
+def filepath_status(filepath: str) -> ExcelFileStatus:
+    """Takes a path to a file and returns an ExcelFileStatus enum member based only on the path
+    itself: whether the file exists and whether it has a valid excel extension. The contents of
+    the file are not opened.
+    """
+    if not os.path.isfile(filepath):
+        return ExcelFileStatus.NOT_FOUND
+    if not filepath.endswith('.xlsx') and not filepath.endswith('.xls'):
+        return ExcelFileStatus.NOT_XLSX
+    return ExcelFileStatus.IS_VALID
+
+
+def worksheet_input_status(ws: Worksheet | SheetValues) -> ExcelFileStatus:
+    """Takes an already opened Worksheet object and returns ExcelFileStatus.IS_VALID if it
+    carries the TWOIS header strings, or ExcelFileStatus.NOT_TWOIS otherwise. This is the
+    content half of input_file_status(), for callers that already hold the worksheet.
+    """
+    sv: SheetValues = as_sheet_values(ws)
+    if (sv.field('form_title') != layout.FORM_TITLE
+                    or sv.field('plans_heading') != layout.PLANS_HEADING):
+        return ExcelFileStatus.NOT_TWOIS
+    return ExcelFileStatus.IS_VALID
+
+
+def worksheet_approved_status(ws: Worksheet | SheetValues) -> ExcelFileStatus:
+    """Takes an already opened Worksheet object and performs the same content checks as
+    approved_file_status() without touching the disk again.
+    """
+    sv: SheetValues = as_sheet_values(ws)
+    resp: ExcelFileStatus = worksheet_input_status(sv)
+    if resp != ExcelFileStatus.IS_VALID:
+        return resp
 
-    if not __has_at_least_one_taskitem(ws) or str(ws['D7'].value) == "None":
+    if not __has_at_least_one_taskitem(sv) or str(sv.field('title')) == "None":
         resp = ExcelFileStatus.NOT_COMPLETE
 
-    wo_number: str = get_wo_number_from_xlsx_cell(ws)
+    wo_number: str = str(sv.field('wo_number'))[:6]
     if resp == ExcelFileStatus.IS_VALID and (not is_a_valid_wo_number(wo_number) or
-                                                not __has_pc_approval_markings(ws)):
+                                                not __has_pc_approval_markings(sv)):
         resp = ExcelFileStatus.NOT_APPROVED
-
-    wb.close()
     return resp
 
 
 
-def is_pac_required_per_xlsx(ws: Worksheet) -> bool:
+def is_pac_required_per_xlsx(ws: Worksheet | SheetValues) -> bool:
     """A static method which analyzes the contents of the "PAC Required" cell and
     determines whether or not a PAC is required. Returns true if a PAC is required
     and false if not.
     """
-    value: str = str(ws['I10'].value).lower()
+    value: str = str(as_sheet_values(ws).field('pac_required')).lower()
     return value.endswith("yes") or value.endswith("required")
 
 
@@ -395,43 +455,92 @@ def __get_enumerated_file_numbers_set() -> set[int]:
     """Analyzes the open workorders and looks at which ones are pendin Extracts the int
     from the pending WO number and adds it to a set.\n
     This is a private method that should only be used by the determine_pending_number() method.
+    The numbers come from the workorder index rather than a walk of the in_progress directory.
+    """
+    return workorder_index.pending_numbers()
+
+
+def __get_template_numbers_set(directory: str, name: str) -> set[int]:
+    """Returns the numbers used by the templates called 'name' in 'directory', which are
+    saved as 'name-1.twois', 'name-2.twois' and so on. This is a private method that should
+    only be used by the template number allocators.
     """
+    prefix: str = f"{name}-"
     resp: set[int] = set()
-    for name in os.listdir(IN_PROGRESS_DIR):
-        if name.endswith(".twois") and name.startswith("Pending"):
-            num: int = extract_pending_twois_number(name)
-            resp.add(num)
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                number: str = entry.name[len(prefix):-len(".twois")]
+                if (entry.name.startswith(prefix) and entry.name.endswith(".twois") and
+                        number.isdigit()):
+                    resp.add(int(number))
+    except OSError:
+        pass
     return resp
 
 
+def __in_progress_stamp() -> int:
+    """Returns the workorder index's external version, which changes whenever a file in the
+    in_progress directory is added, rewritten or removed outside of the app. The app's own saves
+    and deletions are reported to the allocator through commit() and release() instead, so they
+    do not make it reload. This is a private method that should only be used by the pending
+    number allocator.
+    """
+    return workorder_index.external_version()
+
+
+def __date_from_value(dateval: object) -> date:
+    """Takes the raw value of a date cell and returns it as a date object, or today's date if
+    the value cannot be understood as a date. The streaming reader leaves dates as excel serial
+    numbers, since it reads no styles, so numbers are converted as serials.
+    """
+    if isinstance(dateval, datetime):
+        return dateval.date()
+    if isinstance(dateval, date):
+        return dateval
+    if isinstance(dateval, (int, float)) and not isinstance(dateval, bool):
+        try:
+            return from_excel(dateval).date()
+        except (OverflowError, ValueError):
+            return date.today()
+    return string_to_date(str(dateval))
+
+
 def __generate_pending_string(num: int) -> str:
     """Takes an integer and builds and returns an appropriately formatted string,
     where the number is 4 and the result is \"Pending-004\".\n
-    This is a private method that should only be used by the determine_pending_number() method.
+    This is a private method that should only be used by the pending number functions.
     """
     n: str = str(num).rjust(max(3, len(str(num))), '0') #leading zeroes, minimum of 3 digits
     return f"Pending-{n}"
 
 
-def __has_pc_approval_markings(ws: Worksheet) -> bool:
-    """Takes an openpyxl Worksheet object and checks to see whether cells C3, C4, and C5
+def __has_pc_approval_markings(sv: SheetValues) -> bool:
+    """Takes a SheetValues snapshot and checks to see whether cells C3, C4, and C5
     are populated. Returns true if they all are, as this would mean that the workorder has
     been approved by PC.
     """
-    cells: list[str] = ['C3', 'C4', 'C5']
-    for c in cells:
-        if str(ws[c].value) == "None":
+    for c in layout.PC_APPROVAL_CELLS:
+        if str(sv.value(c)) == "None":
             return False
     return True
 
 
-def __has_at_least_one_taskitem(ws: Worksheet) -> bool:
-    """Takes an openpyxl Worksheet object and checks to see whether cells A16, B16, G16, and B15
+def __has_at_least_one_taskitem(sv: SheetValues) -> bool:
+    """Takes a SheetValues snapshot and checks to see whether cells A16, B16, G16, and B15
     are populated. Returns true if they all are, as this would mean that at least one task item
     with a reference is on the workorder.
     """
-    cells: list[str] = ['A16', 'B16', 'G16', 'B15']
-    for c in cells:
-        if str(ws[c].value) == "None":
+    for c in layout.TASKITEM_SENTINEL_CELLS:
+        if str(sv.value(c)) == "None":
             return False
     return True
+
+
+############### MODULE STATE ##################################################
+
+pending_numbers: NumberAllocator = NumberAllocator(__get_enumerated_file_numbers_set,
+                                                   __in_progress_stamp)
+# One allocator per (directory, template name). Their stamp never changes, so each one reads
+# the directory once.
+template_numbers: dict[tuple[str, str], NumberAllocator] = {}
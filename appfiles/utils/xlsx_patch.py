@@ -0,0 +1,157 @@
+"""Cell-level patch writer for an existing .xlsx file.\n
+Saving a workorder through openpyxl means loading the whole workbook, styles, drawings and
+all, and then encoding every part of it again, which is slow for the approved spreadsheets
+that come back from PC with signatures and images in them. When only a few cells have
+changed, such as a new log comment, patch_cells() instead rewrites just the <c> elements of
+those cells in the active sheet's XML. Every other part of the archive is copied across
+unchanged, and the rest of the sheet XML is kept exactly as it was, so styles, merged cells
+and anything openpyxl does not understand survive untouched.\n
+Strings are written as inline strings, so the shared string table is never rewritten. A
+patched cell keeps its style, but loses any formula it held.
+"""
+
+import re
+from typing import Any
+from xml.sax.saxutils import escape
+from zipfile import BadZipFile, ZipFile
+
+from openpyxl.utils.cell import get_column_letter
+
+from appfiles.utils.xlsx_scan import active_sheet_path
+
+SHEET_DATA_RE: re.Pattern = re.compile(rb"<sheetData\s*/>|<sheetData>(.*?)</sheetData>",
+                                       re.DOTALL)
+ROW_RE: re.Pattern = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.DOTALL)
+CELL_RE: re.Pattern = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.DOTALL)
+ROW_NUMBER_RE: re.Pattern = re.compile(r'\br="(\d+)"')
+CELL_REF_RE: re.Pattern = re.compile(r'\br="([A-Z]+)\d+"')
+TYPE_ATTR_RE: re.Pattern = re.compile(r'\s+t="[^"]*"')
+SPANS_ATTR_RE: re.Pattern = re.compile(r'\s+spans="[^"]*"')
+
+
+class XlsxPatchError(Exception):
+    """Raised when a file cannot be patched, so that it has to be rewritten in full."""
+
+
+############### PUBLIC STATIC METHODS #########################################
+
+def patch_cells(source: str, dest: str, values: dict[tuple[int, int], Any]) -> None:
+    """Takes a path to an .xlsx file, a path to write the patched copy to, and the new values
+    of some cells on the active sheet, keyed by (row, column) position. None empties a cell.
+    Raises an XlsxPatchError if the file is not an .xlsx archive that can be patched, in which
+    case nothing useful has been written to 'dest'.
+    """
+    try:
+        with ZipFile(source) as zin, ZipFile(dest, "w") as zout:
+            sheet: str = active_sheet_path(zin)
+            for info in zin.infolist():
+                data: bytes = zin.read(info)
+                if info.filename == sheet:
+                    data = patch_sheet_xml(data, values)
+                zout.writestr(info, data)
+    except (BadZipFile, KeyError, SyntaxError, ValueError, IndexError) as ex:
+        raise XlsxPatchError(f"'{source}' cannot be patched") from ex
+
+
+def patch_sheet_xml(xml: bytes, values: dict[tuple[int, int], Any]) -> bytes:
+    """Takes the XML of a worksheet and returns it with the cells in 'values' replaced.
+    Only the rows that hold those cells are rebuilt; missing rows and cells are inserted in
+    order. Raises an XlsxPatchError if the sheet data cannot be found, or if a row or cell
+    does not say where it is."""
+    found: re.Match | None = SHEET_DATA_RE.search(xml)
+    if found is None:
+        raise XlsxPatchError("the worksheet has no sheetData element")
+    by_row: dict[int, dict[int, Any]] = {}
+    for (row, col), value in values.items():
+        by_row.setdefault(row, {})[col] = value
+
+    body: str = (found.group(1) or b"").decode("utf-8")
+    pieces: list[str] = []
+    pending: list[int] = sorted(by_row, reverse=True)
+    last: int = 0
+    for match in ROW_RE.finditer(body):
+        number: int = __row_number(match.group(1))
+        pieces.append(body[last:match.start()])
+        while pending and pending[-1] < number:
+            pieces.append(__new_row(pending[-1], by_row[pending.pop()]))
+        if pending and pending[-1] == number:
+            pieces.append(__patch_row(match, by_row[pending.pop()]))
+        else:
+            pieces.append(match.group(0))
+        last = match.end()
+    pieces.append(body[last:])
+    while pending:
+        pieces.append(__new_row(pending[-1], by_row[pending.pop()]))
+
+    sheet_data: bytes = b"<sheetData>" + "".join(pieces).encode("utf-8") + b"</sheetData>"
+    return xml[:found.start()] + sheet_data + xml[found.end():]
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+def __row_number(attrs: str) -> int:
+    found: re.Match | None = ROW_NUMBER_RE.search(attrs)
+    if found is None:
+        raise XlsxPatchError("a row has no row number")
+    return int(found.group(1))
+
+
+def __column_number(attrs: str) -> int:
+    found: re.Match | None = CELL_REF_RE.search(attrs)
+    if found is None:
+        raise XlsxPatchError("a cell has no reference")
+    col: int = 0
+    for letter in found.group(1):
+        col = col * 26 + ord(letter) - 64
+    return col
+
+
+def __new_row(row: int, cells: dict[int, Any]) -> str:
+    return f'<row r="{row}">' + "".join(__cell_xml(row, col, "", cells[col])
+                                         for col in sorted(cells)) + "</row>"
+
+
+def __patch_row(match: re.Match, cells: dict[int, Any]) -> str:
+    """Rebuilds one <row> element with the cells in 'cells' replaced or inserted. The row's
+    'spans' hint is dropped if a cell is inserted, since it may no longer be right."""
+    row: int = __row_number(match.group(1))
+    body: str = match.group(2) or ""
+    pending: list[int] = sorted(cells, reverse=True)
+    pieces: list[str] = []
+    replaced: int = 0
+    last: int = 0
+    for cell in CELL_RE.finditer(body):
+        col: int = __column_number(cell.group(1))
+        pieces.append(body[last:cell.start()])
+        while pending and pending[-1] < col:
+            pieces.append(__cell_xml(row, pending[-1], "", cells[pending.pop()]))
+        if pending and pending[-1] == col:
+            attrs: str = TYPE_ATTR_RE.sub("", CELL_REF_RE.sub("", cell.group(1)))
+            pieces.append(__cell_xml(row, pending.pop(), attrs.strip(), cells[col]))
+            replaced += 1
+        else:
+            pieces.append(cell.group(0))
+        last = cell.end()
+    pieces.append(body[last:])
+    while pending:
+        pieces.append(__cell_xml(row, pending[-1], "", cells[pending.pop()]))
+
+    row_attrs: str = match.group(1)
+    if replaced < len(cells):
+        row_attrs = SPANS_ATTR_RE.sub("", row_attrs)
+    return f"<row{row_attrs}>" + "".join(pieces) + "</row>"
+
+
+def __cell_xml(row: int, col: int, attrs: str, value: Any) -> str:
+    """Returns a <c> element holding 'value'. 'attrs' are the cell's other attributes, such as
+    its style, without its reference or type."""
+    head: str = f'<c r="{get_column_letter(col)}{row}"' + (f" {attrs}" if attrs else "")
+    if value is None:
+        return head + "/>"
+    if isinstance(value, bool):
+        return head + f' t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return head + f"><v>{value}</v></c>"
+    text: str = str(value)
+    space: str = ' xml:space="preserve"' if text != text.strip() else ""
+    return head + f' t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
@@ -0,0 +1,146 @@
+"""Streaming reader for a handful of cells on an .xlsx file.\n
+openpyxl's load_workbook() parses styles, merged cells, every row of every sheet and the whole
+shared string table before a single value can be looked at. Classifying a file as a TWOIS
+spreadsheet only needs about a dozen cells near the top of the active sheet, so this module
+reads the sheet XML straight out of the zip archive, stops as soon as it has passed the last
+row it was asked for, and then resolves only the shared strings that those cells point at.
+"""
+
+import posixpath
+from typing import Any, Iterable
+from xml.etree.ElementTree import iterparse, parse
+from zipfile import BadZipFile, ZipFile
+
+from openpyxl.utils.datetime import from_ISO8601
+
+from appfiles.utils.twois_layout import SheetValues, to_position
+
+NS_MAIN: str = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL: str = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL: str = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class XlsxScanError(Exception):
+    """Raised when a file cannot be read as an .xlsx archive."""
+
+
+def scan_cells(filepath: str, coords: Iterable[str]) -> SheetValues:
+    """Takes a path to an .xlsx file and a list of coordinates and returns a SheetValues
+    snapshot holding the value of each of those cells on the active sheet (None for empty
+    cells). Raises an XlsxScanError if the file is not a readable .xlsx archive, or if one of
+    those cells holds a value that does not match its type.
+    """
+    wanted: dict[str, tuple[int, int]] = {c: to_position(c) for c in coords}
+    last_row: int = max((pos[0] for pos in wanted.values()), default=0)
+    try:
+        with ZipFile(filepath) as zf:
+            raw: dict[str, tuple[str | None, str | None]] = __scan_sheet(
+                zf, active_sheet_path(zf), set(wanted), last_row)
+            strings: dict[int, str] = __shared_strings(
+                zf, {int(v) for t, v in raw.values() if t == 's' and v is not None})
+        values: dict[tuple[int, int], Any] = {}
+        for coord, pos in wanted.items():
+            ctype, text = raw.get(coord, (None, None))
+            values[pos] = __convert(ctype, text, strings)
+    except (BadZipFile, KeyError, SyntaxError, ValueError, IndexError) as ex:
+        raise XlsxScanError(f"'{filepath}' is not a readable .xlsx file") from ex
+    return SheetValues(values)
+
+
+def active_sheet_path(zf: ZipFile) -> str:
+    """Returns the archive path of the workbook's active sheet, which is the sheet that
+    openpyxl returns from Workbook.active."""
+    with zf.open("xl/workbook.xml") as file:
+        book = parse(file).getroot()
+    active: int = 0
+    view = book.find(f"{NS_MAIN}bookViews/{NS_MAIN}workbookView")
+    if view is not None:
+        active = int(view.get("activeTab", "0"))
+    sheets = book.findall(f"{NS_MAIN}sheets/{NS_MAIN}sheet")
+    rid: str | None = sheets[active].get(f"{NS_REL}id")
+
+    with zf.open("xl/_rels/workbook.xml.rels") as file:
+        rels = parse(file).getroot()
+    for rel in rels.iter(f"{NS_PKG_REL}Relationship"):
+        if rel.get("Id") == rid:
+            target: str = rel.get("Target", "")
+            if target.startswith("/"):
+                return target[1:]
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(rid)
+
+
+############### PRIVATE STATIC METHODS ########################################
+
+def __scan_sheet(zf: ZipFile, path: str, coords: set[str],
+                 last_row: int) -> dict[str, tuple[str | None, str | None]]:
+    """Streams the sheet XML and returns the raw (type, text) pair for each wanted cell that
+    exists. Stops at the first row past 'last_row', or once every wanted cell has been seen."""
+    resp: dict[str, tuple[str | None, str | None]] = {}
+    with zf.open(path) as file:
+        for event, elem in iterparse(file, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{NS_MAIN}row" and int(elem.get("r", "0")) > last_row:
+                    break
+                continue
+            if elem.tag == f"{NS_MAIN}c":
+                coord: str = elem.get("r", "")
+                if coord in coords:
+                    resp[coord] = __raw_cell(elem)
+                    if len(resp) == len(coords):
+                        break
+                elem.clear()
+            elif elem.tag == f"{NS_MAIN}row":
+                elem.clear()
+    return resp
+
+
+def __raw_cell(elem: Any) -> tuple[str | None, str | None]:
+    """Returns the (type, text) pair of a <c> element."""
+    ctype: str | None = elem.get("t")
+    if ctype == "inlineStr":
+        return ("str", "".join(t.text or "" for t in elem.iter(f"{NS_MAIN}t")))
+    value = elem.find(f"{NS_MAIN}v")
+    return (ctype, None if value is None else value.text)
+
+
+def __shared_strings(zf: ZipFile, indices: set[int]) -> dict[int, str]:
+    """Reads the shared string table only as far as the highest index that is needed."""
+    resp: dict[int, str] = {}
+    if not indices:
+        return resp
+    last: int = max(indices)
+    i: int = 0
+    with zf.open("xl/sharedStrings.xml") as file:
+        for _, elem in iterparse(file, events=("end",)):
+            if elem.tag != f"{NS_MAIN}si":
+                continue
+            if i in indices:
+                resp[i] = "".join(t.text or "" for t in elem.iter(f"{NS_MAIN}t"))
+            if i >= last:
+                break
+            elem.clear()
+            i += 1
+    return resp
+
+
+def __convert(ctype: str | None, text: str | None, strings: dict[int, str]) -> Any:
+    """Converts a raw cell into the same Python value that openpyxl would report for it,
+    apart from dates stored as numbers, which are left as serial numbers since no styles are
+    read. Dates stored as ISO 8601 text (type 'd') are converted. Raises a ValueError if the
+    text does not match the cell's type."""
+    if text is None:
+        return None
+    match ctype:
+        case 's':
+            return strings.get(int(text))
+        case 'str' | 'e':
+            return text
+        case 'b':
+            return text == '1'
+        case 'd':
+            return from_ISO8601(text)
+    number: float = float(text)
+    if number.is_integer() and 'E' not in text.upper() and '.' not in text:
+        return int(number)
+    return number
@@ -0,0 +1,85 @@
+"""Yo!"""
+
+from typing import Callable
+
+import customtkinter as ctk #type: ignore
+
+from appfiles.library.workorder_facets import Facet, FacetView, Selection, SortKey
+
+MENU_W = 110
+COLUMNS = 3
+ALL = -1
+FACET_NAMES: dict[Facet, str] = {Facet.SITE: "Site", Facet.SPECIAL: "Special",
+                                 Facet.TYPE: "Type", Facet.PRIORITY: "Priority",
+                                 Facet.BUILDING: "Building", Facet.ROOM: "Room",
+                                 Facet.APPROVAL: "Approval", Facet.OVERDUE: "Status"}
+SORT_NAMES: dict[str, SortKey] = {"Sort: Due date": SortKey.DUE_DATE,
+                                  "Sort: Priority": SortKey.PRIORITY,
+                                  "Sort: Number": SortKey.NUMBER,
+                                  "Sort: Title": SortKey.TITLE}
+
+
+class TWOISFacetFrame(ctk.CTkFrame):
+    """A row of menus which filter the workorder list by facet, plus one which sorts it. Each
+    value in a menu shows how many workorders selecting it would leave in the list. Calls
+    'on_change' whenever a selection or the sort order changes."""
+    def __init__(self, master: ctk.CTk | ctk.CTkToplevel | ctk.CTkFrame,
+                 on_change: Callable[[], None]):
+        super().__init__(master=master, fg_color='transparent')
+        self.on_change: Callable[[], None] = on_change
+        self.__selected: dict[Facet, int] = {facet: ALL for facet in Facet}
+        self.__codes: dict[Facet, dict[str, int]] = {facet: {} for facet in Facet}
+        self.__menus: dict[Facet, ctk.CTkOptionMenu] = {}
+
+        for i, facet in enumerate(Facet):
+            menu: ctk.CTkOptionMenu = ctk.CTkOptionMenu(
+                self, width=MENU_W, dynamic_resizing=False, values=[FACET_NAMES[facet]],
+                command=lambda choice, f=facet: self.__on_select(f, choice))
+            menu.set(FACET_NAMES[facet])
+            menu.grid(row=i // COLUMNS, column=i % COLUMNS, padx=2, pady=2, sticky='ew')
+            self.__menus[facet] = menu
+        self.sort_menu: ctk.CTkOptionMenu = ctk.CTkOptionMenu(
+            self, width=MENU_W, dynamic_resizing=False, values=list(SORT_NAMES),
+            command=lambda choice: self.on_change())
+        self.sort_menu.grid(row=len(Facet) // COLUMNS, column=len(Facet) % COLUMNS,
+                            padx=2, pady=2, sticky='ew')
+
+
+    ########### PUBLIC METHODS
+    def selection(self) -> Selection:
+        """Returns the selected code of every facet that is filtering the list."""
+        return {facet: (code,) for facet, code in self.__selected.items() if code != ALL}
+
+
+    def sort_key(self) -> SortKey:
+        """Returns the order the list should be sorted in."""
+        return SORT_NAMES[self.sort_menu.get()]
+
+
+    def is_filtering(self) -> bool:
+        """Returns true if any facet is selected or the list is not in due date order."""
+        return bool(self.selection()) or self.sort_key() is not SortKey.DUE_DATE
+
+
+    def set_counts(self, counts: dict[Facet, dict[int, int]]) -> None:
+        """Rewrites the values of every menu with the counts from FacetView.counts(). A value
+        that no longer has any workorders stays listed while it is selected, so that it can be
+        cleared."""
+        for facet, menu in self.__menus.items():
+            facet_counts: dict[int, int] = counts.get(facet, {})
+            selected: int = self.__selected[facet]
+            if selected != ALL and selected not in facet_counts:
+                facet_counts = {**facet_counts, selected: 0}
+            codes: dict[str, int] = {f"{FACET_NAMES[facet]}: All ({sum(facet_counts.values())})":
+                                     ALL}
+            for code, count in sorted(facet_counts.items()):
+                codes[f"{FacetView.label(facet, code)} ({count})"] = code
+            self.__codes[facet] = codes
+            menu.configure(values=list(codes))
+            menu.set(next(text for text, code in codes.items() if code == selected))
+
+
+    ########### PRIVATE METHODS
+    def __on_select(self, facet: Facet, choice: str) -> None:
+        self.__selected[facet] = self.__codes[facet].get(choice, ALL)
+        self.on_change()
@@ -2,7 +2,9 @@
 
 from datetime import date
 from functools import partial
-from tkinter import END, messagebox
+from math import ceil
+from tkinter import END, Event, messagebox
+from typing import Callable
 
 import customtkinter as ctk #type: ignore
 
@@ -13,6 +15,41 @@ from appfiles.utils.appglobals import primary_user
 
 WRAP_LEN = 365
 BTN_W = 100
+ROW_H = 64
+ROW_PAD = 10
+OVERDUE_FG = ("#BF3C3A", "#8D211F")
+OVERDUE_HOVER = ("#823332", "#5E1514")
+
+
+def pool_size(view_height: int, buffer: int) -> int:
+    """Returns how many buttons a TWOISDetailList needs to cover a viewport 'view_height'
+    pixels tall, plus 'buffer' spares for the rows that are partly scrolled into view."""
+    return ceil(view_height / ROW_H) + buffer
+
+
+def clamp_offset(offset: float, rows: int, view_height: int) -> float:
+    """Returns 'offset' limited to the distance a list of 'rows' rows can be scrolled in a
+    viewport 'view_height' pixels tall."""
+    return min(max(0, offset), max(0, rows * ROW_H - view_height))
+
+
+def visible_rows(offset: float, rows: int, pool: int) -> list[tuple[int, float]]:
+    """Returns the (row index, y) to place each of the first buttons of a pool of 'pool'
+    buttons at, for a list of 'rows' rows scrolled down by 'offset' pixels. The rest of the
+    pool is hidden."""
+    first: int = int(offset // ROW_H)
+    shift: float = offset - first * ROW_H
+    return [(first + i, i * ROW_H - shift + ROW_PAD / 2)
+            for i in range(max(0, min(pool, rows - first)))]
+
+
+def scrollbar_span(offset: float, rows: int, view_height: int) -> tuple[float, float]:
+    """Returns the (first, last) fractions of a list of 'rows' rows that are in view, as
+    passed to a scrollbar's set()."""
+    height: int = rows * ROW_H
+    if height <= 0:
+        return (0, 1)
+    return (offset / height, min(1, (offset + view_height) / height))
 
 
 class TWOISDetailFrame(ctk.CTkFrame):
@@ -84,16 +121,154 @@ class TWOISDetailFrame(ctk.CTkFrame):
 class TWOISDetailButton(ctk.CTkButton):
     """Yo!"""
     def __init__(self, master: ctk.CTk | ctk.CTkToplevel | ctk.CTkFrame |
-                 ctk.CTkScrollableFrame, workorder: WorkOrder):
-        super().__init__(master=master)
+                 ctk.CTkScrollableFrame, workorder: WorkOrder | None = None, **kwargs):
+        super().__init__(master=master, anchor="w", compound='left',
+                         font=ctk.CTkFont("DejaVu Sans Mono", 12, "normal"), **kwargs)
+        self.workorder: WorkOrder | None = None
+        if workorder is not None:
+            self.set_workorder(workorder)
+
+
+    def set_workorder(self, workorder: WorkOrder) -> None:
+        """Points the button at a different workorder, so that a single button can be reused
+        for any number of rows of a TWOISDetailList."""
         self.workorder = workorder
         btntxt: str = workorder.get_full_workorder_number().ljust(56)
         btntxt += f"Due {str(workorder.due_date).ljust(14)}\n"
         btntxt += workorder.title.ljust(79)
-        self.configure(text=btntxt, anchor="w", compound='left',
-                       font=ctk.CTkFont("DejaVu Sans Mono", 12, "normal"))
         if self.workorder.due_date < date.today():
-            self.configure(fg_color=("#BF3C3A", "#8D211F"), hover_color=("#823332", "#5E1514"))
+            self.configure(text=btntxt, fg_color=OVERDUE_FG, hover_color=OVERDUE_HOVER)
+        else:
+            self.configure(text=btntxt, fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"],
+                           hover_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"])
+
+
+
+class TWOISDetailList(ctk.CTkFrame):
+    """A scrolling list of workorders which only creates a TWOISDetailButton for each row that
+    fits in the visible area, plus a small buffer. Scrolling moves that pool of buttons and
+    points them at different workorders instead of creating or destroying widgets, so the cost
+    of the list does not grow with the number of workorders in it."""
+    def __init__(self, master: ctk.CTk | ctk.CTkToplevel | ctk.CTkFrame,
+                 on_select: Callable[[WorkOrder], None], width: int = 360, buffer: int = 2):
+        super().__init__(master=master, width=width)
+        self.workorders: list[WorkOrder] = []
+        self.on_select: Callable[[WorkOrder], None] = on_select
+        self.buffer: int = buffer
+        self.__pool: list[TWOISDetailButton] = []
+        self.__offset: float = 0
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.viewport: ctk.CTkFrame = ctk.CTkFrame(self, width=width, fg_color='transparent')
+        self.scrollbar: ctk.CTkScrollbar = ctk.CTkScrollbar(self, command=self.__on_scrollbar)
+        self.viewport.grid(row=0, column=0, padx=ROW_PAD, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+        self.viewport.bind("<Configure>", self.__on_resize)
+        self.__bind_wheel(self.viewport)
+
+
+    ########### PUBLIC METHODS
+    def set_workorders(self, workorders: list[WorkOrder]) -> None:
+        """Replaces the contents of the list and scrolls back to the top."""
+        self.workorders = list(workorders)
+        self.__offset = 0
+        self.__render()
+
+
+    def append(self, wo: WorkOrder) -> None:
+        """Adds a workorder to the end of the list. Only touches widgets if the new row is
+        inside the visible area."""
+        self.workorders.append(wo)
+        self.__render()
+
+
+    def insert(self, index: int, wo: WorkOrder) -> None:
+        """Inserts a workorder at a position in the list."""
+        self.workorders.insert(index, wo)
+        self.__render()
+
+
+    def replace(self, index: int, wo: WorkOrder) -> None:
+        """Replaces the workorder at a position in the list."""
+        self.workorders[index] = wo
+        self.__render()
+
+
+    def pop(self, index: int) -> WorkOrder:
+        """Removes and returns the workorder at a position in the list."""
+        resp: WorkOrder = self.workorders.pop(index)
+        self.__scroll_to(self.__offset)
+        return resp
+
+
+    def clear(self) -> None:
+        """Removes every workorder from the list."""
+        self.set_workorders([])
+
+
+    ########### PRIVATE METHODS
+    def __bind_wheel(self, widget: ctk.CTkBaseClass) -> None:
+        widget.bind("<MouseWheel>", self.__on_wheel, add="+")
+        widget.bind("<Button-4>", self.__on_wheel, add="+")
+        widget.bind("<Button-5>", self.__on_wheel, add="+")
+
+
+    def __content_height(self) -> int:
+        return len(self.workorders) * ROW_H
+
+
+    def __scroll_to(self, offset: float) -> None:
+        self.__offset = clamp_offset(offset, len(self.workorders), self.viewport.winfo_height())
+        self.__render()
+
+
+    def __on_resize(self, _e: Event) -> None:
+        needed: int = pool_size(self.viewport.winfo_height(), self.buffer)
+        while len(self.__pool) < needed:
+            btn: TWOISDetailButton = TWOISDetailButton(self.viewport, height=ROW_H - ROW_PAD)
+            btn.configure(command=partial(self.__on_click, btn))
+            self.__bind_wheel(btn)
+            self.__pool.append(btn)
+        self.__scroll_to(self.__offset)
+
+
+    def __on_click(self, btn: TWOISDetailButton) -> None:
+        if btn.workorder is not None:
+            self.on_select(btn.workorder)
+
+
+    def __on_wheel(self, e: Event) -> None:
+        if e.num == 4:
+            step: float = -ROW_H
+        elif e.num == 5:
+            step = ROW_H
+        else:
+            step = -e.delta / 120 * ROW_H
+        self.__scroll_to(self.__offset + step)
+
+
+    def __on_scrollbar(self, *args: str) -> None:
+        if args[0] == 'moveto':
+            self.__scroll_to(float(args[1]) * self.__content_height())
+        elif args[0] == 'scroll':
+            unit: int = ROW_H // 3 if args[2] == 'units' else self.viewport.winfo_height()
+            self.__scroll_to(self.__offset + int(args[1]) * unit)
+
+
+    def __render(self) -> None:
+        """Places the button pool over the rows that are currently in view."""
+        placed: list[tuple[int, float]] = visible_rows(self.__offset, len(self.workorders),
+                                                       len(self.__pool))
+        for btn, (index, y) in zip(self.__pool, placed):
+            if btn.workorder is not self.workorders[index]:
+                btn.set_workorder(self.workorders[index])
+            btn.place(x=0, y=y, relwidth=1.0)
+        for btn in self.__pool[len(placed):]:
+            btn.place_forget()
+        self.scrollbar.set(*scrollbar_span(self.__offset, len(self.workorders),
+                                           self.viewport.winfo_height()))
 
 
 
@@ -147,6 +322,7 @@ class TWOISLogCommentFrame(ctk.CTkFrame):
             return
         new_cmt: LogComment = LogComment(self.logentry.get(), primary_user.name, date.today(),
                                                len(self.workorder.comments))
+        # log_comment() saves the workorder, which only rewrites the log comment cells
         if not self.workorder.log_comment([new_cmt]):
             reason: str = ""
             if len(self.workorder.comments) >= 24:
@@ -162,4 +338,3 @@ class TWOISLogCommentFrame(ctk.CTkFrame):
         self.logcmts.configure(text=logstr)
         self.logentry.delete(0, END)
         self.logcmts.focus()
-        self.workorder.save()
@@ -0,0 +1,90 @@
+"""Measures the memory held by the task items, log comments and completion data of a synthetic
+archive of 50,000 workorders, and compares it against the layout used before those classes had
+__slots__: one instance dict per object, a private copy of the standard safety task on every
+workorder, and a separate copy of every technician and person name.\n
+Run from the repository root with:
+    python benchmarks/bench_memory.py [number of workorders]
+"""
+
+#pylint: skip-file
+
+from datetime import date, timedelta
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData, WorkorderCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.taskitem import SAFETY_TASK, TaskItem
+
+WORKORDERS: int = 50_000
+TASKS: int = 4
+COMMENTS: int = 6
+TECHNICIANS: tuple[str, ...] = ("Brian Cobb", "Joel DeLeon", "Jose Lopez")
+
+
+class DictObject:
+    """Stands in for a library class as it was before __slots__: a plain instance dict."""
+
+
+def fresh(value: str) -> str:
+    """A new copy of a string, as every unpickled or parsed name used to be."""
+    return "".join(list(value))
+
+
+def unslotted(obj: object) -> DictObject:
+    resp = DictObject()
+    for name in type(obj).__slots__:
+        value = getattr(obj, name if not name.startswith('__') else
+                        f"_{type(obj).__name__}{name}")
+        resp.__dict__[name] = fresh(value) if isinstance(value, str) and value else value
+    return resp
+
+
+def build_archive(n: int, compact: bool) -> list[tuple[list, list, object]]:
+    archive: list[tuple[list, list, object]] = []
+    start: date = date(2020, 1, 1)
+    for i in range(n):
+        day: date = start + timedelta(days=i % 1500)
+        tech: str = fresh(TECHNICIANS[i % len(TECHNICIANS)])
+        tasks: list = [SAFETY_TASK]
+        for t in range(1, TASKS + 1):
+            task = TaskItem(t * 10, f"Task {t} of workorder {i}", f"PROC-{t:04}", 15 + t)
+            task.complete(TaskCompletionData(day, tech, 2, 1.5))
+            tasks.append(task)
+        comments: list = [LogComment(f"Comment {c} on workorder {i}", fresh(tech), day, c)
+                          for c in range(COMMENTS)]
+        completion = WorkorderCompletionData(day, day, day, "0:01:30")
+        if not compact:
+            tasks = [unslotted(task) for task in tasks]
+            comments = [unslotted(comment) for comment in comments]
+            completion = unslotted(completion)
+        archive.append((tasks, comments, completion))
+    return archive
+
+
+def measure(n: int, compact: bool) -> int:
+    tracemalloc.start()
+    archive = build_archive(n, compact)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del archive
+    return size
+
+
+def main() -> None:
+    n: int = int(sys.argv[1]) if len(sys.argv) > 1 else WORKORDERS
+    objects: int = n * (TASKS + 1 + COMMENTS + 1)
+    before: int = measure(n, False)
+    after: int = measure(n, True)
+    print(f"{n} workorders, {objects} task/comment/completion objects")
+    print(f"{'':10}{'total (MB)':>12}{'per object (B)':>16}")
+    print(f"{'dicts':10}{before / 1e6:>12.1f}{before / objects:>16.0f}")
+    print(f"{'slots':10}{after / 1e6:>12.1f}{after / objects:>16.0f}")
+    print(f"saving: {(before - after) / 1e6:.1f} MB ({1 - after / before:.0%})")
+
+
+if __name__ == '__main__':
+    main()
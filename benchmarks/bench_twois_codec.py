@@ -0,0 +1,70 @@
+"""Compares the binary .twois format against the legacy pickle format: encoded size, and the
+time taken to save and load a fully populated workorder. The last row is the header-only load
+used to list workorders, which reads just the bytes shown in its size column.\n
+Run from the repository root with:
+    python benchmarks/bench_twois_codec.py
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder import WorkOrder
+
+REPEAT: int = 5
+NUMBER: int = 2000
+
+
+def make_workorder() -> WorkOrder:
+    """A workorder with a full task list and log, which is the worst case for both formats."""
+    tasks: list[TaskItem] = []
+    for i in range(15):
+        task = TaskItem(i * 10, f"Task number {i}", f"PROC-{i:04}", 15 + i)
+        task.complete(TaskCompletionData(date(2024, 3, 2), "J Lopez", 2, 1.5))
+        tasks.append(task)
+    comments = [LogComment(f"Log comment number {i}", "J Lopez", date(2024, 3, 1), i)
+                for i in range(24)]
+    wo = WorkOrder(wo_number="123456", title="Monthly patching", due_date=date(2024, 3, 1),
+                   task_list=tasks, comments=comments)
+    return wo
+
+
+def best(stmt) -> float:
+    """Best time per call, in microseconds."""
+    return min(timeit.repeat(stmt, repeat=REPEAT, number=NUMBER)) / NUMBER * 1e6
+
+
+def main() -> None:
+    wo: WorkOrder = make_workorder()
+    pickled: bytes = pickle.dumps(wo)
+    binary: bytes = wo.to_twois_bytes()
+
+    print(f"{'':10}{'size (B)':>12}{'save (us)':>12}{'load (us)':>12}")
+    print(f"{'pickle':10}{len(pickled):>12}"
+          f"{best(lambda: pickle.dumps(wo)):>12.1f}"
+          f"{best(lambda: WorkOrder.from_twois_bytes(pickled)):>12.1f}")
+    print(f"{'binary':10}{len(binary):>12}"
+          f"{best(wo.to_twois_bytes):>12.1f}"
+          f"{best(lambda: WorkOrder.from_twois_bytes(binary)):>12.1f}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path: str = os.path.join(tmpdir, "123456VBS.twois")
+        with open(path, "wb") as outfile:
+            outfile.write(binary)
+        header_size: int = 14 + int.from_bytes(binary[6:10], "little")
+        print(f"{'header':10}{header_size:>12}{'':>12}"
+              f"{best(lambda: WorkOrder.from_twois_header(path)):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compares the precompiled, memoized validators against validators that compile their pattern
+on every call, as the app's validators used to, over columns of workorder numbers, NCR numbers
+and dates like the ones found in a year of workorders.\n
+Run from the repository root with:
+    python benchmarks/bench_validation.py
+"""
+
+#pylint: skip-file
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils import validation
+
+ROWS: int = 10_000
+REPEAT: int = 5
+
+
+def old_wo_number(value: str) -> bool:
+    return re.compile(r"\b\d{6}(FG|VB|CS|EA|FD|SX|FY|CL|BL|TH|)(S|N|I|\b)",
+                      re.IGNORECASE).search(value) is not None
+
+
+def old_ncr_number(value: str) -> bool:
+    return (re.compile(r"NCR\d{6}W", re.IGNORECASE).search(value) is not None or
+            value.upper() == "REQUIRED")
+
+
+def old_date_string(value: str) -> bool:
+    return re.compile(r"\d{1,2}(/|\\)\d{1,2}(/|\\)\d{4}").match(value) is not None
+
+
+def make_columns() -> dict[str, list[str]]:
+    rng = random.Random(1)
+    wo_numbers = [f"{rng.randint(100000, 100400)}{rng.choice(['VBS', 'CSI', 'FGN'])}"
+                  for _ in range(ROWS)]
+    ncr_numbers = [rng.choice(["N/A", "REQUIRED", f"NCR{rng.randint(100000, 100050)}W"])
+                   for _ in range(ROWS)]
+    dates = [f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2024" for _ in range(ROWS)]
+    return {'wo': wo_numbers, 'ncr': ncr_numbers, 'date': dates}
+
+
+def best(stmt) -> float:
+    """Best time for one pass over a column, in milliseconds."""
+    return min(timeit.repeat(stmt, repeat=REPEAT, number=1)) * 1e3
+
+
+def main() -> None:
+    columns = make_columns()
+    cases = [('wo', old_wo_number, validation.is_a_valid_wo_number,
+              validation.validate_wo_numbers),
+             ('ncr', old_ncr_number, validation.is_a_valid_ncr_number,
+              validation.validate_ncr_numbers),
+             ('date', old_date_string, validation.is_a_valid_date_string,
+              validation.validate_date_strings)]
+    print(f"{ROWS} rows per column, best of {REPEAT} passes")
+    print(f"{'column':8}{'compile (ms)':>14}{'cached (ms)':>14}{'batch (ms)':>14}")
+    for name, old, new, batch in cases:
+        column = columns[name]
+        validation.clear_caches()
+        print(f"{name:8}{best(lambda: [old(v) for v in column]):>14.2f}"
+              f"{best(lambda: [new(v) for v in column]):>14.2f}"
+              f"{best(lambda: batch(column)):>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,9 @@
 from appfiles.forms.mainwindow import MainWindow
 import customtkinter as ctk             #type: ignore
 
-ctk.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
-ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+if __name__ == "__main__":
+    ctk.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
+    ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
-main = MainWindow()
-main.mainloop()
\ No newline at end of file
+    main = MainWindow()
+    main.mainloop()
\ No newline at end of file
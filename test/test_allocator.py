@@ -0,0 +1,124 @@
+"""This test file is meant to ensure that the number allocator behind pending workorder numbers
+hands out the lowest unused number, never hands out the same number twice, and gets numbers back
+from objects that are thrown away without being saved.
+"""
+
+#pylint: skip-file
+
+import gc
+import os
+import sys
+from threading import Thread
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.workorder import WorkOrder
+from appfiles.utils.allocator import NumberAllocator
+
+
+class Owner:
+    pass
+
+
+class NumberAllocatorTests(unittest.TestCase):
+    """Defines the tests for the NumberAllocator class."""
+    def setUp(self) -> None:
+        self.stored: set[int] = {1, 2, 5}
+        self.stamp: int = 0
+        self.loads: int = 0
+        self.allocator = NumberAllocator(self.load, lambda: self.stamp)
+
+    def load(self) -> set[int]:
+        self.loads += 1
+        return set(self.stored)
+
+    def test_allocate__fills_gaps_then_extends(self) -> None:
+        self.assertEqual([self.allocator.allocate() for _ in range(4)], [3, 4, 6, 7])
+
+    def test_peek__does_not_reserve(self) -> None:
+        self.assertEqual(self.allocator.peek(), 3)
+        self.assertEqual(self.allocator.peek(), 3)
+        self.assertEqual(self.allocator.allocate(), 3)
+        self.assertEqual(self.allocator.peek(), 4)
+
+    def test_release__number_is_reused(self) -> None:
+        self.allocator.allocate()
+        self.allocator.release(2)
+        self.assertEqual(self.allocator.allocate(), 2)
+
+    def test_storage__only_reloaded_when_stamp_changes(self) -> None:
+        for _ in range(10):
+            self.allocator.allocate()
+        self.assertEqual(self.loads, 1)
+        self.stored = {1}
+        self.stamp += 1
+        self.assertEqual(self.allocator.peek(), 2)
+        self.assertEqual(self.loads, 2)
+
+    def test_reload__keeps_outstanding_reservations(self) -> None:
+        self.assertEqual(self.allocator.allocate(), 3)
+        self.stamp += 1
+        self.assertEqual(self.allocator.allocate(), 4)
+
+    def test_reserve_for__released_when_owner_is_collected(self) -> None:
+        owner = Owner()
+        num, _ = self.allocator.reserve_for(owner)
+        del owner
+        gc.collect()
+        self.assertEqual(self.allocator.allocate(), num)
+
+    def test_reserve_for__owner_collected_while_locked(self) -> None:
+        owners = [Owner()]
+
+        def load() -> set[int]:
+            if self.stamp:
+                owners.clear()
+                gc.collect()
+            return set(self.stored)
+        allocator = NumberAllocator(load, lambda: self.stamp)
+        num, _ = allocator.reserve_for(owners[0])
+        self.stamp += 1
+        worker = Thread(target=allocator.peek, daemon=True)
+        worker.start()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(owners, [])
+        self.assertEqual(allocator.allocate(), num)
+
+    def test_reserve_for__kept_once_committed(self) -> None:
+        owner = Owner()
+        num, _ = self.allocator.reserve_for(owner)
+        self.allocator.commit(num)
+        del owner
+        gc.collect()
+        self.assertNotEqual(self.allocator.allocate(), num)
+
+    def test_cancel__stale_token_is_ignored(self) -> None:
+        num, token = self.allocator.reserve_for(Owner())
+        gc.collect()
+        again, _ = self.allocator.reserve_for(keep := Owner())
+        self.assertEqual(num, again)
+        self.allocator.cancel(num, token)
+        self.assertNotEqual(self.allocator.allocate(), num)
+
+
+class PendingNumberTests(unittest.TestCase):
+    """Defines the tests for the pending number of a WorkOrder."""
+    def test_unsaved_workorders__get_unique_numbers(self) -> None:
+        workorders = [WorkOrder() for _ in range(3)]
+        numbers = {wo.wo_number for wo in workorders}
+        self.assertEqual(len(numbers), 3)
+        self.assertTrue(all(num.startswith("Pending-") for num in numbers))
+
+    def test_discarded_workorder__gives_its_number_back(self) -> None:
+        num = WorkOrder().wo_number
+        gc.collect()
+        self.assertEqual(WorkOrder().wo_number, num)
+
+    def test_approved_workorder__never_reserves(self) -> None:
+        self.assertEqual(WorkOrder(wo_number="123456").wo_number, "123456")
+
+
+if __name__ == '__main__':
+    unittest.main()
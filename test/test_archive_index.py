@@ -0,0 +1,113 @@
+"""This test file is meant to ensure that the archive index parses every completed spreadsheet
+under the complete directory once, and that it only re-parses the files that have changed.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.archive_index import (ArchiveIndex, ArchivedComment, ArchivedTask,
+                                            parse_archived_files)
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+
+
+class ArchiveIndexTests(unittest.TestCase):
+    """Defines the tests for the ArchiveIndex class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "complete")
+        os.makedirs(os.path.join(self.directory, "2024", "Week of 03-04"))
+        os.makedirs(os.path.join(self.directory, "2024", "Week of 12-30"))
+        self.index = ArchiveIndex(os.path.join(self.tmpdir.name, "archive.db"), self.directory)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def completed(self, week: str, number: str, enddate: str, hours: float = 1.5) -> str:
+        folder = os.path.join(self.directory, "2024", week)
+        path = os.path.join(folder, f"{number}VBS - Replace filter.xlsx")
+        wb = load_workbook(TEMPLATE)
+        ws = wb.active
+        ws['A7'], ws['B7'], ws['C7'], ws['D7'] = number, "VB", "S", "Replace filter"
+        ws['B3'] = "3/1/2024"
+        ws['A15'], ws['B15'] = 0, "Safety Message"
+        ws['A16'], ws['B16'], ws['G16'] = 10, "Swap the filter", "PROC-1"
+        ws['A33'], ws['C33'], ws['E33'], ws['H33'], ws['J33'] = 10, enddate, "J Lopez", 1, hours
+        ws['A86'], ws['I86'], ws['K86'] = "Filter swapped", "J Lopez", enddate
+        ws['A78'], ws['C78'], ws['C80'] = enddate, enddate, "0:30:00"
+        wb.save(path)
+        with open(os.path.join(folder, f"{number}VBS_description.txt"), "w") as outfile:
+            outfile.write("Swap the air filter")
+        return path
+
+    def test_refresh__parses_each_completed_sheet(self) -> None:
+        self.completed("Week of 03-04", "123456", "3/5/2024")
+        self.completed("Week of 12-30", "234567", "12/31/2024", hours=2)
+        self.assertEqual(self.index.refresh(workers=1), 2)
+
+        entries = self.index.entries()
+        self.assertEqual([e.full_number for e in entries], ["123456VBS", "234567VBS"])
+        first = entries[0]
+        self.assertEqual(first.title, "Replace filter")
+        self.assertEqual(first.due_date, date(2024, 3, 1))
+        self.assertEqual(first.enddate, date(2024, 3, 5))
+        self.assertEqual(first.repairtime, "0:30:00")
+        self.assertEqual(first.description, "Swap the air filter")
+        self.assertEqual(self.index.tasks(first.path)[1],
+                         ArchivedTask(10, "Swap the filter", "PROC-1", date(2024, 3, 5),
+                                      "J Lopez", 1, 1.5))
+        self.assertEqual(self.index.comments(first.path),
+                         [ArchivedComment("Filter swapped", "J Lopez", date(2024, 3, 5))])
+
+    def test_queries__filter_by_end_date(self) -> None:
+        self.completed("Week of 03-04", "123456", "3/5/2024")
+        self.completed("Week of 12-30", "234567", "12/31/2024", hours=2)
+        self.index.refresh(workers=1)
+        self.assertEqual([e.full_number for e in self.index.entries(start=date(2024, 6, 1))],
+                         ["234567VBS"])
+        self.assertEqual(len(self.index.find("123456VBS")), 1)
+        self.assertEqual(self.index.technician_hours(), {"J Lopez": 3.5})
+        self.assertEqual(self.index.technician_hours(end=date(2024, 6, 1)), {"J Lopez": 1.5})
+
+    def test_refresh__only_reparses_changed_files(self) -> None:
+        path = self.completed("Week of 03-04", "123456", "3/5/2024")
+        other = self.completed("Week of 12-30", "234567", "12/31/2024")
+        self.index.refresh(workers=1)
+        self.assertEqual(self.index.refresh(workers=1), 0)
+
+        time.sleep(0.01)
+        self.completed("Week of 03-04", "123456", "3/6/2024")
+        os.remove(other)
+        self.assertEqual(self.index.refresh(workers=1), 1)
+        self.assertEqual([(e.full_number, e.enddate) for e in self.index.entries()],
+                         [("123456VBS", date(2024, 3, 6))])
+
+    def test_refresh__remembers_files_that_are_not_twois(self) -> None:
+        with open(os.path.join(self.directory, "2024", "notes.xlsx"), "w") as outfile:
+            outfile.write("not a spreadsheet")
+        self.assertEqual(self.index.refresh(workers=1), 1)
+        self.assertEqual(self.index.refresh(workers=1), 0)
+        self.assertEqual(self.index.entries(), [])
+
+    def test_parse__pools_give_same_results(self) -> None:
+        paths = [self.completed("Week of 03-04", "123456", "3/5/2024"),
+                 self.completed("Week of 12-30", "234567", "12/31/2024")]
+        expected = parse_archived_files(paths, self.directory, workers=1)
+        self.assertEqual(parse_archived_files(paths, self.directory, workers=2), expected)
+        self.assertEqual(parse_archived_files(paths, self.directory, workers=2, processes=False),
+                         expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""This test file is meant to ensure that the bulk importer classifies a batch of spreadsheets the
+same way approved_file_status() does, and that it pairs each approved spreadsheet with the one
+pending workorder it was approved from.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import WorkOrderIndex
+from appfiles.utils.bulk_import import (MatchKey, classify_files, import_approved_workorders,
+                                        match_pending_workorders)
+from appfiles.utils.workorder import approved_file_status
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+DUE = date(2024, 3, 20)
+SUMMARIES = ("Safety Message", "PPS-AV")
+
+
+class BulkImportTests(unittest.TestCase):
+    """Defines the tests for classify_files(), match_pending_workorders() and
+    import_approved_workorders()."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "returned")
+        self.directory = os.path.join(self.tmpdir.name, "in_progress")
+        os.mkdir(self.source)
+        os.mkdir(self.directory)
+        self.index = WorkOrderIndex(os.path.join(self.tmpdir.name, "index.db"), self.directory)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def sheet(self, name: str, title: str = "Replace filter", due: object = "3/20/2024",
+              approved: bool = True) -> str:
+        path = os.path.join(self.source, name)
+        wb = load_workbook(TEMPLATE)
+        ws = wb.active
+        ws['B3'] = due
+        ws['D7'] = title
+        ws['A7'] = "123456" if approved else None
+        for coord, value in zip(('C3', 'C4', 'C5'), ("3/1/2024", "S", "FSH")):
+            ws[coord] = value if approved else None
+        for row, (num, summary, ref) in enumerate(((0, SUMMARIES[0], None),
+                                                   (10, SUMMARIES[1], "D743-25989-1")), 15):
+            ws[f'A{row}'], ws[f'B{row}'], ws[f'G{row}'] = num, summary, ref
+        wb.save(path)
+        return path
+
+    def pending(self, num: int, title: str = "Replace filter") -> None:
+        wo = WorkOrder(title=title, due_date=DUE,
+                       task_list=[TaskItem(0, SUMMARIES[0], "", 15),
+                                  TaskItem(10, SUMMARIES[1], "D743-25989-1", 16)])
+        wo.wo_number = f"Pending-00{num}"
+        with open(os.path.join(self.directory, f"Pending-00{num}.twois"), "wb") as outfile:
+            pickle.dump(wo, outfile)
+
+    def test_classify__agrees_with_approved_file_status(self) -> None:
+        files = [self.sheet("good.xlsx"), self.sheet("unapproved.xlsx", approved=False)]
+        files.append(os.path.join(self.source, "notes.txt"))
+        with open(files[-1], "w") as outfile:
+            outfile.write("not a spreadsheet")
+        for result in classify_files(files, workers=1):
+            self.assertEqual(result.status, approved_file_status(result.path), result.path)
+        self.assertEqual([r.key is None for r in classify_files(files, workers=1)],
+                         [False, True, True])
+
+    def test_classify__pools_give_same_results(self) -> None:
+        files = [self.sheet(f"{i}.xlsx", title=f"Filter {i}") for i in range(4)]
+        expected = classify_files(files, workers=1)
+        self.assertEqual(classify_files(files, workers=2), expected)
+        self.assertEqual(classify_files(files, workers=2, processes=False), expected)
+
+    def test_classify__reads_match_key(self) -> None:
+        result = classify_files([self.sheet("good.xlsx")], workers=1)[0]
+        self.assertEqual(result.key, MatchKey("Replace filter", DUE, SUMMARIES))
+
+    def test_classify__reads_due_date_stored_as_date(self) -> None:
+        result = classify_files([self.sheet("good.xlsx", due=DUE)], workers=1)[0]
+        self.assertEqual(result.key.due_date, DUE)
+
+    def test_match__pairs_each_workorder_once(self) -> None:
+        self.pending(1)
+        self.pending(2, title="Something else")
+        files = classify_files([self.sheet("a.xlsx"), self.sheet("b.xlsx")], workers=1)
+        matched, unmatched = match_pending_workorders(files, self.index)
+        self.assertEqual(list(matched), [files[0].path])
+        self.assertEqual(matched[files[0].path].wo_number, "Pending-001")
+        self.assertEqual(unmatched, [files[1].path])
+
+    def test_match__requires_task_summaries(self) -> None:
+        self.pending(1)
+        wb = load_workbook(path := self.sheet("a.xlsx"))
+        wb.active['B16'] = "Something different"
+        wb.save(path)
+        matched, unmatched = match_pending_workorders(classify_files([path], workers=1),
+                                                      self.index)
+        self.assertEqual(matched, {})
+        self.assertEqual(unmatched, [path])
+
+    def test_match__accepts_tasks_added_after_the_workorders(self) -> None:
+        self.pending(1)
+        wb = load_workbook(path := self.sheet("a.xlsx"))
+        wb.active['A17'], wb.active['B17'], wb.active['G17'] = 20, "Added by PC", "REF-1"
+        wb.save(path)
+        files = classify_files([path], workers=1)
+        self.assertNotEqual(files[0].key.fingerprint(), self.index.entries()[0].fingerprint)
+        matched, unmatched = match_pending_workorders(files, self.index)
+        self.assertEqual(matched[path].wo_number, "Pending-001")
+        self.assertEqual(unmatched, [])
+
+    def test_import__records_files_that_fail_to_approve(self) -> None:
+        self.pending(1)
+        self.pending(2, title="Something else")
+        self.sheet("a.xlsx")
+        self.sheet("b.xlsx", title="Something else")
+        with mock.patch.object(WorkOrder, 'approve',
+                               side_effect=[OSError("file is locked"), None]) as approve:
+            report = import_approved_workorders(self.source, workers=1, index=self.index)
+        self.assertEqual(approve.call_count, 2)
+        self.assertEqual(report.failed, [("a.xlsx", "file is locked")])
+        self.assertEqual(report.approved, [("b.xlsx", "Pending-002")])
+        self.assertEqual((report.unmatched, report.invalid), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
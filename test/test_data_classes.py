@@ -0,0 +1,83 @@
+"""This test file is meant to ensure that the slotted library data classes behave like the
+classes they replaced: they compare by value, old pickles of them still load, and the shared
+standard tasks can never be changed through one workorder.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.taskitem import REQUIRED_TASK, SAFETY_TASK, TaskItem, shared_task
+from appfiles.library.workorder import WorkOrder
+
+
+class TaskItemTests(unittest.TestCase):
+    """Defines the tests for the TaskItem and FrozenTaskItem classes."""
+    def test_no_instance_dict(self) -> None:
+        self.assertFalse(hasattr(TaskItem(10, "Task", "REF", 16), '__dict__'))
+        self.assertFalse(hasattr(LogComment("Text", "J Lopez", date.today(), 0), '__dict__'))
+
+    def test_equality__compares_fields(self) -> None:
+        self.assertEqual(TaskItem(10, "Task", "REF", 16), TaskItem(10, "Task", "REF", 16))
+        self.assertNotEqual(TaskItem(10, "Task", "REF", 16), TaskItem(20, "Task", "REF", 17))
+        self.assertEqual(SAFETY_TASK, TaskItem(0, "Safety Message", "", 15))
+
+    def test_frozen__cannot_be_changed(self) -> None:
+        with self.assertRaises(AttributeError):
+            SAFETY_TASK.summary = "Changed"
+        with self.assertRaises(AttributeError):
+            SAFETY_TASK.complete(TaskCompletionData(date.today(), "J Lopez", 1, 1.0))
+        copy = SAFETY_TASK.copy()
+        copy.summary = "Changed"
+        self.assertEqual(SAFETY_TASK.summary, "Safety Message")
+
+    def test_shared_task__returns_flyweight(self) -> None:
+        self.assertIs(shared_task(TaskItem(10, "TASK DESCRIPTION REQUIRED",
+                                           "REFERENCE REQUIRED", 16)), REQUIRED_TASK)
+        task = TaskItem(10, "Task", "REF", 16)
+        self.assertIs(shared_task(task), task)
+
+    def test_pickle__frozen_unpickles_as_flyweight(self) -> None:
+        self.assertIs(pickle.loads(pickle.dumps(SAFETY_TASK)), SAFETY_TASK)
+        task = TaskItem(10, "Task", "REF", 16)
+        self.assertEqual(pickle.loads(pickle.dumps(task)), task)
+
+    def test_pickle__dict_state_from_before_slots_loads(self) -> None:
+        task = TaskItem.__new__(TaskItem)
+        task.__setstate__({'number': 10, 'summary': "Task", 'reference': "REF",
+                           'planned_row': 16, 'actuals_row': 33,
+                           'completion_date': date(1989, 5, 30), 'technician': "",
+                           'qty_techs': -1, 'hours': -1.0})
+        self.assertEqual(task, TaskItem(10, "Task", "REF", 16))
+        comment = LogComment.__new__(LogComment)
+        comment.__setstate__({'text': "Text", 'person': "J Lopez", 'date': date(2024, 1, 1),
+                              '_LogComment__row': 90})
+        self.assertEqual(comment.get_row(), 90)
+
+
+class WorkOrderSharedTaskTests(unittest.TestCase):
+    """Defines the tests for the shared standard tasks on a WorkOrder."""
+    def test_complete_task__copies_shared_task(self) -> None:
+        wo = WorkOrder(wo_number="123456")
+        self.assertIs(wo.task_list[0], SAFETY_TASK)
+        self.assertTrue(wo.complete_task(0, TaskCompletionData(date.today(), "J Lopez", 1, 1.0)))
+        self.assertTrue(wo.task_list[0].is_complete())
+        self.assertFalse(SAFETY_TASK.is_complete())
+        self.assertIs(WorkOrder(wo_number="654321").task_list[0], SAFETY_TASK)
+
+    def test_log_comment__person_is_interned(self) -> None:
+        a = LogComment("One", "".join(["J ", "Lopez"]), date.today(), 0)
+        b = LogComment("Two", "".join(["J ", "Lopez"]), date.today(), 1)
+        self.assertIs(a.person, b.person)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""This test file is meant to ensure that a FileTransaction applies all of its changes or none of
+them, that recover() finishes a transaction that was interrupted after its journal was written,
+and that WorkOrder.batch() folds several saves into one.
+"""
+
+#pylint: skip-file
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.workorder import WorkOrder
+from appfiles.utils.file_transaction import (FileTransaction, JOURNAL_SUFFIX, TEMP_SUFFIX,
+                                             recover, write_atomic)
+
+
+class FileTransactionTests(unittest.TestCase):
+    """Defines the tests for FileTransaction, write_atomic() and recover()."""
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        self.journal: str = os.path.join(self.root, "journal")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def write(self, name: str, text: str) -> str:
+        with open(self.path(name), "w") as outfile:
+            outfile.write(text)
+        return self.path(name)
+
+    def read(self, name: str) -> str:
+        with open(self.path(name)) as infile:
+            return infile.read()
+
+    def leftovers(self) -> list[str]:
+        found = [n for n in os.listdir(self.root) if n.endswith(TEMP_SUFFIX)]
+        if os.path.isdir(self.journal):
+            found.extend(os.listdir(self.journal))
+        return found
+
+    def test_commit__replaces_and_removes(self) -> None:
+        self.write("a.twois", "old")
+        self.write("b.twois", "gone")
+        with FileTransaction(self.journal) as tx:
+            tx.write_text(self.path("a.twois"), "new")
+            tx.write_text(self.path("c.twois"), "created")
+            tx.remove(self.path("b.twois"))
+            self.assertEqual(self.read("a.twois"), "old")
+        self.assertEqual(self.read("a.twois"), "new")
+        self.assertEqual(self.read("c.twois"), "created")
+        self.assertFalse(os.path.exists(self.path("b.twois")))
+        self.assertEqual(self.leftovers(), [])
+
+    def test_commit__write_wins_over_remove_of_same_path(self) -> None:
+        self.write("a.twois", "old")
+        with FileTransaction(self.journal) as tx:
+            tx.remove(self.path("a.twois"))
+            tx.write_text(self.path("a.twois"), "new")
+        self.assertEqual(self.read("a.twois"), "new")
+
+    def test_rollback__leaves_files_untouched(self) -> None:
+        self.write("a.twois", "old")
+        with self.assertRaises(RuntimeError):
+            with FileTransaction(self.journal) as tx:
+                tx.write_text(self.path("a.twois"), "new")
+                tx.remove(self.path("a.twois"))
+                raise RuntimeError
+        self.assertEqual(self.read("a.twois"), "old")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_recover__finishes_failed_commit(self) -> None:
+        self.write("b.twois", "gone")
+        os.mkdir(self.path("a.twois"))
+        os.mkdir(self.path("a.twois/blocker"))
+        with self.assertRaises(OSError):
+            with FileTransaction(self.journal) as tx:
+                tx.write_text(self.path("a.twois"), "new")
+                tx.remove(self.path("b.twois"))
+        self.assertEqual(len(os.listdir(self.journal)), 1)
+
+        with self.assertRaises(OSError):
+            recover([self.root], self.journal)
+        self.assertEqual(len(self.leftovers()), 2)
+
+        os.rmdir(self.path("a.twois/blocker"))
+        os.rmdir(self.path("a.twois"))
+        self.assertEqual(recover([self.root], self.journal), 1)
+        self.assertEqual(self.read("a.twois"), "new")
+        self.assertFalse(os.path.exists(self.path("b.twois")))
+        self.assertEqual(self.leftovers(), [])
+
+    def test_recover__sweeps_orphaned_temp_files(self) -> None:
+        self.write("a.twois", "old")
+        self.write(f"a.twois.1234{TEMP_SUFFIX}", "half")
+        os.makedirs(self.path("2024/Week of 03-04"))
+        self.write(f"2024/Week of 03-04/a.xlsx.1234{TEMP_SUFFIX}", "half")
+        os.mkdir(self.journal)
+        self.write(f"journal/broken{JOURNAL_SUFFIX}", "[[\"repl")
+        self.assertEqual(recover([self.root], self.journal), 0)
+        self.assertEqual(self.read("a.twois"), "old")
+        self.assertEqual(self.leftovers(), [])
+        self.assertEqual(os.listdir(self.path("2024/Week of 03-04")), [])
+
+    def test_write_atomic__replaces_contents(self) -> None:
+        self.write("a.twois", "old")
+        write_atomic(self.path("a.twois"), b"new")
+        self.assertEqual(self.read("a.twois"), "new")
+        self.assertEqual(self.leftovers(), [])
+
+
+class WorkOrderBatchTests(unittest.TestCase):
+    """Defines the tests for WorkOrder.batch()."""
+    def setUp(self) -> None:
+        patcher = mock.patch("appfiles.library.workorder.FileTransaction")
+        self.transaction = patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ("_WorkOrder__stage_files", "_WorkOrder__after_write"):
+            patcher = mock.patch.object(WorkOrder, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_batch__saves_once(self) -> None:
+        wo = WorkOrder()
+        with wo.batch():
+            wo.save()
+            with wo.batch():
+                wo.save()
+            self.transaction.assert_not_called()
+        self.assertEqual(self.transaction.call_count, 1)
+
+    def test_batch__discards_save_on_error(self) -> None:
+        wo = WorkOrder()
+        with self.assertRaises(RuntimeError):
+            with wo.batch():
+                wo.save()
+                raise RuntimeError
+        self.transaction.assert_not_called()
+        wo.save()
+        self.assertEqual(self.transaction.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
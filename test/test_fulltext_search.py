@@ -0,0 +1,110 @@
+"""This test file is meant to ensure that the text typed into the search box becomes the right
+FTS5 query, and that both the open and the completed workorders are found and ranked by it.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.archive_index import ArchiveIndex
+from appfiles.library.logcomment import LogComment
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import WorkOrderIndex
+from appfiles.library.workorder_search import search_workorders
+from appfiles.utils.fulltext import to_fts_query
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+
+
+class ToFtsQueryTests(unittest.TestCase):
+    """Defines the tests for to_fts_query()."""
+    def test_words__are_alternatives_with_prefixes(self) -> None:
+        self.assertEqual(to_fts_query("Pump seal ab"), '("pump"* OR "seal"* OR "ab")')
+
+    def test_phrases__must_all_appear(self) -> None:
+        self.assertEqual(to_fts_query('"air filter" pump'), '"air filter" AND ("pump"*)')
+
+    def test_punctuation__is_not_searched(self) -> None:
+        self.assertIsNone(to_fts_query('  "" -*( '))
+        self.assertEqual(to_fts_query('AND "OR'), '"OR" AND ("and"*)')
+
+
+class SearchTests(unittest.TestCase):
+    """Defines the tests for searching the workorder and archive indexes."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.in_progress = os.path.join(self.tmpdir.name, "in_progress")
+        self.complete = os.path.join(self.tmpdir.name, "complete")
+        os.mkdir(self.in_progress)
+        os.makedirs(os.path.join(self.complete, "2024", "Week of 03-04"))
+        self.index = WorkOrderIndex(os.path.join(self.tmpdir.name, "index.db"), self.in_progress)
+        self.archive = ArchiveIndex(os.path.join(self.tmpdir.name, "archive.db"), self.complete)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.archive.close()
+        self.tmpdir.cleanup()
+
+    def record(self, number: str, title: str, comment: str | None = None) -> None:
+        wo = WorkOrder(wo_number=number, title=title, due_date=date(2024, 5, 1))
+        if comment is not None:
+            wo.log_comment([LogComment(comment, "J Lopez", date(2024, 4, 1), 0)])
+        name = f"{number}VBS.twois"
+        with open(os.path.join(self.in_progress, name), "wb") as outfile:
+            pickle.dump(wo, outfile)
+        self.index.record(wo, name, f"{number}VBS - {title}.xlsx")
+
+    def completed(self, number: str, title: str) -> None:
+        folder = os.path.join(self.complete, "2024", "Week of 03-04")
+        wb = load_workbook(TEMPLATE)
+        ws = wb.active
+        ws['A7'], ws['B7'], ws['C7'], ws['D7'] = number, "VB", "S", title
+        ws['A86'], ws['I86'], ws['K86'] = "Checked the pump", "J Lopez", "3/5/2024"
+        ws['A78'], ws['C78'] = "3/5/2024", "3/5/2024"
+        wb.save(os.path.join(folder, f"{number}VBS - {title}.xlsx"))
+
+    def test_index__ranks_title_above_comment(self) -> None:
+        self.record("111111", "Inspect boiler", "Pump noise reported")
+        self.record("222222", "Rebuild pump")
+        self.record("333333", "Paint railing")
+        hits = self.index.search(to_fts_query("pump"))
+        self.assertEqual([e.full_number for e, _ in hits], ["222222VBS", "111111VBS"])
+        self.assertLess(hits[0][1], hits[1][1])
+
+    def test_index__forgets_removed_workorders(self) -> None:
+        self.record("111111", "Rebuild pump")
+        os.remove(os.path.join(self.in_progress, "111111VBS.twois"))
+        self.index.remove("111111VBS.twois")
+        self.assertEqual(self.index.search(to_fts_query("pump")), [])
+
+    def test_archive__finds_completed_text(self) -> None:
+        self.completed("444444", "Replace filter")
+        self.archive.refresh(workers=1)
+        self.assertEqual([e.full_number for e, _ in self.archive.search(to_fts_query("filt"))],
+                         ["444444VBS"])
+        self.assertEqual(self.archive.search(to_fts_query('"filter replace"')), [])
+
+    def test_search_workorders__keeps_both_indexes_apart(self) -> None:
+        self.record("111111", "Rebuild pump")
+        self.record("222222", "Inspect boiler", "Pump noise reported")
+        self.completed("444444", "Replace filter")
+        self.archive.refresh(workers=1)
+        results = search_workorders("pump", index=self.index, archive=self.archive)
+        self.assertEqual([h.full_number for h in results.open], ["111111VBS", "222222VBS"])
+        self.assertEqual([h.full_number for h in results.completed], ["444444VBS"])
+        self.assertEqual(results.open[0].key, "111111VBS.twois")
+        self.assertEqual(search_workorders("   ", index=self.index, archive=self.archive),
+                         ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""This test file is meant to ensure that recurring tasks work out their occurrences directly,
+and that the scheduler creates one pending workorder per occurrence within the lead time while
+folding missed occurrences into one.
+"""
+
+#pylint: skip-file
+
+from datetime import date, timedelta
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.recurring_scheduler import RecurringScheduler
+from appfiles.library.recurring_store import RecurringStore
+from appfiles.library.recurringtask import RecurringTask
+from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder import WorkOrder
+
+TODAY = date(2024, 5, 15)
+
+
+def recurring_task(title: str, due: date, cycle: int) -> RecurringTask:
+    with mock.patch.object(WorkOrder, 'save_as_wo_template', return_value=f"{title}.twois"):
+        return RecurringTask(WorkOrder(title=title), due, title, "OSB GMM", cycle)
+
+
+class RecurringTaskTests(unittest.TestCase):
+    """Defines the tests for the occurrences of a RecurringTask."""
+    def test_occurrences__are_computed_directly(self) -> None:
+        task = recurring_task("AV Update", date(2024, 1, 1), 14)
+        self.assertEqual(task.next_occurrence(date(2023, 12, 1)), date(2024, 1, 1))
+        self.assertEqual(task.next_occurrence(date(2024, 1, 15)), date(2024, 1, 15))
+        self.assertEqual(task.next_occurrence(date(2024, 1, 16)), date(2024, 1, 29))
+        self.assertEqual(task.last_occurrence(date(2024, 1, 28)), date(2024, 1, 15))
+        self.assertIsNone(task.last_occurrence(date(2023, 12, 31)))
+
+    def test_update_due_date__skips_every_missed_cycle(self) -> None:
+        task = recurring_task("AV Update", date(2020, 1, 1), 7)
+        task.update_due_date(TODAY)
+        self.assertGreater(task.due_date, TODAY)
+        self.assertLessEqual(task.due_date, TODAY + timedelta(days=7))
+        self.assertEqual((task.due_date - date(2020, 1, 1)).days % 7, 0)
+
+    def test_cycle__must_be_positive(self) -> None:
+        with self.assertRaises(ValueError):
+            recurring_task("Broken", TODAY, 0)
+
+
+class FromTemplateTests(unittest.TestCase):
+    """Defines the tests for WorkOrder.from_template()."""
+    def test_from_template__is_a_fresh_pending_workorder(self) -> None:
+        template = WorkOrder(wo_number="123456", title="AV Update", priority=2,
+                             task_list=[TaskItem(10, "Update the signatures", "PROC-1", 16)])
+        template.complete_task(0, TaskCompletionData(TODAY, "J Lopez", 1, 0.5))
+        template.comments.append(LogComment("Done", "J Lopez", TODAY, 0))
+        wo = WorkOrder.from_template(template, TODAY)
+        self.assertEqual((wo.title, wo.priority, wo.due_date), ("AV Update", 2, TODAY))
+        self.assertEqual(wo.comments, [])
+        self.assertFalse(wo.task_list[0].is_complete())
+        self.assertTrue(template.task_list[0].is_complete())
+        self.assertFalse(wo.is_approved(False))
+        self.assertTrue(wo.has_unsaved_changes())
+
+
+class RecurringSchedulerTests(unittest.TestCase):
+    """Defines the tests for the RecurringScheduler class."""
+    def setUp(self) -> None:
+        self.loads = []
+        self.scheduler = RecurringScheduler(lead_days=7, load_template=self.load)
+
+    def load(self, task: RecurringTask) -> WorkOrder:
+        self.loads.append(task.title)
+        return WorkOrder(title=task.title)
+
+    def test_run__creates_occurrences_within_lead_time(self) -> None:
+        weekly = recurring_task("Weekly", TODAY + timedelta(days=2), 7)
+        later = recurring_task("Later", TODAY + timedelta(days=30), 7)
+        every_third = recurring_task("Every third", TODAY, 3)
+        for task in (weekly, later, every_third):
+            self.scheduler.add(task)
+
+        result = self.scheduler.run(TODAY, save=False)
+        self.assertEqual(sorted((s.task.title, s.due_date) for s in result.created),
+                         [("Every third", TODAY), ("Every third", TODAY + timedelta(days=3)),
+                          ("Every third", TODAY + timedelta(days=6)),
+                          ("Weekly", TODAY + timedelta(days=2))])
+        self.assertEqual(sorted(self.loads), ["Every third", "Weekly"])
+        self.assertEqual(weekly.due_date, TODAY + timedelta(days=9))
+        self.assertEqual(self.scheduler.peek(), every_third)
+        self.assertEqual(self.scheduler.run(TODAY, save=False).created, [])
+
+    def test_run__history_is_saved_with_the_task(self) -> None:
+        task = recurring_task("Weekly", TODAY, 7)
+        self.scheduler.add(task)
+        result = self.scheduler.run(TODAY, save=False)
+        numbers = [s.workorder.wo_number for s in result.created]
+        self.assertEqual(len(numbers), 2)
+        self.assertEqual(task.history, numbers)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = RecurringStore(os.path.join(tmpdir, "recurring.db"))
+            store.save_all([task])
+            self.assertEqual(store.history(task.task_id), numbers)
+            store.close()
+
+    def test_run__folds_missed_occurrences(self) -> None:
+        task = recurring_task("Daily", TODAY - timedelta(days=60), 1)
+        self.scheduler.add(task)
+        result = self.scheduler.run(TODAY, save=False)
+        self.assertEqual(result.skipped, 59)
+        self.assertEqual([s.due_date for s in result.created],
+                         [TODAY + timedelta(days=d) for d in range(-1, 8)])
+        self.assertEqual(self.loads, ["Daily"])
+
+    def test_run__retries_tasks_whose_template_is_missing(self) -> None:
+        scheduler = RecurringScheduler(lead_days=7, load_template=mock.Mock(
+            side_effect=FileNotFoundError))
+        task = recurring_task("Missing", TODAY, 7)
+        scheduler.add(task)
+        result = scheduler.run(TODAY, save=False)
+        self.assertEqual((result.created, result.failed), ([], [task]))
+        self.assertEqual(scheduler.peek(), task)
+
+    def test_add_and_remove__reschedule_tasks(self) -> None:
+        first = recurring_task("First", TODAY + timedelta(days=20), 7)
+        second = recurring_task("Second", TODAY + timedelta(days=10), 7)
+        self.scheduler.add(first)
+        self.scheduler.add(second)
+        first.due_date = TODAY + timedelta(days=1)
+        self.scheduler.add(first)
+        self.assertEqual(self.scheduler.peek(), first)
+        self.scheduler.remove(first)
+        self.assertEqual(self.scheduler.peek(), second)
+        self.assertEqual(self.scheduler.tasks(), [second])
+        self.assertEqual(len(self.scheduler), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""This test file is meant to ensure that recurring tasks and their history survive a round trip
+through the recurring store, and that template files are numbered without probing for each one.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.recurring_store import SCHEMA_VERSION, RecurringStore
+from appfiles.library.recurringtask import RecurringTask
+from appfiles.library.workorder import WorkOrder
+from appfiles.utils.workorder import allocate_template_filepath
+
+
+def recurring_task(title: str, system: str, due: date, cycle: int = 14) -> RecurringTask:
+    with mock.patch.object(WorkOrder, 'save_as_wo_template',
+                           return_value=f"missing\\{system} - {cycle}-1.twois"):
+        return RecurringTask(WorkOrder(title=title), due, title, system, cycle)
+
+
+class RecurringStoreTests(unittest.TestCase):
+    """Defines the tests for the RecurringStore class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = RecurringStore(os.path.join(self.tmpdir.name, "recurring.db"))
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_save__round_trips_tasks_and_history(self) -> None:
+        task = recurring_task("AV Update", "OSB GMM", date(2024, 5, 1))
+        task.history = ["123456VBS", "234567VBS"]
+        task_id = self.store.save(task)
+        self.assertEqual(task.task_id, task_id)
+        self.store.close()
+
+        loaded = self.store.load_all()
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual((loaded[0].task_id, loaded[0].title, loaded[0].system, loaded[0].recur,
+                          loaded[0].due_date, loaded[0].template_file, loaded[0].history),
+                         (task_id, "AV Update", "OSB GMM", 14, date(2024, 5, 1),
+                          task.template_file, ["123456VBS", "234567VBS"]))
+
+    def test_save__updates_and_appends_history(self) -> None:
+        task = recurring_task("AV Update", "OSB GMM", date(2024, 5, 1))
+        self.store.save(task)
+        task.iterate(WorkOrder(wo_number="123456"))
+        task.iterate(WorkOrder(wo_number="234567"))
+        self.store.save_all([task])
+        self.assertEqual(self.store.history(task.task_id), ["123456", "234567"])
+        self.assertEqual(self.store.load_all()[0].due_date, task.due_date)
+
+    def test_find__by_system_and_title(self) -> None:
+        for title, system in (("AV Update", "OSB GMM"), ("CVA Scan", "OSB GMM"),
+                              ("AV Update", "CSM")):
+            self.store.save(recurring_task(title, system, date(2024, 5, 1)))
+        self.assertEqual([t.title for t in self.store.find_by_system("OSB GMM")],
+                         ["AV Update", "CVA Scan"])
+        self.assertEqual([t.system for t in self.store.find_by_title("AV Update")],
+                         ["CSM", "OSB GMM"])
+        self.assertEqual(self.store.find_by_system("BSAT"), [])
+
+    def test_remove__drops_history(self) -> None:
+        task = recurring_task("AV Update", "OSB GMM", date(2024, 5, 1))
+        task.history = ["123456VBS"]
+        task_id = self.store.save(task)
+        self.store.remove(task)
+        self.assertIsNone(task.task_id)
+        self.assertEqual(self.store.load_all(), [])
+        self.assertEqual(self.store.history(task_id), [])
+
+    def test_open__refuses_a_newer_schema(self) -> None:
+        self.store.save(recurring_task("AV Update", "OSB GMM", date(2024, 5, 1)))
+        self.store.close()
+        self.assertEqual(len(self.store.load_all()), 1)
+        self.store.close()
+
+        conn = sqlite3.connect(self.store.db_path)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        conn.close()
+        with self.assertRaises(sqlite3.DatabaseError):
+            self.store.load_all()
+        conn = sqlite3.connect(self.store.db_path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION + 1)
+        conn.close()
+
+
+class TemplateFilepathTests(unittest.TestCase):
+    """Defines the tests for allocate_template_filepath()."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "templates")
+        os.mkdir(self.directory)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_allocate__fills_gaps_then_counts_up(self) -> None:
+        for name in ("OSB GMM - 14-1.twois", "OSB GMM - 14-3.twois", "CSM - 7-2.twois"):
+            open(os.path.join(self.directory, name), "wb").close()
+        self.assertEqual(allocate_template_filepath("OSB GMM - 14", self.directory),
+                         f"{self.directory}\\OSB GMM - 14-2.twois")
+        self.assertEqual(allocate_template_filepath("OSB GMM - 14", self.directory),
+                         f"{self.directory}\\OSB GMM - 14-4.twois")
+        self.assertEqual(allocate_template_filepath("CSM - 7", self.directory),
+                         f"{self.directory}\\CSM - 7-1.twois")
+
+    def test_allocate__skips_numbers_taken_since(self) -> None:
+        self.assertEqual(allocate_template_filepath("BSAT - 30", self.directory),
+                         f"{self.directory}\\BSAT - 30-1.twois")
+        open(f"{self.directory}\\BSAT - 30-2.twois", "wb").close()
+        with mock.patch("appfiles.utils.workorder.os.scandir") as scandir:
+            self.assertEqual(allocate_template_filepath("BSAT - 30", self.directory),
+                             f"{self.directory}\\BSAT - 30-3.twois")
+            scandir.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
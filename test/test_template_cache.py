@@ -0,0 +1,55 @@
+"""This test file is meant to ensure that the template cache hands out independent copies of a
+parsed template and parses the file again once it changes on disk.
+"""
+
+#pylint: skip-file
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils.template_cache import TemplateCache
+
+TESTFILE: str = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+
+
+class TemplateCacheTests(unittest.TestCase):
+    """Defines the tests for the TemplateCache class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmpdir.name, "template.xlsx")
+        shutil.copyfile(TESTFILE, self.template)
+        self.cache = TemplateCache()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_load__clones_are_independent(self) -> None:
+        first = self.cache.load(self.template)
+        first.active['A1'] = "changed"
+        second = self.cache.load(self.template)
+        self.assertNotEqual(second.active['A1'].value, "changed")
+        self.assertIsNot(first, second)
+
+    def test_load__clone_can_be_saved(self) -> None:
+        wb = self.cache.load(self.template)
+        wb.active['A1'] = "saved"
+        out = os.path.join(self.tmpdir.name, "out.xlsx")
+        wb.save(out)
+        self.assertEqual(self.cache.load(out).active['A1'].value, "saved")
+
+    def test_load__reparses_changed_file(self) -> None:
+        wb = self.cache.load(self.template)
+        wb.active['A1'] = "new template"
+        wb.save(self.template)
+        stat = os.stat(self.template)
+        os.utime(self.template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(self.cache.load(self.template).active['A1'].value, "new template")
+
+
+if __name__ == '__main__':
+    unittest.main()
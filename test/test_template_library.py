@@ -0,0 +1,104 @@
+"""This test file is meant to ensure that the template library lists the templates in its
+directory, keeps the most recently used ones loaded, and makes workorders from them that share
+their tasks until one is changed.
+"""
+
+#pylint: skip-file
+
+from datetime import date, timedelta
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData
+from appfiles.library.site import Site
+from appfiles.library.taskitem import FrozenTaskItem, TaskItem
+from appfiles.library.template_library import TemplateLibrary
+from appfiles.library.workorder import WorkOrder
+
+TODAY = date(2024, 5, 15)
+
+
+class TemplateLibraryTests(unittest.TestCase):
+    """Defines the tests for the TemplateLibrary class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.library = TemplateLibrary(self.tmpdir.name, capacity=2)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def write(self, name: str, title: str, **kwargs) -> str:
+        wo = WorkOrder(title=title, task_list=[TaskItem(10, "Update the signatures", "PROC-1", 16),
+                                               TaskItem(20, "Reboot", "PROC-2", 17)], **kwargs)
+        path = os.path.join(self.tmpdir.name, f"{name}.twois")
+        with open(path, "wb") as outfile:
+            outfile.write(wo.to_twois_bytes())
+        return path
+
+    def test_refresh__lists_template_headers(self) -> None:
+        self.write("OSB GMM - 14-1", "AV Update", site=Site.FG, priority=2)
+        self.write("CSM - 7-1", "CVA Scan")
+        with open(os.path.join(self.tmpdir.name, "broken.twois"), "wb") as outfile:
+            outfile.write(b"not a template")
+        self.assertTrue(self.library.refresh())
+        self.assertEqual([(t.title, t.name) for t in self.library.templates()],
+                         [("AV Update", "OSB GMM - 14-1"), ("CVA Scan", "CSM - 7-1")])
+        self.assertEqual((self.library.templates()[0].site, self.library.templates()[0].priority),
+                         (Site.FG, 2))
+        self.assertFalse(self.library.refresh())
+
+        os.remove(os.path.join(self.tmpdir.name, "CSM - 7-1.twois"))
+        self.assertTrue(self.library.refresh())
+        self.assertEqual([t.title for t in self.library.templates()], ["AV Update"])
+
+    def test_create_many__reads_the_template_once(self) -> None:
+        path = self.write("OSB GMM - 14-1", "AV Update")
+        due_dates = [TODAY + timedelta(days=14 * i) for i in range(12)]
+        with mock.patch.object(WorkOrder, 'from_twois', wraps=WorkOrder.from_twois) as load:
+            workorders = self.library.create_many(path, due_dates)
+            workorders.append(self.library.create(path, TODAY))
+            load.assert_called_once()
+        self.assertEqual([wo.due_date for wo in workorders[:12]], due_dates)
+        self.assertTrue(all(wo.title == "AV Update" for wo in workorders))
+
+    def test_create__shares_tasks_until_one_is_completed(self) -> None:
+        path = self.write("OSB GMM - 14-1", "AV Update")
+        first, second = self.library.create_many(path, [TODAY, TODAY])
+        self.assertIs(first.task_list[0], second.task_list[0])
+        self.assertIsInstance(first.task_list[0], FrozenTaskItem)
+
+        first.complete_task(0, TaskCompletionData(TODAY, "J Lopez", 1, 0.5))
+        self.assertTrue(first.task_list[0].is_complete())
+        self.assertFalse(second.task_list[0].is_complete())
+        self.assertFalse(self.library.prototype(path).task_list[0].is_complete())
+        first.comments.append("note")
+        self.assertEqual(second.comments, [])
+
+    def test_prototype__reloads_changed_files_and_evicts_oldest(self) -> None:
+        paths = [self.write(f"T-{i}", f"Template {i}") for i in range(3)]
+        first = self.library.prototype(paths[0])
+        self.assertIs(self.library.prototype(paths[0]), first)
+
+        time.sleep(0.01)
+        self.write("T-0", "Template 0 changed")
+        self.assertEqual(self.library.prototype(paths[0]).title, "Template 0 changed")
+
+        with mock.patch.object(WorkOrder, 'from_twois', wraps=WorkOrder.from_twois) as load:
+            self.library.prototype(paths[1])
+            self.library.prototype(paths[0])
+            self.library.prototype(paths[2])
+            self.assertEqual(load.call_count, 2)
+            self.library.prototype(paths[0])
+            self.assertEqual(load.call_count, 2)
+            self.library.prototype(paths[1])
+            self.assertEqual(load.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""This test file is meant to ensure that the binary .twois format round-trips every field of a
+WorkOrder, that legacy pickled .twois files still load, and that corrupt files are rejected.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData, WorkorderCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_type import WorkOrderType
+from appfiles.utils import twois_codec
+from appfiles.utils.twois_codec import TwoisFormatError
+
+
+def make_workorder() -> WorkOrder:
+    tasks = [TaskItem(0, "Safety Message", "", 15),
+             TaskItem(10, "Patch the servers", "PROC-0042", 16)]
+    tasks[1].complete(TaskCompletionData(date(2024, 3, 2), "J Lopez", 2, 1.5))
+    comments = [LogComment("Started the patching", "J Lopez", date(2024, 3, 1), 0),
+                LogComment("Finished — no issues", "J Lopez", date(2024, 3, 2), 1)]
+    wo = WorkOrder(wo_number="123456", title="Monthly patching", due_date=date(2024, 3, 1),
+                   site=Site.CS, special=Special.I, type=WorkOrderType.CM, priority=1,
+                   building=1234, room=12, related_wo="654321", ncr_required=True,
+                   ncr_number="NCR-1234", qamip=True, ehs_required=True, task_list=tasks,
+                   comments=comments, description="Patchingmonthly")
+    wo.completion_data = WorkorderCompletionData(date(2024, 3, 1), date(2024, 3, 2),
+                                                 date(2024, 3, 3), "1:02:30")
+    return wo
+
+
+def assert_same_workorder(test: unittest.TestCase, a: WorkOrder, b: WorkOrder) -> None:
+    for name in ('description', 'due_date', 'wo_number', 'site', 'special', 'title', 'type',
+                 'priority', 'creator', 'building', 'room', 'related_wo', 'ncr_number',
+                 *twois_codec.FLAG_FIELDS):
+        test.assertEqual(getattr(a, name), getattr(b, name), name)
+    test.assertEqual(a.task_list, b.task_list)
+    test.assertEqual(a.comments, b.comments)
+    test.assertEqual(a.get_excel_filepath(), b.get_excel_filepath())
+
+
+class TwoisCodecTests(unittest.TestCase):
+    """Defines the tests for the twois_codec module."""
+    def test_round_trip__keeps_every_field(self) -> None:
+        wo = make_workorder()
+        loaded = WorkOrder.from_twois_bytes(wo.to_twois_bytes())
+        assert_same_workorder(self, wo, loaded)
+        self.assertEqual(str(wo.completion_data), str(loaded.completion_data))
+        self.assertEqual(wo.completion_data.restoredate, loaded.completion_data.restoredate)
+
+    def test_round_trip__unreserved_number_stays_unreserved(self) -> None:
+        state = twois_codec.loads(twois_codec.dumps(
+            {**twois_codec.loads(make_workorder().to_twois_bytes()), 'wo_number': None}))
+        self.assertIsNone(state['wo_number'])
+
+    def test_binary__smaller_than_pickle(self) -> None:
+        wo = make_workorder()
+        self.assertLess(len(wo.to_twois_bytes()), len(pickle.dumps(wo)) // 2)
+
+    def test_legacy_pickle__still_loads(self) -> None:
+        wo = make_workorder()
+        data = pickle.dumps(wo)
+        self.assertTrue(twois_codec.is_legacy(data))
+        assert_same_workorder(self, wo, WorkOrder.from_twois_bytes(data))
+
+    def test_corrupt_data__raises(self) -> None:
+        data = make_workorder().to_twois_bytes()
+        for bad in (data[:len(data) // 2], data[:6], b"not a twois file"):
+            with self.assertRaises(TwoisFormatError):
+                WorkOrder.from_twois_bytes(bad)
+
+    def test_newer_version__raises(self) -> None:
+        data = bytearray(make_workorder().to_twois_bytes())
+        data[len(twois_codec.MAGIC)] = twois_codec.FORMAT_VERSION + 1
+        with self.assertRaises(TwoisFormatError):
+            twois_codec.loads(bytes(data))
+
+
+class LazyLoadingTests(unittest.TestCase):
+    """Defines the tests for loading only the header of a .twois file."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "123456CSI.twois")
+        self.wo = make_workorder()
+        with open(self.path, "wb") as outfile:
+            outfile.write(self.wo.to_twois_bytes())
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_load_header__reads_only_the_header(self) -> None:
+        with open(self.path, "rb") as infile:
+            data = infile.read()
+        header_size = int.from_bytes(data[6:10], "little")
+        with open(self.path, "wb") as outfile:
+            outfile.write(data[:14 + header_size])
+        state = twois_codec.load_header(self.path)
+        self.assertEqual(state['title'], "Monthly patching")
+        self.assertFalse(twois_codec.BODY_FIELDS & state.keys())
+
+    def test_from_twois_header__hydrates_on_first_use(self) -> None:
+        lazy = WorkOrder.from_twois_header(self.path)
+        self.assertNotIn('task_list', vars(lazy))
+        self.assertEqual(lazy.get_full_workorder_number(), "123456CSI")
+        self.assertEqual(lazy.task_list[1].summary, "Patch the servers")
+        assert_same_workorder(self, self.wo, lazy)
+
+    def test_from_twois_header__assigned_fields_are_kept(self) -> None:
+        lazy = WorkOrder.from_twois_header(self.path)
+        lazy.comments = []
+        loaded = WorkOrder.from_twois_bytes(lazy.to_twois_bytes())
+        self.assertEqual(loaded.comments, [])
+        self.assertEqual(len(loaded.task_list), 2)
+
+    def test_fingerprint__read_from_header_without_hydrating(self) -> None:
+        lazy = WorkOrder.from_twois_header(self.path)
+        self.assertEqual(lazy.fingerprint(), self.wo.fingerprint())
+        self.assertNotIn('task_list', vars(lazy))
+
+    def test_fingerprint__follows_edits_after_hydrating(self) -> None:
+        lazy = WorkOrder.from_twois_header(self.path)
+        lazy.task_list[1].summary
+        lazy.title = "Quarterly patching"
+        self.assertNotEqual(lazy.fingerprint(), self.wo.fingerprint())
+
+    def test_legacy_pickle__header_still_loads(self) -> None:
+        with open(self.path, "wb") as outfile:
+            pickle.dump(self.wo, outfile)
+        lazy = WorkOrder.from_twois_header(self.path)
+        self.assertEqual(lazy.title, "Monthly patching")
+        self.assertEqual(lazy.description, self.wo.description)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""This test file is meant to ensure that the virtualized workorder list covers its viewport
+with a fixed pool of buttons, places them over the right rows wherever it is scrolled to, and
+never scrolls past either end.
+"""
+
+#pylint: skip-file
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.widgets.twois_detail import (ROW_H, ROW_PAD, clamp_offset, pool_size,
+                                           scrollbar_span, visible_rows)
+
+VIEW_H = 10 * ROW_H + ROW_H // 2
+
+
+class DetailListWindowTests(unittest.TestCase):
+    """Defines the tests for the windowing math behind TWOISDetailList."""
+    def test_pool_size__covers_the_viewport_plus_buffer(self) -> None:
+        self.assertEqual(pool_size(VIEW_H, 2), 13)
+        self.assertEqual(pool_size(10 * ROW_H, 2), 12)
+        self.assertEqual(pool_size(0, 2), 2)
+
+    def test_visible_rows__pool_is_reused_for_any_list_length(self) -> None:
+        pool = pool_size(VIEW_H, 2)
+        for rows in (0, 5, 13, 10_000):
+            for offset in (0, ROW_H * 3.5, clamp_offset(1e9, rows, VIEW_H)):
+                placed = visible_rows(offset, rows, pool)
+                self.assertLessEqual(len(placed), pool)
+                indexes = [index for index, _ in placed]
+                self.assertEqual(indexes, list(range(indexes[0], indexes[0] + len(indexes)))
+                                 if indexes else [])
+                self.assertTrue(all(0 <= index < rows for index in indexes))
+
+    def test_visible_rows__places_buttons_over_the_rows_in_view(self) -> None:
+        placed = visible_rows(ROW_H * 3.5, 10_000, pool_size(VIEW_H, 2))
+        self.assertEqual(placed[0], (3, -ROW_H / 2 + ROW_PAD / 2))
+        self.assertEqual(placed[1], (4, ROW_H / 2 + ROW_PAD / 2))
+        _, last_y = placed[-1]
+        self.assertGreaterEqual(last_y + ROW_H, VIEW_H)
+        self.assertEqual(visible_rows(0, 3, 13), [(i, i * ROW_H + ROW_PAD / 2) for i in range(3)])
+
+    def test_clamp_offset__stays_inside_the_list(self) -> None:
+        self.assertEqual(clamp_offset(-50, 100, VIEW_H), 0)
+        self.assertEqual(clamp_offset(1e9, 100, VIEW_H), 100 * ROW_H - VIEW_H)
+        self.assertEqual(clamp_offset(500, 3, VIEW_H), 0)
+        self.assertEqual(clamp_offset(ROW_H * 2, 100, VIEW_H), ROW_H * 2)
+
+    def test_scrollbar_span__matches_the_rows_in_view(self) -> None:
+        self.assertEqual(scrollbar_span(0, 0, VIEW_H), (0, 1))
+        self.assertEqual(scrollbar_span(0, 5, VIEW_H), (0, 1))
+        first, last = scrollbar_span(50 * ROW_H, 100, VIEW_H)
+        self.assertEqual(first, 0.5)
+        self.assertAlmostEqual(last, (50 * ROW_H + VIEW_H) / (100 * ROW_H))
+
+
+if __name__ == '__main__':
+    unittest.main()
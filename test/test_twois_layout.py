@@ -0,0 +1,72 @@
+"""This test file is meant to ensure that the declarative TWOIS cell map compiles into a read
+plan that covers every mapped cell, and that the bulk snapshot agrees with direct cell lookups.
+"""
+
+#pylint: skip-file
+
+import os
+import sys
+import unittest
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.twois_layout import CellRange, SheetValues, compile_read_plan
+
+
+class ReadPlanTests(unittest.TestCase):
+    """Defines the tests for compile_read_plan() and READ_PLAN."""
+    def test_plan__covers_every_mapped_cell(self) -> None:
+        for row, col in layout.mapped_positions():
+            covered = any(r.min_row <= row <= r.max_row and r.min_col <= col <= r.max_col
+                          for r in layout.READ_PLAN)
+            self.assertTrue(covered, f"({row}, {col}) is not in the read plan")
+
+    def test_plan__merges_close_rows(self) -> None:
+        plan = compile_read_plan({(1, 1), (2, 4), (4, 2)})
+        self.assertEqual(plan, (CellRange(1, 4, 1, 4),))
+
+    def test_plan__splits_distant_rows(self) -> None:
+        plan = compile_read_plan({(1, 1), (10, 3)})
+        self.assertEqual(plan, (CellRange(1, 1, 1, 1), CellRange(10, 10, 3, 3)))
+
+    def test_blocks__do_not_overlap_headings(self) -> None:
+        self.assertLess(layout.TASK_PLANS.rows()[-1], layout.TASK_ACTUALS.first_row - 1)
+        self.assertEqual(len(layout.LOG_COMMENTS.rows()), 24)
+
+
+class SheetValuesTests(unittest.TestCase):
+    """Defines the tests for the SheetValues snapshot."""
+    def setUp(self) -> None:
+        self.wb: Workbook = Workbook()
+        self.ws: Worksheet = self.wb.active
+        self.ws['D7'] = "14-Day Antivirus Updates (Ops GMM)"
+        self.ws['B17'] = "PPS-AV"
+        self.ws['K109'] = "8/5/2024"
+
+    def test_values__match_direct_lookups(self) -> None:
+        sv: SheetValues = SheetValues.from_worksheet(self.ws)
+        for coord in ('D7', 'B17', 'K109', 'A1', 'C80'):
+            self.assertEqual(sv.value(coord), self.ws[coord].value)
+
+    def test_values__field_names(self) -> None:
+        sv: SheetValues = SheetValues.from_worksheet(self.ws)
+        self.assertEqual(sv.field('title'), "14-Day Antivirus Updates (Ops GMM)")
+
+    def test_values__block_rows(self) -> None:
+        sv: SheetValues = SheetValues.from_worksheet(self.ws)
+        rows = dict(sv.block_rows(layout.TASK_PLANS))
+        self.assertEqual(rows[17]['summary'], "PPS-AV")
+        self.assertIsNone(rows[17]['number'])
+
+    def test_values__unmapped_cell_raises(self) -> None:
+        sv: SheetValues = SheetValues.from_worksheet(self.ws)
+        with self.assertRaises(KeyError):
+            sv.value('Z200')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""This test file is meant to ensure that a TWOISWorkbook session opens its file with openpyxl at
+most once, and that the values it reports agree with reading the same cells through openpyxl.
+"""
+
+#pylint: skip-file
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library import twoisworkbook
+from appfiles.library.excelfilestatus import ExcelFileStatus
+from appfiles.library.twoisworkbook import TWOISWorkbook
+from appfiles.utils import twois_layout as layout
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+
+
+class TWOISWorkbookTests(unittest.TestCase):
+    """Defines the tests for the TWOISWorkbook class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "twois.xlsx")
+        shutil.copyfile(TEMPLATE, self.filepath)
+        wb = load_workbook(self.filepath)
+        ws = wb.active
+        ws['A7'] = "123456VBS"
+        ws['D7'] = "AV Update"
+        ws['B3'] = "8/16/2023"
+        ws['A16'] = 10
+        ws['B16'] = "Update the signatures"
+        ws['G16'] = "PROC-1"
+        ws['A86'] = "Started the update"
+        wb.save(self.filepath)
+        wb.close()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_session__loads_the_workbook_once(self) -> None:
+        with mock.patch.object(twoisworkbook, 'load_workbook',
+                               wraps=twoisworkbook.load_workbook) as load:
+            with TWOISWorkbook(self.filepath) as session:
+                self.assertEqual(session.input_status(), ExcelFileStatus.IS_VALID)
+                self.assertEqual(session.approved_status(), ExcelFileStatus.NOT_APPROVED)
+                session.get_match_values()
+                load.assert_not_called()
+
+                session.get_values()
+                session.get_worksheet()
+                session.get_workbook()
+                session.get_match_values()
+                load.assert_called_once()
+
+    def test_session__rejects_files_without_loading_them(self) -> None:
+        bad = os.path.join(self.tmpdir.name, "bad.xlsx")
+        with open(bad, 'w') as file:
+            file.write("not a zip")
+        with mock.patch.object(twoisworkbook, 'load_workbook') as load:
+            session = TWOISWorkbook(bad)
+            self.assertEqual(session.input_status(), ExcelFileStatus.NOT_TWOIS)
+            with self.assertRaises(ValueError):
+                session.get_workbook()
+            with self.assertRaises(ValueError):
+                session.get_match_values()
+            load.assert_not_called()
+
+    def test_approved_status__does_not_allocate_a_pending_number(self) -> None:
+        wb = load_workbook(self.filepath)
+        wb.active['A7'] = None
+        wb.save(self.filepath)
+        wb.close()
+        with mock.patch('appfiles.utils.workorder.determine_pending_number') as pending:
+            self.assertEqual(TWOISWorkbook(self.filepath).approved_status(),
+                             ExcelFileStatus.NOT_APPROVED)
+            pending.assert_not_called()
+
+    def test_get_values__agrees_with_openpyxl(self) -> None:
+        ws = load_workbook(self.filepath).active
+        values = TWOISWorkbook(self.filepath).get_values()
+        for row, col in layout.mapped_positions():
+            self.assertEqual(values.at(row, col), ws.cell(row, col).value, (row, col))
+
+    def test_get_match_values__agrees_with_openpyxl(self) -> None:
+        ws = load_workbook(self.filepath).active
+        streamed = TWOISWorkbook(self.filepath).get_match_values()
+        session = TWOISWorkbook(self.filepath)
+        session.get_workbook()
+        loaded = session.get_match_values()
+        for coord in layout.MATCH_CELLS:
+            self.assertEqual(streamed.value(coord), ws[coord].value, coord)
+            self.assertEqual(loaded.value(coord), ws[coord].value, coord)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""This test file is meant to ensure that the precompiled validators give the same answers as
+before, and that the batch API validates whole columns correctly.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils import validation
+from appfiles.utils.utils import string_to_date
+
+
+class ValidatorTests(unittest.TestCase):
+    """Defines the tests for the single-value validators and parsers."""
+    def test_ncr_number(self) -> None:
+        self.assertTrue(validation.is_a_valid_ncr_number("NCR123456W"))
+        self.assertTrue(validation.is_a_valid_ncr_number("required"))
+        self.assertFalse(validation.is_a_valid_ncr_number("NCR12345W"))
+
+    def test_date_string(self) -> None:
+        self.assertTrue(validation.is_a_valid_date_string("3/14/2024"))
+        self.assertFalse(validation.is_a_valid_date_string("2024-03-14"))
+        self.assertTrue(validation.is_a_valid_date_string("2024-03-14", r"\d{4}-\d{2}-\d{2}"))
+
+    def test_parse_date_string(self) -> None:
+        self.assertEqual(validation.parse_date_string("Due 3/14/2024"), date(2024, 3, 14))
+        self.assertEqual(validation.parse_date_string("3\\14\\2024"), date(2024, 3, 14))
+        self.assertIsNone(validation.parse_date_string("no date"))
+        self.assertEqual(string_to_date("no date"), date.today())
+
+    def test_parse_building_and_room(self) -> None:
+        self.assertEqual(validation.parse_building("Bldg. 1768"), 1768)
+        self.assertEqual(validation.parse_building("B 42"), 42)
+        self.assertIsNone(validation.parse_building("Room 6"))
+        self.assertEqual(validation.parse_room("Rm. 6, B1768"), 6)
+        self.assertIsNone(validation.parse_room("B1768"))
+
+    def test_results_are_memoized(self) -> None:
+        validation.clear_caches()
+        validation.is_a_valid_wo_number("123456VBS")
+        validation.is_a_valid_wo_number("123456VBS")
+        self.assertEqual(validation.is_a_valid_wo_number.cache_info().hits, 1)
+
+
+class BatchValidationTests(unittest.TestCase):
+    """Defines the tests for the column validators."""
+    def test_validate_wo_numbers(self) -> None:
+        column = ["123456VBS", "Pending-001", "123456VBS", "654321"]
+        self.assertEqual(validation.validate_wo_numbers(column), [True, False, True, True])
+
+    def test_validate_ncr_numbers(self) -> None:
+        column = ["NCR123456W", "N/A", "REQUIRED"]
+        self.assertEqual(validation.validate_ncr_numbers(column), [True, False, True])
+
+    def test_validate_date_strings__rejects_impossible_dates(self) -> None:
+        column = ["3/14/2024", "13/45/2024", "soon", "3/14/2024"]
+        self.assertEqual(validation.validate_date_strings(column), [True, False, False, True])
+
+    def test_empty_column(self) -> None:
+        self.assertEqual(validation.validate_wo_numbers([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""This test file is meant to ensure that the directory watcher reports files that are added,
+removed and modified in a watched tree, and that a burst of changes is coalesced into one event.
+"""
+
+#pylint: skip-file
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils.watcher import DirectoryWatcher, WatchEvent
+
+
+class DirectoryWatcherTests(unittest.TestCase):
+    """Defines the tests for the DirectoryWatcher class."""
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        self.write("existing.twois")
+        self.watcher = DirectoryWatcher([self.root], debounce=0)
+        self.watcher.poll()
+        self.drain()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, name: str, mtime: int | None = None) -> None:
+        path = os.path.join(self.root, name)
+        with open(path, "w") as f:
+            f.write(name)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def drain(self) -> list[WatchEvent]:
+        events = []
+        while not self.watcher.events.empty():
+            events.append(self.watcher.events.get())
+        return events
+
+    def test_poll__no_changes_no_events(self) -> None:
+        self.watcher.poll()
+        self.assertEqual(self.drain(), [])
+
+    def test_poll__reports_added_removed_and_modified(self) -> None:
+        self.write("new.xlsx")
+        self.write("existing.twois", mtime=1_000_000_000)
+        self.watcher.poll()
+        [event] = self.drain()
+        self.assertEqual(event.directory, self.root)
+        self.assertEqual(event.added, {"new.xlsx"})
+        self.assertEqual(event.modified, {"existing.twois"})
+        os.remove(os.path.join(self.root, "new.xlsx"))
+        self.watcher.poll()
+        [event] = self.drain()
+        self.assertEqual(event.removed, {"new.xlsx"})
+
+    def test_poll__only_restats_files_in_restat_trees(self) -> None:
+        self.write("existing.twois", mtime=1_000_000_000)
+        with mock.patch("appfiles.utils.watcher.os.stat", wraps=os.stat) as stat:
+            self.watcher.poll()
+            self.assertEqual(stat.call_count, 1)
+        self.assertEqual(self.drain(), [])
+
+        watcher = DirectoryWatcher([self.root], debounce=0, restat=[self.root])
+        watcher.poll()
+        watcher.events.get()
+        self.write("existing.twois", mtime=2_000_000_000)
+        watcher.poll()
+        event = watcher.events.get()
+        self.assertEqual(event.modified, {"existing.twois"})
+        self.assertTrue(watcher.events.empty())
+
+    def test_poll__reports_files_in_subdirectories(self) -> None:
+        os.mkdir(os.path.join(self.root, "sub"))
+        self.write(os.path.join("sub", "a.twois"))
+        self.watcher.poll()
+        [event] = self.drain()
+        self.assertEqual(event.added, {os.path.join("sub", "a.twois")})
+
+    def test_debounce__burst_is_coalesced(self) -> None:
+        self.watcher.debounce = 3600
+        self.write("a.twois")
+        self.watcher.poll()
+        self.write("a.xlsx")
+        os.remove(os.path.join(self.root, "existing.twois"))
+        self.watcher.poll()
+        self.assertEqual(self.drain(), [])
+        self.watcher.debounce = 0
+        self.watcher.poll()
+        [event] = self.drain()
+        self.assertEqual(event.added, {"a.twois", "a.xlsx"})
+        self.assertEqual(event.removed, {"existing.twois"})
+
+    def test_debounce__added_then_removed_cancels_out(self) -> None:
+        self.watcher.debounce = 3600
+        self.write("temp.xlsx")
+        self.watcher.poll()
+        os.remove(os.path.join(self.root, "temp.xlsx"))
+        self.watcher.poll()
+        self.watcher.debounce = 0
+        self.watcher.poll()
+        self.assertEqual(self.drain(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
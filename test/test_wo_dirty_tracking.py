@@ -0,0 +1,82 @@
+"""This test file is meant to ensure that a WorkOrder keeps track of which of its fields have
+changed since it was last saved or loaded, so that save() only rewrites what has changed.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.completiondata import TaskCompletionData
+from appfiles.library.logcomment import LogComment
+from appfiles.library.taskitem import TaskItem
+from appfiles.library.workorder import WorkOrder
+from appfiles.utils import twois_layout as layout
+
+
+def loaded_workorder() -> WorkOrder:
+    wo = WorkOrder(title="Monthly patching", due_date=date(2024, 3, 1),
+                   task_list=[TaskItem(0, "Safety Message", "", 15),
+                              TaskItem(10, "Patch the servers", "PROC-0042", 16)])
+    wo.wo_number = "Pending-001"
+    return WorkOrder.from_twois_bytes(wo.to_twois_bytes())
+
+
+def changed_sections(wo: WorkOrder) -> set[str] | None:
+    return wo._WorkOrder__changed_sections()
+
+
+class WorkOrderDirtyTrackingTests(unittest.TestCase):
+    """Defines the tests for the unsaved change tracking of WorkOrder."""
+    def test_new_workorder__is_entirely_unsaved(self) -> None:
+        wo = WorkOrder(title="Monthly patching")
+        self.assertTrue(wo.has_unsaved_changes())
+        self.assertIsNone(changed_sections(wo))
+
+    def test_loaded_workorder__has_no_unsaved_changes(self) -> None:
+        wo = loaded_workorder()
+        self.assertFalse(wo.has_unsaved_changes())
+        self.assertEqual(changed_sections(wo), set())
+
+    def test_assignment__marks_the_header(self) -> None:
+        wo = loaded_workorder()
+        wo.title = "Quarterly patching"
+        self.assertTrue(wo.has_unsaved_changes())
+        self.assertEqual(changed_sections(wo), {'header'})
+
+    def test_description__changes_no_cells(self) -> None:
+        wo = loaded_workorder()
+        wo.description = "Patchingquarterly"
+        self.assertTrue(wo.has_unsaved_changes())
+        self.assertEqual(changed_sections(wo), set())
+
+    def test_log_comment__only_writes_log_cells(self) -> None:
+        wo = loaded_workorder()
+        with mock.patch.object(WorkOrder, 'save'):
+            wo.log_comment([LogComment("Started", "J Lopez", date(2024, 3, 1), 0)])
+        self.assertEqual(changed_sections(wo), {'comments'})
+        cells = wo._WorkOrder__get_cell_values(changed_sections(wo))
+        self.assertEqual(len(cells), 3)
+        self.assertTrue(all(row in layout.LOG_COMMENTS.rows() for row, _ in cells))
+
+    def test_complete_task__marks_the_tasks(self) -> None:
+        wo = loaded_workorder()
+        self.assertTrue(wo.complete_task(1, TaskCompletionData(date(2024, 3, 2), "J Lopez",
+                                                               2, 1.5)))
+        self.assertEqual(changed_sections(wo), {'tasks'})
+
+    def test_save__skipped_without_changes(self) -> None:
+        wo = loaded_workorder()
+        with mock.patch("appfiles.library.workorder.FileTransaction") as transaction, \
+                mock.patch("appfiles.library.workorder.os.path.isfile", return_value=True):
+            wo.save()
+        transaction.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""This test file is meant to ensure that the facet view filters, counts and sorts the loaded
+workorders the same way that filtering and sorting the WorkOrder objects themselves would.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.site import Site
+from appfiles.library.special import Special
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_facets import Facet, FacetView, SortKey
+from appfiles.library.workorder_type import WorkOrderType
+
+TODAY = date(2024, 5, 15)
+
+
+class FacetViewTests(unittest.TestCase):
+    """Defines the tests for the FacetView class."""
+    def setUp(self) -> None:
+        self.workorders = [
+            WorkOrder(wo_number="300000", title="Charlie", site=Site.VB, special=Special.S,
+                      type=WorkOrderType.PM, priority=2, due_date=date(2024, 5, 1)),
+            WorkOrder(wo_number="100000", title="alpha", site=Site.FG, special=Special.S,
+                      type=WorkOrderType.CM, priority=1, due_date=date(2024, 5, 20)),
+            WorkOrder(title="Bravo", site=Site.VB, special=Special.N, type=WorkOrderType.CM,
+                      priority=3, due_date=date(2024, 6, 1)),
+        ]
+        self.workorders[2].wo_number = "Pending-001"
+        self.view = FacetView(self.workorders, today=TODAY)
+
+    def test_rows__filter_by_any_combination(self) -> None:
+        self.assertEqual(list(self.view.rows()), [0, 1, 2])
+        self.assertEqual(list(self.view.rows({Facet.SITE: [Site.VB.value]})), [0, 2])
+        self.assertEqual(list(self.view.rows({Facet.SITE: [Site.VB.value],
+                                              Facet.TYPE: [WorkOrderType.CM.value]})), [2])
+        self.assertEqual(list(self.view.rows({Facet.PRIORITY: [1, 3]})), [1, 2])
+        self.assertEqual(list(self.view.rows({Facet.OVERDUE: [1]})), [0])
+        self.assertEqual(list(self.view.rows({Facet.APPROVAL: [0]})), [2])
+        self.assertEqual(list(self.view.rows({Facet.SITE: []})), [0, 1, 2])
+        self.assertEqual(list(self.view.rows({Facet.SITE: [Site.TH.value]})), [])
+
+    def test_rows__sort_orders(self) -> None:
+        self.assertEqual(list(self.view.rows(sort=SortKey.PRIORITY)), [1, 0, 2])
+        self.assertEqual(list(self.view.rows(sort=SortKey.TITLE)), [1, 2, 0])
+        self.assertEqual(list(self.view.rows(sort=SortKey.DUE_DATE, descending=True)), [2, 1, 0])
+        self.assertEqual(list(self.view.rows({Facet.SPECIAL: [Special.S.value]},
+                                             sort=SortKey.NUMBER)), [1, 0])
+
+    def test_counts__ignore_own_facet(self) -> None:
+        counts = self.view.counts({Facet.SITE: [Site.VB.value]})
+        self.assertEqual(counts[Facet.SITE], {Site.FG.value: 1, Site.VB.value: 2})
+        self.assertEqual(counts[Facet.TYPE], {WorkOrderType.PM.value: 1,
+                                              WorkOrderType.CM.value: 1})
+        self.assertEqual(counts[Facet.OVERDUE], {0: 1, 1: 1})
+        self.assertEqual(self.view.counts(within=[1, 2])[Facet.SPECIAL],
+                         {Special.N.value: 1, Special.S.value: 1})
+
+    def test_keep__preserves_given_order(self) -> None:
+        self.assertEqual(self.view.keep([2, 0, 1], {Facet.SITE: [Site.VB.value]}), [2, 0])
+
+    def test_rows__match_filtering_the_objects(self) -> None:
+        rng = random.Random(7)
+        workorders = [WorkOrder(wo_number=str(100000 + i), title=f"WO {i}",
+                                site=rng.choice(list(Site)), priority=rng.randint(1, 5),
+                                building=rng.choice((1768, 1770)),
+                                due_date=date(2024, rng.randint(1, 12), rng.randint(1, 28)))
+                      for i in range(300)]
+        view = FacetView(workorders, today=TODAY)
+        selection = {Facet.SITE: [Site.VB.value, Site.FG.value], Facet.BUILDING: [1768]}
+        expected = sorted((i for i, wo in enumerate(workorders)
+                           if wo.site in (Site.VB, Site.FG) and wo.building == 1768),
+                          key=lambda i: (workorders[i].priority, workorders[i].due_date))
+        self.assertEqual(list(view.rows(selection, sort=SortKey.PRIORITY)), expected)
+        self.assertEqual(sum(view.counts(selection)[Facet.PRIORITY].values()), len(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""This test file is meant to ensure that the workorder index reflects the .twois files in its
+directory, both when it is told about changes and when files change behind its back.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import WorkOrderIndex
+from appfiles.utils import twois_codec
+from appfiles.utils.fulltext import to_fts_query
+from appfiles.utils.fingerprint import MatchKey
+
+
+class WorkOrderIndexTests(unittest.TestCase):
+    """Defines the tests for the WorkOrderIndex class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "in_progress")
+        os.mkdir(self.directory)
+        self.index = WorkOrderIndex(os.path.join(self.tmpdir.name, "index.db"), self.directory)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def write(self, wo: WorkOrder, name: str) -> str:
+        with open(os.path.join(self.directory, name), "wb") as outfile:
+            pickle.dump(wo, outfile)
+        return name
+
+    def test_rebuild__indexes_every_twois_file(self) -> None:
+        self.write(WorkOrder(wo_number="Pending-003", title="Late", due_date=date(2024, 5, 2)),
+                   "Pending-003.twois")
+        self.write(WorkOrder(wo_number="123456", title="Early", due_date=date(2024, 5, 1)),
+                   "123456VBS.twois")
+        self.assertEqual(self.index.rebuild(), 2)
+        self.assertEqual([e.title for e in self.index.entries()], ["Early", "Late"])
+        self.assertEqual([wo.title for wo in self.index.load_workorders()], ["Early", "Late"])
+
+    def test_rebuild__reads_bodies_only_when_searched(self) -> None:
+        for num, title in (("111111", "Rebuild pump"), ("222222", "Paint railing")):
+            wo = WorkOrder(wo_number=num, title=title, due_date=date(2024, 5, 1))
+            wo.description = "Check the pump seals"
+            with open(os.path.join(self.directory, f"{num}VBS.twois"), "wb") as outfile:
+                outfile.write(wo.to_twois_bytes())
+        with mock.patch.object(twois_codec, 'load_body', wraps=twois_codec.load_body) as body:
+            self.assertEqual(self.index.rebuild(), 2)
+            self.index.entries()
+            body.assert_not_called()
+            hits = self.index.search(to_fts_query("seals"))
+            self.assertEqual(body.call_count, 2)
+            self.assertEqual(len(hits), 2)
+            self.index.search(to_fts_query("pump"))
+            self.assertEqual(body.call_count, 2)
+
+    def test_record__is_found_by_number(self) -> None:
+        wo = WorkOrder(wo_number="123456", title="Recorded")
+        self.index.reconcile()
+        self.index.record(wo, self.write(wo, "123456VBS.twois"), "123456VBS - Recorded.xlsx")
+        entry = self.index.find("123456VBS")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.excel_name, "123456VBS - Recorded.xlsx")
+        self.assertIsNone(self.index.find("654321VBS"))
+
+    def test_pending_numbers__tracks_record_and_remove(self) -> None:
+        for num in (1, 2, 5):
+            wo = WorkOrder(title=f"Pending {num}")
+            wo.wo_number = f"Pending-00{num}"
+            self.index.record(wo, self.write(wo, f"Pending-00{num}.twois"), "unused.xlsx")
+        self.assertEqual(self.index.pending_numbers(), {1, 2, 5})
+        os.remove(os.path.join(self.directory, "Pending-002.twois"))
+        self.index.remove("Pending-002.twois")
+        self.assertEqual(self.index.pending_numbers(), {1, 5})
+
+    def test_reconcile__picks_up_outside_changes(self) -> None:
+        self.write(WorkOrder(wo_number="111111", title="Kept"), "111111VBS.twois")
+        self.write(WorkOrder(wo_number="222222", title="Removed"), "222222VBS.twois")
+        self.index.rebuild()
+        self.assertFalse(self.index.reconcile())
+
+        time.sleep(0.01)
+        os.remove(os.path.join(self.directory, "222222VBS.twois"))
+        self.write(WorkOrder(wo_number="333333", title="Added"), "333333VBS.twois")
+        self.assertEqual(sorted(e.title for e in self.index.entries()), ["Added", "Kept"])
+
+    def test_record__does_not_make_the_next_call_reconcile(self) -> None:
+        self.index.rebuild()
+        time.sleep(0.01)
+        wo = WorkOrder(wo_number="111111", title="Recorded")
+        self.index.record(wo, self.write(wo, "111111VBS.twois"), "recorded.xlsx")
+        self.assertFalse(self.index.reconcile())
+        time.sleep(0.01)
+        os.remove(os.path.join(self.directory, "111111VBS.twois"))
+        self.index.remove("111111VBS.twois")
+        self.assertFalse(self.index.reconcile())
+
+    def test_external_version__ignores_the_apps_own_writes(self) -> None:
+        self.index.rebuild()
+        external = self.index.external_version()
+        wo = WorkOrder(wo_number="111111", title="Recorded")
+        self.index.record(wo, self.write(wo, "111111VBS.twois"), "recorded.xlsx")
+        os.remove(os.path.join(self.directory, "111111VBS.twois"))
+        self.index.remove("111111VBS.twois")
+        self.assertEqual(self.index.external_version(), external)
+
+        time.sleep(0.01)
+        self.write(WorkOrder(wo_number="222222", title="Dropped"), "222222VBS.twois")
+        self.assertNotEqual(self.index.external_version(), external)
+
+    def test_changes_since__only_reports_what_changed(self) -> None:
+        for num in ("111111", "222222", "333333"):
+            self.write(WorkOrder(wo_number=num, title=num), f"{num}VBS.twois")
+        self.index.rebuild()
+        version = self.index.version()
+        self.assertEqual(self.index.changes_since(version).changed, [])
+
+        edited = WorkOrder(wo_number="222222", title="Edited")
+        self.index.record(edited, self.write(edited, "222222VBS.twois"), "edited.xlsx")
+        os.remove(os.path.join(self.directory, "333333VBS.twois"))
+        self.index.remove("333333VBS.twois")
+
+        changes = self.index.changes_since(version)
+        self.assertEqual([e.title for e in changes.changed], ["Edited"])
+        self.assertEqual(changes.removed, ["333333VBS.twois"])
+        self.assertEqual(self.index.changes_since(changes.version), (changes.version, [], []))
+
+    def test_find_pending__looks_up_fingerprint(self) -> None:
+        for num, title in ((1, "Wanted"), (2, "Other")):
+            wo = WorkOrder(title=title, due_date=date(2024, 5, 1))
+            wo.wo_number = f"Pending-00{num}"
+            self.write(wo, f"Pending-00{num}.twois")
+        summaries = tuple(task.summary for task in WorkOrder().task_list)
+        key = MatchKey("Wanted", date(2024, 5, 1), summaries)
+        self.assertEqual(self.index.find_pending(key).wo_number, "Pending-001")
+        self.assertIsNone(self.index.find_pending(key, {"Pending-001.twois"}))
+        self.assertIsNone(self.index.find_pending(key._replace(due_date=date(2024, 5, 2))))
+
+    def test_batch__commits_all_changes_at_once(self) -> None:
+        for num in ("111111", "222222"):
+            self.write(WorkOrder(wo_number=num, title="Old"), f"{num}VBS.twois")
+        self.index.rebuild()
+        observer = WorkOrderIndex(self.index.db_path, self.directory)
+        self.addCleanup(observer.close)
+
+        with self.index.batch():
+            for num in ("111111", "222222"):
+                self.index.record(WorkOrder(wo_number=num, title="New"), f"{num}VBS.twois",
+                                  f"{num}VBS - New.xlsx")
+            self.assertEqual([e.title for e in observer.entries()], ["Old", "Old"])
+        self.assertEqual([e.title for e in observer.entries()], ["New", "New"])
+
+    def test_batch__rolls_back_on_error(self) -> None:
+        self.write(WorkOrder(wo_number="111111", title="Old"), "111111VBS.twois")
+        self.index.rebuild()
+        with self.assertRaises(RuntimeError):
+            with self.index.batch():
+                self.index.record(WorkOrder(wo_number="111111", title="New"), "111111VBS.twois",
+                                  "111111VBS - New.xlsx")
+                raise RuntimeError("approval failed")
+        self.assertEqual([e.title for e in self.index.entries()], ["Old"])
+
+
+if __name__ == '__main__':
+    unittest.main()
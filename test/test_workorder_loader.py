@@ -0,0 +1,85 @@
+"""This test file is meant to ensure that the background workorder loader hands back every
+workorder tracked by the index, in order, and drops whatever an abandoned load leaves behind.
+"""
+
+#pylint: skip-file
+
+from datetime import date
+import os
+import pickle
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.library.workorder import WorkOrder
+from appfiles.library.workorder_index import WorkOrderIndex
+from appfiles.library.workorder_loader import WorkOrderLoader
+
+
+class WorkOrderLoaderTests(unittest.TestCase):
+    """Defines the tests for the WorkOrderLoader class."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "in_progress")
+        os.mkdir(self.directory)
+        self.index = WorkOrderIndex(os.path.join(self.tmpdir.name, "index.db"), self.directory)
+        self.loader = WorkOrderLoader(self.index)
+        for day, num in ((3, "333333"), (1, "111111"), (2, "222222")):
+            self.write(WorkOrder(wo_number=num, title=num, due_date=date(2024, 5, day)))
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def write(self, wo: WorkOrder) -> None:
+        with open(os.path.join(self.directory, f"{wo.wo_number}VBS.twois"), "wb") as outfile:
+            pickle.dump(wo, outfile)
+
+    def drain_all(self, limit: int = 2) -> list[tuple[str, object]]:
+        resp = []
+        deadline = time.monotonic() + 10
+        while self.loader.is_loading() and time.monotonic() < deadline:
+            batch = self.loader.drain(limit)
+            self.assertLessEqual(len(batch), limit)
+            resp.extend(batch)
+            time.sleep(0.001)
+        self.assertFalse(self.loader.is_loading())
+        return resp
+
+    def test_drain__hands_back_every_workorder_in_order(self) -> None:
+        self.assertFalse(self.loader.is_loading())
+        self.loader.start()
+        messages = self.drain_all()
+        self.assertEqual([kind for kind, _ in messages],
+                         ['total', 'workorder', 'workorder', 'workorder', 'done'])
+        self.assertEqual(messages[0][1], (3, self.index.version()))
+        self.assertEqual([wo.title for kind, (_, wo) in messages[1:4]],
+                         ["111111", "222222", "333333"])
+        self.assertEqual(self.loader.drain(10), [])
+
+    def test_start__drops_messages_from_an_abandoned_load(self) -> None:
+        first = self.loader.start()
+        second = self.loader.start()
+        self.assertEqual(self.loader.generation(), second)
+        self.assertNotEqual(first, second)
+        messages = self.drain_all(limit=100)
+        self.assertEqual([kind for kind, _ in messages].count('total'), 1)
+        self.assertEqual([kind for kind, _ in messages].count('workorder'), 3)
+        self.assertEqual(messages[-1], ('done', None))
+
+    def test_start__can_rebuild_the_index_first(self) -> None:
+        self.index.rebuild()
+        edited = WorkOrder(wo_number="222222", title="Edited", due_date=date(2024, 5, 2))
+        with open(os.path.join(self.directory, "222222VBS.twois"), "r+b") as outfile:
+            pickle.dump(edited, outfile)
+        self.loader.start(rebuild=True)
+        titles = [payload[1].title for kind, payload in self.drain_all()
+                  if kind == 'workorder']
+        self.assertEqual(titles, ["111111", "Edited", "333333"])
+
+
+if __name__ == '__main__':
+    unittest.main()
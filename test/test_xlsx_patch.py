@@ -0,0 +1,92 @@
+"""This test file is meant to ensure that the cell-level patch writer changes exactly the cells it
+is given, that openpyxl reads the patched file back the same way, and that every other part of
+the archive is copied across unchanged.
+"""
+
+#pylint: skip-file
+
+import os
+import sys
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.xlsx_patch import XlsxPatchError, patch_cells
+from appfiles.utils.xlsx_scan import active_sheet_path, scan_cells
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res', 'testfile.xlsx')
+
+
+class PatchCellsTests(unittest.TestCase):
+    """Defines the tests for patch_cells()."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "source.xlsx")
+        self.dest = os.path.join(self.tmpdir.name, "dest.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws['A1'] = "shared"
+        ws['B1'] = 42
+        ws['C1'] = "bold"
+        ws['C1'].font = Font(bold=True)
+        ws['A5'] = "untouched"
+        ws['A9'] = "last"
+        wb.create_sheet("Other")['A1'] = "other sheet"
+        wb.save(self.source)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_patch__replaces_inserts_and_clears(self) -> None:
+        patch_cells(self.source, self.dest, {(1, 3): "still bold", (1, 2): None, (1, 5): 7,
+                                             (3, 1): "new row", (5, 2): 1.5, (12, 1): "<end>"})
+        ws = load_workbook(self.dest).active
+        self.assertEqual(ws['A1'].value, "shared")
+        self.assertIsNone(ws['B1'].value)
+        self.assertEqual(ws['C1'].value, "still bold")
+        self.assertTrue(ws['C1'].font.bold)
+        self.assertEqual(ws['E1'].value, 7)
+        self.assertEqual(ws['A3'].value, "new row")
+        self.assertEqual(ws['A5'].value, "untouched")
+        self.assertEqual(ws['B5'].value, 1.5)
+        self.assertEqual(ws['A9'].value, "last")
+        self.assertEqual(ws['A12'].value, "<end>")
+
+    def test_patch__copies_other_parts_unchanged(self) -> None:
+        patch_cells(self.source, self.dest, {(1, 1): "changed"})
+        with ZipFile(self.source) as zin, ZipFile(self.dest) as zout:
+            sheet = active_sheet_path(zin)
+            self.assertEqual(zin.namelist(), zout.namelist())
+            for name in zin.namelist():
+                if name != sheet:
+                    self.assertEqual(zin.read(name), zout.read(name), name)
+        self.assertEqual(load_workbook(self.dest)["Other"]['A1'].value, "other sheet")
+
+    def test_patch__log_comment_on_template(self) -> None:
+        block = layout.LOG_COMMENTS
+        values = {block.position(0, 'text'): "Replaced the filter",
+                  block.position(0, 'person'): "J Lopez",
+                  block.position(0, 'date'): "3/1/2024"}
+        patch_cells(TEMPLATE, self.dest, values)
+        sv = scan_cells(self.dest, ('A86', 'I86', 'K86', *layout.CLASSIFICATION_CELLS))
+        self.assertEqual([sv.value(c) for c in ('A86', 'I86', 'K86')],
+                         ["Replaced the filter", "J Lopez", "3/1/2024"])
+        original = scan_cells(TEMPLATE, layout.CLASSIFICATION_CELLS)
+        for coord in layout.CLASSIFICATION_CELLS:
+            self.assertEqual(sv.value(coord), original.value(coord), coord)
+
+    def test_patch__rejects_non_xlsx(self) -> None:
+        with open(self.source, 'w') as file:
+            file.write("not a zip")
+        with self.assertRaises(XlsxPatchError):
+            patch_cells(self.source, self.dest, {(1, 1): "x"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""This test file is meant to ensure that the streaming cell reader reports the same values as
+openpyxl for the cells it is asked about, and that it rejects files that are not .xlsx archives.
+"""
+
+#pylint: skip-file
+
+from datetime import datetime
+import os
+import sys
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from appfiles.utils import twois_layout as layout
+from appfiles.utils.xlsx_scan import XlsxScanError, scan_cells
+
+
+class ScanCellsTests(unittest.TestCase):
+    """Defines the tests for scan_cells()."""
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "scan.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws['A1'] = "shared"
+        ws['B1'] = 42
+        ws['C1'] = 1.5
+        ws['D1'] = True
+        ws['A3'] = "shared"
+        ws['A200'] = "far away"
+        wb.save(self.filepath)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_scan__matches_openpyxl(self) -> None:
+        coords = ('A1', 'B1', 'C1', 'D1', 'A3', 'B3')
+        sv = scan_cells(self.filepath, coords)
+        ws = load_workbook(self.filepath).active
+        for coord in coords:
+            self.assertEqual(sv.value(coord), ws[coord].value, coord)
+
+    def test_scan__classification_cells_of_template(self) -> None:
+        template = os.path.join(os.path.dirname(__file__), '..', 'appfiles', 'res',
+                                'testfile.xlsx')
+        sv = scan_cells(template, layout.CLASSIFICATION_CELLS)
+        ws = load_workbook(template).active
+        for coord in layout.CLASSIFICATION_CELLS:
+            self.assertEqual(sv.value(coord), ws[coord].value, coord)
+
+    def test_scan__reads_iso_date_cells(self) -> None:
+        path = os.path.join(self.tmpdir.name, "dates.xlsx")
+        wb = Workbook(iso_dates=True)
+        wb.active['B3'] = datetime(2024, 3, 1)
+        wb.save(path)
+        with ZipFile(path) as zf:
+            self.assertIn(b't="d"', zf.read("xl/worksheets/sheet1.xml"))
+        self.assertEqual(scan_cells(path, ('B3',)).value('B3'),
+                         load_workbook(path).active['B3'].value)
+
+    def test_scan__rejects_values_that_do_not_match_their_type(self) -> None:
+        path = os.path.join(self.tmpdir.name, "bad_value.xlsx")
+        with ZipFile(self.filepath) as src, ZipFile(path, 'w') as dest:
+            for item in src.infolist():
+                data = src.read(item)
+                if item.filename == "xl/worksheets/sheet1.xml":
+                    data = data.replace(b'<c r="B1" t="n"><v>42</v>',
+                                        b'<c r="B1" t="n"><v>forty-two</v>')
+                    self.assertIn(b"forty-two", data)
+                dest.writestr(item, data)
+        with self.assertRaises(XlsxScanError):
+            scan_cells(path, ('B1',))
+
+    def test_scan__rejects_non_xlsx(self) -> None:
+        bad = os.path.join(self.tmpdir.name, "bad.xlsx")
+        with open(bad, 'w') as file:
+            file.write("not a zip")
+        with self.assertRaises(XlsxScanError):
+            scan_cells(bad, ('A1',))
+
+
+if __name__ == '__main__':
+    unittest.main()